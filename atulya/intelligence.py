@@ -6,14 +6,21 @@ with automatic failover fallbacks.
 """
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
 import inspect
+import threading
+import time
 import urllib.request
 import urllib.error
 from pathlib import Path
-from typing import Any, AsyncIterator
+from typing import Any, AsyncIterator, Callable
+
+from atulya.observability import PROVIDER_CALL, TIME_TO_FIRST_TOKEN, get_metrics, get_tracer, timed
+from tantra.core.latency_routing import AllCandidatesFailed, LatencyPolicy, ProviderUnavailable
+from tantra.core.packing import TokenCounter
 
 logger = logging.getLogger(__name__)
 
@@ -85,6 +92,12 @@ def _benchmark_allows_tantra(model_path: str | Path) -> bool:
 
 class IntelligenceProvider:
     """Base interface for pluggable intelligence providers."""
+
+    # Routing class: latency only reorders providers within a tier
+    # (0 = free/local, 1 = paid, 2 = canned last-resort fallback).
+    routing_tier = 0
+    # Prompt window in tokens; the chat prompt is packed to fit it, less the reply allowance.
+    context_tokens = 8192
     
     def name(self) -> str:
         raise NotImplementedError
@@ -98,6 +111,10 @@ class IntelligenceProvider:
 
 class TantraProvider(IntelligenceProvider):
     """Native Tantra NP-DNA provider, gated by benchmark readiness."""
+
+    # The cached NpDnaCore is shared; the router runs chats on worker threads.
+    _generate_lock = threading.Lock()
+    context_tokens = 2048
     
     def name(self) -> str:
         return "Tantra (Local NP-DNA)"
@@ -111,6 +128,20 @@ class TantraProvider(IntelligenceProvider):
         except Exception:
             return False
             
+    def token_counter(self) -> TokenCounter | None:
+        """Counter over the latest checkpoint's ``AtulyaTokenizer`` (no model load)."""
+        if not self.is_available():
+            return None
+        from drishti.dashboard.helpers import _checkpoint_index
+        from tantra.npdna import AtulyaTokenizer
+
+        model_path = _checkpoint_index().get("latest")
+        cached = getattr(self, "_counter", None)
+        if cached is None or cached[0] != model_path:
+            tokenizer = AtulyaTokenizer.load(Path(model_path) / "tokenizer.json")
+            cached = self._counter = (model_path, TokenCounter.from_tokenizer(tokenizer))
+        return cached[1]
+
     async def chat(self, prompt: str, system_prompt: str = "") -> str:
         try:
             from drishti.dashboard.helpers import _checkpoint_index, _load_cached_model
@@ -120,11 +151,14 @@ class TantraProvider(IntelligenceProvider):
             if not model_path or not model_path.exists():
                 raise FileNotFoundError("Tantra model not found")
                 
-            core = _load_cached_model(model_path)
-            with torch.inference_mode():
-                full_prompt = f"{system_prompt}\n\nUser: {prompt}\nAssistant:" if system_prompt else prompt
-                response = core.generate(full_prompt, max_tokens=150, temperature=0.7)
-                return response
+            from atulya.local_provider import holding
+
+            async with holding(self._generate_lock):
+                core = _load_cached_model(model_path)
+                with torch.inference_mode():
+                    full_prompt = f"{system_prompt}\n\nUser: {prompt}\nAssistant:" if system_prompt else prompt
+                    response = core.generate(full_prompt, max_tokens=150, temperature=0.7)
+                    return response
         except Exception as e:
             logger.warning(f"TantraProvider chat failed: {e}")
             raise e
@@ -132,6 +166,8 @@ class TantraProvider(IntelligenceProvider):
 
 class OllamaProvider(IntelligenceProvider):
     """Local Ollama model provider running on localhost."""
+
+    context_tokens = 2048  # Ollama's default num_ctx; /api/generate does not raise it
     
     def __init__(self, model_name: str = "llama3"):
         self.model_name = os.environ.get("ATULYA_OLLAMA_MODEL", model_name)
@@ -177,6 +213,9 @@ class OllamaProvider(IntelligenceProvider):
 
 class OpenAIProvider(IntelligenceProvider):
     """OpenAI API Provider."""
+
+    routing_tier = 1
+    context_tokens = 128_000
     
     def name(self) -> str:
         return "OpenAI"
@@ -222,6 +261,8 @@ class OpenAIProvider(IntelligenceProvider):
 
 class GeminiProvider(IntelligenceProvider):
     """Google Gemini API Provider."""
+
+    context_tokens = 1_000_000
     
     def name(self) -> str:
         return "Gemini"
@@ -269,6 +310,8 @@ class GeminiProvider(IntelligenceProvider):
 
 class OpenRouterProvider(IntelligenceProvider):
     """OpenRouter Cloud Model Aggregator Provider."""
+
+    context_tokens = 128_000
     
     def name(self) -> str:
         return "OpenRouter"
@@ -317,6 +360,8 @@ class OpenRouterProvider(IntelligenceProvider):
 
 class NvidiaNimProvider(IntelligenceProvider):
     """NVIDIA NIM Inference Microservice Provider."""
+
+    context_tokens = 128_000
     
     def name(self) -> str:
         return "NVIDIA NIM"
@@ -365,6 +410,8 @@ class NvidiaNimProvider(IntelligenceProvider):
 class GroqProvider(IntelligenceProvider):
     """Groq OpenAI-compatible provider."""
 
+    context_tokens = 128_000
+
     def name(self) -> str:
         return "Groq"
 
@@ -410,6 +457,8 @@ class GroqProvider(IntelligenceProvider):
 
 class OpenCodeProvider(IntelligenceProvider):
     """OpenCode Zen Provider for lightweight local system fallbacks."""
+
+    routing_tier = 2
     
     def name(self) -> str:
         return "OpenCode Zen"
@@ -430,36 +479,44 @@ class LocalGGUFProvider(IntelligenceProvider):
 
     def __init__(self):
         self._impl = None
+        self._impl_lock = threading.Lock()
+
+    @property
+    def context_tokens(self) -> int:
+        return int(os.environ.get("ATULYA_LOCAL_MODEL_CONTEXT", "4096"))
+
+    def _provider(self):
+        # One wrapped model per router, even when threads race to create it.
+        if self._impl is None:
+            with self._impl_lock:
+                if self._impl is None:
+                    from atulya.tantra_local import create_tantra_local_provider
+                    self._impl = create_tantra_local_provider()
+        return self._impl
 
     def name(self) -> str:
         try:
-            from atulya.tantra_local import create_tantra_local_provider
-            if self._impl is None:
-                self._impl = create_tantra_local_provider()
-            return self._impl.name()
+            return self._provider().name()
         except Exception:
             return "Tantra Local (Placeholder)"
 
     def is_available(self) -> bool:
         try:
-            from atulya.tantra_local import create_tantra_local_provider
-            if self._impl is None:
-                self._impl = create_tantra_local_provider()
-            return self._impl.is_available()
+            return self._provider().is_available()
         except Exception:
             return False
 
+    def token_counter(self) -> TokenCounter | None:
+        try:
+            return self._provider().token_counter()
+        except Exception:
+            return None
+
     async def chat(self, prompt: str, system_prompt: str = "", tools: list[dict[str, Any]] | None = None) -> str:
-        from atulya.tantra_local import create_tantra_local_provider
-        if self._impl is None:
-            self._impl = create_tantra_local_provider()
-        return await self._impl.chat(prompt, system_prompt, tools)
+        return await self._provider().chat(prompt, system_prompt, tools)
 
     async def chat_stream(self, prompt: str, system_prompt: str = "") -> AsyncIterator[str]:
-        from atulya.tantra_local import create_tantra_local_provider
-        if self._impl is None:
-            self._impl = create_tantra_local_provider()
-        stream = getattr(self._impl, "chat_stream", None)
+        stream = getattr(self._provider(), "chat_stream", None)
         if stream is None:
             yield await self._impl.chat(prompt, system_prompt)
             return
@@ -468,11 +525,17 @@ class LocalGGUFProvider(IntelligenceProvider):
 
 
 class ProviderRouter(IntelligenceProvider):
-    """Atulya Intelligence Provider Fallback Chain Router."""
+    """Atulya Intelligence Provider Fallback Chain Router.
+
+    The list below is the static preference order. Within each
+    ``routing_tier`` the router reorders it by observed latency and error
+    rate (``LatencyPolicy``), and a chat that runs past the chosen
+    provider's p95 is hedged onto the next one in the same tier.
+    """
     
-    def __init__(self):
+    def __init__(self, providers: list[IntelligenceProvider] | None = None, policy: LatencyPolicy | None = None):
         # Fallback priority chain order - Local 0.5B model first (Tantra placeholder)
-        self.providers: list[IntelligenceProvider] = [
+        self.providers: list[IntelligenceProvider] = providers if providers is not None else [
             LocalGGUFProvider(),   # Tiny 350 MB local GGUF, auto-downloads, no Ollama needed (1st choice)
             OllamaProvider(),      # Free local model via Ollama (2nd choice)
             GroqProvider(),        # Fast free developer-tier API (3rd choice)
@@ -483,36 +546,100 @@ class ProviderRouter(IntelligenceProvider):
             NvidiaNimProvider(),   # Optional provider fallback (7th choice)
             OpenCodeProvider()     # Bulletproof fallback (8th choice)
         ]
+        self.policy: LatencyPolicy[str] = policy or LatencyPolicy(
+            hedging=os.environ.get("ATULYA_ROUTER_HEDGE", "1").lower() not in {"0", "false", "no"},
+            hedge_floor_ms=_env_float("ATULYA_ROUTER_HEDGE_MIN_MS", 250.0),
+        )
+        self._estimate_counter = TokenCounter()
         
     def name(self) -> str:
         return "Atulya Provider Router"
         
     def is_available(self) -> bool:
         return True
-        
-    async def chat(self, prompt: str, system_prompt: str = "", preferred_provider: str = "", tools: list[dict[str, Any]] | None = None) -> str:
-        """Route request through priority chain and failover automatically."""
-        attempted = []
-        providers = self.providers
+
+    def _ordered(self, preferred_provider: str = "", tools: bool = False) -> list[IntelligenceProvider]:
+        """Preferred matches first, then tool-capable (if needed), then by tier and latency."""
+        by_name = {provider.name(): provider for provider in self.providers}
+        ordered = [by_name[n] for n in self.policy.order(list(by_name), tier=lambda n: self._tier(by_name[n], tools))]
         preferred = (preferred_provider or "").strip().lower()
         if preferred and preferred not in {"auto", "latest"}:
-            preferred_matches = [p for p in providers if preferred in p.name().lower()]
-            providers = preferred_matches + [p for p in providers if p not in preferred_matches]
+            preferred_matches = [p for p in ordered if preferred in p.name().lower()]
+            ordered = preferred_matches + [p for p in ordered if p not in preferred_matches]
+        return ordered
 
-        for provider in providers:
-            if provider.is_available():
-                try:
-                    logger.info(f"Atulya OS routing request to provider: {provider.name()}")
-                    if tools and _supports_tools(provider):
-                        response = await provider.chat(prompt, system_prompt, tools=tools)
-                    else:
-                        response = await provider.chat(prompt, system_prompt)
-                    return response, provider.name()
-                except Exception as exc:
-                    logger.warning(f"Provider {provider.name()} failed: {exc}. Attempting next fallback.")
-                    attempted.append(f"{provider.name()} (Error: {exc})")
-            else:
-                attempted.append(f"{provider.name()} (Unavailable)")
+    @staticmethod
+    def _tier(provider: IntelligenceProvider, tools: bool = False) -> int:
+        return (0 if not tools or _supports_tools(provider) else 10) + getattr(provider, "routing_tier", 0)
+
+    def counter_for(self, provider: IntelligenceProvider) -> TokenCounter:
+        """``provider``'s own tokenizer, or the estimate when it has none.
+
+        Local providers (GGUF, NP-DNA) expose theirs; remote APIs do not
+        publish tokenizers. Loading one can block, so call this off the loop.
+        """
+        factory = getattr(provider, "token_counter", None)
+        if factory is not None:
+            try:
+                counter = factory()
+            except Exception as exc:
+                logger.debug(f"Tokenizer for {provider.name()} unavailable: {exc}")
+                counter = None
+            if counter is not None:
+                return counter
+        return self._estimate_counter
+
+    @staticmethod
+    async def _off_loop(coro_factory) -> Any:
+        # Provider coroutines do blocking HTTP; give each its own loop on a
+        # worker thread so a hedge can start while the first is in flight.
+        # In-process models (GGUF, NP-DNA) lock around their own generation.
+        return await asyncio.to_thread(lambda: asyncio.run(coro_factory()))
+        
+    async def chat(
+        self,
+        prompt: str,
+        system_prompt: str = "",
+        preferred_provider: str = "",
+        tools: list[dict[str, Any]] | None = None,
+        compose: Callable[[IntelligenceProvider], str] | None = None,
+    ) -> str:
+        """Route to the fastest healthy provider, hedging slow requests.
+
+        With ``compose``, each candidate gets the prompt it returns for that
+        provider (its window and tokenizer) instead of ``prompt``; it runs on
+        a worker thread.
+        """
+        ordered = self._ordered(preferred_provider, tools=bool(tools))
+        by_name = {provider.name(): provider for provider in ordered}
+
+        async def call(name: str) -> str:
+            provider = by_name[name]
+            if not await asyncio.to_thread(provider.is_available):
+                raise ProviderUnavailable("Unavailable")
+            text = prompt if compose is None else await asyncio.to_thread(compose, provider)
+            logger.info(f"Atulya OS routing request to provider: {name}")
+            with timed(PROVIDER_CALL, "provider.call", provider=name):
+                if tools and _supports_tools(provider):
+                    return await self._off_loop(lambda: provider.chat(text, system_prompt, tools=tools))
+                return await self._off_loop(lambda: provider.chat(text, system_prompt))
+
+        def on_error(name: str, exc: BaseException) -> None:
+            logger.warning(f"Provider {name} failed: {exc}. Attempting next fallback.")
+
+        with get_tracer().span("router.chat", candidates=len(by_name)) as span:
+            try:
+                name, response = await self.policy.hedged(
+                    list(by_name), call, on_error=on_error, tier=lambda n: self._tier(by_name[n], bool(tools)),
+                )
+                span.set("provider", name)
+                return response, name
+            except AllCandidatesFailed as exc:
+                span.fail(exc)
+                attempted = [
+                    f"{name} (Unavailable)" if isinstance(err, ProviderUnavailable) else f"{name} (Error: {err})"
+                    for name, err in exc.errors
+                ]
                 
         # All providers failed, return a diagnostic error response
         errors_summary = ", ".join(attempted)
@@ -527,32 +654,44 @@ class ProviderRouter(IntelligenceProvider):
         prompt: str,
         system_prompt: str = "",
         preferred_provider: str = "",
+        compose: Callable[[IntelligenceProvider], str] | None = None,
     ) -> AsyncIterator[tuple[str, str]]:
         """Stream tokens from the first available provider that supports streaming.
 
         Falls back to chunking a full provider.chat() response when the chosen
         provider only implements chat(). Yields (text_piece, provider_name).
+        Providers are tried in latency order; streams are not hedged.
+        ``compose`` works as in ``chat``.
         """
-        providers = self.providers
-        preferred = (preferred_provider or "").strip().lower()
-        if preferred and preferred not in {"auto", "latest"}:
-            preferred_matches = [p for p in providers if preferred in p.name().lower()]
-            providers = preferred_matches + [p for p in providers if p not in preferred_matches]
-
-        for provider in providers:
-            if not provider.is_available():
-                continue
-            stream_method = getattr(provider, "chat_stream", None)
-            try:
-                if stream_method is not None:
-                    async for piece in stream_method(prompt, system_prompt):
-                        yield piece, provider.name()
-                else:
-                    text = await provider.chat(prompt, system_prompt)
-                    for piece in _chunk_stream_text(text):
-                        yield piece, provider.name()
-                return
-            except Exception as exc:
-                logger.warning(f"Provider {provider.name()} stream failed: {exc}. Attempting next fallback.")
+        providers = self._ordered(preferred_provider)
+        # Never made current: a context var set inside an async generator
+        # would leak into the consumer between yields.
+        span = get_tracer().start_span("router.stream")
+        try:
+            for provider in providers:
+                if not provider.is_available():
+                    continue
+                stream_method = getattr(provider, "chat_stream", None)
+                name, started, first = provider.name(), time.perf_counter(), True
+                try:
+                    text = prompt if compose is None else await asyncio.to_thread(compose, provider)
+                    if stream_method is not None:
+                        async for piece in stream_method(text, system_prompt):
+                            if first:
+                                first = False
+                                get_metrics().observe(TIME_TO_FIRST_TOKEN, time.perf_counter() - started, {"provider": name})
+                            yield piece, name
+                    else:
+                        reply = await provider.chat(text, system_prompt)
+                        get_metrics().observe(TIME_TO_FIRST_TOKEN, time.perf_counter() - started, {"provider": name})
+                        for piece in _chunk_stream_text(reply):
+                            yield piece, name
+                    span.set("provider", name)
+                    return
+                except Exception as exc:
+                    logger.warning(f"Provider {name} stream failed: {exc}. Attempting next fallback.")
+            span.fail("all providers failed")
+        finally:
+            span.end()
 
         yield "Caution, sir. All neural intelligence channels are offline or unconfigured.", "Diagnostics Fallback"
@@ -8,13 +8,16 @@ from __future__ import annotations
 
 import asyncio
 import json
+import os
 import re
 from dataclasses import dataclass, field
 from functools import lru_cache
-from typing import Any, AsyncIterator
+from typing import Any, AsyncIterator, Callable
 
 from atulya.intelligence import ProviderRouter
+from atulya.observability import CHAT_REQUEST, CONTEXT_EFFICIENCY, MEMORY_SEARCH, get_metrics, timed
 from atulya.persona import Persona, get_atulya_fallback_response
+from tantra.core.packing import ContextPacker, PackResult, TokenCounter
 from yantra.capabilities import ToolRegistry, create_default_registry
 
 
@@ -32,8 +35,13 @@ class LLMResponse:
     tool_steps: list[dict[str, Any]] = field(default_factory=list)
     needs_approval: bool = False
     pending_tool: dict[str, Any] | None = None
+    context: dict[str, Any] = field(default_factory=dict)
 
 
+_ANSWER_NOW = "Now answer the user directly. If another tool is essential, emit exactly one JSON tool call."
+# Section headers _compose_prompt may add around the packed pieces.
+_PROMPT_FRAME = "Relevant past interactions:\n\nConversation so far:\n\nUser: \n\n" + _ANSWER_NOW
+
 RISKY_TOOLS = {
     "exec",
     "file_write",
@@ -53,6 +61,8 @@ class AtulyaLLM:
         allow_exec: bool = False,
         use_memory: bool = False,
         memory_dir: str = "assets/memory",
+        context_tokens: int | None = None,
+        reply_tokens: int | None = None,
     ):
         self.tools = tools or create_default_registry()
         self.max_tool_iterations = max_tool_iterations
@@ -62,6 +72,12 @@ class AtulyaLLM:
         self.use_memory = use_memory
         self.memory_dir = memory_dir
         self._memory = None
+        # Context window of the model reading the prompt, and the share of it left for the reply.
+        # Unset, each provider's own window applies (see ProviderRouter.chat's compose).
+        self.context_tokens = context_tokens or int(os.environ.get("ATULYA_CONTEXT_TOKENS") or 0) or None
+        self.default_context_tokens = int(os.environ.get("ATULYA_LOCAL_MODEL_CONTEXT", "4096"))
+        self.reply_tokens = reply_tokens or int(os.environ.get("ATULYA_LOCAL_MAX_TOKENS", "512"))
+        self._fallback_counter = TokenCounter()
 
     def _ensure_memory(self):
         if self._memory is None and self.use_memory:
@@ -93,7 +109,8 @@ class AtulyaLLM:
         if not mgr:
             return []
         try:
-            entries = await mgr.semantic_search(prompt, limit)
+            with timed(MEMORY_SEARCH, "memory.search"):
+                entries = await mgr.semantic_search(prompt, limit)
             return [entry.content for entry in entries if getattr(entry, "content", None)]
         except Exception:
             return []
@@ -115,43 +132,58 @@ class AtulyaLLM:
         tools_enabled: bool = True,
         approved_tool_call: dict[str, Any] | None = None,
         provider: str = "",
+    ) -> LLMResponse:
+        with timed(CHAT_REQUEST, "llm.ask") as span:
+            response = await self._ask(prompt, history, tools_enabled, approved_tool_call, provider)
+            span.set("provider", response.provider)
+            span.set("tool_steps", len(response.tool_steps))
+            if response.context:
+                get_metrics().observe(CONTEXT_EFFICIENCY, response.context["efficiency"])
+                span.set("context.efficiency", response.context["efficiency"])
+                span.set("context.tokenizer", response.context["tokenizer"])
+            return response
+
+    async def _ask(
+        self,
+        prompt: str,
+        history: list[dict[str, str]] | None,
+        tools_enabled: bool,
+        approved_tool_call: dict[str, Any] | None,
+        provider: str,
     ) -> LLMResponse:
         system_prompt = self._build_system_prompt(history or [])
-        working_prompt = self._compose_prompt(prompt, history or [])
         steps: list[dict[str, Any]] = []
         requested_provider = provider
+        memories: list[str] = []
+        tool_blocks: list[str] = []
 
         if requested_provider.startswith("public") or requested_provider == "public":
             pass
         elif self.use_memory and (requested_provider == "" or "private" in requested_provider or "local" in requested_provider.lower() or requested_provider == "private"):
             memories = await self._retrieve_memory_context(prompt)
-            if memories:
-                working_prompt = (
-                    f"Relevant past interactions:\n"
-                    + "\n".join(f"- {m}" for m in memories)
-                    + f"\n\n{working_prompt}"
-                )
 
         if approved_tool_call and tools_enabled:
             step = await self._execute_tool_call(approved_tool_call)
             steps.append(step)
-            working_prompt = (
-                f"{working_prompt}\n\n"
+            tool_blocks.append(
                 f"User approved tool:\n{json.dumps(approved_tool_call, ensure_ascii=False)}\n\n"
-                f"Tool result:\n{json.dumps(step, ensure_ascii=False)}\n\n"
-                "Now answer the user directly. If another tool is essential, emit exactly one JSON tool call."
+                f"Tool result:\n{json.dumps(step, ensure_ascii=False)}"
             )
 
         for _ in range(self.max_tool_iterations if tools_enabled else 1):
+            working_prompt, packed = self._compose_prompt(prompt, history or [], system_prompt, None, memories, tool_blocks)
+            packs: dict[str, PackResult] = {}
             text, provider_name = await self.router.chat(
                 working_prompt,
                 system_prompt,
                 preferred_provider=requested_provider,
                 tools=self._build_tool_schemas() if tools_enabled else None,
+                compose=self._composer(prompt, history or [], system_prompt, packs, memories, tool_blocks),
             )
+            packed = packs.get(provider_name, packed)
             tool_call = self._extract_tool_call(text)
             if not tool_call or not tools_enabled:
-                final = LLMResponse(text=self._strip_tool_blocks(text).strip(), provider=provider_name, tool_steps=steps)
+                final = LLMResponse(text=self._strip_tool_blocks(text).strip(), provider=provider_name, tool_steps=steps, context=packed.as_dict())
                 await self._store_exchange(prompt, final.text)
                 return final
 
@@ -164,20 +196,19 @@ class AtulyaLLM:
                     tool_steps=steps,
                     needs_approval=True,
                     pending_tool=risky[0],
+                    context=packed.as_dict(),
                 )
 
             new_steps = await asyncio.gather(*(self._execute_tool_call(call) for call in tool_calls))
             steps.extend(new_steps)
-            working_prompt = (
-                f"{working_prompt}\n\n"
+            tool_blocks.append(
                 f"Assistant requested tool:\n{json.dumps(tool_call, ensure_ascii=False)}\n\n"
-                f"Tool result:\n{json.dumps(new_steps, ensure_ascii=False)}\n\n"
-                "Now answer the user directly. If another tool is essential, emit exactly one JSON tool call."
+                f"Tool result:\n{json.dumps(new_steps, ensure_ascii=False)}"
             )
 
         fallback = "I ran out of tool iterations before completing the request. Here is what I found:\n"
         fallback += "\n".join(f"- {s['tool']}: {s.get('output') or s.get('error')}" for s in steps)
-        final = LLMResponse(text=fallback, provider=requested_provider or "Diagnostics Fallback", tool_steps=steps)
+        final = LLMResponse(text=fallback, provider=requested_provider or "Diagnostics Fallback", tool_steps=steps, context=packed.as_dict())
         await self._store_exchange(prompt, final.text)
         return final
 
@@ -223,20 +254,24 @@ class AtulyaLLM:
         # each provider's chat_stream (llama-cpp token generator) is used directly.
         if not tools_enabled and not approved_tool_call:
             system_prompt = self._build_system_prompt(history or [])
-            working_prompt = self._compose_prompt(prompt, history or [])
+            working_prompt, packed = self._compose_prompt(prompt, history or [], system_prompt)
+            packs: dict[str, PackResult] = {}
             parts: list[str] = []
             async for piece, provider_name in self.router.stream(
                 working_prompt,
                 system_prompt,
                 preferred_provider=provider,
+                compose=self._composer(prompt, history or [], system_prompt, packs),
             ):
                 if piece:
                     parts.append(piece)
                     yield LLMEvent("token", content=piece)
                     await asyncio.sleep(0)
+            packed = packs.get(provider_name, packed)
+            get_metrics().observe(CONTEXT_EFFICIENCY, packed.efficiency)
             yield LLMEvent(
                 "done",
-                metadata={"provider": provider_name, "steps": []},
+                metadata={"provider": provider_name, "steps": [], "context": packed.as_dict()},
             )
             return
 
@@ -259,13 +294,14 @@ class AtulyaLLM:
                     "pending_tool": response.pending_tool,
                     "tool": (response.pending_tool or {}).get("tool"),
                     "tool_args": (response.pending_tool or {}).get("arguments", {}),
+                    "context": response.context,
                 },
             )
             return
         for chunk in _chunk_text(response.text):
             yield LLMEvent("token", content=chunk)
             await asyncio.sleep(0)
-        yield LLMEvent("done", metadata={"provider": response.provider, "steps": response.tool_steps})
+        yield LLMEvent("done", metadata={"provider": response.provider, "steps": response.tool_steps, "context": response.context})
 
     def _build_system_prompt(self, history: list[dict[str, str]]) -> str:
         prompt = self.persona.get_system_prompt()
@@ -298,18 +334,67 @@ class AtulyaLLM:
             })
         return schemas
 
-    @staticmethod
-    def _compose_prompt(prompt: str, history: list[dict[str, str]]) -> str:
-        trimmed = history[-10:]
-        if not trimmed:
-            return prompt
-        turns = []
-        for item in trimmed:
-            role = item.get("role", "user")
-            content = item.get("content") or item.get("text") or ""
-            if content:
-                turns.append(f"{role}: {content}")
-        return "Conversation so far:\n" + "\n".join(turns) + f"\n\nUser: {prompt}"
+    def _composer(
+        self,
+        prompt: str,
+        history: list[dict[str, str]],
+        system_prompt: str,
+        packs: dict[str, PackResult],
+        memories: list[str] | None = None,
+        tool_blocks: list[str] | None = None,
+    ) -> Callable[[Any], str]:
+        """Per-provider ``_compose_prompt`` for the router; records each pack under the provider name."""
+
+        def compose(provider: Any) -> str:
+            counter_for = getattr(self.router, "counter_for", None)
+            counter = counter_for(provider) if counter_for is not None else None
+            text, packs[provider.name()] = self._compose_prompt(
+                prompt, history, system_prompt, counter, memories, tool_blocks,
+                context_tokens=getattr(provider, "context_tokens", None),
+            )
+            return text
+
+        return compose
+
+    def _compose_prompt(
+        self,
+        prompt: str,
+        history: list[dict[str, str]],
+        system_prompt: str = "",
+        counter: TokenCounter | None = None,
+        memories: list[str] | None = None,
+        tool_blocks: list[str] | None = None,
+        context_tokens: int | None = None,
+    ) -> tuple[str, PackResult]:
+        """Pack history, memory and tool results around ``prompt`` into the context window.
+
+        The budget is the context window (``self.context_tokens`` if set, else
+        the answering provider's ``context_tokens``) less the reply allowance,
+        the system prompt and the section headers. The prompt itself is always
+        kept.
+        """
+        counter = counter or self._fallback_counter
+        window = self.context_tokens or context_tokens or self.default_context_tokens
+        budget = window - self.reply_tokens - counter.count(system_prompt) - counter.count(_PROMPT_FRAME)
+        packer = ContextPacker(budget, counter)
+        packer.pin(prompt)
+        packer.add_history(history[-50:])
+        for memory in memories or []:
+            packer.add("memory", f"- {memory}")
+        for block in tool_blocks or []:
+            packer.add("tool", block)
+        packed = packer.pack()
+
+        sections = []
+        if packed.of("memory"):
+            sections.append("Relevant past interactions:\n" + "\n".join(item.content for item in packed.of("memory")))
+        if packed.of("history"):
+            sections.append("Conversation so far:\n" + "\n".join(item.content for item in packed.of("history")))
+        sections.append(f"User: {prompt}" if sections else prompt)
+        sections.extend(item.content for item in packed.of("tool"))
+        if tool_blocks:
+            sections.append(_ANSWER_NOW)
+        return "\n\n".join(sections), packed
 
     @staticmethod
     def _extract_tool_call(text: str) -> dict[str, Any] | None:
@@ -5,9 +5,12 @@ No Ollama required. Falls back gracefully if llama-cpp-python is not installed.
 """
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import json
 import logging
 import os
+import threading
 import urllib.request
 import urllib.error
 from pathlib import Path
@@ -16,6 +19,21 @@ from typing import Any, AsyncIterator
 logger = logging.getLogger(__name__)
 
 
+@contextlib.asynccontextmanager
+async def holding(lock: threading.Lock, poll: float = 0.01) -> AsyncIterator[None]:
+    """Hold ``lock`` without blocking the event loop while waiting.
+
+    Polls instead of ``to_thread(lock.acquire)`` so a cancelled waiter can
+    never end up owning the lock.
+    """
+    while not lock.acquire(blocking=False):
+        await asyncio.sleep(poll)
+    try:
+        yield
+    finally:
+        lock.release()
+
+
 def _normalize_tool_call_xml(text: str) -> str | None:
     """Convert Qwen-style <tool_call>{{"name":...,"arguments":{...}}}</tool_call> to plain JSON.
 
@@ -96,6 +114,11 @@ class LocalGGUFProvider:
     def __init__(self, model_path: str | Path | None = None):
         self._model_path = Path(model_path) if model_path else _ensure_model()
         self._llm = None
+        self._counter = None
+        # llama_cpp.Llama is not thread-safe, and the router runs chats on
+        # worker threads: one load or generation at a time per model.
+        self._lock = threading.Lock()
+        self._counter_lock = threading.Lock()
 
     def name(self) -> str:
         return "Tiny Local (Qwen2.5-0.5B)"
@@ -122,6 +145,27 @@ class LocalGGUFProvider:
             verbose=False,
         )
 
+    def token_counter(self):
+        """Exact token counter for the GGUF vocabulary, or ``None`` if unavailable.
+
+        Uses the loaded model when there is one; otherwise loads the
+        vocabulary alone (``vocab_only``). That reads the GGUF file, so the
+        first call blocks: the router calls it on a worker thread, once.
+        """
+        if self._counter is None:
+            if not self.is_available():
+                return None
+            from tantra.core.packing import TokenCounter
+
+            with self._counter_lock:
+                if self._counter is None:
+                    llm = self._llm
+                    if llm is None:
+                        import llama_cpp
+                        llm = llama_cpp.Llama(model_path=str(self._model_path), vocab_only=True, verbose=False)
+                    self._counter = TokenCounter.from_llama(llm, name=f"gguf:{self._model_path.name}")
+        return self._counter
+
     async def chat(
         self,
         prompt: str,
@@ -129,6 +173,10 @@ class LocalGGUFProvider:
         tools: list[dict[str, Any]] | None = None,
     ) -> str:
         """Chat with optional native tool calling (llama-cpp chat template)."""
+        async with holding(self._lock):
+            return self._chat_locked(prompt, system_prompt, tools)
+
+    def _chat_locked(self, prompt: str, system_prompt: str, tools: list[dict[str, Any]] | None) -> str:
         try:
             self._load()
             messages = []
@@ -174,7 +222,13 @@ class LocalGGUFProvider:
         """Stream tokens incrementally from the local model (llama-cpp stream=True).
 
         Falls back to yielding the whole response if streaming is unsupported.
+        The model stays locked until the stream finishes or is closed.
         """
+        async with holding(self._lock):
+            async for piece in self._stream_locked(prompt, system_prompt):
+                yield piece
+
+    async def _stream_locked(self, prompt: str, system_prompt: str) -> AsyncIterator[str]:
         try:
             self._load()
             messages = []
@@ -1,13 +1,22 @@
 """Observability system - usage tracking, metrics, traces, error tracking."""
-# NOTE: All observability data is intentionally kept in-memory only (no disk persistence).
-# This is by design — lightweight telemetry without storage overhead.
+# NOTE: Usage, metrics and errors are intentionally kept in-memory only (no disk persistence).
+# This is by design — lightweight telemetry without storage overhead. Sampled
+# traces are the exception: see ``tracing`` for the file / OTLP exporters.
 from __future__ import annotations
 
+import threading
 import time
+from asyncio import CancelledError
+from bisect import bisect_left
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
+from .tracing import FileSpanExporter, OtlpHttpExporter, Span, SpanExporter, Tracer, current_span, otlp_payload, tracer_from_env
+
+# Seconds; covers a sub-millisecond tokenizer call up to a slow remote provider.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
 
 @dataclass
 class UsageRecord:
@@ -53,12 +62,82 @@ class UsageTracker:
         return sum(r.cost for r in self._records)
 
 
+class Histogram:
+    """Fixed-bucket histogram; one series per label set.
+
+    Bucket counts are stored per bucket and made cumulative on export, so
+    ``observe`` is a bisect and three additions.
+    """
+
+    def __init__(self, name: str, buckets: tuple[float, ...] = LATENCY_BUCKETS, help: str = ""):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[tuple[str, str], ...], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: dict[str, str] | None = None) -> None:
+        self.observe_key(tuple(sorted(labels.items())) if labels else (), value)
+
+    def observe_key(self, key: tuple[tuple[str, str], ...], value: float) -> None:
+        """``observe`` with a prebuilt, sorted label key (hot paths)."""
+        index = bisect_left(self.buckets, value)
+        self._lock.acquire()
+        series = self._series.get(key)
+        if series is None:
+            # counts per bucket (+Inf last), then sum, then count
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+        self._lock.release()
+
+    def snapshot(self, labels: dict[str, str] | None = None) -> dict[str, Any]:
+        key = tuple(sorted(labels.items())) if labels else ()
+        with self._lock:
+            series = list(self._series.get(key) or [0] * (len(self.buckets) + 1) + [0.0, 0])
+        return {"buckets": dict(zip([*self.buckets, float("inf")], series[:-2])), "sum": series[-2], "count": series[-1]}
+
+    def quantile(self, q: float, labels: dict[str, str] | None = None) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile (0..1)."""
+        snap = self.snapshot(labels)
+        target, seen = q * snap["count"], 0
+        for bound, count in snap["buckets"].items():
+            seen += count
+            if count and seen >= target:
+                return bound
+        return 0.0
+
+    def export_prometheus(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}"] if self.help else []
+        lines.append(f"# TYPE {self.name} histogram")
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        for key, series in items:
+            base = ",".join(f'{k}="{_escape_label(v)}"' for k, v in key)
+            cumulative = 0
+            for bound, count in zip([*self.buckets, float("inf")], series[:-2]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{base + "," if base else ""}le="{le}"}} {cumulative}')
+            suffix = f"{{{base}}}" if base else ""
+            lines.append(f"{self.name}_sum{suffix} {series[-2]}")
+            lines.append(f"{self.name}_count{suffix} {series[-1]}")
+        return lines
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
 class MetricsCollector:
-    def __init__(self, data_dir: str | Path):
-        self.data_dir = Path(data_dir) / "metrics"
-        self.data_dir.mkdir(parents=True, exist_ok=True)
+    def __init__(self, data_dir: str | Path | None = None):
+        self.data_dir = Path(data_dir) / "metrics" if data_dir is not None else None
+        if self.data_dir is not None:
+            self.data_dir.mkdir(parents=True, exist_ok=True)
         self._counters: dict[str, float] = {}
         self._gauges: dict[str, float] = {}
+        self._histograms: dict[str, Histogram] = {}
 
     def counter(self, name: str, value: float = 1.0):
         self._counters[name] = self._counters.get(name, 0.0) + value
@@ -66,12 +145,24 @@ class MetricsCollector:
     def gauge(self, name: str, value: float):
         self._gauges[name] = value
 
+    def histogram(self, name: str, buckets: tuple[float, ...] = LATENCY_BUCKETS, help: str = "") -> Histogram:
+        hist = self._histograms.get(name)
+        if hist is None:
+            hist = self._histograms.setdefault(name, Histogram(name, buckets, help))
+        return hist
+
+    def observe(self, name: str, value: float, labels: dict[str, str] | None = None):
+        hist = self._histograms.get(name) or self.histogram(name)
+        hist.observe(value, labels)
+
     def export_prometheus(self) -> str:
         lines = []
         for name, value in self._counters.items():
             lines.append(f"# TYPE {name} counter\n{name} {value}")
         for name, value in self._gauges.items():
             lines.append(f"# TYPE {name} gauge\n{name} {value}")
+        for hist in list(self._histograms.values()):
+            lines.append("\n".join(hist.export_prometheus()))
         return "\n".join(lines)
 
 
@@ -80,17 +171,19 @@ class TraceCollector:
         self.data_dir = Path(data_dir) / "traces"
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self._traces: dict[str, list[TraceSpan]] = {}
+        self._index: dict[tuple[str, str], TraceSpan] = {}
 
     def start_span(self, trace_id: str, span_id: str, name: str) -> TraceSpan:
         span = TraceSpan(trace_id=trace_id, span_id=span_id, name=name, start_time=time.time())
         self._traces.setdefault(trace_id, []).append(span)
+        self._index[(trace_id, span_id)] = span
         return span
 
     def end_span(self, trace_id: str, span_id: str, status: str = "ok"):
-        for span in self._traces.get(trace_id, []):
-            if span.span_id == span_id:
-                span.end_time = time.time()
-                span.status = status
+        span = self._index.pop((trace_id, span_id), None)
+        if span is not None:
+            span.end_time = time.time()
+            span.status = status
 
 
 class ErrorTracker:
@@ -107,3 +200,79 @@ class ErrorTracker:
         for error in self._errors:
             by_type[error.error_type] = by_type.get(error.error_type, 0) + 1
         return {"total_errors": len(self._errors), "by_type": by_type}
+
+
+# ── process-wide instruments for the chat request path ──────
+
+PROVIDER_CALL = "atulya_provider_call_seconds"
+MEMORY_SEARCH = "atulya_memory_search_seconds"
+TOOL_CALL = "atulya_tool_call_seconds"
+TOKENIZER_ENCODE = "atulya_tokenizer_encode_seconds"
+TIME_TO_FIRST_TOKEN = "atulya_time_to_first_token_seconds"
+CHAT_REQUEST = "atulya_chat_request_seconds"
+CONTEXT_EFFICIENCY = "atulya_context_packing_efficiency"
+RATIO_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0)
+
+_metrics = MetricsCollector()
+for _name, _help in (
+    (PROVIDER_CALL, "Provider chat call latency"),
+    (MEMORY_SEARCH, "Memory search latency"),
+    (TOOL_CALL, "Tool execution latency"),
+    (TOKENIZER_ENCODE, "Tokenizer encode latency"),
+    (TIME_TO_FIRST_TOKEN, "Time from stream start to first token"),
+    (CHAT_REQUEST, "End-to-end AtulyaLLM.ask latency"),
+):
+    _metrics.histogram(_name, help=_help)
+_metrics.histogram(CONTEXT_EFFICIENCY, RATIO_BUCKETS, help="Packed prompt tokens / available context tokens")
+_tracer = tracer_from_env()
+
+
+def get_metrics() -> MetricsCollector:
+    return _metrics
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def set_tracer(tracer: Tracer) -> Tracer:
+    """Replace the process tracer; returns the previous one."""
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
+class timed:
+    """Span plus histogram observation around a block.
+
+    ``with timed(TOOL_CALL, "tool.call", tool=name) as span:`` records the
+    block's wall time in the histogram (labelled by ``labels``) and, when the
+    trace is sampled, as a span with the same attributes. A cancelled block
+    (a hedge loser) is traced but not observed: its time is only a lower bound.
+    """
+
+    __slots__ = ("histogram", "key", "span", "_start")
+
+    def __init__(self, metric: str, span_name: str, **labels: str):
+        self.histogram = _metrics._histograms.get(metric) or _metrics.histogram(metric)
+        self.key = tuple(sorted(labels.items())) if len(labels) > 1 else tuple(labels.items())
+        self.span = _tracer.start_span(span_name, labels or None)
+
+    def __enter__(self) -> Span:
+        self._start = time.perf_counter()
+        return self.span.__enter__()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None or not issubclass(exc_type, CancelledError):
+            self.histogram.observe_key(self.key, time.perf_counter() - self._start)
+        self.span.__exit__(exc_type, exc, tb)
+
+
+__all__ = [
+    "UsageRecord", "TraceSpan", "ErrorRecord", "UsageTracker", "MetricsCollector", "Histogram",
+    "TraceCollector", "ErrorTracker", "LATENCY_BUCKETS", "Span", "Tracer", "SpanExporter",
+    "FileSpanExporter", "OtlpHttpExporter", "current_span", "otlp_payload", "tracer_from_env",
+    "get_metrics", "get_tracer", "set_tracer", "timed", "PROVIDER_CALL", "MEMORY_SEARCH",
+    "TOOL_CALL", "TOKENIZER_ENCODE", "TIME_TO_FIRST_TOKEN", "CHAT_REQUEST", "CONTEXT_EFFICIENCY",
+    "RATIO_BUCKETS",
+]
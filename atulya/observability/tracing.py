@@ -0,0 +1,342 @@
+"""Low-overhead spans for the chat request path.
+
+The current span lives in a ``ContextVar``, so it follows ``await``,
+``asyncio.create_task``/``gather`` and ``asyncio.to_thread`` without being
+passed around. Sampling is decided once per trace at the root span (head
+based); children inherit the decision, so a trace is either exported whole
+or not at all. Unsampled spans still carry context but are never stored or
+exported.
+
+Open sampled spans are indexed by ``(trace_id, span_id)`` for O(1) lookup.
+Finished sampled spans go to a small in-memory ring and to an exporter,
+which batches them on a background thread as OTLP/JSON
+(``{"resourceSpans": [...]}``), either into a size-rotated local file or to
+an OTLP/HTTP collector.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.request
+from collections import deque
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar["Span | None"] = ContextVar("atulya_current_span", default=None)
+_rand = random.getrandbits
+_now_ns = time.time_ns
+
+
+class Span:
+    """One timed operation. Use as a context manager (sync or async code)."""
+
+    __slots__ = ("tracer", "trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "status", "error", "sampled", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: int, parent_id: int, sampled: bool, attributes: dict[str, Any] | None):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = _rand(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = _now_ns()
+        self.end_ns = 0
+        self.attributes = attributes if attributes is not None else {}
+        self.status = "ok"
+        self.error = ""
+        self.sampled = sampled
+        self._token = None
+
+    def set(self, key: str, value: Any) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    def fail(self, error: BaseException | str) -> None:
+        self.status = "error"
+        self.error = str(error)
+
+    def end(self) -> None:
+        if not self.end_ns:
+            self.end_ns = _now_ns()
+            if self.sampled:
+                self.tracer._finish(self)
+
+    @property
+    def duration(self) -> float:
+        return ((self.end_ns or _now_ns()) - self.start_ns) / 1e9
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc is not None:
+            self.fail(exc)
+        self.end()
+        if self._token is not None:
+            try:
+                _current.reset(self._token)
+            except ValueError:
+                # Exited in a different context (e.g. an async generator closed elsewhere).
+                pass
+            self._token = None
+
+    def to_otlp(self) -> dict[str, Any]:
+        span: dict[str, Any] = {
+            "traceId": f"{self.trace_id:032x}",
+            "spanId": f"{self.span_id:016x}",
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.status == "error" else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = f"{self.parent_id:016x}"
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def otlp_payload(spans: list[Span], service: str = "atulya") -> dict[str, Any]:
+    """OTLP/JSON ``ExportTraceServiceRequest`` for ``spans``."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", service)]},
+            "scopeSpans": [{"scope": {"name": "atulya.observability"}, "spans": [s.to_otlp() for s in spans]}],
+        }]
+    }
+
+
+class _NoopSpan:
+    """Stands in for a root span when tracing is off; records nothing."""
+
+    __slots__ = ()
+    sampled = False
+    trace_id = span_id = parent_id = 0
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def fail(self, error: BaseException | str) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+class SpanExporter:
+    """Batches finished spans and writes them from a daemon thread.
+
+    Args:
+        batch_size: Spans that trigger an immediate flush
+        interval: Seconds between background flushes
+        max_queue: Spans buffered before new ones are dropped
+    """
+
+    def __init__(self, batch_size: int = 256, interval: float = 2.0, max_queue: int = 8192, service: str = "atulya"):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.service = service
+        self._queue: deque[Span] = deque()
+        self._max_queue = max_queue
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.exported = 0
+        self.dropped = 0
+
+    def export(self, span: Span) -> None:
+        if len(self._queue) >= self._max_queue:
+            self.dropped += 1
+            return
+        self._queue.append(span)
+        if self._thread is None:
+            self._start()
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="atulya-span-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            batch: list[Span] = []
+            while self._queue:
+                batch.append(self._queue.popleft())
+            if not batch:
+                return 0
+            try:
+                self._write(otlp_payload(batch, self.service))
+                self.exported += len(batch)
+            except Exception as exc:
+                self.dropped += len(batch)
+                logger.warning(f"Span export failed: {exc}")
+            return len(batch)
+
+    def _write(self, payload: dict[str, Any]) -> None:
+        raise NotImplementedError
+
+
+class FileSpanExporter(SpanExporter):
+    """One OTLP/JSON payload per line in ``path``, rotated at ``max_bytes``."""
+
+    def __init__(self, path: str | Path, max_bytes: int = 10 * 1024 * 1024, backups: int = 3, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def _write(self, payload: dict[str, Any]) -> None:
+        line = (json.dumps(payload, separators=(",", ":")) + "\n").encode("utf-8")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = self.path.stat().st_size if self.path.exists() else 0
+        if size and size + len(line) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "ab") as f:
+            f.write(line)
+
+    def _rotate(self) -> None:
+        for i in range(self.backups - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backups > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink(missing_ok=True)
+
+
+class OtlpHttpExporter(SpanExporter):
+    """POSTs OTLP/JSON to ``<endpoint>/v1/traces``."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.url = endpoint.rstrip("/") + ("" if endpoint.rstrip("/").endswith("/v1/traces") else "/v1/traces")
+        self.timeout = timeout
+
+    def _write(self, payload: dict[str, Any]) -> None:
+        req = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload, separators=(",", ":")).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+
+class Tracer:
+    """Creates spans, samples traces and hands finished spans to an exporter.
+
+    Args:
+        sample_rate: Fraction of new traces recorded (0 disables tracing)
+        exporter: Where finished sampled spans go, or ``None`` to keep them in memory only
+        keep: Finished spans kept in memory for ``recent``
+    """
+
+    def __init__(self, sample_rate: float = 0.0, exporter: SpanExporter | None = None, keep: int = 1024):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self._open: dict[tuple[int, int], Span] = {}
+        self._recent: deque[Span] = deque(maxlen=keep)
+        self._random = random.random
+
+    def start_span(self, name: str, attributes: dict[str, Any] | None = None, parent: Span | None = None) -> Span:
+        """New span under ``parent`` (default: the current one). Not made current."""
+        if parent is None:
+            parent = _current.get()
+        if parent is None:
+            if self.sample_rate <= 0:
+                return NOOP_SPAN  # type: ignore[return-value]
+            span = Span(self, name, 0, 0, self.sample_rate > 0 and self._random() < self.sample_rate, attributes)
+            span.trace_id = (_rand(64) << 64) | span.span_id
+        else:
+            span = Span(self, name, parent.trace_id, parent.span_id, parent.sampled, attributes)
+        if span.sampled:
+            self._open[(span.trace_id, span.span_id)] = span
+        return span
+
+    def span(self, name: str, **attributes: Any) -> Span:
+        """``with tracer.span("provider.call", provider=name) as span: ...``"""
+        return self.start_span(name, attributes or None)
+
+    def get_span(self, trace_id: int, span_id: int) -> Span | None:
+        return self._open.get((trace_id, span_id))
+
+    def end_span(self, trace_id: int, span_id: int, status: str = "ok") -> Span | None:
+        span = self._open.get((trace_id, span_id))
+        if span is not None:
+            span.status = status
+            span.end()
+        return span
+
+    def _finish(self, span: Span) -> None:
+        self._open.pop((span.trace_id, span.span_id), None)
+        self._recent.append(span)
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+    def recent(self, limit: int = 100) -> list[Span]:
+        return list(self._recent)[-limit:]
+
+    @property
+    def open_spans(self) -> int:
+        return len(self._open)
+
+    def flush(self) -> None:
+        if self.exporter is not None:
+            self.exporter.flush()
+
+
+def tracer_from_env() -> Tracer:
+    """``ATULYA_TRACE_SAMPLE`` (0..1), ``ATULYA_OTLP_ENDPOINT`` or ``ATULYA_TRACE_FILE``."""
+    try:
+        rate = float(os.environ.get("ATULYA_TRACE_SAMPLE", "0") or 0)
+    except ValueError:
+        rate = 0.0
+    exporter: SpanExporter | None = None
+    if rate > 0:
+        endpoint = os.environ.get("ATULYA_OTLP_ENDPOINT", "").strip()
+        if endpoint:
+            exporter = OtlpHttpExporter(endpoint)
+        else:
+            exporter = FileSpanExporter(os.environ.get("ATULYA_TRACE_FILE", "assets/traces/spans.jsonl"))
+    return Tracer(sample_rate=min(1.0, max(0.0, rate)), exporter=exporter)
@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 import json
-import math
 import re
 import threading
 import time
@@ -11,6 +10,7 @@ from pathlib import Path
 from typing import Any
 
 from .estimator import estimate_tokens, estimate_cost
+from .ledger import UsageLedger
 
 
 @dataclass
@@ -53,30 +53,27 @@ class TokenJuice:
         self.max_records = max_records
         self.max_cache = max_cache
         self._lock = threading.Lock()
-        self._usage: list[TokenUsage] = []
-        self._sessions: dict[str, list[TokenUsage]] = {}
         self._compression_cache: dict[str, CompressionResult] = {}
-        self._load()
+        # Raw records past max_records are folded into the ledger snapshot.
+        self.ledger = UsageLedger(self.data_dir, compact_after=max_records)
+        self._migrate()
 
     # ── persistence ──────────────────────────────────────────
 
-    def _load(self):
+    def _migrate(self):
+        """Fold a legacy ``usage.json`` into the ledger once."""
         f = self.data_dir / "usage.json"
-        if f.exists():
-            try:
-                data = json.loads(f.read_text())
-                for u in data.get("usage", []):
-                    rec = TokenUsage(**u)
-                    self._usage.append(rec)
-                    sid = rec.session_id
-                    if sid:
-                        self._sessions.setdefault(sid, []).append(rec)
-            except Exception:
-                pass
-
-    def _save(self):
-        f = self.data_dir / "usage.json"
-        f.write_text(json.dumps({"usage": [vars(u) for u in self._usage]}, indent=2))
+        if not f.exists():
+            return
+        try:
+            data = json.loads(f.read_text())
+            self.ledger.import_records(vars(TokenUsage(**u)) for u in data.get("usage", []))
+            f.rename(f.with_suffix(".json.migrated"))
+        except Exception:
+            pass
+
+    def close(self):
+        self.ledger.close()
 
     # ── tracking ─────────────────────────────────────────────
 
@@ -91,14 +88,9 @@ class TokenJuice:
             cost=cost, session_id=session_id, task_type=task_type,
         )
         with self._lock:
-            self._usage.append(rec)
-            if session_id:
-                self._sessions.setdefault(session_id, []).append(rec)
-            if len(self._usage) > self.max_records:
-                self._usage = self._usage[-self.max_records:]
             if len(self._compression_cache) > self.max_cache:
                 self._compression_cache.clear()
-        self._save()
+        self.ledger.record(vars(rec))
         return rec
 
     def track_raw(self, provider: str, model: str, prompt_tokens: int,
@@ -110,27 +102,20 @@ class TokenJuice:
             prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
             cost=cost, session_id=session_id, task_type=task_type,
         )
-        with self._lock:
-            self._usage.append(rec)
-            if session_id:
-                self._sessions.setdefault(session_id, []).append(rec)
-            if len(self._usage) > self.max_records:
-                self._usage = self._usage[-self.max_records:]
-        self._save()
+        self.ledger.record(vars(rec))
         return rec
 
     # ── budgets ──────────────────────────────────────────────
 
     def check_budget(self, session_id: str = "") -> dict[str, Any]:
         now = time.time()
-        today_start = now - 86400
-        month_start = now - 2592000
+        today = self.ledger.window(86400, now)
+        month = self.ledger.window(2592000, now)
 
-        daily_tokens = sum(u.prompt_tokens + u.completion_tokens
-                           for u in self._usage if u.timestamp > today_start)
-        monthly_cost = sum(u.cost for u in self._usage if u.timestamp > month_start)
-        session_tokens = sum(u.prompt_tokens + u.completion_tokens
-                             for u in self._sessions.get(session_id, []))
+        daily_tokens = today["prompt_tokens"] + today["completion_tokens"]
+        monthly_cost = month["cost"]
+        session = self.ledger.session(session_id) if session_id else None
+        session_tokens = session["prompt_tokens"] + session["completion_tokens"] if session else 0
 
         violations = []
         if self.budget.enabled:
@@ -202,22 +187,25 @@ class TokenJuice:
     # ── analytics ────────────────────────────────────────────
 
     def get_stats(self) -> dict[str, Any]:
-        total_prompt = sum(u.prompt_tokens for u in self._usage)
-        total_completion = sum(u.completion_tokens for u in self._usage)
-        total_cost = sum(u.cost for u in self._usage)
+        totals = self.ledger.totals()
+        total_calls = sum(t["calls"] for t in totals.values())
+        total_prompt = sum(t["prompt_tokens"] for t in totals.values())
+        total_completion = sum(t["completion_tokens"] for t in totals.values())
+        total_cost = sum(t["cost"] for t in totals.values())
 
         by_provider: dict[str, int] = {}
         by_model: dict[str, dict[str, Any]] = {}
-        for u in self._usage:
-            by_provider[u.provider] = by_provider.get(u.provider, 0) + u.prompt_tokens + u.completion_tokens
-            if u.model not in by_model:
-                by_model[u.model] = {"calls": 0, "tokens": 0, "cost": 0.0}
-            by_model[u.model]["calls"] += 1
-            by_model[u.model]["tokens"] += u.prompt_tokens + u.completion_tokens
-            by_model[u.model]["cost"] += u.cost
+        for (provider, model), t in totals.items():
+            tokens = t["prompt_tokens"] + t["completion_tokens"]
+            by_provider[provider] = by_provider.get(provider, 0) + tokens
+            if model not in by_model:
+                by_model[model] = {"calls": 0, "tokens": 0, "cost": 0.0}
+            by_model[model]["calls"] += t["calls"]
+            by_model[model]["tokens"] += tokens
+            by_model[model]["cost"] += t["cost"]
 
         return {
-            "total_calls": len(self._usage),
+            "total_calls": total_calls,
             "total_prompt_tokens": total_prompt,
             "total_completion_tokens": total_completion,
             "total_tokens": total_prompt + total_completion,
@@ -230,12 +218,12 @@ class TokenJuice:
 
     def get_optimization_suggestions(self) -> list[dict[str, Any]]:
         suggestions = []
-        total_tokens = sum(u.prompt_tokens + u.completion_tokens for u in self._usage)
+        total_tokens = sum(t["prompt_tokens"] + t["completion_tokens"] for t in self.ledger.totals().values())
         if total_tokens == 0:
             return suggestions
 
         # Check if repetitive calls
-        by_session = len(self._sessions)
+        by_session = self.ledger.session_count
         if by_session > 0 and total_tokens / by_session > 50000:
             suggestions.append({
                 "type": "compression",
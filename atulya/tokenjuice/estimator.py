@@ -17,10 +17,13 @@ MODEL_TOKEN_RATES = {
 }
 
 
+_PRINTABLE_RUNS = re.compile(r"[ -~]+")
+
+
 def _chars_per_token(text: str) -> float:
     """Estimate average char-per-token ratio based on text composition."""
-    ascii_count = len(re.findall(r"[ -~]", text))
-    unicode_count = len(text) - ascii_count
+    unicode_count = len(_PRINTABLE_RUNS.sub("", text))
+    ascii_count = len(text) - unicode_count
     total = max(len(text), 1)
     ratio = (ascii_count * 1.0 + unicode_count * 3.0) / total
     return max(1.5, min(6.0, ratio))
@@ -0,0 +1,274 @@
+"""Append-only usage ledger with rolling time-bucketed aggregates.
+
+Every tracked call is appended as one JSON line to ``usage.jsonl`` and folded
+into in-memory aggregates:
+
+  - per-minute, per-hour and per-day buckets keyed by (provider, model),
+    each kept only as long as a budget window or the stats need it,
+  - all-time totals per (provider, model) and per session.
+
+Budget checks and stats read the buckets, never the raw records. A snapshot
+(``ledger.json``) stores the aggregates plus the byte offset of
+``usage.jsonl`` it covers, so a restart replays only the records written
+after it. Once the raw file passes ``compact_after`` records it is folded
+into a fresh snapshot and replaced by an empty one; the first line of each
+raw file carries an id the snapshot names, so a crash between the two steps
+never double-counts.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterable
+
+MINUTE, HOUR, DAY = 60, 3600, 86400
+# Seconds each resolution is kept: minutes cover a daily window and hours a
+# 30-day one at their old edge, with a bucket to spare.
+RETENTION = {MINUTE: 25 * HOUR, HOUR: 32 * DAY, DAY: 400 * DAY}
+
+_FIELDS = ("calls", "prompt_tokens", "completion_tokens", "cost")
+
+
+def _empty() -> list[float]:
+    return [0, 0, 0, 0.0]
+
+
+def _add(agg: list[float], calls: int, prompt: int, completion: int, cost: float) -> None:
+    agg[0] += calls
+    agg[1] += prompt
+    agg[2] += completion
+    agg[3] += cost
+
+
+def _ceil(ts: float, width: int) -> float:
+    return -(-ts // width) * width
+
+
+class UsageLedger:
+    """Usage records on disk, aggregates in memory.
+
+    Args:
+        path: Directory holding ``usage.jsonl`` and ``ledger.json``
+        compact_after: Raw records kept before folding into the snapshot
+        max_sessions: Session totals kept (least recently used dropped)
+    """
+
+    def __init__(self, path: str | Path, compact_after: int = 10_000, max_sessions: int = 10_000):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.raw_path = self.path / "usage.jsonl"
+        self.snapshot_path = self.path / "ledger.json"
+        self.compact_after = max(1, compact_after)
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._buckets: dict[int, dict[tuple[float, str, str], list[float]]] = {res: {} for res in RETENTION}
+        self._totals: dict[tuple[str, str], list[float]] = {}
+        self._sessions: OrderedDict[str, list[float]] = OrderedDict()
+        self._raw_records = 0
+        self._pruned_at = 0.0
+        self._fh = None
+        self._load()
+
+    # ── persistence ──────────────────────────────────────────
+
+    def _load(self) -> None:
+        offset, snap_id = 0, ""
+        if self.snapshot_path.exists():
+            try:
+                snap = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+                offset, snap_id = int(snap.get("offset", 0)), str(snap.get("raw_id", ""))
+                for res, rows in snap.get("buckets", {}).items():
+                    self._buckets[int(res)] = {(b[0], b[1], b[2]): list(b[3:]) for b in rows}
+                self._totals = {(t[0], t[1]): list(t[2:]) for t in snap.get("totals", [])}
+                self._sessions = OrderedDict((s[0], list(s[1:])) for s in snap.get("sessions", []))
+            except (ValueError, KeyError, IndexError, TypeError):
+                offset, snap_id = 0, ""
+                self._buckets = {res: {} for res in RETENTION}
+                self._totals, self._sessions = {}, OrderedDict()
+        self._raw_id = snap_id or uuid.uuid4().hex
+        if not self.raw_path.exists():
+            return
+        with open(self.raw_path, "rb") as f:
+            header = f.readline()
+            try:
+                raw_id = json.loads(header).get("ledger", "")
+            except (ValueError, AttributeError):
+                raw_id = ""
+            if snap_id and raw_id != snap_id:
+                # Crash between snapshot and rotation: these records are already folded.
+                self._rotate()
+                return
+            self._raw_id = raw_id or self._raw_id
+            f.seek(max(offset, len(header)))
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn final write
+                try:
+                    self._fold(json.loads(line))
+                except (ValueError, TypeError, AttributeError):
+                    continue
+                self._raw_records += 1
+        self._prune(time.time())
+
+    def _snapshot(self, offset: int) -> None:
+        snap = {
+            "raw_id": self._raw_id,
+            "offset": offset,
+            "saved_at": time.time(),
+            "buckets": {str(res): [[*key, *agg] for key, agg in rows.items()] for res, rows in self._buckets.items()},
+            "totals": [[*key, *agg] for key, agg in self._totals.items()],
+            "sessions": [[sid, *agg] for sid, agg in self._sessions.items()],
+        }
+        tmp = self.snapshot_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(snap, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.snapshot_path)
+
+    def _rotate(self) -> int:
+        """Atomically start a fresh raw file headed by ``self._raw_id``."""
+        header = (json.dumps({"ledger": self._raw_id}) + "\n").encode("utf-8")
+        tmp = self.raw_path.with_suffix(".tmp")
+        tmp.write_bytes(header)
+        os.replace(tmp, self.raw_path)
+        self._raw_records = 0
+        return len(header)
+
+    def compact(self) -> None:
+        """Fold the raw records into the snapshot and start a new ``usage.jsonl``."""
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        # The snapshot names the next raw file; until that file replaces the
+        # current one, a restart sees the id mismatch and skips the old records.
+        self._raw_id = uuid.uuid4().hex
+        header_len = len(json.dumps({"ledger": self._raw_id})) + 1
+        self._snapshot(header_len)
+        self._rotate()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+                self._snapshot(self._fh.tell())
+                self._fh.close()
+                self._fh = None
+
+    # ── recording ────────────────────────────────────────────
+
+    def record(self, usage: dict[str, Any]) -> None:
+        line = (json.dumps(usage, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            if self._fh is None:
+                if not self.raw_path.exists():
+                    self._rotate()
+                self._fh = open(self.raw_path, "ab")
+            self._fh.write(line)
+            self._fh.flush()
+            self._fold(usage)
+            self._raw_records += 1
+            if self._raw_records >= self.compact_after:
+                self._compact_locked()
+
+    def _fold(self, usage: dict[str, Any]) -> None:
+        ts = float(usage.get("timestamp") or time.time())
+        provider, model = str(usage.get("provider") or ""), str(usage.get("model") or "")
+        values = (1, int(usage.get("prompt_tokens") or 0), int(usage.get("completion_tokens") or 0), float(usage.get("cost") or 0.0))
+        for res, rows in self._buckets.items():
+            key = (ts // res * res, provider, model)
+            agg = rows.get(key)
+            if agg is None:
+                agg = rows[key] = _empty()
+            _add(agg, *values)
+        agg = self._totals.get((provider, model))
+        if agg is None:
+            agg = self._totals[(provider, model)] = _empty()
+        _add(agg, *values)
+        sid = str(usage.get("session_id") or "")
+        if sid:
+            agg = self._sessions.get(sid)
+            if agg is None:
+                agg = self._sessions[sid] = _empty()
+                if len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(sid)
+            _add(agg, *values)
+        if ts - self._pruned_at > MINUTE:
+            self._prune(ts)
+
+    def _prune(self, now: float) -> None:
+        for res, keep in RETENTION.items():
+            cutoff = now - keep
+            rows = self._buckets[res]
+            for key in [k for k in rows if k[0] + res <= cutoff]:
+                del rows[key]
+        self._pruned_at = now
+
+    # ── queries ──────────────────────────────────────────────
+
+    def window(self, seconds: float, now: float | None = None) -> dict[str, float]:
+        """Totals over the last ``seconds`` (minute-granular at the old edge).
+
+        Whole days come from day buckets, the remaining hours from hour
+        buckets and the remaining minutes from minute buckets. Windows longer
+        than a level's retention round the old edge outward to the next
+        coarser bucket instead of reading pruned ones.
+        """
+        now = time.time() if now is None else now
+        start = now - seconds
+        if seconds > RETENTION[MINUTE] - MINUTE:
+            start = start // HOUR * HOUR
+        if seconds > RETENTION[HOUR] - HOUR:
+            start = start // DAY * DAY
+        minute_edge = _ceil(start, MINUTE)
+        hour_edge = max(_ceil(start, HOUR), minute_edge)
+        day_edge = max(_ceil(start, DAY), hour_edge)
+        total = _empty()
+        with self._lock:
+            spans = ((DAY, day_edge, float("inf")), (HOUR, hour_edge, day_edge), (MINUTE, minute_edge, hour_edge))
+            for res, lo, hi in spans:
+                for (bucket, _, _), agg in self._buckets[res].items():
+                    if lo <= bucket < hi:
+                        _add(total, *agg)
+        return dict(zip(_FIELDS, total))
+
+    def session(self, session_id: str) -> dict[str, float]:
+        with self._lock:
+            return dict(zip(_FIELDS, self._sessions.get(session_id) or _empty()))
+
+    def totals(self) -> dict[tuple[str, str], dict[str, float]]:
+        with self._lock:
+            return {key: dict(zip(_FIELDS, agg)) for key, agg in self._totals.items()}
+
+    def series(self, resolution: int = HOUR, since: float = 0.0) -> list[dict[str, Any]]:
+        """Per-bucket usage at one resolution, oldest first."""
+        with self._lock:
+            rows = sorted(self._buckets[resolution].items())
+        return [
+            {"bucket": bucket, "provider": provider, "model": model, **dict(zip(_FIELDS, agg))}
+            for (bucket, provider, model), agg in rows
+            if bucket >= since
+        ]
+
+    @property
+    def session_count(self) -> int:
+        return len(self._sessions)
+
+    def import_records(self, records: Iterable[dict[str, Any]]) -> int:
+        """Fold legacy records straight into the snapshot (no raw lines)."""
+        count = 0
+        with self._lock:
+            for usage in records:
+                self._fold(usage)
+                count += 1
+            self._prune(time.time())
+            self._compact_locked()
+        return count
@@ -5,9 +5,9 @@ from __future__ import annotations
 import logging
 import asyncio
 import json
+import math
 import os
 import threading
-import time
 from contextlib import asynccontextmanager
 from pathlib import Path
 
@@ -19,26 +19,60 @@ from fastapi.staticfiles import StaticFiles
 from drishti.dashboard.helpers import _checkpoint_index, _load_cached_model
 from drishti.dashboard.routes import agent, auth, automation, chat, cortex, create, devices, model, notifications, openai, system, train, upload, voice, ws
 from drishti.dashboard.automation_runner import AutomationRunner
+from drishti.dashboard.rate_limit import limiter_from_env
+from drishti.dashboard.state import UPLOAD_MAX_BYTES, VOICE_UPLOAD_MAX_BYTES
 from yantra.mcp.external_client import MCPClientManager
 
 logger = logging.getLogger(__name__)
 
 # ── Rate Limiting ─────────────────────────────────────────────────────────
 
-_RATE_LIMIT_WINDOW = 60
-_RATE_LIMIT_MAX = 100
-_RATE_STORE: dict[str, list[float]] = {}
+_RATE_LIMITER = limiter_from_env()
+
+
+def _rate_client(request: Request) -> str:
+    """Username for a live session token, else the client IP."""
+    from drishti.dashboard import users
+
+    token = request.headers.get("X-Atulya-Token")
+    if token:
+        session = users.get_session(token)
+        if session:
+            return f"user:{session['username']}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
 
 
 async def _rate_limiter(request: Request, call_next):
-    client = request.client.host if request.client else "unknown"
-    now = time.time()
-    window_start = now - _RATE_LIMIT_WINDOW
-    hits = [t for t in _RATE_STORE.get(client, []) if t > window_start]
-    if len(hits) >= _RATE_LIMIT_MAX:
-        return JSONResponse(status_code=429, content={"detail": "Rate limit exceeded. Try again later."})
-    hits.append(now)
-    _RATE_STORE[client] = hits
+    allowed, retry_after, _ = await _RATE_LIMITER.acheck(request.url.path, _rate_client(request))
+    if not allowed:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Rate limit exceeded. Try again later."},
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+    return await call_next(request)
+
+
+# ── Upload size guard ─────────────────────────────────────────────────────
+
+# Multipart bodies are parsed before the route runs; refuse oversized ones
+# from the declared length instead of spooling them first. The routes still
+# count bytes as they stream, for chunked or understated uploads.
+_UPLOAD_LIMITS = {"/api/upload": UPLOAD_MAX_BYTES, "/api/voice/stt": VOICE_UPLOAD_MAX_BYTES}
+
+
+async def _upload_size_guard(request: Request, call_next):
+    limit = _UPLOAD_LIMITS.get(request.url.path)
+    if limit is not None:
+        try:
+            declared = int(request.headers.get("content-length") or 0)
+        except ValueError:
+            declared = 0
+        if declared > limit:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"File too large (max {limit // 1024 // 1024}MB)"},
+            )
     return await call_next(request)
 
 
@@ -73,10 +107,13 @@ async def lifespan(app: FastAPI):
     set_agent(agent_core)
     app.state.agent = agent_core
 
+    train.METRICS_TAILER.start(train.push_training_metrics)
+
     threading.Thread(target=_warm_latest_model, daemon=True).start()
     try:
         yield
     finally:
+        await train.METRICS_TAILER.stop()
         await app.state.automation_runner.stop()
         app.state.automation_task.cancel()
         await app.state.mcp_manager.shutdown_all()
@@ -121,6 +158,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.middleware("http")(_upload_size_guard)
 app.middleware("http")(_rate_limiter)
 
 for module in (auth, system, model, train, chat, cortex, automation, openai, voice, upload, devices, ws, notifications, agent, create):
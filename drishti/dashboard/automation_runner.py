@@ -1,8 +1,27 @@
-"""Background automation runner for stored cron jobs."""
+"""Background automation runner for stored cron jobs.
+
+Jobs are kept in memory in a min-heap keyed by ``next_run``; the loop sleeps
+until the earliest deadline (or the next jobs-file mtime check, every
+``interval`` seconds) instead of re-parsing the file every tick. The file is
+re-read only when its mtime/size changes, and runtime fields are merged back
+on save so edits made through the API are not clobbered.
+
+Due jobs run concurrently, bounded by ``max_concurrency``, each under a
+timeout (``job["timeout"]`` or ``job_timeout``). A job that is overdue when
+the runner catches up follows its ``misfire`` policy:
+
+  - ``coalesce`` (default): run once for all missed periods.
+  - ``skip``: if later than ``misfire_grace`` seconds, skip to the next slot.
+
+A job that is still running when it comes due again is not started twice.
+"""
 from __future__ import annotations
 
 import asyncio
+import heapq
+import itertools
 import json
+import logging
 import time
 from pathlib import Path
 from typing import Any
@@ -12,46 +31,178 @@ try:
 except ImportError:  # pragma: no cover
     croniter = None
 
+logger = logging.getLogger(__name__)
+
+MISFIRE_COALESCE = "coalesce"
+MISFIRE_SKIP = "skip"
+
 
 class AutomationRunner:
-    def __init__(self, jobs_file: str | Path, llm: Any, interval: float = 1.0):
+    def __init__(
+        self,
+        jobs_file: str | Path,
+        llm: Any,
+        interval: float = 1.0,
+        max_concurrency: int = 4,
+        job_timeout: float = 300.0,
+        misfire_grace: float = 60.0,
+    ):
         self.jobs_file = Path(jobs_file)
         self.llm = llm
         self.interval = interval
+        self.job_timeout = job_timeout
+        self.misfire_grace = misfire_grace
         self._running = False
+        self._sem = asyncio.Semaphore(max(1, max_concurrency))
+        self._jobs: dict[str, dict[str, Any]] = {}
+        self._order: list[str] = []
+        self._stamp: tuple[int, int] | None = None
+        self._loaded = False
+        self._heap: list[tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._dirty: dict[str, dict[str, Any]] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._wake: asyncio.Event | None = None
+        self.metrics: dict[str, dict[str, Any]] = {}
+
+    # ── Loop ────────────────────────────────────────────────────────────────
 
     async def start(self) -> None:
         self._running = True
+        self._wake = asyncio.Event()
         while self._running:
-            await self.tick()
-            await asyncio.sleep(self.interval)
+            now = time.time()
+            self._refresh()
+            for job_id, scheduled in self._pop_due(now):
+                task = asyncio.create_task(self._execute(job_id, scheduled))
+                self._inflight[job_id] = task
+                task.add_done_callback(lambda _t, jid=job_id: self._inflight.pop(jid, None))
+            self._persist()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._delay(time.time()))
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
 
     async def stop(self) -> None:
         self._running = False
+        if self._wake is not None:
+            self._wake.set()
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._persist()
+
+    def notify_changed(self) -> None:
+        """Wake the loop now (e.g. after the jobs file was edited)."""
+        if self._wake is not None:
+            self._wake.set()
 
     async def tick(self) -> None:
+        """Run every job due now and wait for them (one synchronous pass)."""
+        self._refresh()
+        due = self._pop_due(time.time())
+        if due:
+            await asyncio.gather(*(self._execute(job_id, scheduled) for job_id, scheduled in due))
+        self._persist()
+
+    def _delay(self, now: float) -> float:
+        """Sleep until the earliest deadline, but re-check the file every ``interval``."""
+        self._drop_stale_heads()
+        if not self._heap:
+            return self.interval
+        return max(0.0, min(self._heap[0][0] - now, self.interval))
+
+    # ── Job state ───────────────────────────────────────────────────────────
+
+    def _file_stamp(self) -> tuple[int, int] | None:
+        try:
+            st = self.jobs_file.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _refresh(self) -> None:
+        """Reload jobs only when the file changed on disk."""
+        stamp = self._file_stamp()
+        if self._loaded and stamp == self._stamp:
+            return
         jobs = self._load_jobs()
+        self._stamp = stamp
+        self._loaded = True
+        self._order = []
+        self._jobs = {}
+        for i, job in enumerate(jobs):
+            job_id = str(job.get("id") or f"#{i}")
+            self._order.append(job_id)
+            self._jobs[job_id] = job
+            # Runtime fields not yet written win over the file's copy.
+            job.update(self._dirty.get(job_id, {}))
+        self._rebuild_heap()
+
+    def _rebuild_heap(self) -> None:
         now = time.time()
-        changed = False
-        for job in jobs:
+        self._heap = []
+        for job_id, job in self._jobs.items():
             if not job.get("enabled", True):
                 continue
             next_run = float(job.get("next_run") or 0)
             if next_run <= 0:
-                job["next_run"] = self._next_run(str(job.get("schedule") or "60"), now)
-                changed = True
+                next_run = self._next_run(str(job.get("schedule") or "60"), now)
+                self._update(job_id, next_run=next_run)
+            self._heap.append((next_run, next(self._seq), job_id))
+        heapq.heapify(self._heap)
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.update(fields)
+        self._dirty.setdefault(job_id, {}).update(fields)
+
+    def _schedule(self, job_id: str, next_run: float) -> None:
+        self._update(job_id, next_run=next_run)
+        heapq.heappush(self._heap, (next_run, next(self._seq), job_id))
+
+    def _is_current(self, entry: tuple[float, int, str]) -> dict[str, Any] | None:
+        when, _, job_id = entry
+        job = self._jobs.get(job_id)
+        if job is None or not job.get("enabled", True) or float(job.get("next_run") or 0) != when:
+            return None
+        return job
+
+    def _drop_stale_heads(self) -> None:
+        while self._heap and self._is_current(self._heap[0]) is None:
+            heapq.heappop(self._heap)
+
+    def _pop_due(self, now: float) -> list[tuple[str, float]]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            job = self._is_current(entry)
+            if job is None:
                 continue
-            if next_run > now:
+            scheduled, _, job_id = entry
+            schedule = str(job.get("schedule") or "60")
+            self._schedule(job_id, self._next_run(schedule, now))
+            if job_id in self._inflight:
+                continue  # previous run still going: coalesce into it
+            if job.get("misfire") == MISFIRE_SKIP and now - scheduled > self.misfire_grace:
+                self._update(job_id, last_status="skipped")
                 continue
-            command = str(job.get("command") or job.get("callback") or "").strip()
-            if command:
-                await self.run_job(job)
-            job["last_run"] = now
-            job["run_count"] = int(job.get("run_count") or 0) + 1
-            job["next_run"] = self._next_run(str(job.get("schedule") or "60"), now)
-            changed = True
-        if changed:
-            self._save_jobs(jobs)
+            due.append((job_id, scheduled))
+        return due
+
+    def _persist(self) -> None:
+        if not self._dirty:
+            return
+        if self._loaded and self._file_stamp() != self._stamp:
+            self._refresh()  # pick up API edits first; the overlay is re-applied
+        jobs = [self._jobs[job_id] for job_id in self._order if job_id in self._jobs]
+        self._save_jobs(jobs)
+        self._stamp = self._file_stamp()
+        self._dirty.clear()
 
     def _load_jobs(self) -> list[dict[str, Any]]:
         if not self.jobs_file.exists():
@@ -65,6 +216,67 @@ class AutomationRunner:
         self.jobs_file.parent.mkdir(parents=True, exist_ok=True)
         self.jobs_file.write_text(json.dumps(jobs, indent=2), encoding="utf-8")
 
+    # ── Execution ───────────────────────────────────────────────────────────
+
+    async def _execute(self, job_id: str, scheduled: float) -> None:
+        job = dict(self._jobs.get(job_id) or {})
+        status = "ok"
+        async with self._sem:
+            started = time.time()
+            command = str(job.get("command") or job.get("callback") or "").strip()
+            if command:
+                timeout = float(job.get("timeout") or self.job_timeout)
+                try:
+                    await asyncio.wait_for(self.run_job(job), timeout=timeout)
+                    if job.get("last_error"):
+                        status = "error"
+                except asyncio.TimeoutError:
+                    status = "timeout"
+                    logger.warning("Automation job %s timed out after %gs", job_id, timeout)
+                    job.update(last_error=f"Timed out after {timeout:g}s", last_result="", last_provider="")
+                    await self._notify_job(job, error=job["last_error"])
+            duration = time.time() - started
+
+        current = self._jobs.get(job_id) or job
+        fields = {k: job[k] for k in ("last_result", "last_error", "last_provider") if k in job}
+        self._update(
+            job_id,
+            last_run=started,
+            run_count=int(current.get("run_count") or 0) + 1,
+            last_duration=round(duration, 3),
+            last_latency=round(max(0.0, started - scheduled), 3),
+            last_status=status,
+            **fields,
+        )
+        self._record(job_id, duration, started - scheduled, status)
+        if self._running:
+            self._persist()
+
+    def _record(self, job_id: str, duration: float, latency: float, status: str) -> None:
+        m = self.metrics.setdefault(job_id, {
+            "runs": 0, "errors": 0, "timeouts": 0,
+            "avg_duration": 0.0, "max_duration": 0.0, "last_duration": 0.0,
+            "avg_latency": 0.0, "max_latency": 0.0,
+        })
+        m["runs"] += 1
+        m["errors"] += status == "error"
+        m["timeouts"] += status == "timeout"
+        m["last_duration"] = duration
+        m["max_duration"] = max(m["max_duration"], duration)
+        m["avg_duration"] += (duration - m["avg_duration"]) / m["runs"]
+        latency = max(0.0, latency)
+        m["max_latency"] = max(m["max_latency"], latency)
+        m["avg_latency"] += (latency - m["avg_latency"]) / m["runs"]
+
+    def stats(self) -> dict[str, Any]:
+        self._drop_stale_heads()
+        return {
+            "running": self._running,
+            "inflight": sorted(self._inflight),
+            "next_due": self._heap[0][0] if self._heap else None,
+            "jobs": {job_id: dict(m) for job_id, m in self.metrics.items()},
+        }
+
     async def run_job(self, job: dict[str, Any]) -> dict[str, Any]:
         command = str(job.get("command") or job.get("callback") or "").strip()
         if not command:
@@ -94,7 +306,7 @@ class AutomationRunner:
         try:
             from drishti.dashboard.routes.ws import broadcast_event
             desc = (error or "job finished")[:280]
-            broadcast_event(
+            await broadcast_event(
                 f"Automation job: {name}",
                 desc,
                 event_type="success" if not error else "error",
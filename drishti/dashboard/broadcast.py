@@ -0,0 +1,223 @@
+"""WebSocket broadcast hub for the Drishti dashboard.
+
+``broadcast`` used to await ``send_json`` on every socket in turn, so one slow
+tab stalled all subscribers and the caller. The hub instead:
+
+  - serialises each payload once and enqueues the text on every subscriber,
+  - gives each connection a bounded queue drained by its own writer task,
+  - applies a slow-consumer policy when a queue is full (``drop_oldest`` or
+    ``disconnect``),
+  - keeps a fixed-size ring buffer of recent payloads for replay on connect,
+  - delivers a payload only to connections subscribed to its topic; the
+    ``training`` topic (and ``*``) carries admin-only metrics, so it is
+    dropped from a non-admin connection's subscription.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+
+# Event type → topic; anything not listed is a general "events" message.
+EVENT_TOPICS = {"training_status": "training", "training_metrics": "training", "telemetry": "telemetry"}
+DEFAULT_TOPICS = frozenset({"events"})
+ALL_TOPICS = "*"
+ADMIN_TOPICS = frozenset({"training", ALL_TOPICS})
+
+
+def topic_for(event_type: str) -> str:
+    return EVENT_TOPICS.get(event_type, "events")
+
+
+def parse_topics(raw: str | Iterable[str] | None) -> set[str]:
+    """``"training,telemetry"`` / list → topic set (empty → defaults)."""
+    if raw is None:
+        return set(DEFAULT_TOPICS)
+    items = raw.split(",") if isinstance(raw, str) else list(raw)
+    topics = {str(t).strip() for t in items if str(t).strip()}
+    return topics or set(DEFAULT_TOPICS)
+
+
+def allowed_topics(topics: Iterable[str], admin: bool) -> set[str]:
+    """Topics a connection may hold; non-admins get ``*`` as every public topic."""
+    topics = set(topics)
+    if admin:
+        return topics
+    if ALL_TOPICS in topics:
+        topics |= set(EVENT_TOPICS.values()) | DEFAULT_TOPICS
+    return topics - ADMIN_TOPICS
+
+
+@dataclass(eq=False)
+class Subscriber:
+    """One connected socket and its outbound queue."""
+
+    ws: Any
+    topics: set[str]
+    user: str = ""
+    admin: bool = False
+    queue: deque = field(default_factory=deque)   # (enqueued_at, text)
+    wake: asyncio.Event = field(default_factory=asyncio.Event)
+    send_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    writer: asyncio.Task | None = None
+    connected_at: float = field(default_factory=time.time)
+    sent: int = 0
+    dropped: int = 0
+    closed: bool = False
+
+    def wants(self, topic: str) -> bool:
+        return ALL_TOPICS in self.topics or topic in self.topics
+
+    async def send_now(self, text: str) -> None:
+        """Send outside the queue (welcome, replay, pong) without racing the writer."""
+        async with self.send_lock:
+            await self.ws.send_text(text)
+
+    def lag(self, now: float | None = None) -> float:
+        """Age in seconds of the oldest message still waiting to be sent."""
+        if not self.queue:
+            return 0.0
+        return (time.time() if now is None else now) - self.queue[0][0]
+
+
+class BroadcastHub:
+    """Fan out serialized payloads to WebSocket subscribers.
+
+    Args:
+        queue_size: Max queued messages per connection
+        policy: ``drop_oldest`` (discard the oldest queued message) or
+            ``disconnect`` (close the slow connection) when a queue is full
+        history_size: Ring-buffer size for replay on connect
+    """
+
+    def __init__(self, queue_size: int = 256, policy: str = DROP_OLDEST, history_size: int = 200):
+        if policy not in (DROP_OLDEST, DISCONNECT):
+            raise ValueError(f"Unknown slow-consumer policy: {policy!r}")
+        self.queue_size = max(1, queue_size)
+        self.policy = policy
+        self.history: deque[dict[str, Any]] = deque(maxlen=history_size)
+        self.subscribers: dict[Any, Subscriber] = {}
+
+    # ── Connections ──────────────────────────────────────────────────────────
+
+    def register(self, ws: Any, topics: set[str] | None = None, user: str = "", admin: bool = False) -> Subscriber:
+        sub = Subscriber(ws=ws, topics=allowed_topics(topics or DEFAULT_TOPICS, admin), user=user, admin=admin)
+        sub.writer = asyncio.get_running_loop().create_task(self._writer(sub))
+        self.subscribers[ws] = sub
+        return sub
+
+    async def unregister(self, ws: Any) -> None:
+        sub = self.subscribers.pop(ws, None)
+        if sub is None:
+            return
+        sub.closed = True
+        sub.wake.set()
+        if sub.writer is not None and sub.writer is not asyncio.current_task():
+            sub.writer.cancel()
+            try:
+                await sub.writer
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    def clear(self) -> None:
+        for sub in self.subscribers.values():
+            sub.closed = True
+            if sub.writer is not None:
+                sub.writer.cancel()
+        self.subscribers.clear()
+        self.history.clear()
+
+    async def _writer(self, sub: Subscriber) -> None:
+        try:
+            while not sub.closed:
+                if not sub.queue:
+                    sub.wake.clear()
+                    await sub.wake.wait()
+                    continue
+                _, text = sub.queue.popleft()
+                async with sub.send_lock:
+                    await sub.ws.send_text(text)
+                sub.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Socket is gone; the endpoint's receive loop cleans up.
+            sub.closed = True
+            self.subscribers.pop(sub.ws, None)
+
+    # ── Publishing ───────────────────────────────────────────────────────────
+
+    def publish(self, event_type: str, data: dict[str, Any], topic: str | None = None) -> dict[str, Any]:
+        """Record and enqueue one payload; never waits on a socket."""
+        topic = topic or topic_for(event_type)
+        payload = {"type": event_type, "data": data, "timestamp": time.time()}
+        self.history.append(payload)
+        targets = [s for s in self.subscribers.values() if not s.closed and s.wants(topic)]
+        if not targets:
+            return payload
+        text = json.dumps(payload, default=str)
+        now = payload["timestamp"]
+        for sub in targets:
+            if len(sub.queue) >= self.queue_size:
+                if self.policy == DISCONNECT:
+                    self._disconnect_slow(sub)
+                    continue
+                sub.queue.popleft()
+                sub.dropped += 1
+            sub.queue.append((now, text))
+            sub.wake.set()
+        return payload
+
+    def _disconnect_slow(self, sub: Subscriber) -> None:
+        logger.info("Closing slow WebSocket consumer %s (%d queued)", sub.user or "?", len(sub.queue))
+        sub.closed = True
+        sub.queue.clear()
+        sub.wake.set()
+        self.subscribers.pop(sub.ws, None)
+
+        async def _close() -> None:
+            try:
+                await sub.ws.close(code=1013)
+            except Exception:
+                pass
+
+        asyncio.get_running_loop().create_task(_close())
+
+    def replay(self, sub: Subscriber, limit: int = 20) -> list[str]:
+        """Serialized recent history matching the subscriber's topics."""
+        matched = [p for p in self.history if sub.wants(topic_for(p["type"]))]
+        return [json.dumps(p, default=str) for p in matched[-limit:]]
+
+    # ── Telemetry ────────────────────────────────────────────────────────────
+
+    def stats(self, include_users: bool = True) -> dict[str, Any]:
+        """Per-connection queue telemetry; ``include_users=False`` omits usernames.
+
+        Sync dashboard routes call this from a threadpool thread while the
+        event loop registers sockets, so it walks a snapshot of the table.
+        """
+        now = time.time()
+        connections = []
+        for s in list(self.subscribers.values()):
+            entry = {
+                "topics": sorted(s.topics),
+                "queued": len(s.queue),
+                "lag_seconds": round(s.lag(now), 3),
+                "sent": s.sent,
+                "dropped": s.dropped,
+                "connected_seconds": int(now - s.connected_at),
+            }
+            if include_users:
+                entry = {"user": s.user, **entry}
+            connections.append(entry)
+        return {"policy": self.policy, "queue_size": self.queue_size, "connections": connections}
@@ -1,51 +1,210 @@
-"""Persistent chat history for Drishti users."""
+"""Persistent chat history for Drishti users.
+
+Messages live in a WAL-mode SQLite table next to the legacy JSON file
+(``config/chat_history.db``). Appends are single-row inserts, reads are
+keyset-paginated on the ``(user, id)`` index, and per-user retention is
+enforced by a background trimmer instead of on the request path. An existing
+``chat_history.json`` is imported once, on first open, and renamed to
+``chat_history.json.migrated``.
+"""
 
 from __future__ import annotations
 
 import json
+import logging
+import sqlite3
 import threading
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
+logger = logging.getLogger(__name__)
+
 _ROOT = Path(__file__).resolve().parents[2]
 HISTORY_FILE = _ROOT / "config" / "chat_history.json"
 _lock = threading.Lock()
 _MAX_MESSAGES = 300
+_TRIM_DELAY = 2.0  # seconds the trimmer waits to batch up appends
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    user       TEXT NOT NULL,
+    role       TEXT NOT NULL,
+    text       TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    surface    TEXT NOT NULL DEFAULT 'chat',
+    provider   TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_messages_user_id ON messages(user, id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
 
 
 def _now() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def _read_store() -> dict[str, Any]:
-    if not HISTORY_FILE.exists():
-        return {"users": {}}
-    try:
-        data = json.loads(HISTORY_FILE.read_text(encoding="utf-8"))
-    except Exception:
-        return {"users": {}}
-    if not isinstance(data, dict):
-        return {"users": {}}
-    data.setdefault("users", {})
-    return data
-
-
-def _write_store(data: dict[str, Any]) -> None:
-    HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
-    HISTORY_FILE.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+def _db_path() -> Path:
+    return HISTORY_FILE.with_suffix(".db")
+
+
+class _HistoryStore:
+    """SQLite store bound to one database file.
+
+    Each thread gets its own connection; WAL lets readers proceed while a
+    writer commits, so request threads never serialise behind each other.
+    """
+
+    def __init__(self, db_path: Path, legacy_file: Path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._dirty: set[str] = set()
+        self._dirty_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._trimmer: threading.Thread | None = None
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self.conn()
+        conn.executescript(_SCHEMA)
+        self._migrate_json(conn, legacy_file)
+
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=10.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _migrate_json(self, conn: sqlite3.Connection, legacy_file: Path) -> None:
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return
+        rows: list[tuple] = []
+        if legacy_file.exists():
+            try:
+                data = json.loads(legacy_file.read_text(encoding="utf-8"))
+            except Exception:
+                data = {}
+            users = data.get("users") if isinstance(data, dict) else None
+            for key, user_store in (users or {}).items():
+                for msg in (user_store or {}).get("messages") or []:
+                    if not isinstance(msg, dict) or not msg.get("text"):
+                        continue
+                    rows.append((
+                        str(key), str(msg.get("role") or "user"), str(msg["text"]),
+                        str(msg.get("created_at") or _now()), str(msg.get("surface") or "chat"),
+                        msg.get("provider"),
+                    ))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO messages (user, role, text, created_at, surface, provider) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)", (_now(),))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if legacy_file.exists():
+            try:
+                legacy_file.rename(legacy_file.with_name(legacy_file.name + ".migrated"))
+            except OSError:
+                pass
+            logger.info("Migrated %d chat messages from %s", len(rows), legacy_file)
+
+    # ── Retention ────────────────────────────────────────────────────────────
+
+    def mark_dirty(self, key: str) -> None:
+        with self._dirty_lock:
+            self._dirty.add(key)
+            if self._trimmer is None:
+                self._trimmer = threading.Thread(target=self._trim_loop, name="chat-history-trim", daemon=True)
+                self._trimmer.start()
+        self._wake.set()
+
+    def _trim_loop(self) -> None:
+        while True:
+            self._wake.wait()
+            time.sleep(_TRIM_DELAY)
+            self._wake.clear()
+            with self._dirty_lock:
+                keys, self._dirty = self._dirty, set()
+            for key in keys:
+                try:
+                    self.trim(key)
+                except sqlite3.Error as exc:
+                    logger.warning("Chat history trim failed for %s: %s", key, exc)
+
+    def trim(self, key: str, keep: int | None = None) -> int:
+        """Delete all but the newest ``keep`` messages of one user."""
+        keep = _MAX_MESSAGES if keep is None else keep
+        cur = self.conn().execute(
+            """
+            DELETE FROM messages WHERE user = ? AND id <= (
+                SELECT id FROM messages WHERE user = ? ORDER BY id DESC LIMIT 1 OFFSET ?
+            )
+            """,
+            (key, key, max(0, keep)),
+        )
+        return cur.rowcount
+
+
+_stores: dict[Path, _HistoryStore] = {}
+
+
+def _store() -> _HistoryStore:
+    path = _db_path()
+    store = _stores.get(path)
+    if store is None:
+        with _lock:
+            store = _stores.get(path)
+            if store is None:
+                store = _stores[path] = _HistoryStore(path, HISTORY_FILE)
+    return store
 
 
 def _user_key(user: dict[str, Any] | None) -> str:
     return str((user or {}).get("username") or "anonymous").strip().lower() or "anonymous"
 
 
-def list_messages(user: dict[str, Any] | None, limit: int = 120) -> list[dict[str, Any]]:
+def _row_to_message(row: sqlite3.Row) -> dict[str, Any]:
+    message = {
+        "id": row["id"],
+        "role": row["role"],
+        "text": row["text"],
+        "created_at": row["created_at"],
+        "surface": row["surface"],
+    }
+    if row["provider"] is not None:
+        message["provider"] = row["provider"]
+    return message
+
+
+def list_messages(
+    user: dict[str, Any] | None,
+    limit: int = 120,
+    before: int | None = None,
+) -> list[dict[str, Any]]:
+    """Newest ``limit`` messages of a user, oldest first.
+
+    Pass the ``id`` of the oldest message already shown as ``before`` to page
+    further back.
+    """
     key = _user_key(user)
-    with _lock:
-        store = _read_store()
-        messages = list(store["users"].get(key, {}).get("messages") or [])
-    return messages[-max(1, min(limit, _MAX_MESSAGES)):]
+    limit = max(1, min(limit, _MAX_MESSAGES))
+    if before is None:
+        rows = _store().conn().execute(
+            "SELECT * FROM messages WHERE user = ? ORDER BY id DESC LIMIT ?", (key, limit),
+        ).fetchall()
+    else:
+        rows = _store().conn().execute(
+            "SELECT * FROM messages WHERE user = ? AND id < ? ORDER BY id DESC LIMIT ?", (key, int(before), limit),
+        ).fetchall()
+    return [_row_to_message(row) for row in reversed(rows)]
 
 
 def append_exchange(
@@ -62,31 +221,35 @@ def append_exchange(
         return
 
     key = _user_key(user)
-    created = _now()
-    new_messages = []
+    rows = []
     if prompt:
-        new_messages.append({"role": "user", "text": prompt, "created_at": created, "surface": surface})
+        rows.append((key, "user", prompt, _now(), surface, None))
     if response:
-        new_messages.append({
-            "role": "assistant",
-            "text": response,
-            "created_at": _now(),
-            "surface": surface,
-            "provider": provider,
-        })
-
-    with _lock:
-        store = _read_store()
-        user_store = store["users"].setdefault(key, {"messages": []})
-        user_store["messages"] = (list(user_store.get("messages") or []) + new_messages)[-_MAX_MESSAGES:]
-        user_store["updated_at"] = _now()
-        _write_store(store)
+        rows.append((key, "assistant", response, _now(), surface, provider))
+
+    store = _store()
+    conn = store.conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(
+            "INSERT INTO messages (user, role, text, created_at, surface, provider) VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    store.mark_dirty(key)
+
+
+def trim_history(user: dict[str, Any] | None = None) -> int:
+    """Apply retention now (one user, or everyone). Returns rows deleted."""
+    store = _store()
+    if user is not None:
+        return store.trim(_user_key(user))
+    keys = [r[0] for r in store.conn().execute("SELECT DISTINCT user FROM messages").fetchall()]
+    return sum(store.trim(key) for key in keys)
 
 
 def clear_messages(user: dict[str, Any] | None) -> None:
-    key = _user_key(user)
-    with _lock:
-        store = _read_store()
-        if key in store["users"]:
-            del store["users"][key]
-        _write_store(store)
+    _store().conn().execute("DELETE FROM messages WHERE user = ?", (_user_key(user),))
@@ -16,7 +16,8 @@ from typing import Any
 
 from fastapi import Header, HTTPException
 
-from .state import ADMIN_TOKEN, DATASETS_DIR, DashboardState, MODEL_OUTPUT_DIRS, OUTPUTS_DIR
+from .registry import FileMemo, ScanCache
+from .state import ADMIN_TOKEN, DATASETS_DIR, LORA_BUDGET_MB, LORA_DIR, DashboardState, MODEL_OUTPUT_DIRS, OUTPUTS_DIR
 
 logger = logging.getLogger(__name__)
 
@@ -71,13 +72,19 @@ def _require_admin(token: str | None = Header(default=None, alias="X-Atulya-Toke
     return user
 
 
-def _checkpoint_index() -> dict[str, Path]:
+_PENDING_VERSIONS: list[Path] = []
+
+
+def _scan_checkpoints() -> dict[str, Path]:
     index: dict[str, Path] = {}
     candidates: list[tuple[int, float, Path]] = []
+    pending: list[Path] = []
     for output_dir in MODEL_OUTPUT_DIRS:
         versions = output_dir / "versions"
         if versions.exists():
-            items = [item for item in versions.iterdir() if item.is_dir() and (item / "metadata.json").exists()]
+            dirs = [item for item in versions.iterdir() if item.is_dir()]
+            items = [item for item in dirs if (item / "metadata.json").exists()]
+            pending += [item for item in dirs if item not in items]
             for item in items:
                 meta = _read_metadata(item)
                 index[item.name] = item
@@ -88,19 +95,47 @@ def _checkpoint_index() -> dict[str, Path]:
             candidates.append((_checkpoint_step(output_dir.name, meta), (output_dir / "metadata.json").stat().st_mtime, output_dir))
     if candidates:
         index["latest"] = max(candidates, key=lambda item: (item[0], item[1]))[2]
+    _PENDING_VERSIONS[:] = pending
     return index
 
 
-def _read_metadata(path: str | Path) -> dict:
-    meta = Path(path) / "metadata.json"
-    if not meta.exists():
-        return {}
+_CHECKPOINTS = ScanCache(_scan_checkpoints)
+
+
+def _checkpoint_index() -> dict[str, Path]:
+    """Checkpoint id → directory, rescanned only when an output dir changes.
+
+    Checkpoint saves add a ``versions/`` entry or rewrite the top-level
+    ``metadata.json``; both are in the watch list, as are version dirs seen
+    before their ``metadata.json`` was written.
+    """
+    watch = []
+    for output_dir in MODEL_OUTPUT_DIRS:
+        watch += [output_dir, output_dir / "versions", output_dir / "metadata.json"]
+    watch += _PENDING_VERSIONS
+    return dict(_CHECKPOINTS.get(watch))
+
+
+def _parse_metadata(meta: Path) -> dict:
     try:
         return json.loads(meta.read_text(encoding="utf-8"))
     except Exception:
         return {}
 
 
+_METADATA = FileMemo(_parse_metadata)
+
+
+def _read_metadata(path: str | Path) -> dict:
+    return dict(_METADATA.get(Path(path) / "metadata.json", default={}))
+
+
+def _invalidate_registries() -> None:
+    """Drop cached checkpoint/dataset scans (training start/stop, dataset writes)."""
+    _CHECKPOINTS.invalidate()
+    _DATASETS.invalidate()
+
+
 def _checkpoint_step(name: str, meta: dict) -> int:
     return int(meta.get("train_step") or meta.get("loss_count") or 0)
 
@@ -148,7 +183,21 @@ def _load_cached_model(model_path: Path):
     return DashboardState.MODEL_CACHE[key]
 
 
-def _dataset_index() -> dict[str, Path]:
+def _adapter_server(model_path: Path):
+    """Topic-adapter server bound to the cached model (rebuilt if the model reloads)."""
+    from tantra.npdna.adapter_serving import AdapterServer
+
+    core = _load_cached_model(model_path)
+    key = str(model_path.resolve())
+    with _MODEL_CACHE_LOCK:
+        server = DashboardState.ADAPTER_SERVERS.get(key)
+        if server is None or server.core is not core:
+            server = AdapterServer(core, LORA_DIR, budget_mb=LORA_BUDGET_MB)
+            DashboardState.ADAPTER_SERVERS[key] = server
+    return server
+
+
+def _scan_datasets() -> dict[str, Path]:
     if not DATASETS_DIR.exists():
         return {}
     files = list(DATASETS_DIR.glob("*.jsonl"))
@@ -158,6 +207,13 @@ def _dataset_index() -> dict[str, Path]:
     return {p.name: p for p in sorted(files)}
 
 
+_DATASETS = ScanCache(_scan_datasets)
+
+
+def _dataset_index() -> dict[str, Path]:
+    return dict(_DATASETS.get([DATASETS_DIR]))
+
+
 def _file_size_label(size: int) -> str:
     units = ["B", "KB", "MB", "GB"]
     value = float(size)
@@ -168,20 +224,21 @@ def _file_size_label(size: int) -> str:
     return f"{size} B"
 
 
-def _dataset_records(path: Path, limit: int = 3) -> tuple[int | None, list[Any]]:
+def _scan_records(path: Path, limit: int) -> tuple[int | None, list[Any]]:
     samples: list[Any] = []
     count = 0
     try:
         if path.suffix.lower() == ".jsonl":
-            for line in path.read_text(encoding="utf-8").splitlines():
-                if not line.strip():
-                    continue
-                count += 1
-                if len(samples) < limit:
-                    try:
-                        samples.append(json.loads(line))
-                    except Exception:
-                        samples.append(line[:300])
+            with path.open("r", encoding="utf-8") as handle:
+                for line in handle:
+                    if not line.strip():
+                        continue
+                    count += 1
+                    if len(samples) < limit:
+                        try:
+                            samples.append(json.loads(line))
+                        except Exception:
+                            samples.append(line.rstrip("\r\n")[:300])
             return count, samples
         data = json.loads(path.read_text(encoding="utf-8"))
         if isinstance(data, list):
@@ -196,6 +253,15 @@ def _dataset_records(path: Path, limit: int = 3) -> tuple[int | None, list[Any]]
     return None, []
 
 
+_RECORDS = FileMemo(_scan_records)
+
+
+def _dataset_records(path: Path, limit: int = 3) -> tuple[int | None, list[Any]]:
+    """Row count and first samples, re-read only when (path, size, mtime) changes."""
+    count, samples = _RECORDS.get(path, limit, default=(None, []))
+    return count, list(samples)
+
+
 def _dataset_registry() -> list[dict]:
     datasets = []
     for dataset_id, path in _dataset_index().items():
@@ -269,17 +335,29 @@ def _latest_metrics_path() -> Path | None:
     return max(candidates, key=lambda p: p.stat().st_mtime)
 
 
+_STATUS_CACHE: dict[str, Any] = {"key": None, "data": None}
+
+
 def _read_status_file() -> dict:
+    """Latest train_status.json, re-parsed only when the file changes."""
     path = _latest_status_path()
     if not path:
         return {}
+    try:
+        st = path.stat()
+        key = (str(path), st.st_mtime_ns, st.st_size)
+    except OSError:
+        key = None
+    if key is not None and _STATUS_CACHE["key"] == key:
+        return dict(_STATUS_CACHE["data"])
     try:
         data = json.loads(path.read_text(encoding="utf-8"))
         data["_path"] = str(path)
-        return data
     except Exception as exc:
         logger.debug("Failed to read status file %s: %s", path, exc)
         return {"_path": str(path), "phase": "unreadable"}
+    _STATUS_CACHE.update(key=key, data=data)
+    return dict(data)
 
 
 def _run_history() -> list[dict]:
@@ -0,0 +1,249 @@
+"""Incremental follower for the trainer's ``live_metrics.jsonl``.
+
+The dashboard used to re-open and re-parse the tail of the metrics file on
+every poll. ``MetricsTailer`` instead remembers its byte offset, reads only
+what the trainer appended, keeps the most recent records in a ring buffer
+with a monotonically increasing cursor, and (when running as a task) pushes
+each delta to a callback — the dashboard wires that to the ``/api/ws``
+training topic.
+
+Wake-ups come from inotify on Linux (via libc, no extra dependency) and fall
+back to offset polling elsewhere. A truncated, replaced or re-resolved file
+resets the window.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import sys
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+
+class _Inotify:
+    """Minimal inotify watcher over libc; ``None`` from ``create`` when unavailable."""
+
+    def __init__(self, libc, fd: int):
+        self._libc = libc
+        self.fd = fd
+        self._watches: dict[str, int] = {}
+
+    @classmethod
+    def create(cls) -> "_Inotify | None":
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        return cls(libc, fd)
+
+    def watch_dir(self, directory: Path) -> bool:
+        key = str(directory)
+        if key in self._watches:
+            return True
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        wd = self._libc.inotify_add_watch(self.fd, key.encode(), mask)
+        if wd < 0:
+            return False
+        self._watches[key] = wd
+        return True
+
+    def drain(self) -> None:
+        try:
+            while os.read(self.fd, 4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def close(self) -> None:
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class MetricsTailer:
+    """Follow a JSONL metrics file incrementally.
+
+    Args:
+        resolve: Returns the metrics file to follow (re-evaluated on each poll,
+            so a new training run or version directory is picked up)
+        window: Records kept in the ring buffer
+        poll_interval: Seconds between offset polls without inotify (and the
+            inotify safety-net timeout)
+    """
+
+    def __init__(self, resolve: Callable[[], Path | None], window: int = 500, poll_interval: float = 1.0):
+        self.resolve = resolve
+        self.window = window
+        self.poll_interval = poll_interval
+        self.records: deque[tuple[int, dict[str, Any]]] = deque(maxlen=window)
+        self.cursor = 0          # seq of the newest record
+        self.generation = 0      # bumped whenever the window is reset
+        self.path: Path | None = None
+        self._inode: tuple[int, int] | None = None
+        self._offset = 0
+        self._partial = b""
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _reset(self, path: Path | None) -> None:
+        self.path = path
+        self._inode = None
+        self._offset = 0
+        self._partial = b""
+        self.records.clear()
+        self.generation += 1
+
+    def poll(self) -> list[dict[str, Any]]:
+        """Read newly appended records. Returns them (possibly empty)."""
+        with self._lock:
+            path = self.resolve()
+            if path != self.path:
+                self._reset(path)
+            if path is None:
+                return []
+            try:
+                st = path.stat()
+            except OSError:
+                return []
+            inode = (st.st_dev, st.st_ino)
+            if self._inode is not None and (inode != self._inode or st.st_size < self._offset):
+                self._reset(path)
+            self._inode = inode
+            if st.st_size == self._offset:
+                return []
+
+            if self._offset == 0 and not self.records:
+                self._offset = self._seek_tail(path, st.st_size)
+            try:
+                with open(path, "rb") as f:
+                    f.seek(self._offset)
+                    chunk = f.read(st.st_size - self._offset)
+            except OSError as exc:
+                logger.debug("Metrics tail read failed for %s: %s", path, exc)
+                return []
+            self._offset += len(chunk)
+            data = self._partial + chunk
+            lines = data.split(b"\n")
+            self._partial = lines.pop()  # incomplete last line (b"" if none)
+
+            fresh = []
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self.cursor += 1
+                self.records.append((self.cursor, record))
+                fresh.append(record)
+            return fresh[-self.window:]
+
+    def _seek_tail(self, path: Path, size: int) -> int:
+        """Start offset for a cold start: roughly the last ``window`` lines."""
+        block = 64 * 1024
+        pos = size
+        newlines = 0
+        with open(path, "rb") as f:
+            while pos > 0 and newlines <= self.window:
+                step = min(block, pos)
+                pos -= step
+                f.seek(pos)
+                newlines += f.read(step).count(b"\n")
+            if pos == 0:
+                return 0
+            f.seek(pos)
+            f.readline()  # align to a line start
+            return f.tell()
+
+    def since(self, cursor: int | None = None, generation: int | None = None) -> dict[str, Any]:
+        """Cached window, or only records newer than ``cursor``.
+
+        A stale ``generation`` (the file was reset since the client's cursor)
+        returns the whole window with ``reset: True``.
+        """
+        with self._lock:
+            reset = generation is not None and generation != self.generation
+            if cursor is None or reset:
+                items = list(self.records)
+            else:
+                items = [(seq, rec) for seq, rec in self.records if seq > cursor]
+            return {
+                "metrics": [rec for _, rec in items],
+                "cursor": self.cursor,
+                "generation": self.generation,
+                "reset": reset,
+                "path": str(self.path) if self.path else "",
+            }
+
+    # ── Background follower ──────────────────────────────────────────────────
+
+    def start(self, on_records: Callable[[list[dict[str, Any]], int], Awaitable[None]]) -> asyncio.Task:
+        self._task = asyncio.get_running_loop().create_task(self._run(on_records))
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    async def _run(self, on_records) -> None:
+        loop = asyncio.get_running_loop()
+        notify = _Inotify.create()
+        wake = asyncio.Event()
+        if notify is not None:
+            def _on_event() -> None:
+                notify.drain()
+                wake.set()
+            loop.add_reader(notify.fd, _on_event)
+        try:
+            while True:
+                if notify is not None:
+                    path = self.path or self.resolve()
+                    if path is not None:
+                        notify.watch_dir(path.parent)
+                fresh = await asyncio.to_thread(self.poll)
+                if fresh:
+                    try:
+                        await on_records(fresh, self.cursor)
+                    except Exception as exc:
+                        logger.debug("Metrics push failed: %s", exc)
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout=self.poll_interval if notify is None else 5.0)
+                except asyncio.TimeoutError:
+                    pass
+                wake.clear()
+        finally:
+            if notify is not None:
+                loop.remove_reader(notify.fd)
+                notify.close()
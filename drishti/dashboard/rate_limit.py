@@ -0,0 +1,222 @@
+"""Token-bucket rate limiting for the Drishti HTTP middleware.
+
+Each (rule, client) pair owns one bucket of ``burst`` tokens refilled at
+``rate`` tokens/second, so a check is O(1) and memory per client is two
+floats. Clients are keyed by username when the request carries a valid
+session token, otherwise by IP.
+
+Backends:
+  - ``MemoryBucketStore``: sharded, LRU-bounded dict (per process).
+  - ``SQLiteBucketStore``: one WAL-mode SQLite table shared by every uvicorn
+    worker on the host, so ``--workers N`` still enforces a single limit.
+    Its ``take`` may wait on the write lock, so ``RateLimiter.acheck`` runs it
+    in a worker thread instead of on the event loop.
+
+Configuration (environment):
+  ATULYA_RATE_LIMIT_BACKEND   memory (default) | sqlite
+  ATULYA_RATE_LIMIT_DB        SQLite path (default config/rate_limit.db)
+  ATULYA_RATE_LIMIT_MAX_KEYS  tracked clients per process (default 10000)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_DB = _ROOT / "config" / "rate_limit.db"
+
+
+@dataclass(frozen=True)
+class RateRule:
+    """Budget for requests whose path starts with ``prefix``.
+
+    Args:
+        name: Bucket namespace (rules sharing a name share a budget)
+        prefix: Path prefix; the longest matching prefix wins
+        rate: Sustained requests per second
+        burst: Bucket capacity (requests allowed back-to-back)
+        exact: Match ``prefix`` as the whole path only (checked before prefixes)
+    """
+
+    name: str
+    prefix: str
+    rate: float
+    burst: float
+    exact: bool = False
+
+
+DEFAULT_RULES: tuple[RateRule, ...] = (
+    RateRule("default", "/", rate=100 / 60, burst=100),
+    RateRule("static", "/assets", rate=10.0, burst=300),
+    # Generation endpoints only; /api/chat/history reads stay on the default budget.
+    RateRule("chat", "/api/chat", rate=20 / 60, burst=10, exact=True),
+    RateRule("chat", "/api/chat/stream", rate=20 / 60, burst=10, exact=True),
+    RateRule("chat", "/v1/chat", rate=20 / 60, burst=10),
+    # Voice generation only; /api/voice/voices and the stream stats poll stay on the default budget.
+    RateRule("voice", "/api/voice/chat", rate=20 / 60, burst=10, exact=True),
+    RateRule("voice", "/api/voice/chat/stream", rate=20 / 60, burst=10, exact=True),
+    RateRule("voice", "/api/voice/tts", rate=20 / 60, burst=10, exact=True),
+    RateRule("voice", "/api/voice/stt", rate=20 / 60, burst=10, exact=True),
+    RateRule("model", "/api/model/generate", rate=20 / 60, burst=10),
+    RateRule("login", "/api/auth/login", rate=10 / 60, burst=5),
+    RateRule("upload", "/api/upload", rate=10 / 60, burst=5),
+)
+
+
+class MemoryBucketStore:
+    """In-process buckets, sharded by key hash and LRU-bounded per shard."""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = 10_000, shards: int = 16):
+        self.shards = max(1, shards)
+        self.max_per_shard = max(1, max_keys // self.shards)
+        self._buckets: list[OrderedDict[str, list[float]]] = [OrderedDict() for _ in range(self.shards)]
+        self._locks = [threading.Lock() for _ in range(self.shards)]
+
+    def __len__(self) -> int:
+        return sum(len(b) for b in self._buckets)
+
+    def clear(self) -> None:
+        for lock, buckets in zip(self._locks, self._buckets):
+            with lock:
+                buckets.clear()
+
+    def take(self, key: str, rate: float, burst: float, now: float, cost: float = 1.0) -> tuple[bool, float]:
+        """Spend ``cost`` tokens. Returns ``(allowed, retry_after_seconds)``."""
+        i = zlib.crc32(key.encode()) % self.shards
+        buckets = self._buckets[i]
+        with self._locks[i]:
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [burst, now]
+                if len(buckets) > self.max_per_shard:
+                    buckets.popitem(last=False)
+            else:
+                buckets.move_to_end(key)
+            tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                return True, 0.0
+            bucket[0] = tokens
+            return False, (cost - tokens) / rate if rate > 0 else float("inf")
+
+
+class SQLiteBucketStore:
+    """Buckets in a local SQLite table, shared across worker processes."""
+
+    blocking = True  # BEGIN IMMEDIATE can wait up to the 5 s busy timeout
+    _PRUNE_EVERY = 1000
+
+    def __init__(self, path: Path | str = DEFAULT_DB, idle_ttl: float = 3600.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.idle_ttl = idle_ttl
+        self._local = threading.local()
+        self._ops = 0
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM buckets").fetchone()[0]
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM buckets")
+
+    def take(self, key: str, rate: float, burst: float, now: float, cost: float = 1.0) -> tuple[bool, float]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now),
+            )
+            self._ops += 1
+            if self._ops % self._PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM buckets WHERE updated < ?", (now - self.idle_ttl,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if allowed:
+            return True, 0.0
+        return False, (cost - tokens) / rate if rate > 0 else float("inf")
+
+
+class RateLimiter:
+    """Route-aware token-bucket limiter.
+
+    Args:
+        rules: Budgets by path prefix; must include a ``"/"`` fallback
+        store: Bucket backend (``MemoryBucketStore`` or ``SQLiteBucketStore``)
+    """
+
+    def __init__(self, rules: tuple[RateRule, ...] = DEFAULT_RULES, store=None):
+        if not any(r.prefix == "/" and not r.exact for r in rules):
+            raise ValueError("RateLimiter needs a '/' fallback rule")
+        self.exact = {r.prefix: r for r in rules if r.exact}
+        self.rules = sorted((r for r in rules if not r.exact), key=lambda r: len(r.prefix), reverse=True)
+        self.store = store if store is not None else MemoryBucketStore()
+
+    def rule_for(self, path: str) -> RateRule:
+        rule = self.exact.get(path)
+        if rule is not None:
+            return rule
+        for rule in self.rules:
+            if path.startswith(rule.prefix):
+                return rule
+        return self.rules[-1]
+
+    def check(self, path: str, client: str, now: float | None = None) -> tuple[bool, float, RateRule]:
+        """Spend one request for ``client`` on ``path``."""
+        rule = self.rule_for(path)
+        allowed, retry_after = self.store.take(
+            f"{rule.name}:{client}", rule.rate, rule.burst, time.time() if now is None else now,
+        )
+        return allowed, retry_after, rule
+
+    async def acheck(self, path: str, client: str, now: float | None = None) -> tuple[bool, float, RateRule]:
+        """``check`` for async callers; a blocking store runs in a worker thread."""
+        if getattr(self.store, "blocking", False):
+            return await asyncio.to_thread(self.check, path, client, now)
+        return self.check(path, client, now)
+
+
+def limiter_from_env() -> RateLimiter:
+    backend = os.environ.get("ATULYA_RATE_LIMIT_BACKEND", "memory").strip().lower()
+    if backend == "sqlite":
+        path = os.environ.get("ATULYA_RATE_LIMIT_DB") or DEFAULT_DB
+        try:
+            return RateLimiter(store=SQLiteBucketStore(path))
+        except sqlite3.Error as exc:
+            logger.warning("Shared rate-limit store unavailable (%s); using in-process buckets", exc)
+    max_keys = int(os.environ.get("ATULYA_RATE_LIMIT_MAX_KEYS", "10000"))
+    return RateLimiter(store=MemoryBucketStore(max_keys=max_keys))
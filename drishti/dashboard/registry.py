@@ -0,0 +1,119 @@
+"""Memoized filesystem registries for the dashboard.
+
+``/api/health``, ``/api/dashboard/bootstrap``, ``/api/checkpoints`` and the
+cortex routes used to rescan the output and dataset directories, parse every
+``metadata.json`` and read whole JSONL files to count rows on each request.
+Two small caches replace that:
+
+  - ``FileMemo``: a value derived from one file (parsed metadata, row count),
+    recomputed only when the file's ``(size, mtime_ns)`` changes.
+  - ``ScanCache``: the result of a directory scan, rebuilt only when one of its
+    watched paths changes mtime, when ``invalidate()`` is called (training
+    start/stop), or after ``max_age`` seconds as a safety net for in-place
+    writes that do not touch a directory mtime.
+
+Rebuilds go through ``FileMemo`` so only files that changed are re-read.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+MAX_AGE = float(os.environ.get("ATULYA_REGISTRY_MAX_AGE", "30"))
+
+
+def _stamp(path: Path) -> tuple[int, int] | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class FileMemo:
+    """Per-file memo keyed by ``(path, *args)`` and validated by stat.
+
+    Args:
+        compute: ``compute(path, *args)`` producing the cached value
+        max_entries: LRU bound
+    """
+
+    def __init__(self, compute: Callable[..., Any], max_entries: int = 4096):
+        self.compute = compute
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[tuple[int, int], Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: Path, *args: Any, default: Any = None) -> Any:
+        stamp = _stamp(path)
+        if stamp is None:
+            return default
+        key = (str(path), *args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = self.compute(path, *args)
+        with self._lock:
+            self._entries[key] = (stamp, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, path: Path | None = None) -> None:
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] == str(path)]:
+                del self._entries[key]
+
+
+class ScanCache:
+    """Cache one scan result per set of roots.
+
+    Args:
+        build: ``build()`` performing the scan
+        max_age: Seconds after which the scan is redone even if no watched
+            mtime moved
+    """
+
+    def __init__(self, build: Callable[[], Any], max_age: float = MAX_AGE):
+        self.build = build
+        self.max_age = max_age
+        self._key: tuple | None = None
+        self._value: Any = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.builds = 0
+
+    def get(self, watch: Iterable[Path]) -> Any:
+        key = tuple((str(p), _stamp(p)) for p in watch)
+        now = time.monotonic()
+        with self._lock:
+            if self._key == key and now - self._built_at < self.max_age:
+                return self._value
+            generation = self.generation
+        value = self.build()
+        with self._lock:
+            if generation == self.generation:  # not invalidated mid-build
+                self._key, self._value, self._built_at = key, value, now
+            self.builds += 1
+        return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._key = None
+            self.generation += 1
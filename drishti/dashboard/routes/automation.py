@@ -107,6 +107,14 @@ def api_cron_update_job(job_id: str, body: dict, _admin: dict = Depends(_require
     return {"ok": False, "error": "Job not found"}
 
 
+@router.get("/api/cron/stats")
+def api_cron_stats(request: Request, _admin: dict = Depends(_require_admin)):
+    runner = getattr(request.app.state, "automation_runner", None)
+    if runner is None:
+        return {"running": False, "inflight": [], "next_due": None, "jobs": {}}
+    return runner.stats()
+
+
 @router.post("/api/cron/jobs/{job_id}/run")
 async def api_cron_run_job(
     request: Request,
@@ -7,6 +7,7 @@ from fastapi.responses import StreamingResponse
 from drishti.dashboard import chat_history
 from drishti.dashboard.helpers import _checkpoint_index, _require_auth
 from drishti.dashboard.state import MAX_CHAT_TOKENS, MAX_PROMPT_CHARS
+from tantra.core.security import SECRET_SCANNER
 
 router = APIRouter()
 
@@ -57,9 +58,10 @@ async def api_chat(request: Request, body: dict, token: str | None = Header(defa
         approved_tool_call=body.get("approved_tool") or None,
         provider=str(body.get("provider") or model_id),
     )
-    chat_history.append_exchange(user, prompt, response.text, provider=response.provider)
+    text = SECRET_SCANNER.rewrite(response.text)
+    chat_history.append_exchange(user, prompt, text, provider=response.provider)
     return {
-        "response": response.text[:MAX_CHAT_TOKENS * 8],
+        "response": text[:MAX_CHAT_TOKENS * 8],
         "model_id": model_id,
         "provider": response.provider,
         "steps": response.tool_steps,
@@ -91,6 +93,8 @@ async def api_chat_stream(request: Request, body: dict, token: str | None = Head
 
             llm = getattr(request.app.state, "llm", None) or get_default_llm()
             response_parts: list[str] = []
+            # Secrets are redacted as tokens arrive; only a short tail is held back.
+            redactor = SECRET_SCANNER.stream()
             async for event in llm.stream(
                 prompt,
                 history=history,
@@ -98,11 +102,17 @@ async def api_chat_stream(request: Request, body: dict, token: str | None = Head
                 provider=str(body.get("provider") or model_id),
             ):
                 if event.type == "token":
-                    response_parts.append(event.content)
-                    yield f"data: {json.dumps({'token': event.content})}\n\n"
+                    piece = redactor.feed(event.content)
+                    if piece:
+                        response_parts.append(piece)
+                        yield f"data: {json.dumps({'token': piece})}\n\n"
                 elif event.type == "tool":
                     yield f"data: {json.dumps({'tool': event.metadata})}\n\n"
                 elif event.type == "done":
+                    tail = redactor.finish()
+                    if tail:
+                        response_parts.append(tail)
+                        yield f"data: {json.dumps({'token': tail})}\n\n"
                     chat_history.append_exchange(
                         user,
                         prompt,
@@ -119,9 +129,15 @@ async def api_chat_stream(request: Request, body: dict, token: str | None = Head
 
 
 @router.get("/api/chat/history")
-async def api_chat_history(token: str | None = Header(default=None, alias="X-Atulya-Token")):
+async def api_chat_history(
+    limit: int = 120,
+    before: int | None = None,
+    token: str | None = Header(default=None, alias="X-Atulya-Token"),
+):
     user = _require_auth(token)
-    return {"messages": chat_history.list_messages(user)}
+    messages = chat_history.list_messages(user, limit=limit, before=before)
+    next_before = messages[0]["id"] if len(messages) >= max(1, limit) else None
+    return {"messages": messages, "next_before": next_before}
 
 
 @router.delete("/api/chat/history")
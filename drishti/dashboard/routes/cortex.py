@@ -1,11 +1,23 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Header
+from fastapi import APIRouter, Header, HTTPException
 
 from drishti.dashboard.helpers import _checkpoint_index, _read_metadata, _require_admin
+from drishti.dashboard.registry import FileMemo
+from tantra.npdna.cortex_index import META_FILE, SORT_COLUMNS, CortexIndex
 
 router = APIRouter()
 
+# Opened index per checkpoint, reopened when its cortex_meta.json changes.
+_CORTEX_INDEXES = FileMemo(lambda meta_path: CortexIndex.open(meta_path.parent), max_entries=32)
+
+
+def _cortex_index(model_id: str) -> CortexIndex | None:
+    path = _checkpoint_index().get(model_id)
+    if not path:
+        return None
+    return _CORTEX_INDEXES.get(path / "cortex" / META_FILE)
+
 
 @router.get("/api/cortex/stats")
 @router.get("/api/cortex/status")
@@ -16,6 +28,7 @@ def api_cortex_stats(model_id: str = "latest", _admin: str | None = Header(defau
         return {"exists": False, "entries": 0}
     meta = _read_metadata(path)
     cortex_dir = path / "cortex"
+    index = _cortex_index(model_id)
     return {
         "exists": cortex_dir.exists(),
         "model_id": model_id,
@@ -24,6 +37,8 @@ def api_cortex_stats(model_id: str = "latest", _admin: str | None = Header(defau
         "max_entries": int(meta.get("cortex_max_entries") or 0),
         "top_k": int(meta.get("cortex_top_k") or 0),
         "path": str(cortex_dir),
+        "indexed_entries": index.total if index else 0,
+        "topics": index.topics(limit=20) if index else [],
     }
 
 
@@ -32,17 +47,22 @@ def api_cortex_entries(
     model_id: str = "latest",
     page: int = 1,
     limit: int = 50,
+    topic: str = "",
+    q: str = "",
+    sort: str = "index",
+    order: str = "asc",
     _admin: str | None = Header(default=None, alias="X-Atulya-Token"),
 ):
+    """One page of cortex entries, filtered by ``topic`` and text ``q``.
+
+    ``sort`` is one of index, topic, importance, access_count, created_at.
+    """
     _require_admin(_admin)
-    path = _checkpoint_index().get(model_id)
-    if not path:
+    if sort not in SORT_COLUMNS:
+        raise HTTPException(400, f"sort must be one of: {', '.join(SORT_COLUMNS)}")
+    limit = max(1, min(limit, 500))
+    index = _cortex_index(model_id)
+    if index is None:
         return {"entries": [], "total": 0, "page": page, "limit": limit}
-    meta_path = path / "cortex" / "cortex_meta.json"
-    if not meta_path.exists():
-        return {"entries": [], "total": 0, "page": page, "limit": limit}
-    import json
-
-    entries = json.loads(meta_path.read_text(encoding="utf-8"))
-    start = max(0, (page - 1) * limit)
-    return {"entries": entries[start:start + limit], "total": len(entries), "page": page, "limit": limit}
+    entries, total = index.query(page=page, limit=limit, topic=topic, q=q, sort=sort, order=order)
+    return {"entries": entries, "total": total, "page": page, "limit": limit}
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Header
+from fastapi import APIRouter, Header, HTTPException
 
-from drishti.dashboard.helpers import _checkpoint_index, _read_metadata, _require_admin
-from drishti.dashboard.state import DashboardState
+from drishti.dashboard.helpers import _adapter_server, _checkpoint_index, _read_metadata, _require_admin, _require_auth
+from drishti.dashboard.state import MAX_CHAT_TOKENS, MAX_PROMPT_CHARS, DashboardState
 
 router = APIRouter()
 
@@ -76,3 +76,45 @@ def api_checkpoints(_admin: str | None = Header(default=None, alias="X-Atulya-To
     return {"checkpoints": items, "models": items}
 
 
+
+
+@router.get("/api/model/adapters")
+def api_model_adapters(model_id: str = "latest", _admin: str | None = Header(default=None, alias="X-Atulya-Token")):
+    _require_admin(_admin)
+    path = _checkpoint_index().get(model_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Model not found")
+    server = _adapter_server(path)
+    return {"model_id": model_id, "available": server.available(), "resident": server.resident(),
+            "resident_bytes": server.resident_bytes, "budget_bytes": server.budget_bytes}
+
+
+@router.post("/api/model/adapters/reload")
+def api_model_adapters_reload(body: dict, _admin: str | None = Header(default=None, alias="X-Atulya-Token")):
+    _require_admin(_admin)
+    path = _checkpoint_index().get(str(body.get("model_id") or "latest"))
+    if not path:
+        raise HTTPException(status_code=404, detail="Model not found")
+    try:
+        key = _adapter_server(path).reload(str(body.get("topic") or ""))
+    except (ValueError, FileNotFoundError) as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    return {"status": "reloaded", "key": key}
+
+
+@router.post("/api/model/generate")
+def api_model_generate(body: dict, token: str | None = Header(default=None, alias="X-Atulya-Token")):
+    """Generate with the local NP-DNA model, optionally through a topic adapter."""
+    _require_auth(token)
+    model_id = str(body.get("model_id") or "latest")
+    path = _checkpoint_index().get(model_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Model not found")
+    prompt = str(body.get("prompt") or "")[:MAX_PROMPT_CHARS]
+    topic = str(body.get("topic") or "") or None
+    max_tokens = max(1, min(int(body.get("max_tokens") or 128), MAX_CHAT_TOKENS))
+    try:
+        text = _adapter_server(path).generate(prompt, topic=topic, max_tokens=max_tokens)
+    except (ValueError, FileNotFoundError) as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    return {"response": text, "model_id": model_id, "topic": topic}
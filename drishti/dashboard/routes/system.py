@@ -5,6 +5,9 @@ import time
 
 import psutil
 from fastapi import APIRouter, Header
+from fastapi.responses import PlainTextResponse
+
+from atulya.observability import get_metrics
 
 from tantra.npdna.config import CONFIGS, PREFERRED_CONFIG_NAMES
 from drishti.dashboard.helpers import (
@@ -130,9 +133,14 @@ def api_system(_admin: str | None = Header(default=None, alias="X-Atulya-Token")
     return _system_payload()
 
 
+def _websocket_stats(include_users: bool = False) -> dict:
+    from drishti.dashboard.routes.ws import hub
+    return hub.stats(include_users=include_users)
+
+
 @router.get("/api/telemetry")
 def api_telemetry(token: str | None = Header(default=None, alias="X-Atulya-Token")):
-    _require_auth(token)
+    user = _require_auth(token)
     system = _system_payload()
     providers = _provider_registry()
     return {
@@ -143,10 +151,19 @@ def api_telemetry(token: str | None = Header(default=None, alias="X-Atulya-Token
         },
         "providers": providers,
         "events": _telemetry_events(system, providers),
+        # Who is connected is admin-only; other users see aggregate queue stats.
+        "websocket": _websocket_stats(include_users=user.get("role") == "admin"),
         "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
     }
 
 
+@router.get("/api/metrics", response_class=PlainTextResponse)
+def api_metrics(token: str | None = Header(default=None, alias="X-Atulya-Token")):
+    """Prometheus text: chat-path latency histograms (provider, memory, tools, tokenizer, TTFT)."""
+    _require_auth(token)
+    return PlainTextResponse(get_metrics().export_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 @router.get("/api/configs")
 def api_configs(_admin: str | None = Header(default=None, alias="X-Atulya-Token")):
     _require_admin(_admin)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import signal
@@ -11,6 +12,7 @@ from fastapi import APIRouter, Header
 
 from drishti.dashboard.helpers import (
     _dataset_index,
+    _invalidate_registries,
     _latest_metrics_path,
     _pid_running,
     _python_executable,
@@ -20,13 +22,31 @@ from drishti.dashboard.helpers import (
 )
 from drishti.dashboard.state import DashboardState, OUTPUTS_DIR
 
-from drishti.dashboard.routes.ws import broadcast_training, broadcast_telemetry, broadcast_event
+from drishti.dashboard.metrics_tailer import MetricsTailer
+from drishti.dashboard.routes.ws import broadcast_training, broadcast_training_metrics, broadcast_event
 
 router = APIRouter()
 
 PID_FILE = OUTPUTS_DIR / "train.pid"
 LOG_FILE = OUTPUTS_DIR / "training.log"
 METRICS_WINDOW = 500
+_LAST_RUNNING = False
+
+
+def _metrics_path() -> Path | None:
+    metrics_file = OUTPUTS_DIR / "live_metrics.jsonl"
+    if metrics_file.exists():
+        return metrics_file
+    return _latest_metrics_path()
+
+
+METRICS_TAILER = MetricsTailer(_metrics_path, window=METRICS_WINDOW)
+
+
+async def push_training_metrics(records: list[dict], cursor: int) -> None:
+    """MetricsTailer callback: push the delta and the current status to /api/ws."""
+    await broadcast_training_metrics(records, cursor, METRICS_TAILER.generation)
+    await broadcast_training(await asyncio.to_thread(_status_snapshot))
 
 
 def _read_pid() -> int | None:
@@ -36,6 +56,24 @@ def _read_pid() -> int | None:
         return None
 
 
+def _status_snapshot() -> dict:
+    """The ``/api/training-status`` fields a ``training_status`` push carries (no log tail)."""
+    pid = _read_pid()
+    running = _pid_running(pid)
+    status = _read_status_file()
+    phase = status.get("phase") or status.get("status") or ("running" if running else "idle")
+    if not running and phase in {"running", "training"}:
+        phase = "stopped"
+    status = {**status, "phase": phase}
+    return {
+        "running": running,
+        "pid": pid,
+        "phase": phase,
+        "status": status,
+        "last": status.get("last") or status.get("last_metric") or status,
+    }
+
+
 def _write_pid(pid: int) -> None:
     OUTPUTS_DIR.mkdir(parents=True, exist_ok=True)
     PID_FILE.write_text(str(pid), encoding="utf-8")
@@ -89,49 +127,41 @@ def _resolve_training_data_path(data_id: str, datasets: dict[str, Path]) -> Path
 
 
 @router.get("/api/training-metrics")
-def api_training_metrics(_admin: str | None = Header(default=None, alias="X-Atulya-Token")):
+def api_training_metrics(
+    since: int | None = None,
+    generation: int | None = None,
+    _admin: str | None = Header(default=None, alias="X-Atulya-Token"),
+):
+    """Cached metrics window; pass the last ``cursor``/``generation`` as ``since``/``generation`` for a delta."""
     _require_admin(_admin)
-    metrics_file = OUTPUTS_DIR / "live_metrics.jsonl"
-    if not metrics_file.exists():
-        metrics_file = _latest_metrics_path() or metrics_file
-    metrics = []
-    if metrics_file.exists():
-        for line in _tail_lines(metrics_file, max_lines=METRICS_WINDOW):
-            if line.strip():
-                try:
-                    metrics.append(json.loads(line))
-                except json.JSONDecodeError:
-                    pass
-    return {"metrics": metrics, "path": str(metrics_file)}
+    if not METRICS_TAILER.running:
+        METRICS_TAILER.poll()
+    payload = METRICS_TAILER.since(since, generation)
+    if not payload["path"]:
+        payload["path"] = str(OUTPUTS_DIR / "live_metrics.jsonl")
+    return payload
 
 
 @router.get("/api/training-status")
 def api_training_status(_admin: str | None = Header(default=None, alias="X-Atulya-Token")):
     _require_admin(_admin)
-    pid = _read_pid()
-    running = _pid_running(pid)
-    status = _read_status_file()
-    phase = status.get("phase") or status.get("status") or ("running" if running else "idle")
+    global _LAST_RUNNING
+    snapshot = _status_snapshot()
+    running = snapshot["running"]
+    if _LAST_RUNNING and not running:
+        _invalidate_registries()  # run finished: pick up its final checkpoint now
+    _LAST_RUNNING = running
     log_tail = _tail_lines(LOG_FILE, max_lines=120)
 
-    if not running and phase in {"running", "training"}:
-        phase = "stopped"
-    status = {**status, "phase": phase}
-
     try:
-        import asyncio
         loop = asyncio.get_event_loop()
         if loop.is_running():
-            asyncio.ensure_future(broadcast_training(status), loop=loop)
+            asyncio.ensure_future(broadcast_training(snapshot), loop=loop)
     except Exception:
         pass
 
     return {
-        "running": running,
-        "pid": pid,
-        "phase": phase,
-        "status": status,
-        "last": status.get("last") or status.get("last_metric") or status,
+        **snapshot,
         "log_tail": log_tail,
         "log_path": str(LOG_FILE),
         "train_python": _python_executable(),
@@ -153,6 +183,7 @@ def api_train_start(body: dict, _admin: str | None = Header(default=None, alias=
     device = str(body.get("device") or "cpu")
     if device == "auto":
         device = "cpu"
+    nprocs = max(1, min(int(body.get("nprocs") or 1), os.cpu_count() or 1))
 
     datasets = _dataset_index()
     data_id = str(body.get("data_id") or body.get("dataset") or "all")
@@ -185,6 +216,8 @@ def api_train_start(body: dict, _admin: str | None = Header(default=None, alias=
     ]
     if body.get("pack"):
         cmd.append("--pack")
+    if nprocs > 1:
+        cmd.extend(["--nprocs", str(nprocs)])
     resume_id = str(body.get("resume_id") or "")
     if resume_id and resume_id != "fresh":
         from drishti.dashboard.helpers import _checkpoint_index
@@ -212,6 +245,7 @@ def api_train_start(body: dict, _admin: str | None = Header(default=None, alias=
         )
     DashboardState.TRAIN_PROCESS = proc
     _write_pid(proc.pid)
+    _invalidate_registries()
     return {"ok": True, "pid": proc.pid, "cmd": cmd, "log_path": str(LOG_FILE), "data_path": str(data_path)}
 
 
@@ -242,4 +276,5 @@ def api_train_stop(_admin: str | None = Header(default=None, alias="X-Atulya-Tok
             asyncio.ensure_future(broadcast_event("Training Stopped", f"PID {pid} was stopped", "warning"))
     except Exception:
         pass
+    _invalidate_registries()
     return {"ok": True, "running": False, "stopped_pid": pid}
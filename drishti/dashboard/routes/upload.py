@@ -1,20 +1,21 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-import os
-import shutil
 import uuid
 from pathlib import Path
 
 from fastapi import APIRouter, Header, HTTPException, UploadFile, File
 
 from drishti.dashboard.helpers import _require_auth
+from drishti.dashboard.state import UPLOAD_MAX_BYTES
+from drishti.dashboard.uploads import BlobStore, UploadTooLarge
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 UPLOAD_DIR = Path(__file__).resolve().parents[3] / "config" / "uploads"
-_MAX_SIZE = 50 * 1024 * 1024  # 50MB
+_MAX_SIZE = UPLOAD_MAX_BYTES
 _ALLOWED_TYPES = {
     "image/jpeg", "image/png", "image/gif", "image/webp",
     "application/pdf", "text/plain", "text/csv",
@@ -43,17 +44,18 @@ async def api_upload(
     file_id = f"{uuid.uuid4().hex}{ext}"
     dest = user_dir / file_id
 
-    content = await file.read()
-    if len(content) > _MAX_SIZE:
-        raise HTTPException(400, f"File too large (max {_MAX_SIZE // 1024 // 1024}MB)")
-
-    dest.write_bytes(content)
+    try:
+        stored = await BlobStore(UPLOAD_DIR, user["username"]).save(file, dest, _MAX_SIZE)
+    except UploadTooLarge as exc:
+        raise HTTPException(413, str(exc)) from exc
 
     return {
         "ok": True,
         "file_id": file_id,
         "filename": file.filename,
-        "size": len(content),
+        "size": stored.size,
+        "sha256": stored.sha256,
+        "deduped": stored.deduped,
         "url": f"/api/files/{user['username']}/{file_id}",
     }
 
@@ -91,4 +93,5 @@ async def api_delete_file(file_id: str, token: str | None = Header(default=None,
     if not file_path.exists():
         raise HTTPException(404, "File not found")
     file_path.unlink()
+    await asyncio.to_thread(BlobStore(UPLOAD_DIR, user["username"]).prune)
     return {"ok": True}
@@ -1,17 +1,22 @@
 """Voice API Routes for High-Quality Neural TTS and STT."""
 from __future__ import annotations
 
+import asyncio
 import base64
+import json
 import logging
-import os
+import time
+from collections import deque
 from typing import Any
 
-from fastapi import APIRouter, Header, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Header, HTTPException, Request, UploadFile, File, Form
 from fastapi.responses import StreamingResponse, JSONResponse
 
 from atulya.config import get_config
 from drishti.dashboard import chat_history
 from drishti.dashboard.helpers import _checkpoint_index, _load_cached_model, _require_auth
+from drishti.dashboard.state import VOICE_UPLOAD_MAX_BYTES
+from drishti.dashboard.uploads import UploadTooLarge, spool
 from yantra.capabilities.voice_pipeline import VoicePipeline, TextToSpeech, SpeechToText
 
 logger = logging.getLogger(__name__)
@@ -87,24 +92,20 @@ async def api_voice_stt(
 ):
     """Speech to Text by uploading audio file."""
     _require_auth(token)
+    temp_filepath = None
     try:
-        # Create temp audio file
-        temp_dir = assets_dir / "temp"
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        temp_filepath = temp_dir / f"upload_{os.urandom(8).hex()}.wav"
-        
-        with open(temp_filepath, "wb") as f:
-            f.write(await file.read())
-            
+        # Stream the audio to a temp file; STT reads it from disk
+        try:
+            spooled = await spool(file, assets_dir / "temp", VOICE_UPLOAD_MAX_BYTES, suffix=".wav")
+        except UploadTooLarge as exc:
+            return JSONResponse(status_code=413, content={"error": str(exc)})
+        temp_filepath = spooled.path
+
         result = await voice_pipeline.stt.transcribe(
             audio_path=str(temp_filepath),
             language=language
         )
-        
-        # Clean up temp file
-        if temp_filepath.exists():
-            temp_filepath.unlink()
-            
+
         return {
             "text": result.text,
             "language": result.language,
@@ -115,6 +116,29 @@ async def api_voice_stt(
     except Exception as e:
         logger.error(f"STT transcription failed: {e}")
         return JSONResponse(status_code=500, content={"error": str(e)})
+    finally:
+        if temp_filepath is not None:
+            temp_filepath.unlink(missing_ok=True)
+
+
+def _voice_history(user: dict[str, Any], body: dict) -> list[dict[str, str]]:
+    """Last 10 turns of server-side plus client-supplied history, de-duplicated."""
+    server_messages = chat_history.list_messages(user, limit=20)
+    server_hist = [{"role": m["role"], "content": m["text"]} for m in server_messages if m.get("text")]
+    frontend_hist = body.get("history") or []
+    seen = set()
+    history = []
+    for msg in server_hist + frontend_hist:
+        content = (msg.get("content") or msg.get("text") or "").strip()
+        role = msg.get("role", "user")
+        if not content:
+            continue
+        key = f"{role}:{content[:80]}"
+        if key in seen:
+            continue
+        seen.add(key)
+        history.append({"role": role, "content": content})
+    return history[-10:]
 
 
 @router.post("/api/voice/chat")
@@ -144,22 +168,7 @@ async def api_voice_chat(
     provider_name = "Atulya Fallback"
     try:
         from atulya.llm import get_default_llm
-        server_messages = chat_history.list_messages(user, limit=20)
-        server_hist = [{"role": m["role"], "content": m["text"]} for m in server_messages if m.get("text")]
-        frontend_hist = body.get("history") or []
-        seen = set()
-        history = []
-        for msg in server_hist + frontend_hist:
-            content = (msg.get("content") or msg.get("text") or "").strip()
-            role = msg.get("role", "user")
-            if not content:
-                continue
-            key = f"{role}:{content[:80]}"
-            if key in seen:
-                continue
-            seen.add(key)
-            history.append({"role": role, "content": content})
-        history = history[-10:]
+        history = _voice_history(user, body)
 
         response = await get_default_llm().ask(
             prompt,
@@ -196,3 +205,128 @@ async def api_voice_chat(
             "error": f"Audio synthesis failed: {e}"
         }
 
+
+# ── Streaming voice chat ─────────────────────────────────────────────────────
+
+_STREAM_METRICS: deque[dict[str, float]] = deque(maxlen=100)
+
+
+def _audio_event(index: int, sentence: str, result: Any) -> dict[str, Any]:
+    return {
+        "index": index,
+        "text": sentence,
+        "audio_base64": result.audio_base64,
+        "format": result.format.value,
+        "provider": result.provider,
+        "error": result.metadata.get("error", ""),
+    }
+
+
+@router.post("/api/voice/chat/stream")
+async def api_voice_chat_stream(
+    request: Request,
+    body: dict,
+    token: str | None = Header(default=None, alias="X-Atulya-Token")
+):
+    """Pipelined voice chat over server-sent events.
+
+    LLM tokens are cut at sentence boundaries and each sentence is
+    synthesized while generation continues. Events, in order of arrival:
+    ``transcript`` (when ``audio_base64`` was sent instead of a prompt),
+    ``token``, ``audio`` (one per sentence, in sentence order), then ``done``
+    with ``metrics`` (seconds since the request: first token, first audio,
+    total).
+    """
+    user = _require_auth(token)
+    voice = str(body.get("voice") or "en_male")
+    prompt = str(body.get("prompt") or "").strip()
+    audio_base64 = body.get("audio_base64")
+    if not prompt and not audio_base64:
+        raise HTTPException(status_code=400, detail="Prompt is required")
+
+    async def events():
+        from atulya.llm import get_default_llm
+
+        started = time.perf_counter()
+        metrics: dict[str, float] = {}
+        user_prompt = prompt
+        if not user_prompt:
+            stt = await voice_pipeline.stt.transcribe(
+                audio_base64=str(audio_base64), language=str(body.get("language") or "en"),
+            )
+            metrics["transcribed"] = round(time.perf_counter() - started, 4)
+            if not stt.text:
+                yield f"data: {json.dumps({'error': stt.error or 'Transcription failed'})}\n\n"
+                yield f"data: {json.dumps({'done': True})}\n\n"
+                return
+            user_prompt = stt.text
+            yield f"data: {json.dumps({'transcript': user_prompt})}\n\n"
+
+        llm = getattr(request.app.state, "llm", None) or get_default_llm()
+        out: asyncio.Queue = asyncio.Queue()
+        parts: list[str] = []
+        provider_name = ""
+
+        async def tokens():
+            nonlocal provider_name
+            async for event in llm.stream(
+                user_prompt,
+                history=_voice_history(user, body),
+                tools_enabled=False,
+                provider=str(body.get("provider") or body.get("model_id") or ""),
+            ):
+                if event.type == "token" and event.content:
+                    metrics.setdefault("first_token", round(time.perf_counter() - started, 4))
+                    parts.append(event.content)
+                    await out.put({"token": event.content})
+                    yield event.content
+                elif event.type == "done":
+                    provider_name = str(event.metadata.get("provider") or "")
+
+        async def speak():
+            try:
+                index = 0
+                async for sentence, result in voice_pipeline.tts.synthesize_sentences(tokens(), voice=voice):
+                    metrics.setdefault("first_audio", round(time.perf_counter() - started, 4))
+                    await out.put({"audio": _audio_event(index, sentence, result)})
+                    index += 1
+            except Exception as exc:
+                logger.error(f"Streaming voice chat failed: {exc}")
+                await out.put({"error": str(exc)})
+            finally:
+                await out.put(None)
+
+        worker = asyncio.create_task(speak())
+        try:
+            while (item := await out.get()) is not None:
+                yield f"data: {json.dumps(item)}\n\n"
+        finally:
+            worker.cancel()
+
+        metrics["total"] = round(time.perf_counter() - started, 4)
+        _STREAM_METRICS.append(metrics)
+        response_text = "".join(parts).strip()
+        chat_history.append_exchange(user, user_prompt, response_text, provider=provider_name, surface="live")
+        payload = {
+            "done": True,
+            "prompt": user_prompt,
+            "response_text": response_text,
+            "provider_name": provider_name,
+            "metrics": metrics,
+        }
+        yield f"data: {json.dumps(payload)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@router.get("/api/voice/chat/stream/stats")
+def api_voice_stream_stats(token: str | None = Header(default=None, alias="X-Atulya-Token")):
+    """Mean and worst time-to-first-audio / end-to-end latency of recent streams."""
+    _require_auth(token)
+    recent = list(_STREAM_METRICS)
+    summary: dict[str, Any] = {"streams": len(recent)}
+    for key in ("first_token", "first_audio", "total"):
+        values = [m[key] for m in recent if key in m]
+        if values:
+            summary[key] = {"avg": round(sum(values) / len(values), 4), "max": max(values)}
+    return summary
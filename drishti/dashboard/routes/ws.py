@@ -1,21 +1,21 @@
 from __future__ import annotations
 
-import asyncio
 import json
 import logging
-import time
 from typing import Any
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
 from drishti.dashboard import users
+from drishti.dashboard.broadcast import BroadcastHub, allowed_topics, parse_topics
 from drishti.dashboard.helpers import _require_auth
+from drishti.dashboard.state import WS_QUEUE_SIZE, WS_SLOW_POLICY
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-_active_connections: set[WebSocket] = set()
-_broadcast_history: list[dict[str, Any]] = []
+hub = BroadcastHub(queue_size=WS_QUEUE_SIZE, policy=WS_SLOW_POLICY, history_size=200)
+_broadcast_history = hub.history
 
 
 @router.websocket("/api/ws")
@@ -34,15 +34,17 @@ async def websocket_endpoint(websocket: WebSocket):
         await websocket.close(code=1008)
         return
     await websocket.accept()
-    _active_connections.add(websocket)
-
-    await websocket.send_json({"type": "welcome", "user": user.get("username"), "role": user.get("role")})
-
-    # Send recent history
-    for msg in _broadcast_history[-20:]:
-        await websocket.send_json(msg)
+    # ?topics=training,telemetry (or "*"); general events only by default.
+    # Training metrics are admin-only over HTTP, so the hub drops that topic for other roles.
+    sub = hub.register(websocket, parse_topics(websocket.query_params.get("topics")), user.get("username") or "",
+                       admin=user.get("role") == "admin")
 
     try:
+        await sub.send_now(json.dumps({"type": "welcome", "user": user.get("username"), "role": user.get("role"),
+                                       "topics": sorted(sub.topics)}))
+        for text in hub.replay(sub, limit=20):
+            await sub.send_now(text)
+
         while True:
             data = await websocket.receive_text()
             try:
@@ -51,32 +53,35 @@ async def websocket_endpoint(websocket: WebSocket):
                 continue
             # Handle ping/pong
             if msg.get("type") == "ping":
-                await websocket.send_json({"type": "pong"})
+                await sub.send_now(json.dumps({"type": "pong"}))
+            elif msg.get("type") in ("subscribe", "unsubscribe"):
+                topics = parse_topics(msg.get("topics") or [])
+                if msg["type"] == "subscribe":
+                    sub.topics = sub.topics | allowed_topics(topics, sub.admin)
+                else:
+                    sub.topics = sub.topics - topics
+                await sub.send_now(json.dumps({"type": "subscribed", "topics": sorted(sub.topics)}))
     except WebSocketDisconnect:
         pass
+    except Exception as exc:
+        logger.debug("WebSocket closed: %s", exc)
     finally:
-        _active_connections.discard(websocket)
+        await hub.unregister(websocket)
 
 
 async def broadcast(event_type: str, data: dict[str, Any]) -> None:
-    payload = {"type": event_type, "data": data, "timestamp": time.time()}
-    _broadcast_history.append(payload)
-    if len(_broadcast_history) > 200:
-        _broadcast_history[:] = _broadcast_history[-200:]
-
-    disconnected = set()
-    for ws in _active_connections:
-        try:
-            await ws.send_json(payload)
-        except Exception:
-            disconnected.add(ws)
-    _active_connections.difference_update(disconnected)
+    """Queue an event for subscribed sockets; returns without waiting on any of them."""
+    hub.publish(event_type, data)
 
 
 async def broadcast_training(status: dict) -> None:
     await broadcast("training_status", status)
 
 
+async def broadcast_training_metrics(records: list[dict], cursor: int, generation: int) -> None:
+    await broadcast("training_metrics", {"metrics": records, "cursor": cursor, "generation": generation})
+
+
 async def broadcast_telemetry(telemetry: dict) -> None:
     await broadcast("telemetry", telemetry)
 
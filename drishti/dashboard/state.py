@@ -11,6 +11,12 @@ _ROOT = Path(__file__).resolve().parents[2]
 OUTPUTS_DIR = _ROOT / "tantra" / "outputs" / "npdna"
 MODEL_OUTPUT_DIRS = (OUTPUTS_DIR, _ROOT / "tantra" / "outputs" / "npdna_nano")
 DATASETS_DIR = _ROOT / "tantra" / "training" / "datasets"
+LORA_DIR = Path(os.environ.get("ATULYA_LORA_DIR") or _ROOT / "tantra" / "outputs" / "lora")
+LORA_BUDGET_MB = float(os.environ.get("ATULYA_LORA_BUDGET_MB", "64"))
+WS_QUEUE_SIZE = int(os.environ.get("ATULYA_WS_QUEUE_SIZE", "256"))
+WS_SLOW_POLICY = os.environ.get("ATULYA_WS_SLOW_POLICY", "drop_oldest")
+UPLOAD_MAX_BYTES = int(float(os.environ.get("ATULYA_UPLOAD_MAX_MB", "50")) * 1024 * 1024)
+VOICE_UPLOAD_MAX_BYTES = int(float(os.environ.get("ATULYA_VOICE_UPLOAD_MAX_MB", "25")) * 1024 * 1024)
 MAX_PROMPT_CHARS = 20_000
 MAX_CHAT_TOKENS = 4096
 
@@ -27,6 +33,7 @@ ADMIN_TOKEN, ADMIN_TOKEN_SOURCE = _load_admin_token()
 class DashboardState:
     MODEL_CACHE = {}
     MODEL_CACHE_MTIME = {}
+    ADAPTER_SERVERS = {}
     TRAIN_PROCESS = None
 
 
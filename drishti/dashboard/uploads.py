@@ -0,0 +1,153 @@
+"""Streaming, content-addressed storage for dashboard uploads.
+
+Routes used to ``await file.read()`` the whole upload, check its size
+afterwards and write it out in one shot. ``spool`` instead copies the upload
+to a temp file chunk by chunk, hashing as it goes and aborting as soon as the
+byte limit is crossed. ``BlobStore`` then files the temp file under its
+SHA-256 (``<root>/.blobs/<scope>/ab/abcdef…``) and hard-links it to wherever
+the caller wants it, so identical uploads share one copy on disk. Routes
+scope the store per user: a shared blob (or its inode mtime) would tell one
+user what another has uploaded.
+
+Consumers (STT, document ingestion, dataset registration) get the finished
+``Path`` and open it themselves; nothing here returns the bytes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+# Serializes commit (replace + link) against prune (nlink check + unlink), so
+# a blob is never removed between being filed and being linked.
+_STORE_LOCK = threading.Lock()
+
+
+class UploadTooLarge(Exception):
+    """The upload crossed ``max_bytes``; nothing was kept."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"File too large (max {max_bytes // 1024 // 1024}MB)")
+        self.max_bytes = max_bytes
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    """A finished upload on disk."""
+
+    path: Path
+    sha256: str
+    size: int
+    deduped: bool = False
+
+
+def _write_chunk(out, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
+
+
+async def spool(
+    file: Any,
+    directory: Path,
+    max_bytes: int,
+    *,
+    suffix: str = "",
+    chunk_size: int = CHUNK_SIZE,
+) -> StoredFile:
+    """Stream ``file`` (an ``UploadFile``) into a temp file under ``directory``.
+
+    Raises ``UploadTooLarge`` after reading at most one chunk past the limit;
+    the partial temp file is removed.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    declared = getattr(file, "size", None)
+    if isinstance(declared, int) and declared > max_bytes:
+        raise UploadTooLarge(max_bytes)
+
+    fd, name = tempfile.mkstemp(prefix=".upload-", suffix=suffix, dir=str(directory))
+    path = Path(name)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                await asyncio.to_thread(_write_chunk, out, digest, chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return StoredFile(path=path, sha256=digest.hexdigest(), size=size)
+
+
+class BlobStore:
+    """Content-addressed blobs with hard-linked views.
+
+    Args:
+        root: Directory holding ``.blobs/`` and the temp files being spooled
+        scope: Namespace under ``.blobs/``; only uploads in one scope dedupe
+    """
+
+    def __init__(self, root: Path, scope: str = ""):
+        self.root = Path(root)
+        self.scope = scope
+
+    @property
+    def blob_dir(self) -> Path:
+        return self.root / ".blobs" / self.scope if self.scope else self.root / ".blobs"
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.blob_dir / sha256[:2] / sha256
+
+    def commit(self, spooled: StoredFile, dest: Path) -> StoredFile:
+        """Move a spooled temp file into the store and link it at ``dest``."""
+        blob = self.blob_path(spooled.sha256)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        with _STORE_LOCK:
+            deduped = blob.exists()
+            if deduped:
+                spooled.path.unlink(missing_ok=True)
+            else:
+                os.replace(spooled.path, blob)
+            try:
+                os.link(blob, dest)
+            except OSError:
+                # Cross-device or no hard-link support: fall back to a copy.
+                shutil.copyfile(blob, dest)
+        return StoredFile(path=dest, sha256=spooled.sha256, size=spooled.size, deduped=deduped)
+
+    async def save(self, file: Any, dest: Path, max_bytes: int, chunk_size: int = CHUNK_SIZE) -> StoredFile:
+        spooled = await spool(file, self.blob_dir, max_bytes, chunk_size=chunk_size)
+        return await asyncio.to_thread(self.commit, spooled, dest)
+
+    def prune(self) -> int:
+        """Delete blobs no longer linked from anywhere. Returns blobs removed."""
+        removed = 0
+        if not self.blob_dir.exists():
+            return 0
+        for blob in self.blob_dir.glob("*/*"):
+            with _STORE_LOCK:
+                try:
+                    if blob.is_file() and blob.stat().st_nlink <= 1:
+                        blob.unlink()
+                        removed += 1
+                except OSError as exc:
+                    logger.debug("Blob prune skipped %s: %s", blob, exc)
+        return removed
@@ -1,13 +1,17 @@
 """User store and session management for Atulya Drishti.
 
-Stores users in a JSON file at {project_root}/config/users.json.
-Passwords are hashed with PBKDF2-HMAC-SHA256 + per-user salt.
-Sessions are persisted to config/sessions.json so they survive a server restart.
+Stores users in a JSON file at {project_root}/config/users.json, cached in
+memory until the file changes. Passwords are hashed with PBKDF2-HMAC-SHA256 +
+per-user salt. Sessions are persisted to config/sessions.json (snapshot) plus
+an append-only config/sessions.json.log so they survive a server restart;
+session lookups never touch the disk.
 """
 
 from __future__ import annotations
 
+import atexit
 import hashlib
+import heapq
 import json
 import logging
 import os
@@ -46,69 +50,204 @@ def _verify_password(password: str, stored_hash: str, salt: str) -> bool:
 
 
 
-def _read_store() -> dict:
-    """Read the users JSON file."""
-    if not USERS_FILE.exists():
-        return {"users": {}}
+_user_cache: dict[str, Any] = {"path": None, "stat": None, "data": None}
+
+
+def _file_stamp(path: Path) -> tuple[int, int] | None:
     try:
-        data = json.loads(USERS_FILE.read_text(encoding="utf-8"))
-        if "users" not in data:
-            data["users"] = {}
-        return data
-    except Exception as exc:
-        logger.warning("Failed to read users file: %s", exc)
-        return {"users": {}}
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _read_store() -> dict:
+    """Read the users JSON file (cached until the file changes on disk)."""
+    stamp = _file_stamp(USERS_FILE)
+    if _user_cache["path"] == USERS_FILE and _user_cache["stat"] == stamp and _user_cache["data"] is not None:
+        return _user_cache["data"]
+    data: dict = {"users": {}}
+    if stamp is not None:
+        try:
+            data = json.loads(USERS_FILE.read_text(encoding="utf-8"))
+            if "users" not in data:
+                data["users"] = {}
+        except Exception as exc:
+            logger.warning("Failed to read users file: %s", exc)
+            data = {"users": {}}
+    _user_cache.update(path=USERS_FILE, stat=stamp, data=data)
+    return data
 
 
 def _write_store(data: dict) -> None:
-    """Write the users JSON file."""
+    """Write the users JSON file atomically and refresh the cache."""
     USERS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    USERS_FILE.write_text(
-        json.dumps(data, indent=2, ensure_ascii=False),
-        encoding="utf-8",
-    )
+    tmp = USERS_FILE.with_name(USERS_FILE.name + ".tmp")
+    try:
+        tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, USERS_FILE)
+    except Exception:
+        _user_cache.update(path=None, stat=None, data=None)
+        raise
+    _user_cache.update(path=USERS_FILE, stat=_file_stamp(USERS_FILE), data=data)
+
+
+# ── Session persistence ──────────────────────────────────────────────────────
+#
+# SESSIONS_FILE is a snapshot; every login/logout appends one line to
+# ``<SESSIONS_FILE>.log``. Appends are coalesced by a background worker that
+# also sweeps expired sessions off an expiry heap and compacts the log into a
+# fresh snapshot once it grows past ``_COMPACT_OPS`` lines. Lookups only touch
+# the in-memory dict.
+
+_FLUSH_DELAY = 0.5       # seconds to coalesce session writes
+_SWEEP_INTERVAL = 60.0   # max seconds between expiry sweeps
+_COMPACT_OPS = 1000      # log lines before rewriting the snapshot
+
+_expiry_heap: list[tuple[float, str]] = []
+_pending_ops: list[tuple[Path, str]] = []  # guarded by _lock
+_log_lines = 0
+_io_lock = threading.Lock()  # serialises file writes; taken before _lock, never inside it
+_wake = threading.Event()
+_worker: threading.Thread | None = None
+
+
+def _sessions_log() -> Path:
+    return SESSIONS_FILE.with_name(SESSIONS_FILE.name + ".log")
+
+
+def _queue_op(op: dict[str, Any]) -> None:
+    """Queue a session log record and wake the writer. Caller holds ``_lock``."""
+    _pending_ops.append((_sessions_log(), json.dumps(op, ensure_ascii=False)))
+    _ensure_worker()
+    _wake.set()
+
+
+def _flush_locked() -> None:
+    """Append queued records to their log files. Caller holds ``_io_lock``."""
+    global _log_lines
+    with _lock:
+        ops = _pending_ops[:]
+        _pending_ops.clear()
+    if not ops:
+        return
+    by_path: dict[Path, list[str]] = {}
+    for path, line in ops:
+        by_path.setdefault(path, []).append(line)
+    for path, lines in by_path.items():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+    _log_lines += len(ops)
+
+
+def _flush_pending() -> None:
+    with _io_lock:
+        _flush_locked()
 
 
 def _read_sessions() -> dict[str, dict[str, Any]]:
-    """Read the sessions JSON file into memory."""
-    if not SESSIONS_FILE.exists():
-        return {}
-    try:
-        data = json.loads(SESSIONS_FILE.read_text(encoding="utf-8"))
-        if isinstance(data, dict):
-            return data
-    except Exception as exc:
-        logger.warning("Failed to read sessions file: %s", exc)
-    return {}
+    """Rebuild live sessions from the snapshot plus the append log."""
+    sessions: dict[str, dict[str, Any]] = {}
+    if SESSIONS_FILE.exists():
+        try:
+            data = json.loads(SESSIONS_FILE.read_text(encoding="utf-8"))
+            if isinstance(data, dict):
+                sessions.update(data)
+        except Exception as exc:
+            logger.warning("Failed to read sessions file: %s", exc)
+    log = _sessions_log()
+    if log.exists():
+        try:
+            for line in log.read_text(encoding="utf-8").splitlines():
+                try:
+                    op = json.loads(line)
+                except ValueError:
+                    continue  # torn tail write
+                if op.get("op") == "put":
+                    sessions[op["token"]] = op["session"]
+                elif op.get("op") == "del":
+                    sessions.pop(op.get("token"), None)
+        except OSError as exc:
+            logger.warning("Failed to read sessions log: %s", exc)
+    now = time.time()
+    return {t: s for t, s in sessions.items() if now <= s.get("expires_at", 0)}
 
 
 def _save_sessions() -> None:
-    """Persist the in-memory sessions to disk."""
-    SESSIONS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    if not _sessions:
-        if SESSIONS_FILE.exists():
-            SESSIONS_FILE.write_text("{}", encoding="utf-8")
-        return
-    SESSIONS_FILE.write_text(
-        json.dumps(_sessions, indent=2, ensure_ascii=False),
-        encoding="utf-8",
-    )
+    """Compact: write the in-memory sessions as the snapshot and reset the log."""
+    global _log_lines
+    with _io_lock:
+        _flush_locked()
+        with _lock:
+            payload = json.dumps(_sessions, indent=2, ensure_ascii=False)
+        SESSIONS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = SESSIONS_FILE.with_name(SESSIONS_FILE.name + ".tmp")
+        tmp.write_text(payload, encoding="utf-8")
+        os.replace(tmp, SESSIONS_FILE)
+        # Anything queued after the copy stays pending for the fresh log.
+        _sessions_log().unlink(missing_ok=True)
+        _log_lines = 0
 
 
-def _prune_expired_sessions() -> None:
-    """Drop expired sessions and persist the cleaned store."""
-    expired = [t for t, s in _sessions.items() if time.time() > s.get("expires_at", 0)]
-    if not expired:
-        return
-    for t in expired:
-        _sessions.pop(t, None)
-    _save_sessions()
+def flush_sessions() -> None:
+    """Write any queued session changes to disk now."""
+    _flush_pending()
+
+
+def _prune_expired_sessions() -> int:
+    """Drop sessions whose expiry has passed, using the expiry heap."""
+    now = time.time()
+    dropped = 0
+    with _lock:
+        while _expiry_heap and _expiry_heap[0][0] <= now:
+            _, token = heapq.heappop(_expiry_heap)
+            session = _sessions.get(token)
+            if session is not None and now > session.get("expires_at", 0):
+                del _sessions[token]
+                dropped += 1
+    return dropped
+
+
+def _session_worker() -> None:
+    while True:
+        with _lock:
+            next_expiry = _expiry_heap[0][0] if _expiry_heap else None
+        timeout = _SWEEP_INTERVAL if next_expiry is None else min(_SWEEP_INTERVAL, max(0.0, next_expiry - time.time()))
+        if _wake.wait(timeout):
+            time.sleep(_FLUSH_DELAY)
+            _wake.clear()
+        try:
+            _flush_pending()
+            _prune_expired_sessions()
+            if _log_lines >= _COMPACT_OPS:
+                _save_sessions()
+        except Exception as exc:
+            logger.warning("Session persistence failed: %s", exc)
+
+
+def _ensure_worker() -> None:
+    global _worker
+    if _worker is None:
+        _worker = threading.Thread(target=_session_worker, name="session-store", daemon=True)
+        _worker.start()
+        atexit.register(_flush_pending)
+
+
+def _index_session(token: str, session: dict[str, Any]) -> None:
+    heapq.heappush(_expiry_heap, (float(session.get("expires_at", 0)), token))
 
 
 # Load persisted sessions into memory on import so logins survive a restart.
+_loaded = _read_sessions()
 with _lock:
-    _sessions.update(_read_sessions())
-    _prune_expired_sessions()
+    _sessions.update(_loaded)
+    for _token, _session in _sessions.items():
+        _index_session(_token, _session)
+if _sessions_log().exists():
+    _save_sessions()
+if _sessions:
+    _ensure_worker()
 
 
 
@@ -229,14 +368,16 @@ def create_session(username: str) -> str:
             raise ValueError(f"User {username} not found")
 
         token = secrets.token_urlsafe(32)
-        _sessions[token] = {
+        session = {
             "username": username,
             "role": user["role"],
             "display_name": user["display_name"],
             "created_at": datetime.now(timezone.utc).isoformat(),
             "expires_at": time.time() + 86400,
         }
-        _save_sessions()
+        _sessions[token] = session
+        _index_session(token, session)
+        _queue_op({"op": "put", "token": token, "session": session})
     return token
 
 
@@ -248,9 +389,8 @@ def get_session(token: str | None) -> dict | None:
     if session is None:
         return None
     if time.time() > session.get("expires_at", 0):
-        with _lock:
-            _sessions.pop(token, None)
-            _save_sessions()
+        # The sweeper normally gets here first; replay drops it on restart.
+        _sessions.pop(token, None)
         return None
     return session
 
@@ -258,8 +398,8 @@ def get_session(token: str | None) -> dict | None:
 def kill_session(token: str) -> None:
     """Remove a session."""
     with _lock:
-        _sessions.pop(token, None)
-        _save_sessions()
+        if _sessions.pop(token, None) is not None:
+            _queue_op({"op": "del", "token": token})
 
 
 def kill_user_sessions(username: str) -> None:
@@ -269,7 +409,7 @@ def kill_user_sessions(username: str) -> None:
         to_remove = [t for t, s in _sessions.items() if s["username"] == username]
         for t in to_remove:
             _sessions.pop(t, None)
-        _save_sessions()
+            _queue_op({"op": "del", "token": t})
 
 
 
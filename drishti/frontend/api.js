@@ -127,24 +127,36 @@ export const api = {
       })
       .catch(onError);
   },
-  connectWebSocket(onMessage) {
+  connectWebSocket(onMessage, topics = [], { onOpen, onClose } = {}) {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-    const wsUrl = `${protocol}//${window.location.host}/api/ws`;
-    let ws = new WebSocket(wsUrl);
+    const params = new URLSearchParams();
+    if (topics.length) params.set('topics', topics.join(','));
+    // Browsers cannot set headers on a WebSocket; the server also reads ?token=.
+    const token = getToken();
+    if (token) params.set('token', token);
+    const query = params.toString() ? `?${params}` : '';
+    const wsUrl = `${protocol}//${window.location.host}/api/ws${query}`;
+    let ws = null;
     let reconnectTimer = null;
+    let disposed = false;
 
-    ws.onopen = () => {
-      ws.send(JSON.stringify({ type: 'ping' }));
-    };
-    ws.onmessage = (event) => {
-      try { onMessage(JSON.parse(event.data)); } catch {}
-    };
-    ws.onclose = () => {
-      reconnectTimer = setTimeout(() => {
-        this.connectWebSocket(onMessage);
-      }, 3000);
+    const open = () => {
+      ws = new WebSocket(wsUrl);
+      ws.onopen = () => {
+        ws.send(JSON.stringify({ type: 'ping' }));
+        if (onOpen) onOpen();
+      };
+      ws.onmessage = (event) => {
+        try { onMessage(JSON.parse(event.data)); } catch {}
+      };
+      ws.onclose = () => {
+        if (onClose) onClose();
+        if (!disposed) reconnectTimer = setTimeout(open, 3000);
+      };
     };
+    open();
     return () => {
+      disposed = true;
       clearTimeout(reconnectTimer);
       ws.close();
     };
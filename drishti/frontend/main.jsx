@@ -216,7 +216,9 @@ function Training({ bootstrap, load, toast }) {
   const [log, setLog] = useState([]);
   const [metrics, setMetrics] = useState([]);
   const [busy, setBusy] = useState(false);
+  const [live, setLive] = useState(false);
   const terminalEndRef = useRef(null);
+  const metricsCursorRef = useRef(null);
   const [form, setForm] = useState({
     config: configs[0]?.name || 'atulya_seed',
     dataset: datasets[0]?.id || '',
@@ -239,21 +241,57 @@ function Training({ bootstrap, load, toast }) {
     }));
   }, [configs, datasets]);
 
+  async function refreshMetrics() {
+    const cursor = metricsCursorRef.current;
+    const query = cursor ? `?since=${cursor.cursor}&generation=${cursor.generation}` : '';
+    const metricRes = await api.get(`/api/training-metrics${query}`).catch(() => null);
+    if (!metricRes) return;
+    const delta = metricRes.metrics || [];
+    if (!cursor || metricRes.reset) setMetrics(delta);
+    else if (delta.length) setMetrics((prev) => [...prev, ...delta].slice(-500));
+    metricsCursorRef.current = { cursor: metricRes.cursor ?? 0, generation: metricRes.generation ?? 0 };
+  }
+
   async function refreshStatus() {
     const res = await api.get('/api/training-status');
     setStatus(res);
     setLog(res.log_tail || []);
-    const metricRes = await api.get('/api/training-metrics').catch(() => ({ metrics: [] }));
-    setMetrics(metricRes.metrics || []);
+  }
+
+  function applyPushedMetrics(data) {
+    // A push carries records (cursor - n, cursor]; append only when it continues our window.
+    const cursor = metricsCursorRef.current;
+    const delta = data.metrics || [];
+    const start = (data.cursor ?? 0) - delta.length;
+    if (!cursor || data.generation !== cursor.generation || start > cursor.cursor) {
+      refreshMetrics().catch(() => {});
+      return;
+    }
+    if (data.cursor <= cursor.cursor) return; // replayed on reconnect
+    setMetrics((prev) => [...prev, ...delta.slice(cursor.cursor - start)].slice(-500));
+    metricsCursorRef.current = { cursor: data.cursor, generation: data.generation };
   }
 
   useEffect(() => terminalEndRef.current?.scrollIntoView({ behavior: 'smooth' }), [log]);
 
+  useEffect(() => api.connectWebSocket((msg) => {
+    if (msg.type === 'training_metrics') applyPushedMetrics(msg.data || {});
+    else if (msg.type === 'training_status') setStatus((prev) => ({ ...prev, ...(msg.data || {}) }));
+  }, ['training'], {
+    onOpen: () => {
+      setLive(true);
+      refreshMetrics().catch(() => {});
+    },
+    onClose: () => setLive(false),
+  }), []);
+
   useEffect(() => {
-    refreshStatus().catch(() => {});
-    const id = setInterval(() => refreshStatus().catch(() => {}), 4000);
+    // Pushes drive updates while the socket is up; polling is only a fallback.
+    const refresh = () => Promise.all([refreshStatus(), refreshMetrics()]).catch(() => {});
+    refresh();
+    const id = setInterval(refresh, live ? 30000 : 4000);
     return () => clearInterval(id);
-  }, []);
+  }, [live]);
 
   async function startTraining(event) {
     event.preventDefault();
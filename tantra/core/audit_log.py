@@ -1,14 +1,36 @@
-"""Tamper-evident audit logs with hash chaining."""
+"""Tamper-evident audit logs with hash chaining.
+
+Appends are O(1): the sequence number and the last hash live in memory, the
+active segment stays open, and each entry is a single ``write``. Durability
+is group-committed: a background thread ``fsync``s whatever was written in
+the last ``commit_interval`` seconds, so a burst of appends shares one
+``fsync``. ``append(..., wait=True)`` blocks until its entry is durable.
+
+The log rolls into size-capped segments. ``audit.log`` is always the active
+segment; a full one is renamed to ``audit.000001.log`` (and so on) and sealed
+with a checkpoint record in ``audit.log.checkpoints`` holding the segment's
+entry range, last hash and Merkle root over its entry hashes. Every
+``checkpoint_every`` entries a checkpoint also records the active segment's
+byte offset and hash. Checkpoints are HMAC-signed when a key is configured
+(``signing_key`` or ``ATULYA_AUDIT_KEY``).
+
+``verify()`` only re-hashes the tail after the newest checkpoint;
+``verify(full=True)`` re-hashes every segment and checks each Merkle root.
+"""
 from __future__ import annotations
 
 import hashlib
+import hmac
 import json
 import os
+import threading
 import time
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
+GENESIS = "0" * 64
+
 
 @dataclass
 class AuditEntry:
@@ -20,76 +42,353 @@ class AuditEntry:
     entry_hash: str = ""
 
 
+def _entry_hash(entry_id: str, action: str, details: Any, timestamp: Any, previous_hash: str) -> str:
+    data = f"{entry_id}{action}{json.dumps(details)}{timestamp}{previous_hash}"
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _node(left: str, right: str) -> str:
+    return hashlib.sha256(bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+class MerkleAccumulator:
+    """Streaming Merkle root over entry hashes in O(log n) memory.
+
+    Keeps one peak per set bit of the leaf count (a Merkle mountain range);
+    ``root`` folds the peaks right to left.
+    """
+
+    def __init__(self):
+        self.peaks: list[tuple[int, str]] = []  # (height, hash), heights strictly decreasing
+        self.count = 0
+
+    def add(self, leaf_hash: str) -> None:
+        height, node = 0, leaf_hash
+        while self.peaks and self.peaks[-1][0] == height:
+            _, left = self.peaks.pop()
+            node = _node(left, node)
+            height += 1
+        self.peaks.append((height, node))
+        self.count += 1
+
+    def root(self) -> str:
+        if not self.peaks:
+            return GENESIS
+        node = self.peaks[-1][1]
+        for _, left in reversed(self.peaks[:-1]):
+            node = _node(left, node)
+        return node
+
+
 class TamperEvidentLog:
-    def __init__(self, log_path: str | Path = "assets/audit.log"):
+    """Hash-chained, segmented, group-committed audit log.
+
+    Args:
+        log_path: Active segment path
+        segment_bytes: Roll to a new segment past this size
+        checkpoint_every: Entries between in-segment checkpoints
+        commit_interval: Max seconds between a write and its ``fsync``
+        signing_key: HMAC key for checkpoints (default ``ATULYA_AUDIT_KEY``)
+    """
+
+    def __init__(
+        self,
+        log_path: str | Path = "assets/audit.log",
+        segment_bytes: int = 64 * 1024 * 1024,
+        checkpoint_every: int = 10_000,
+        commit_interval: float = 0.01,
+        signing_key: bytes | str | None = None,
+    ):
         self.log_path = Path(log_path)
         self.log_path.parent.mkdir(parents=True, exist_ok=True)
-        self._last_hash = "0" * 64
-        self._load_last_hash()
-
-    def _load_last_hash(self):
-        if not self.log_path.exists() or self.log_path.stat().st_size == 0:
-            return
-        chunk_size = min(4096, self.log_path.stat().st_size)
-        with open(self.log_path, "rb") as f:
-            f.seek(-chunk_size, os.SEEK_END)
-            if f.tell() > 0:
-                f.readline()  # Skip potentially incomplete first line
-            tail = f.read().decode("utf-8").strip()
-        for line in reversed(tail.splitlines()):
-            line = line.strip()
-            if line:
-                last = json.loads(line)
-                self._last_hash = last.get("entry_hash", "0" * 64)
-                break
+        self.checkpoint_path = self.log_path.with_name(self.log_path.name + ".checkpoints")
+        self.segment_bytes = segment_bytes
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.commit_interval = commit_interval
+        key = signing_key if signing_key is not None else os.environ.get("ATULYA_AUDIT_KEY", "")
+        self._key = key.encode() if isinstance(key, str) else key
+
+        self._lock = threading.Lock()       # sequence, hash chain, handle writes
+        self._io_lock = threading.Lock()    # fsync vs segment roll; taken before _lock
+        self._synced = threading.Condition(threading.Lock())
+        self._dirty = threading.Event()
+        self._committer: threading.Thread | None = None
+        self._closed = False
+        self._fh = None
+
+        self._last_hash = GENESIS
+        self._seq = 0              # entries ever appended (all segments)
+        self._written_seq = 0      # last seq handed to the OS
+        self._synced_seq = 0       # last seq known durable
+        self._segment = 1          # index of the active segment
+        self._segment_start = 0    # seq before the active segment's first entry
+        self._size = 0             # bytes in the active segment
+        self._merkle = MerkleAccumulator()
+        self._load_state()
+
+    # ── Recovery ─────────────────────────────────────────────────────────────
+
+    def _load_state(self) -> None:
+        """Restore counters from the last seal plus one scan of the active segment."""
+        seal = None
+        for record in self._checkpoints():
+            if record.get("kind") == "seal":
+                seal = record
+        if seal is not None:
+            self._segment = int(seal["segment"]) + 1
+            self._segment_start = int(seal["seq_end"])
+            self._last_hash = seal["last_hash"]
+        self._seq = self._segment_start
+        if self.log_path.exists():
+            self._size = self.log_path.stat().st_size
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry_hash = json.loads(line).get("entry_hash", GENESIS)
+                    except ValueError:
+                        continue
+                    self._seq += 1
+                    self._merkle.add(entry_hash)
+                    self._last_hash = entry_hash
+        self._written_seq = self._synced_seq = self._seq
+
+    # ── Append / group commit ────────────────────────────────────────────────
+
+    def _handle(self):
+        if self._fh is None:
+            self._fh = open(self.log_path, "ab")
+        return self._fh
+
+    def append(self, action: str, details: dict[str, Any], wait: bool = False) -> AuditEntry:
+        roll = False
+        with self._lock:
+            if self._closed:
+                raise ValueError("Audit log is closed")
+            entry = AuditEntry(
+                id=f"audit_{int(time.time())}_{self._seq}",
+                action=action, details=details,
+                previous_hash=self._last_hash,
+            )
+            entry.entry_hash = self._compute_hash(entry)
+            line = (json.dumps(vars(entry), ensure_ascii=False) + "\n").encode("utf-8")
+            fh = self._handle()
+            fh.write(line)
+            fh.flush()
+            self._size += len(line)
+            self._seq += 1
+            self._written_seq = self._seq
+            self._last_hash = entry.entry_hash
+            self._merkle.add(entry.entry_hash)
+            seq = self._seq
+            if (seq - self._segment_start) % self.checkpoint_every == 0:
+                self._write_checkpoint(self._checkpoint_record("checkpoint", offset=self._size))
+            roll = self._size >= self.segment_bytes
+        self._start_committer()
+        self._dirty.set()
+        if roll:
+            self._roll()
+        if wait:
+            self._wait_synced(seq)
+        return entry
+
+    def _start_committer(self) -> None:
+        if self._committer is None:
+            with self._synced:
+                if self._committer is None:
+                    self._committer = threading.Thread(target=self._commit_loop, name="audit-commit", daemon=True)
+                    self._committer.start()
 
-    def append(self, action: str, details: dict[str, Any]) -> AuditEntry:
-        entry = AuditEntry(
-            id=f"audit_{int(time.time())}_{self._count_lines()}",
-            action=action, details=details,
-            previous_hash=self._last_hash,
-        )
-        entry.entry_hash = self._compute_hash(entry)
+    def _commit_loop(self) -> None:
+        while True:
+            self._dirty.wait()
+            if self._closed:
+                return
+            time.sleep(self.commit_interval)
+            self._dirty.clear()
+            self._sync()
 
-        with open(self.log_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(vars(entry), ensure_ascii=False) + "\n")
+    def _sync(self) -> None:
+        with self._io_lock:
+            with self._lock:
+                fh, target = self._fh, self._written_seq
+            if fh is not None and target > self._synced_seq:
+                os.fsync(fh.fileno())
+        with self._synced:
+            self._synced_seq = max(self._synced_seq, target)
+            self._synced.notify_all()
+
+    def _wait_synced(self, seq: int) -> None:
+        with self._synced:
+            while self._synced_seq < seq:
+                if not self._synced.wait(timeout=max(self.commit_interval * 10, 1.0)):
+                    break
+        if self._synced_seq < seq:
+            self._sync()
+
+    def flush(self) -> None:
+        """Make every appended entry durable now."""
+        self._sync()
+
+    def close(self) -> None:
+        self.flush()
+        with self._io_lock, self._lock:
+            self._closed = True
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+        self._dirty.set()
+
+    def __enter__(self) -> "TamperEvidentLog":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ── Segments and checkpoints ─────────────────────────────────────────────
+
+    def segment_path(self, index: int) -> Path:
+        return self.log_path.with_name(f"{self.log_path.stem}.{index:06d}{self.log_path.suffix}")
+
+    def _roll(self) -> None:
+        with self._io_lock, self._lock:
+            fh = self._fh
+            if fh is None or self._size < self.segment_bytes:
+                return  # another thread rolled first
+            fh.flush()
+            os.fsync(fh.fileno())
+            fh.close()
+            self._fh = None
+            sealed = self.segment_path(self._segment)
+            os.replace(self.log_path, sealed)
+            self._write_checkpoint(self._checkpoint_record("seal", file=sealed.name))
+            self._segment += 1
+            self._segment_start = self._seq
+            self._size = 0
+            self._merkle = MerkleAccumulator()
+            synced = self._written_seq
+        with self._synced:
+            self._synced_seq = max(self._synced_seq, synced)
+            self._synced.notify_all()
+
+    def _checkpoint_record(self, kind: str, **extra: Any) -> dict[str, Any]:
+        record = {
+            "kind": kind,
+            "segment": self._segment,
+            "seq_start": self._segment_start,
+            "seq_end": self._seq,
+            "last_hash": self._last_hash,
+            "merkle_root": self._merkle.root(),
+            "created_at": time.time(),
+            **extra,
+        }
+        record["signature"] = self._sign(record)
+        return record
+
+    def _sign(self, record: dict[str, Any]) -> str:
+        if not self._key:
+            return ""
+        body = json.dumps({k: v for k, v in record.items() if k != "signature"}, sort_keys=True)
+        return hmac.new(self._key, body.encode(), hashlib.sha256).hexdigest()
+
+    def _write_checkpoint(self, record: dict[str, Any]) -> None:
+        with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
             f.flush()
             os.fsync(f.fileno())
 
-        self._last_hash = entry.entry_hash
-        return entry
+    def _checkpoints(self) -> list[dict[str, Any]]:
+        if not self.checkpoint_path.exists():
+            return []
+        records = []
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        return records
+
+    # ── Verification ─────────────────────────────────────────────────────────
 
     def _compute_hash(self, entry: AuditEntry) -> str:
-        data = f"{entry.id}{entry.action}{json.dumps(entry.details)}{entry.timestamp}{entry.previous_hash}"
-        return hashlib.sha256(data.encode()).hexdigest()
-
-    def verify(self) -> bool:
-        if not self.log_path.exists():
-            return True
-        prev_hash = "0" * 64
-        with open(self.log_path, "r", encoding="utf-8") as f:
+        return _entry_hash(entry.id, entry.action, entry.details, entry.timestamp, entry.previous_hash)
+
+    @staticmethod
+    def _verify_chain(path: Path, prev_hash: str, offset: int = 0, merkle: MerkleAccumulator | None = None) -> str | None:
+        """Re-hash ``path`` from ``offset``. Returns the last hash, or None if broken."""
+        if not path.exists():
+            return prev_hash
+        with open(path, "r", encoding="utf-8") as f:
+            f.seek(offset)
             for line in f:
                 line = line.strip()
                 if not line:
                     continue
-                entry = json.loads(line)
-                expected_hash = hashlib.sha256(
-                    f"{entry['id']}{entry['action']}{json.dumps(entry['details'])}{entry['timestamp']}{prev_hash}".encode()
-                ).hexdigest()
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    return None
+                expected_hash = _entry_hash(entry["id"], entry["action"], entry["details"], entry["timestamp"], prev_hash)
                 if entry.get("entry_hash") != expected_hash:
-                    return False
+                    return None
                 prev_hash = entry["entry_hash"]
-        return True
+                if merkle is not None:
+                    merkle.add(prev_hash)
+        return prev_hash
 
-    def __len__(self) -> int:
-        return self._count_lines()
+    def verify(self, full: bool = False) -> bool:
+        """Check the hash chain: the tail after the newest checkpoint, or everything."""
+        if self._fh is not None:
+            with self._lock:
+                self._fh.flush()
+        checkpoints = self._checkpoints()
+        for record in checkpoints:
+            if self._key and not hmac.compare_digest(record.get("signature", ""), self._sign(record)):
+                return False
+        seals = {int(r["segment"]): r for r in checkpoints if r.get("kind") == "seal"}
 
-    def _count_lines(self) -> int:
-        if not self.log_path.exists():
-            return 0
-        count = 0
-        with open(self.log_path, "r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    count += 1
-        return count
+        if full:
+            prev_hash = GENESIS
+            for index in sorted(seals):
+                seal = seals[index]
+                merkle = MerkleAccumulator()
+                prev_hash = self._verify_chain(self.segment_path(index), prev_hash, merkle=merkle)
+                if prev_hash is None or prev_hash != seal["last_hash"] or merkle.root() != seal["merkle_root"]:
+                    return False
+            return self._verify_chain(self.log_path, prev_hash) is not None
+
+        active = max(seals) + 1 if seals else 1
+        prev_hash, offset = (seals[active - 1]["last_hash"], 0) if seals else (GENESIS, 0)
+        for record in reversed(checkpoints):
+            if record.get("kind") == "checkpoint" and int(record["segment"]) == active:
+                prev_hash, offset = record["last_hash"], int(record["offset"])
+                break
+        if offset and not self._hash_before(offset, prev_hash):
+            return False
+        return self._verify_chain(self.log_path, prev_hash, offset) is not None
+
+    def _hash_before(self, offset: int, expected: str) -> bool:
+        """The entry ending at ``offset`` in the active segment carries ``expected``."""
+        try:
+            with open(self.log_path, "rb") as f:
+                end = offset - 1  # skip the entry's own newline
+                start = end
+                tail = b""
+                while start > 0 and b"\n" not in tail:
+                    start = max(0, start - 65536)
+                    f.seek(start)
+                    tail = f.read(end - start)
+        except OSError:
+            return False
+        try:
+            return json.loads(tail.rsplit(b"\n", 1)[-1]).get("entry_hash") == expected
+        except ValueError:
+            return False
+
+    def __len__(self) -> int:
+        return self._seq
@@ -9,20 +9,18 @@ from __future__ import annotations
 
 import json
 import logging
-import math
 import os
 import sys
-import time
 from pathlib import Path
 
 import torch
-from torch import nn
 
 ROOT = Path(__file__).resolve().parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from tantra.npdna import NpDnaCore
+from tantra.training.evaluation import EncodedSet, encode_eval_set, evaluate_checkpoints, evaluate_loss, measure_latency
 
 logging.basicConfig(level=logging.WARNING, format="%(message)s")
 
@@ -32,6 +30,8 @@ CHECKPOINT_B = ROOT / "outputs/npdna/checkpoints/step_018228"
 TEST_DATA = ROOT / "data/all_datasets.jsonl"
 NUM_EVAL_SAMPLES = 16           # texts from the test set (small for CPU speed)
 GENERATE_TOKENS = 10            # tokens to generate for speed test
+LATENCY_RUNS = 5                # timed generation runs (p50/p95), after warmup
+EVAL_WORKERS = 2                # checkpoints evaluated in parallel processes
 MAX_SEQ = 64                    # max sequence length for perplexity
 DEVICE = "cpu"
 
@@ -69,30 +69,23 @@ def load_test_texts(path: Path, n: int) -> list[str]:
     return texts
 
 
-def benchmark_core(core: NpDnaCore, test_texts: list[str], label: str) -> dict:
+def benchmark_core(
+    core: NpDnaCore,
+    test_texts: list[str],
+    label: str,
+    encoded: EncodedSet | None = None,
+) -> dict:
     """Run a mini benchmark on a loaded core, return metrics dict."""
     model = core.model
     model.eval()
     device = next(model.parameters()).device
-    loss_fn = nn.CrossEntropyLoss(reduction="sum")
 
-    # ── 1. Perplexity ──────────────────────────────────────────────────────
+    # ── 1. Perplexity (padded, length-bucketed batches) ─────────────────────
     print(f"  [{label}] Computing perplexity on {len(test_texts)} texts...", flush=True)
-    total_loss = 0.0
-    total_tokens = 0
-    with torch.no_grad():
-        for text in test_texts:
-            ids = core.encode(text, allow_growth=False)[:MAX_SEQ]
-            if len(ids) < 2:
-                continue
-            input_ids = torch.tensor([ids[:-1]], dtype=torch.long, device=device)
-            labels = torch.tensor([ids[1:]], dtype=torch.long, device=device)
-            logits, _ = model(input_ids)
-            loss = loss_fn(logits.reshape(-1, logits.shape[-1]), labels.reshape(-1))
-            total_loss += float(loss)
-            total_tokens += len(ids) - 1
-    avg_loss = total_loss / max(1, total_tokens)
-    perplexity = math.exp(min(avg_loss, 100))
+    encoded = encoded or encode_eval_set(core, test_texts, MAX_SEQ)
+    ev = evaluate_loss(model, encoded)
+    avg_loss = ev["avg_loss"]
+    perplexity = ev["perplexity"]
 
     # ── 2. Compression ──────────────────────────────────────────────────────
     print(f"  [{label}] Computing compression...", flush=True)
@@ -138,13 +131,9 @@ def benchmark_core(core: NpDnaCore, test_texts: list[str], label: str) -> dict:
         util_scores.append(score)
     avg_util = sum(util_scores) / max(1, len(util_scores)) * 100
 
-    # ── 4. Generation speed ─────────────────────────────────────────────────
-    print(f"  [{label}] Measuring generation speed ({GENERATE_TOKENS} tokens)...", flush=True)
-    core.generate("test", max_tokens=3)  # warmup
-    start = time.perf_counter()
-    result = core.generate("Hello world", max_tokens=GENERATE_TOKENS)
-    elapsed = time.perf_counter() - start
-    tokens_generated = len(core.encode(result, allow_growth=False))
+    # ── 4. Generation latency (p50/p95 over repeated runs) ──────────────────
+    print(f"  [{label}] Measuring generation latency ({GENERATE_TOKENS} tokens x {LATENCY_RUNS} runs)...", flush=True)
+    latency = measure_latency(core, "Hello world", max_tokens=GENERATE_TOKENS, runs=LATENCY_RUNS)
 
     # ── 5. Memory ───────────────────────────────────────────────────────────
     print(f"  [{label}] Measuring memory...", flush=True)
@@ -177,9 +166,12 @@ def benchmark_core(core: NpDnaCore, test_texts: list[str], label: str) -> dict:
         "compression_ratio": round(compression_ratio, 2),
         "strand_util_pct": round(avg_util, 1),
         "dead_strands_total": sum(dead_counts),
-        "gen_tokens": tokens_generated,
-        "gen_time_sec": round(elapsed, 3),
-        "gen_speed_tokps": round(tokens_generated / max(0.001, elapsed), 1),
+        "gen_tokens": latency["tokens"],
+        "gen_time_sec": round(latency["total_ms_p50"] / 1000, 3),
+        "gen_speed_tokps": latency["tokens_per_sec_p50"],
+        "gen_ttft_ms_p50": latency["ttft_ms_p50"],
+        "gen_ttft_ms_p95": latency["ttft_ms_p95"],
+        "gen_time_ms_p95": latency["total_ms_p95"],
         "rss_mb": round(mem_info.rss / 1024 / 1024, 1),
         "param_mem_mb": round(param_bytes / 1024 / 1024, 1),
         "train_loss": meta_loss,
@@ -213,9 +205,12 @@ def comparison_table(a: dict, b: dict) -> str:
         ("Compression Ratio (↑ better)", a["compression_ratio"], b["compression_ratio"], False),
         ("Strand Utilization % (↑ better)", a["strand_util_pct"], b["strand_util_pct"], False),
         ("Dead Strands (↓ better)", a["dead_strands_total"], b["dead_strands_total"], True),
-        ("Gen Speed (tok/s, ↑ better)", a["gen_speed_tokps"], b["gen_speed_tokps"], False),
+        ("Gen Speed p50 (tok/s, ↑ better)", a["gen_speed_tokps"], b["gen_speed_tokps"], False),
         ("Gen Tokens", a["gen_tokens"], b["gen_tokens"], False),
-        ("Gen Time (sec)", a["gen_time_sec"], b["gen_time_sec"], True),
+        ("Gen Time p50 (sec)", a["gen_time_sec"], b["gen_time_sec"], True),
+        ("Gen Time p95 (ms)", a["gen_time_ms_p95"], b["gen_time_ms_p95"], True),
+        ("TTFT p50 (ms)", a["gen_ttft_ms_p50"], b["gen_ttft_ms_p50"], True),
+        ("TTFT p95 (ms)", a["gen_ttft_ms_p95"], b["gen_ttft_ms_p95"], True),
         ("RSS Memory (MB)", a["rss_mb"], b["rss_mb"], True),
         ("Param Memory (MB)", a["param_mem_mb"], b["param_mem_mb"], True),
     ]
@@ -254,26 +249,19 @@ if __name__ == "__main__":
     test_texts = load_test_texts(TEST_DATA, NUM_EVAL_SAMPLES)
     print(f"  Loaded {len(test_texts)} test samples", flush=True)
 
+    print(f"\nEvaluating both checkpoints with {EVAL_WORKERS} worker(s)...", flush=True)
     results = []
-    for cp, label in [(CHECKPOINT_A, "step_017728"), (CHECKPOINT_B, "step_018228")]:
-        print(f"\n[{label}] Loading checkpoint...", flush=True)
-        core = None
-        try:
-            core = NpDnaCore.load(str(cp))
-            core.model.to(DEVICE)
-            print(f"  Model: {core.model.parameter_count():,} params, device={DEVICE}", flush=True)
-            res = benchmark_core(core, test_texts, label)
-            results.append(res)
-            print(f"  [{label}] Done. Perplexity={res['perplexity']}, Speed={res['gen_speed_tokps']} tok/s", flush=True)
-        except Exception as e:
-            print(f"  [{label}] ERROR: {e}", flush=True)
-            import traceback
-            traceback.print_exc()
-        finally:
-            if core is not None:
-                del core
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
+    for res in evaluate_checkpoints(
+        [CHECKPOINT_A, CHECKPOINT_B], test_texts, max_seq=MAX_SEQ, workers=EVAL_WORKERS,
+        benchmark=benchmark_core, device=DEVICE,
+    ):
+        label = res["label"]
+        if "error" in res:
+            print(f"  [{label}] ERROR: {res['error']}", flush=True)
+            sys.exit(1)
+        results.append(res)
+        print(f"  [{label}] Done. Perplexity={res['perplexity']}, Speed={res['gen_speed_tokps']} tok/s, "
+              f"TTFT p95={res['gen_ttft_ms_p95']}ms", flush=True)
 
     print("\n" + "=" * 70, flush=True)
     print(comparison_table(*results), flush=True)
@@ -3,9 +3,25 @@ from __future__ import annotations
 
 import re
 import time
+from collections import deque
 from dataclasses import dataclass, field
 from typing import Any
 
+from tantra.core.packing import ContextPacker, PackResult, TokenCounter
+from tantra.core.scanner import Rule, Scanner
+
+_DROP_ACTIONS = {"drop", "remove", "omit", "exclude"}
+_MASK_ACTIONS = {"mask", "redact"}
+# Tags first: a URL inside a tag goes with the tag, as when tags were stripped first.
+_BUILTIN_SCANNERS = {
+    (html, url): Scanner(
+        ([Rule("html", r"<[^>]+>", "", literals=("<",))] if html else [])
+        + ([Rule("url", r"https?://[^\s]+", "[URL]", literals=("http",))] if url else [])
+    )
+    for html in (False, True)
+    for url in (False, True)
+}
+
 
 @dataclass
 class ContextMessage:
@@ -16,40 +32,54 @@ class ContextMessage:
 
 
 class ContextWindowGuard:
-    def __init__(self, max_tokens: int = 8192, max_messages: int = 50):
+    """Sliding window of messages under a token and message cap.
+
+    Messages live in a deque with a running token total, so evicting the
+    oldest is O(1). Messages without a ``token_count`` are counted by
+    ``counter`` (the active model's tokenizer when one is given).
+    """
+
+    def __init__(self, max_tokens: int = 8192, max_messages: int = 50, counter: TokenCounter | None = None):
         self.max_tokens = max_tokens
         self.max_messages = max_messages
-        self.messages: list[ContextMessage] = []
+        self.counter = counter or TokenCounter()
+        self.messages: deque[ContextMessage] = deque()
         self.total_tokens = 0
 
     def add(self, message: ContextMessage) -> bool:
-        # Enforce max_messages - remove oldest when at capacity
         if message.token_count <= 0:
-            message.token_count = max(1, len(message.content) // 4 + 1)
+            message.token_count = max(1, self.counter.count(message.content))
         if message.token_count > self.max_tokens:
             return False
+        # Enforce max_messages - remove oldest when at capacity
         if len(self.messages) >= self.max_messages:
-            removed = self.messages.pop(0)
-            self.total_tokens -= removed.token_count
+            self._evict()
         if self.total_tokens + message.token_count > self.max_tokens:
             self._compact()
         while self.total_tokens + message.token_count > self.max_tokens and self.messages:
-            removed = self.messages.pop(0)
-            self.total_tokens -= removed.token_count
+            self._evict()
         self.messages.append(message)
         self.total_tokens += message.token_count
         return True
 
+    def _evict(self) -> None:
+        self.total_tokens -= self.messages.popleft().token_count
+
     def _compact(self):
         while self.total_tokens > self.max_tokens * 0.8 and len(self.messages) > 2:
-            removed = self.messages.pop(0)
-            self.total_tokens -= removed.token_count
+            self._evict()
+
+    def pack(self, budget: int | None = None) -> PackResult:
+        """The newest messages that fit ``budget`` (default ``max_tokens``)."""
+        packer = ContextPacker(self.max_tokens if budget is None else budget, self.counter)
+        packer.add_history(self.messages)
+        return packer.pack()
 
     def get_messages(self) -> list[dict[str, str]]:
         return [{"role": m.role, "content": m.content} for m in self.messages]
 
     def stats(self) -> dict[str, Any]:
-        return {"messages": len(self.messages), "tokens": self.total_tokens, "max_tokens": self.max_tokens}
+        return {"messages": len(self.messages), "tokens": self.total_tokens, "max_tokens": self.max_tokens, "tokenizer": self.counter.name}
 
 
 class ContextCompressor:
@@ -63,29 +93,89 @@ class ContextCompressor:
         }
         self._user_rules: dict[str, str] = {}
         self._project_rules: dict[str, str] = {}
+        self._pattern_scanner: Scanner | None = None
+        self._pattern_actions: list[tuple[re.Pattern, bool]] = []
+        self._drop_scanners: dict[str, Scanner] = {}
 
     def add_tool_rule(self, tool_name: str, rules: dict[str, Any]):
         self._tool_rules[tool_name] = rules
+        self._drop_scanners.pop(tool_name, None)
 
     def add_user_rule(self, pattern: str, action: str):
         self._user_rules[pattern] = action
+        self._pattern_scanner = None
 
     def add_project_rule(self, pattern: str, action: str):
         self._project_rules[pattern] = action
+        self._pattern_scanner = None
+
+    def _pattern_rules(self) -> Scanner:
+        """User then project drop/mask rules in one scanner, named by declaration order.
+
+        Other actions are no-ops. ``_pattern_actions[i]`` holds rule ``i``'s
+        regex and whether it drops.
+        """
+        if self._pattern_scanner is None:
+            rules, actions = [], []
+            for pattern, action in [*self._user_rules.items(), *self._project_rules.items()]:
+                normalized = action.lower().strip()
+                if normalized in _DROP_ACTIONS or normalized in _MASK_ACTIONS:
+                    rules.append(Rule(str(len(actions)), pattern))
+                    actions.append((re.compile(pattern), normalized in _DROP_ACTIONS))
+            self._pattern_scanner = Scanner(rules)
+            self._pattern_actions = actions
+        return self._pattern_scanner
+
+    def _first_pattern_rule(self, scanner: Scanner | None, line: str) -> str | None:
+        """Apply the earliest-declared pattern rule that matches ``line``; ``None`` drops it.
+
+        One scan finds whether any rule hits. Its hit bounds the winner, and
+        only rules declared before it are re-checked on their own, since an
+        earlier rule's match can overlap (and hide behind) a later one's.
+        """
+        hit = scanner.search(line) if scanner is not None else None
+        if hit is None:
+            return line
+        winner = int(hit.rule)
+        for index in range(winner):
+            if self._pattern_actions[index][0].search(line):
+                winner = index
+                break
+        regex, drops = self._pattern_actions[winner]
+        return None if drops else regex.sub("[REDACTED]", line)
+
+    def _drop_rules(self, tool_name: str) -> Scanner | None:
+        patterns = self._tool_rules.get(tool_name, {}).get("drop_patterns")
+        if not patterns:
+            return None
+        scanner = self._drop_scanners.get(tool_name)
+        if scanner is None:
+            scanner = self._drop_scanners[tool_name] = Scanner(Rule("drop", p) for p in patterns)
+        return scanner
 
     def compress(self, text: str, tool_name: str | None = None) -> str:
+        """Line-wise compression; each line gets one scan per rule set.
+
+        Pattern rules keep their per-line, first-match-wins semantics
+        (``^``/``$`` anchor to the line): the earliest-declared rule that
+        matches decides whether the line is dropped or which pattern is masked.
+        """
         lines = text.split("\n")
         result = []
         seen = set()
 
         rules = dict(self._builtin_rules)
+        # Narrowed once for the whole text: rules that cannot hit it are not run per line.
+        patterns = self._pattern_rules().narrow(text)
+        builtin = _BUILTIN_SCANNERS[(bool(rules.get("html_strip")), bool(rules.get("url_shorten")))].narrow(text)
+        drop_rules = self._drop_rules(tool_name) if tool_name else None
+        drop = drop_rules.narrow(text) if drop_rules is not None else None
 
         for line in lines:
             original_stripped = line.strip()
-            custom = self._apply_pattern_rules(original_stripped)
-            if custom is None:
+            stripped = self._first_pattern_rule(patterns, original_stripped)
+            if stripped is None:
                 continue
-            stripped = custom
 
             # Blank line compression
             if rules.get("blank_lines") and not stripped:
@@ -99,35 +189,20 @@ class ContextCompressor:
                 continue
             seen.add(original_stripped)
 
-            # HTML stripping
-            if rules.get("html_strip"):
-                stripped = re.sub(r'<[^>]+>', '', stripped)
-
-            # URL shortening
-            if rules.get("url_shorten"):
-                stripped = re.sub(r'https?://[^\s]+', '[URL]', stripped)
+            # HTML stripping and URL shortening in one rewrite
+            if builtin is not None:
+                stripped = builtin.rewrite(stripped)
 
             # Tool-specific rules
-            if tool_name and tool_name in self._tool_rules:
-                tool_rule = self._tool_rules[tool_name]
-                if "drop_patterns" in tool_rule:
-                    if any(re.search(p, stripped) for p in tool_rule["drop_patterns"]):
-                        continue
+            if drop is not None and drop.detect(stripped):
+                continue
 
             result.append(stripped)
 
         return "\n".join(result)
 
     def _apply_pattern_rules(self, line: str) -> str | None:
-        for pattern, action in [*self._user_rules.items(), *self._project_rules.items()]:
-            if not re.search(pattern, line):
-                continue
-            normalized = action.lower().strip()
-            if normalized in {"drop", "remove", "omit", "exclude"}:
-                return None
-            if normalized in {"mask", "redact"}:
-                return re.sub(pattern, "[REDACTED]", line)
-        return line
+        return self._first_pattern_rule(self._pattern_rules(), line)
 
     def collapse_blank_lines(self, text: str) -> str:
         return re.sub(r'\n{3,}', '\n\n', text)
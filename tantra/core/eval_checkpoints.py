@@ -6,19 +6,24 @@ from __future__ import annotations
 
 import json
 import logging
-import math
 import sys
 import time
 from pathlib import Path
 
 import torch
-from torch import nn
 
 ROOT = Path(__file__).resolve().parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from tantra.npdna import NpDnaCore
+from tantra.training.evaluation import (
+    EncodedSet,
+    encode_eval_set,
+    evaluate_checkpoints,
+    evaluate_loss,
+    measure_latency,
+)
 
 logging.basicConfig(level=logging.WARNING, format="%(message)s")
 
@@ -27,6 +32,8 @@ CHECKPOINT_DIR = ROOT / "tantra/outputs/npdna/checkpoints"
 TEST_DATA = ROOT / "data/all_datasets.jsonl"
 NUM_EVAL_SAMPLES = 64  # texts from the test set
 GENERATE_TOKENS = 20   # tokens to generate for speed test
+LATENCY_RUNS = 5       # timed generation runs (p50/p95), after warmup
+EVAL_WORKERS = 2       # checkpoints evaluated in parallel processes
 MAX_SEQ = 128          # max sequence length for perplexity
 DEVICE = "cpu"
 EXPERIMENT_LOG = ROOT / "experiment_log.csv"
@@ -92,45 +99,20 @@ def benchmark_core(
     core: NpDnaCore,
     test_texts: list[str],
     label: str,
+    encoded: EncodedSet | None = None,
 ) -> dict:
     """Run a mini benchmark on a loaded core, return metrics dict."""
     model = core.model
     model.eval()
-    device = next(model.parameters()).device
-    loss_fn = nn.CrossEntropyLoss(reduction="sum")
 
     # â”€â”€ 1. Loss & Perplexity & Accuracy â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
     print(f"  [{label}] Evaluating on {len(test_texts)} texts...", flush=True)
-    total_loss = 0.0
-    total_tokens = 0
-    total_correct = 0
-    with torch.no_grad():
-        for text in test_texts:
-            ids = core.encode(text, allow_growth=False)[:MAX_SEQ]
-            if len(ids) < 2:
-                continue
-            input_ids = torch.tensor([ids[:-1]], dtype=torch.long, device=device)
-            labels_t = torch.tensor([ids[1:]], dtype=torch.long, device=device)
-            logits, _ = model(input_ids)
-            loss = loss_fn(logits.reshape(-1, logits.shape[-1]), labels_t.reshape(-1))
-            total_loss += float(loss)
-            total_tokens += len(ids) - 1
-            total_correct += int(
-                (logits.argmax(dim=-1) == labels_t).sum().item()
-            )
-
-    avg_loss = total_loss / max(1, total_tokens)
-    perplexity = math.exp(min(avg_loss, 100))
-    accuracy = total_correct / max(1, total_tokens) * 100.0
+    encoded = encoded or encode_eval_set(core, test_texts, MAX_SEQ)
+    ev = evaluate_loss(model, encoded)
 
     # â”€â”€ 2. Generation speed â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-    print(f"  [{label}] Measuring generation speed ({GENERATE_TOKENS} tokens)...", flush=True)
-    core.generate("test", max_tokens=3)  # warmup
-    start = time.perf_counter()
-    result = core.generate("Hello world", max_tokens=GENERATE_TOKENS)
-    elapsed = time.perf_counter() - start
-    tokens_generated = len(core.encode(result, allow_growth=False))
-    gen_speed = tokens_generated / max(0.001, elapsed)
+    print(f"  [{label}] Measuring generation latency ({GENERATE_TOKENS} tokens x {LATENCY_RUNS} runs)...", flush=True)
+    latency = measure_latency(core, "Hello world", max_tokens=GENERATE_TOKENS, runs=LATENCY_RUNS)
 
     # â”€â”€ 3. Parameters â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
     total_params = model.parameter_count()
@@ -153,14 +135,19 @@ def benchmark_core(
 
     return {
         "label": label,
-        "avg_loss": round(avg_loss, 4),
-        "perplexity": round(perplexity, 2),
-        "accuracy_pct": round(accuracy, 2),
+        "avg_loss": round(ev["avg_loss"], 4),
+        "perplexity": round(ev["perplexity"], 2),
+        "accuracy_pct": round(ev["accuracy_pct"], 2),
+        "eval_tokens": ev["tokens"],
+        "eval_tokens_per_sec": round(ev["tokens_per_sec"], 1),
         "total_params": total_params,
         "active_params": active_params,
-        "gen_tokens": tokens_generated,
-        "gen_time_sec": round(elapsed, 3),
-        "gen_speed_tokps": round(gen_speed, 1),
+        "gen_tokens": latency["tokens"],
+        "gen_time_sec": round(latency["total_ms_p50"] / 1000, 3),
+        "gen_speed_tokps": latency["tokens_per_sec_p50"],
+        "gen_ttft_ms_p50": latency["ttft_ms_p50"],
+        "gen_ttft_ms_p95": latency["ttft_ms_p95"],
+        "gen_time_ms_p95": latency["total_ms_p95"],
         "train_loss": meta_loss,
     }
 
@@ -213,7 +200,9 @@ def format_table_entry(results: list[dict]) -> str:
         ("Avg CE Loss", f"{latest['avg_loss']:.4f}", fmt_change(loss_diff, loss_pct, True) if prev else "N/A"),
         ("Perplexity", f"{latest['perplexity']:.2f}", fmt_change(ppl_diff, ppl_pct, True) if prev else "N/A"),
         ("Accuracy", f"{latest['accuracy_pct']:.2f}%", fmt_change(acc_diff, acc_pct, False) if prev else "N/A"),
-        ("Gen Speed", f"{latest['gen_speed_tokps']:.1f} tok/s", fmt_change(speed_diff, speed_pct, False) if prev else "N/A"),
+        ("Gen Speed (p50)", f"{latest['gen_speed_tokps']:.1f} tok/s", fmt_change(speed_diff, speed_pct, False) if prev else "N/A"),
+        ("TTFT p50 / p95", f"{latest['gen_ttft_ms_p50']:.1f} / {latest['gen_ttft_ms_p95']:.1f} ms",
+         f"{prev['gen_ttft_ms_p50']:.1f} / {prev['gen_ttft_ms_p95']:.1f} ms" if prev else "N/A"),
         ("Total Params", f"{latest['total_params']:,}", f"{prev['total_params']:,}" if prev else "N/A"),
         ("Active Params", f"{latest['active_params']:,}", f"{prev['active_params']:,}" if prev else "N/A"),
     ]
@@ -323,33 +312,25 @@ if __name__ == "__main__":
     test_texts = load_test_texts(TEST_DATA, NUM_EVAL_SAMPLES)
     print(f"  Loaded {len(test_texts)} test samples", flush=True)
 
-    results = []
     checkpoints_to_run = []
     if prev_ckpt:
         checkpoints_to_run.append(prev_ckpt)
     checkpoints_to_run.append(latest_ckpt)
 
-    for cp in checkpoints_to_run:
-        label = cp.name
-        print(f"\n[{label}] Loading checkpoint...", flush=True)
-        core = None
-        try:
-            core = NpDnaCore.load(str(cp))
-            core.model.to(DEVICE)
-            print(f"  Model: {core.model.parameter_count():,} params, device={DEVICE}", flush=True)
-            res = benchmark_core(core, test_texts, label)
-            results.append(res)
-            print(f"  [{label}] Done. Loss={res['avg_loss']:.4f}, Acc={res['accuracy_pct']:.2f}%, "
-                  f"PPL={res['perplexity']:.2f}, Speed={res['gen_speed_tokps']:.1f} tok/s", flush=True)
-        except Exception as e:
-            print(f"  [{label}] ERROR: {e}", flush=True)
-            import traceback
-            traceback.print_exc()
-        finally:
-            if core is not None:
-                del core
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
+    print(f"\n  Evaluating {len(checkpoints_to_run)} checkpoint(s) with {EVAL_WORKERS} worker(s)...", flush=True)
+    results = []
+    for res in evaluate_checkpoints(
+        checkpoints_to_run, test_texts, max_seq=MAX_SEQ, workers=EVAL_WORKERS,
+        benchmark=benchmark_core, device=DEVICE,
+    ):
+        label = res["label"]
+        if "error" in res:
+            print(f"  [{label}] ERROR: {res['error']}", flush=True)
+            continue
+        results.append(res)
+        print(f"  [{label}] Done. Loss={res['avg_loss']:.4f}, Acc={res['accuracy_pct']:.2f}%, "
+              f"PPL={res['perplexity']:.2f}, Speed={res['gen_speed_tokps']:.1f} tok/s, "
+              f"TTFT p95={res['gen_ttft_ms_p95']:.1f}ms", flush=True)
 
     if not results:
         print("  No results generated.", flush=True)
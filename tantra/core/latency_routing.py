@@ -0,0 +1,278 @@
+"""Latency-aware provider ranking and hedged requests.
+
+``ProviderRouter`` (atulya/intelligence.py) and ``ModelFailover`` used to
+walk a static preference order: a provider that was slow but not failing
+made every request wait out its full latency. ``LatencyPolicy`` keeps, per
+provider (or provider/model) key:
+
+  - an EWMA of successful latency and a window of recent samples for
+    p50/p95,
+  - an EWMA error rate and a consecutive-failure count with a cooldown.
+
+``order`` ranks candidates: lower tier first (cost/fallback classes), then
+providers with observations by expected time to a success
+(``ewma / (1 - error_rate)``), then unobserved providers in their static
+order, and providers cooling down after repeated failures last.
+
+``hedged`` runs the first candidate and, once it has been outstanding for
+longer than its own p95, starts the next one as a backup, but only within
+the same tier, so a slow free provider never doubles spend on a paid one.
+The first success
+wins and the rest are cancelled. A cancelled loser's elapsed time is only a
+lower bound on its latency: it raises the EWMA to at least that value but is
+not a sample, so a provider that keeps losing races drifts down the ranking
+instead of keeping a stale fast estimate. Failures move on to the next
+candidate immediately.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Generic, Hashable, Sequence, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+class ProviderUnavailable(Exception):
+    """Raised by a ``hedged`` call to skip a candidate without counting an error."""
+
+
+class AllCandidatesFailed(RuntimeError):
+    """Every candidate failed or was unavailable; ``errors`` holds ``(key, exc)``."""
+
+    def __init__(self, errors: list[tuple[Any, BaseException]]):
+        last = errors[-1][1] if errors else None
+        super().__init__(f"All providers failed. Last error: {last}")
+        self.errors = errors
+
+
+@dataclass
+class LatencyStats:
+    ewma_ms: float = 0.0
+    error_rate: float = 0.0
+    samples: deque = field(default_factory=lambda: deque(maxlen=128))
+    successes: int = 0
+    failures: int = 0
+    cancelled: int = 0
+    consecutive_failures: int = 0
+    last_failure: float = 0.0
+
+    @property
+    def observed(self) -> int:
+        return len(self.samples)
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100.0 * len(ordered)) - 1))]
+
+
+class LatencyPolicy(Generic[K]):
+    """Per-key latency/error tracking, ranking and hedging.
+
+    Args:
+        alpha: EWMA weight of the newest sample
+        window: Samples kept per key for percentiles
+        min_samples: Observations before a key's p95 is trusted for hedging
+        hedging: Fire backup requests at all
+        hedge_floor_ms: Never hedge sooner than this
+        hedge_cap_ms: Never wait longer than this before hedging
+        failure_threshold: Consecutive failures that start a cooldown
+        cooldown: Seconds a failing key is ranked last
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        window: int = 128,
+        min_samples: int = 5,
+        hedging: bool = True,
+        hedge_floor_ms: float = 250.0,
+        hedge_cap_ms: float = 30_000.0,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+    ):
+        self.alpha = alpha
+        self.window = window
+        self.min_samples = min_samples
+        self.hedging = hedging
+        self.hedge_floor_ms = hedge_floor_ms
+        self.hedge_cap_ms = hedge_cap_ms
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._stats: dict[K, LatencyStats] = {}
+        self._lock = threading.Lock()
+        self.hedges_fired = 0
+        self.hedges_won = 0
+
+    # ── observations ─────────────────────────────────────────
+
+    def _get(self, key: K) -> LatencyStats:
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = LatencyStats(samples=deque(maxlen=self.window))
+        return stats
+
+    def _sample(self, stats: LatencyStats, latency_ms: float) -> None:
+        stats.ewma_ms = latency_ms if not stats.samples else stats.ewma_ms + self.alpha * (latency_ms - stats.ewma_ms)
+        stats.samples.append(latency_ms)
+
+    def record(self, key: K, latency_ms: float, ok: bool = True) -> None:
+        with self._lock:
+            stats = self._get(key)
+            stats.error_rate += self.alpha * ((0.0 if ok else 1.0) - stats.error_rate)
+            if ok:
+                self._sample(stats, latency_ms)
+                stats.successes += 1
+                stats.consecutive_failures = 0
+            else:
+                stats.failures += 1
+                stats.consecutive_failures += 1
+                stats.last_failure = time.time()
+
+    def record_cancelled(self, key: K, elapsed_ms: float) -> None:
+        """A hedge loser: it took at least ``elapsed_ms``, so that bounds the EWMA from below."""
+        with self._lock:
+            stats = self._get(key)
+            stats.ewma_ms = max(stats.ewma_ms, elapsed_ms)
+            stats.cancelled += 1
+
+    # ── ranking ──────────────────────────────────────────────
+
+    def cooling_down(self, key: K, now: float | None = None) -> bool:
+        stats = self._stats.get(key)
+        if stats is None or stats.consecutive_failures < self.failure_threshold:
+            return False
+        return ((time.time() if now is None else now) - stats.last_failure) < self.cooldown
+
+    def expected_ms(self, key: K) -> float | None:
+        stats = self._stats.get(key)
+        if stats is None or not stats.samples:
+            return None
+        return stats.ewma_ms / max(0.05, 1.0 - stats.error_rate)
+
+    def order(self, keys: Sequence[K], tier: Callable[[K], int] | None = None) -> list[K]:
+        """Rank ``keys`` (given in static preference order) fastest-healthy first."""
+        now = time.time()
+        with self._lock:
+            def rank(item: tuple[int, K]) -> tuple:
+                index, key = item
+                expected = self.expected_ms(key)
+                if self.cooling_down(key, now):
+                    return (tier(key) if tier else 0, 2, index)
+                if expected is None:
+                    return (tier(key) if tier else 0, 1, index)
+                return (tier(key) if tier else 0, 0, expected)
+
+            return [key for _, key in sorted(enumerate(keys), key=rank)]
+
+    def hedge_delay(self, key: K) -> float | None:
+        """Seconds to wait on ``key`` before starting a backup, or ``None``."""
+        if not self.hedging:
+            return None
+        stats = self._stats.get(key)
+        if stats is None or stats.observed < self.min_samples:
+            return None
+        return min(self.hedge_cap_ms, max(self.hedge_floor_ms, stats.percentile(95))) / 1000.0
+
+    # ── execution ────────────────────────────────────────────
+
+    async def hedged(
+        self,
+        candidates: Sequence[K],
+        call: Callable[[K], Awaitable[T]],
+        *,
+        hedge: bool = True,
+        max_hedges: int = 1,
+        fatal: Callable[[K, BaseException], bool] | None = None,
+        on_error: Callable[[K, BaseException], None] | None = None,
+        tier: Callable[[K], int] | None = None,
+    ) -> tuple[K, T]:
+        """Run ``call`` over ``candidates`` with failover and hedging.
+
+        Returns ``(key, result)`` of the first success. Raises
+        ``AllCandidatesFailed`` when none succeeds, or as soon as ``fatal``
+        says an error should stop the walk. With ``tier``, a backup is only
+        started on a candidate in the same tier as the one in flight.
+        """
+        queue = list(candidates)
+        pending: dict[asyncio.Future, tuple[K, float]] = {}
+        errors: list[tuple[K, BaseException]] = []
+        hedges_left = max_hedges if hedge else 0
+        launched: list[K] = []
+
+        def launch() -> None:
+            key = queue.pop(0)
+            launched.append(key)
+            pending[asyncio.ensure_future(call(key))] = (key, time.perf_counter())
+
+        try:
+            while True:
+                if not pending:
+                    if not queue:
+                        raise AllCandidatesFailed(errors)
+                    launch()
+                timeout = None
+                if hedges_left > 0 and queue and len(pending) == 1:
+                    key, started = next(iter(pending.values()))
+                    same_tier = tier is None or tier(queue[0]) == tier(key)
+                    delay = self.hedge_delay(key) if same_tier else None
+                    if delay is not None:
+                        timeout = max(0.0, started + delay - time.perf_counter())
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedges_left -= 1
+                    self.hedges_fired += 1
+                    launch()
+                    continue
+                winner: tuple[K, T] | None = None
+                for task in done:
+                    key, started = pending.pop(task)
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    exc = task.exception()
+                    if exc is None:
+                        self.record(key, elapsed_ms, ok=True)
+                        if winner is None:
+                            winner = (key, task.result())
+                        continue
+                    errors.append((key, exc))
+                    if isinstance(exc, ProviderUnavailable):
+                        continue
+                    self.record(key, elapsed_ms, ok=False)
+                    if on_error is not None:
+                        on_error(key, exc)
+                    if fatal is not None and fatal(key, exc):
+                        raise AllCandidatesFailed(errors)
+                if winner is not None:
+                    if pending and winner[0] != launched[0]:
+                        self.hedges_won += 1
+                    return winner
+        finally:
+            for task, (key, started) in pending.items():
+                task.cancel()
+                self.record_cancelled(key, (time.perf_counter() - started) * 1000)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            providers = {
+                str(key): {
+                    "ewma_ms": round(stats.ewma_ms, 2),
+                    "p50_ms": round(stats.percentile(50), 2),
+                    "p95_ms": round(stats.percentile(95), 2),
+                    "error_rate": round(stats.error_rate, 4),
+                    "successes": stats.successes,
+                    "failures": stats.failures,
+                    "cancelled": stats.cancelled,
+                    "cooling_down": self.cooling_down(key),
+                }
+                for key, stats in self._stats.items()
+            }
+        return {"providers": providers, "hedges_fired": self.hedges_fired, "hedges_won": self.hedges_won}
@@ -1,17 +1,23 @@
 """Model failover with health checks, live switching, and automatic fallback.
 
 Supports OpenCode as primary provider with circuit breaker pattern.
+Providers are ranked by observed latency (``LatencyPolicy``) within a
+priority tier, and slow requests are hedged onto the next provider.
 """
 from __future__ import annotations
 
 import asyncio
+import shlex
 import subprocess
 import time
 import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, AsyncIterator
+from typing import Any, AsyncIterator, Iterable
+
+from .latency_routing import AllCandidatesFailed, LatencyPolicy
+from .worker_pool import WorkerPool
 
 logger = logging.getLogger(__name__)
 
@@ -111,6 +117,10 @@ class ProviderConfig:
     cost_per_1k_output: float = 0.0
     circuit_breaker: CircuitBreakerConfig = field(default_factory=CircuitBreakerConfig)
     metadata: dict[str, Any] = field(default_factory=dict)
+    # Providers in a lower tier are always tried first; latency ranks within a tier.
+    tier: int = 0
+    # e.g. {"tools", "stream", "vision"}; empty means "anything".
+    capabilities: set[str] = field(default_factory=set)
 
 
 class ModelProvider(ABC):
@@ -148,11 +158,33 @@ class OpenCodeProvider(ModelProvider):
     """OpenCode CLI-based model provider.
 
     Uses `opencode run` or `opencode chat` to interact with the model.
+    When ``config.metadata["worker_command"]`` names a worker that speaks
+    the ``WorkerPool`` protocol, requests go to a pool of warm workers
+    (``workers`` of them, each replaced after ``worker_max_requests``)
+    instead of one process per request; messages travel over stdin.
     """
 
     def __init__(self, config: ProviderConfig):
         self.config = config
         self._available: bool | None = None
+        self._pool: WorkerPool | None = None
+        worker_command = config.metadata.get("worker_command")
+        if worker_command:
+            argv = shlex.split(worker_command) if isinstance(worker_command, str) else list(worker_command)
+            self._pool = WorkerPool(
+                argv,
+                size=int(config.metadata.get("workers", 2)),
+                max_requests=int(config.metadata.get("worker_max_requests", 100)),
+                timeout=config.timeout,
+            )
+
+    @property
+    def pool(self) -> WorkerPool | None:
+        return self._pool
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
 
     def _check_available(self) -> bool:
         if self._available is not None:
@@ -173,6 +205,8 @@ class OpenCodeProvider(ModelProvider):
 
     async def health_check(self) -> ProviderHealth:
         start = time.time()
+        if self._pool is not None:
+            return await self._pool_health(start)
         try:
             available = await asyncio.to_thread(self._check_available)
             if available:
@@ -194,6 +228,37 @@ class OpenCodeProvider(ModelProvider):
                 last_error=str(e),
             )
 
+    async def _pool_health(self, start: float) -> ProviderHealth:
+        """Healthy with every worker alive, degraded with some, unhealthy with none."""
+        try:
+            await self._pool.start()
+        except Exception as e:
+            return ProviderHealth(status=ProviderStatus.UNHEALTHY, last_check=time.time(), last_error=str(e))
+        alive = self._pool.alive
+        stats = self._pool.health()
+        if alive == 0:
+            status = ProviderStatus.UNHEALTHY
+        else:
+            status = ProviderStatus.HEALTHY if alive >= self._pool.size else ProviderStatus.DEGRADED
+        return ProviderHealth(
+            status=status,
+            latency_ms=(time.time() - start) * 1000,
+            last_check=time.time(),
+            total_requests=stats["requests"],
+            total_failures=stats["crashed"],
+            last_error=stats["last_error"] or None,
+            last_success=time.time() if alive else 0.0,
+        )
+
+    def _pool_request(self, messages: list[dict[str, str]], temperature: float, max_tokens: int | None, stream: bool) -> dict[str, Any]:
+        return {
+            "messages": [{"role": m.get("role", "user"), "content": m.get("content", "")} for m in messages],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "model": self.config.model,
+            "stream": stream,
+        }
+
     async def chat_completion(
         self,
         messages: list[dict[str, str]],
@@ -202,6 +267,19 @@ class OpenCodeProvider(ModelProvider):
         stream: bool = False,
         **kwargs: Any,
     ) -> dict[str, Any]:
+        if self._pool is not None:
+            reply = await self._pool.request(self._pool_request(messages, temperature, max_tokens, False))
+            usage = reply.get("usage") or {}
+            return {
+                "content": str(reply.get("content", "")).strip(),
+                "usage": {
+                    "prompt_tokens": usage.get("prompt_tokens", 0),
+                    "completion_tokens": usage.get("completion_tokens", 0),
+                    "total_tokens": usage.get("total_tokens", 0),
+                },
+                "provider": "opencode",
+                "model": self.config.model or "opencode-default",
+            }
         prompt = "\n".join(m.get("content", "") for m in messages)
         cmd = self.config.command or "opencode"
         args = [cmd, "run", "--temperature", str(temperature)]
@@ -234,6 +312,12 @@ class OpenCodeProvider(ModelProvider):
         max_tokens: int | None = None,
         **kwargs: Any,
     ) -> AsyncIterator[str]:
+        if self._pool is not None:
+            async for message in self._pool.stream(self._pool_request(messages, temperature, max_tokens, True)):
+                chunk = str(message.get("chunk", "")).strip()
+                if chunk:
+                    yield chunk
+            return
         prompt = "\n".join(m.get("content", "") for m in messages)
         cmd = self.config.command or "opencode"
         args = [cmd, "run", "--stream", "--temperature", str(temperature)]
@@ -296,7 +380,11 @@ class OpenCodeProvider(ModelProvider):
 
 
 class ModelFailover:
-    def __init__(self, providers: list[tuple[ModelProvider, ProviderConfig]]):
+    def __init__(
+        self,
+        providers: list[tuple[ModelProvider, ProviderConfig]],
+        policy: LatencyPolicy | None = None,
+    ):
         self._providers: dict[str, tuple[ModelProvider, ProviderConfig]] = {
             cfg.name: (provider, cfg) for provider, cfg in providers
         }
@@ -311,6 +399,25 @@ class ModelFailover:
         self._running = False
         self._current_provider: str | None = None
         self._failover_log: list[dict[str, Any]] = []
+        self.policy: LatencyPolicy[str] = policy or LatencyPolicy()
+
+    def _ranked(self, names: Iterable[str] | None = None, require: Iterable[str] = ()) -> list[str]:
+        """Providers meeting ``require``, fastest healthy first within each tier."""
+        required = set(require)
+        names = [
+            n for n in (names if names is not None else self._providers)
+            if not required or not self._providers[n][1].capabilities
+            or required <= self._providers[n][1].capabilities
+        ]
+        names.sort(key=lambda n: self._providers[n][1].priority)
+        return self.policy.order(names, tier=lambda n: self._providers[n][1].tier)
+
+    def _can_execute(self, name: str) -> bool:
+        cfg = self._providers[name][1]
+        return self._circuit_breakers[name].can_execute(
+            cfg.circuit_breaker.recovery_timeout,
+            cfg.circuit_breaker.half_open_max_requests
+        )
 
     async def start(self):
         self._running = True
@@ -326,6 +433,10 @@ class ModelFailover:
                 await self._health_check_task
             except asyncio.CancelledError:
                 pass
+        for provider, _ in self._providers.values():
+            close = getattr(provider, "close", None)
+            if close is not None:
+                await close()
 
     async def _health_loop(self):
         while self._running:
@@ -381,26 +492,14 @@ class ModelFailover:
         return health
 
     async def _select_best_provider(self):
-        candidates = []
-        for name, (_, cfg) in self._providers.items():
-            health = self._health[name]
-            cb = self._circuit_breakers[name]
-            if cb.can_execute(
-                cfg.circuit_breaker.recovery_timeout,
-                cfg.circuit_breaker.half_open_max_requests
-            ):
-                if health.status in (ProviderStatus.HEALTHY, ProviderStatus.DEGRADED):
-                    candidates.append((cfg.priority, name, health.latency_ms))
-
-        if not candidates:
-            candidates = [
-                (cfg.priority, name, 0)
-                for name, (_, cfg) in self._providers.items()
-            ]
-
-        if candidates:
-            candidates.sort(key=lambda x: (x[0], x[2]))
-            best = candidates[0][1]
+        candidates = [
+            name for name in self._providers
+            if self._can_execute(name)
+            and self._health[name].status in (ProviderStatus.HEALTHY, ProviderStatus.DEGRADED)
+        ]
+        ranked = self._ranked(candidates or None)
+        if ranked:
+            best = ranked[0]
             if self._current_provider != best:
                 logger.info("Switching provider: %s -> %s", self._current_provider, best)
                 self._current_provider = best
@@ -416,8 +515,17 @@ class ModelFailover:
         max_tokens: int | None = None,
         stream: bool = False,
         force_provider: str | None = None,
+        require: Iterable[str] = (),
+        hedge: bool = True,
         **kwargs: Any,
     ) -> dict[str, Any] | AsyncIterator[str]:
+        """Run on the fastest healthy provider meeting ``require``.
+
+        Non-streaming requests are hedged: when the chosen provider is still
+        running past its p95, the next one is started and the first answer
+        wins. Streams fail over sequentially in the same ranked order; their
+        latency is the time to the first chunk.
+        """
         if force_provider:
             if force_provider not in self._providers:
                 raise ValueError(f"Unknown provider: {force_provider}")
@@ -425,48 +533,73 @@ class ModelFailover:
                 force_provider, messages, temperature, max_tokens, stream, **kwargs
             )
 
-        ordered = sorted(
-            self._providers.keys(),
-            key=lambda n: self._providers[n][1].priority
-        )
+        ordered = [name for name in self._ranked(require=require) if self._can_execute(name)]
+
+        if not stream:
+            async def call(name: str) -> dict[str, Any]:
+                return await self._try_provider(name, messages, temperature, max_tokens, False, **kwargs)
+
+            def is_fatal(name: str, exc: BaseException) -> bool:
+                return isinstance(exc, Exception) and self._providers[name][0].classify_error(exc) == ErrorType.AUTH
+
+            try:
+                name, result = await self.policy.hedged(
+                    ordered, call, hedge=hedge, fatal=is_fatal, on_error=self._record_failure,
+                    tier=lambda n: self._providers[n][1].tier,
+                )
+            except AllCandidatesFailed as exc:
+                last_error = exc.errors[-1][1] if exc.errors else None
+                raise RuntimeError(f"All providers failed. Last error: {last_error}") from last_error
+            self._record_success(name)
+            return result
 
         last_error = None
         for name in ordered:
-            cb = self._circuit_breakers[name]
-            cfg = self._providers[name][1]
-            if not cb.can_execute(
-                cfg.circuit_breaker.recovery_timeout,
-                cfg.circuit_breaker.half_open_max_requests
-            ):
-                continue
-
+            start = time.time()
             try:
                 result = await self._try_provider(
                     name, messages, temperature, max_tokens, stream, **kwargs
                 )
-                cb.record_success()
-                self._health[name].consecutive_failures = 0
-                self._health[name].last_success = time.time()
-                return result
+                self._record_success(name)
+                # The iterator exists before any token does; time the first chunk instead.
+                return self._timed_stream(name, result, start) if hasattr(result, "__aiter__") else result
             except Exception as e:
                 last_error = e
-                error_type = self._providers[name][0].classify_error(e)
-                cb.record_failure(cfg.circuit_breaker.failure_threshold)
-                self._health[name].consecutive_failures += 1
-                self._health[name].total_failures += 1
-                self._health[name].last_error = str(e)
-                self._failover_log.append({
-                    "timestamp": time.time(),
-                    "provider": name,
-                    "error": str(e),
-                    "error_type": error_type.value,
-                })
-                logger.warning("Provider %s failed (%s): %s", name, error_type.value, e)
-                if error_type == ErrorType.AUTH:
+                self.policy.record(name, (time.time() - start) * 1000, ok=False)
+                if self._record_failure(name, e) == ErrorType.AUTH:
                     break
 
         raise RuntimeError(f"All providers failed. Last error: {last_error}")
 
+    async def _timed_stream(self, name: str, chunks: AsyncIterator[str], start: float) -> AsyncIterator[str]:
+        first = True
+        async for chunk in chunks:
+            if first:
+                first = False
+                self.policy.record(name, (time.time() - start) * 1000, ok=True)
+            yield chunk
+
+    def _record_success(self, name: str) -> None:
+        self._circuit_breakers[name].record_success()
+        self._health[name].consecutive_failures = 0
+        self._health[name].last_success = time.time()
+
+    def _record_failure(self, name: str, error: BaseException) -> ErrorType:
+        provider, cfg = self._providers[name]
+        error_type = provider.classify_error(error) if isinstance(error, Exception) else ErrorType.UNKNOWN
+        self._circuit_breakers[name].record_failure(cfg.circuit_breaker.failure_threshold)
+        self._health[name].consecutive_failures += 1
+        self._health[name].total_failures += 1
+        self._health[name].last_error = str(error)
+        self._failover_log.append({
+            "timestamp": time.time(),
+            "provider": name,
+            "error": str(error),
+            "error_type": error_type.value,
+        })
+        logger.warning("Provider %s failed (%s): %s", name, error_type.value, error)
+        return error_type
+
     async def _try_provider(
         self,
         name: str,
@@ -522,6 +655,7 @@ class ModelFailover:
                 for cb in [self._circuit_breakers[name]]
             },
             "failover_log": self._failover_log[-20:],
+            "latency": self.policy.snapshot(),
         }
 
     def switch_provider(self, name: str):
@@ -541,6 +675,11 @@ def create_failover_from_config(config: dict[str, Any]) -> ModelFailover:
         command=config.get("opencode_command", "opencode"),
         cost_per_1k_input=0.0,
         cost_per_1k_output=0.0,
+        metadata={
+            key: config[f"opencode_{key}"]
+            for key in ("worker_command", "workers", "worker_max_requests")
+            if config.get(f"opencode_{key}")
+        },
     )
     providers.append((OpenCodeProvider(opencode_cfg), opencode_cfg))
 
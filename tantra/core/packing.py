@@ -0,0 +1,245 @@
+"""Token-exact context packing.
+
+``TokenCounter`` counts tokens with the tokenizer of the model that will read
+the prompt: the GGUF vocabulary through llama-cpp (``from_llama``), the
+NP-DNA ``AtulyaTokenizer`` (``from_tokenizer``), or, when neither is
+available, the character heuristic from ``atulya.tokenjuice``. Counts are
+memoized per text in a bounded LRU, so a history turn is tokenized once per
+process, not once per request.
+
+``ContextPacker`` fits pinned text (the user's prompt, instructions), recent
+history, memory snippets and tool results into a token budget:
+
+  - items are admitted by priority, newest first within a priority,
+  - history is kept as a contiguous run of the newest turns: once a turn is
+    evicted every older turn goes too, so the model never sees a gap,
+  - truncatable items (tool output, memory) that do not fit whole are cut to
+    the remaining space instead of being dropped,
+  - pinned items are always kept, even over budget.
+
+``PackResult`` reports what was kept and dropped and the packing efficiency
+(used / available tokens).
+"""
+from __future__ import annotations
+
+import functools
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Sequence
+
+logger = logging.getLogger(__name__)
+
+PINNED = 100
+PRIORITIES = {"tool": 60, "history": 40, "memory": 30}
+_TRUNCATABLE = {"tool", "memory"}
+_CONTIGUOUS = {"history"}
+
+
+def _estimate(text: str) -> int:
+    try:
+        from atulya.tokenjuice.estimator import estimate_tokens
+    except Exception:  # pragma: no cover - atulya is optional for tantra
+        return max(1, len(text) // 4 + 1)
+    return estimate_tokens(text)
+
+
+class TokenCounter:
+    """Counts tokens with a model's tokenizer, memoizing per text.
+
+    Args:
+        encode: ``text -> token ids``; ``None`` uses the character heuristic
+        name: Tokenizer label reported in packing stats
+        cache_size: Distinct texts whose counts are remembered
+    """
+
+    def __init__(self, encode: Callable[[str], Sequence[int]] | None = None, name: str = "estimate", cache_size: int = 4096):
+        self._encode = encode
+        self.name = name
+        self.exact = encode is not None
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_llama(cls, llama: Any, name: str = "gguf", **kwargs: Any) -> "TokenCounter":
+        """Count with a ``llama_cpp.Llama`` (a ``vocab_only`` instance is enough)."""
+        return cls(lambda text: llama.tokenize(text.encode("utf-8"), add_bos=False, special=True), name, **kwargs)
+
+    @classmethod
+    def from_tokenizer(cls, tokenizer: Any, name: str = "npdna", **kwargs: Any) -> "TokenCounter":
+        """Count with an ``AtulyaTokenizer`` without growing its vocabulary."""
+        return cls(functools.partial(tokenizer.encode, allow_growth=False), name, **kwargs)
+
+    def _measure(self, text: str) -> int:
+        if self._encode is None:
+            return _estimate(text)
+        try:
+            return len(self._encode(text))
+        except Exception as exc:
+            logger.debug(f"Tokenizer {self.name} failed, estimating: {exc}")
+            return _estimate(text)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        with self._lock:
+            n = self._cache.get(text)
+            if n is not None:
+                self._cache.move_to_end(text)
+                self.hits += 1
+                return n
+        n = self._measure(text)
+        with self._lock:
+            self.misses += 1
+            self._cache[text] = n
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return n
+
+    def truncate(self, text: str, tokens: int) -> str:
+        """Longest prefix of ``text`` that fits in ``tokens`` (binary search)."""
+        if tokens <= 0:
+            return ""
+        if self.count(text) <= tokens:
+            return text
+        lo, hi = 0, len(text)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self._measure(text[:mid]) <= tokens:
+                lo = mid
+            else:
+                hi = mid - 1
+        return text[:lo]
+
+    def stats(self) -> dict[str, Any]:
+        return {"tokenizer": self.name, "exact": self.exact, "cached": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+@dataclass
+class PackItem:
+    kind: str
+    content: str
+    tokens: int
+    priority: int
+    seq: int
+    role: str = ""
+    truncatable: bool = False
+    truncated: bool = False
+
+
+@dataclass
+class PackResult:
+    items: list[PackItem] = field(default_factory=list)
+    dropped: list[PackItem] = field(default_factory=list)
+    used: int = 0
+    budget: int = 0
+    requested: int = 0
+    tokenizer: str = "estimate"
+
+    @property
+    def efficiency(self) -> float:
+        """Used / available tokens."""
+        return self.used / self.budget if self.budget > 0 else 0.0
+
+    @property
+    def truncated(self) -> int:
+        return sum(1 for item in self.items if item.truncated)
+
+    def of(self, kind: str) -> list[PackItem]:
+        return [item for item in self.items if item.kind == kind]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "used": self.used,
+            "budget": self.budget,
+            "requested": self.requested,
+            "efficiency": round(self.efficiency, 4),
+            "kept": len(self.items),
+            "dropped": len(self.dropped),
+            "truncated": self.truncated,
+            "tokenizer": self.tokenizer,
+        }
+
+
+class ContextPacker:
+    """Fits prompt pieces into a token budget with priority-aware eviction.
+
+    Args:
+        budget: Tokens available for everything added
+        counter: Token counter; defaults to the estimating one
+        overhead: Tokens charged per item for separators/role prefixes
+        min_truncated: Smallest useful slice of a truncatable item
+    """
+
+    def __init__(self, budget: int, counter: TokenCounter | None = None, overhead: int = 1, min_truncated: int = 16):
+        self.budget = max(0, budget)
+        self.counter = counter or TokenCounter()
+        self.overhead = overhead
+        self.min_truncated = min_truncated
+        self._items: list[PackItem] = []
+
+    def add(self, kind: str, content: str, priority: int | None = None, role: str = "", truncatable: bool | None = None, tokens: int = 0) -> PackItem | None:
+        if not content:
+            return None
+        item = PackItem(
+            kind=kind,
+            content=content,
+            tokens=tokens if tokens > 0 else self.counter.count(content),
+            priority=PRIORITIES.get(kind, PINNED) if priority is None else priority,
+            seq=len(self._items),
+            role=role,
+            truncatable=kind in _TRUNCATABLE if truncatable is None else truncatable,
+        )
+        self._items.append(item)
+        return item
+
+    def pin(self, content: str, kind: str = "pinned") -> PackItem | None:
+        return self.add(kind, content, priority=PINNED, truncatable=False)
+
+    def add_history(self, history: Iterable[Any]) -> None:
+        """Turns oldest first, as dicts (``role``/``content``) or ``ContextMessage``."""
+        for turn in history:
+            if isinstance(turn, dict):
+                role, content = turn.get("role", "user"), turn.get("content") or turn.get("text") or ""
+            else:
+                role, content = turn.role, turn.content
+            if content:
+                self.add("history", f"{role}: {content}", role=role)
+
+    def pack(self) -> PackResult:
+        result = PackResult(budget=self.budget, tokenizer=self.counter.name)
+        remaining = self.budget
+        kept: set[int] = set()
+        closed: set[tuple[str, int]] = set()
+        for item in sorted(self._items, key=lambda i: (-i.priority, -i.seq)):
+            cost = item.tokens + self.overhead
+            result.requested += cost
+            if item.priority >= PINNED:
+                kept.add(item.seq)
+                remaining -= cost
+                continue
+            if (item.kind, item.priority) in closed:
+                result.dropped.append(item)
+                continue
+            if cost <= remaining:
+                kept.add(item.seq)
+                remaining -= cost
+                continue
+            room = remaining - self.overhead
+            if item.truncatable and room >= self.min_truncated:
+                item.content = self.counter.truncate(item.content, room)
+                item.tokens = self.counter.count(item.content)
+                item.truncated = True
+                kept.add(item.seq)
+                remaining -= item.tokens + self.overhead
+                continue
+            if item.kind in _CONTIGUOUS:
+                closed.add((item.kind, item.priority))
+            result.dropped.append(item)
+        result.items = [item for item in self._items if item.seq in kept]
+        result.used = self.budget - remaining
+        return result
@@ -0,0 +1,317 @@
+"""Single-pass rule scanning and rewriting.
+
+``PromptInjectionGuard``, ``EncryptionManager.redact_secrets`` and
+``ContextCompressor`` used to run one ``re.search``/``re.sub`` per rule over
+the same text. A ``Scanner`` compiles a rule set into one alternation of
+named groups (``(?P<_r0>...)|(?P<_r1>...)|...``), so a single left-to-right
+pass finds every hit and a single rewrite applies every replacement. At any
+position the first rule (in rule order) that matches wins and hits never
+overlap, which is what the sequential passes produced for these rule sets.
+
+``StreamScanner`` applies a scanner to text arriving in chunks (SSE tokens).
+It releases everything that can no longer be part of a match and holds back
+only the tail that still could be:
+
+  - for rules with a bounded match length, the longest such match;
+  - for unbounded rules, from the last occurrence of the rule's ``trigger``
+    (a short bounded pattern every match starts with), capped at
+    ``max_match`` characters. Unbounded rules without a trigger hold back
+    ``max_match`` characters.
+
+CPython's ``re`` has no multi-literal (Aho–Corasick) search and a wide
+alternation is slower per position than one literal pattern, so rules carry
+``literals``: lowercase strings, one of which every match contains. A scan
+first checks the lowercased text for them (C-speed substring search) and
+runs the combined regex only over the rules that can hit; text with no
+candidate at all is returned untouched without running any regex. Plain
+literal patterns get their literal automatically.
+
+Rules whose pattern cannot be embedded (numbered backreferences, duplicate
+group names) run as separate regexes; their hits are merged by position.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Iterable, Sequence, Union
+
+try:  # Python 3.11+
+    from re import _parser as _sre_parse
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
+
+Replacement = Union[str, Callable[[re.Match], str], None]
+
+_FLAG_LETTERS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"), (re.VERBOSE, "x"))
+_BACKREF = re.compile(r"\\[1-9]|\(\?P=")
+_META = re.compile(r"[\\.^$*+?{}\[\]|()]")
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One detection/redaction rule.
+
+    ``replacement`` is the text substituted for a hit (``None`` = detect
+    only; a callable receives the rule's own match). ``literals`` prefilter
+    the rule (empty = always run). ``trigger`` is only used when streaming
+    unbounded patterns.
+    """
+
+    name: str
+    pattern: str
+    replacement: Replacement = None
+    flags: int = 0
+    trigger: str | None = None
+    literals: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class Hit:
+    rule: str
+    start: int
+    end: int
+    text: str
+
+
+def _scoped(rule: Rule) -> str:
+    letters = "".join(letter for flag, letter in _FLAG_LETTERS if rule.flags & flag)
+    return f"(?{letters}:{rule.pattern})" if letters else f"(?:{rule.pattern})"
+
+
+def _max_width(pattern: str, flags: int) -> int | None:
+    """Longest possible match of ``pattern``, or ``None`` when unbounded."""
+    try:
+        hi = _sre_parse.parse(pattern, flags).getwidth()[1]
+    except Exception:
+        return None
+    return None if hi >= _sre_parse.MAXREPEAT else hi
+
+
+def _literals(rule: Rule) -> tuple[str, ...] | None:
+    if rule.literals:
+        return tuple(lit.lower() for lit in rule.literals)
+    if rule.pattern and not _META.search(rule.pattern) and not rule.flags & re.VERBOSE:
+        return (rule.pattern.lower(),)
+    return None
+
+
+class Scanner:
+    """A compiled rule set. Immutable; share one per rule set."""
+
+    def __init__(self, rules: Iterable[Rule], prefilter: bool = True):
+        self.rules: tuple[Rule, ...] = tuple(rules)
+        self._literals = [_literals(rule) for rule in self.rules] if prefilter else [None] * len(self.rules)
+        self._prefiltered = any(lits is not None for lits in self._literals)
+        self._subsets: dict[tuple[int, ...], Scanner | None] = {}
+        self._by_group: dict[str, int] = {}
+        combined: list[str] = []
+        self._separate: list[tuple[int, re.Pattern]] = []
+        # Compiling each rule alone surfaces a bad pattern with its own error.
+        self._own = [re.compile(rule.pattern, rule.flags) for rule in self.rules]
+        for index, (rule, own) in enumerate(zip(self.rules, self._own)):
+            if _BACKREF.search(rule.pattern) or own.groupindex:
+                self._separate.append((index, own))
+                continue
+            group = f"_r{index}"
+            self._by_group[group] = index
+            combined.append(f"(?P<{group}>{_scoped(rule)})")
+        self._regex = re.compile("|".join(combined)) if combined else None
+        # Fixed-string replacements by group, for a cheap ``sub`` callback.
+        self._fixed: dict[str, str] | None = {
+            group: rule.replacement for group, index in self._by_group.items()
+            if isinstance((rule := self.rules[index]).replacement, str)
+        }
+        if len(self._fixed) != len(self._by_group):
+            self._fixed = None
+        # One shared replacement needs no callback at all.
+        same = set(self._fixed.values()) if self._fixed else set()
+        self._template = same.pop().replace("\\", "\\\\") if len(same) == 1 else None
+
+        widths = [_max_width(rule.pattern, rule.flags) for rule in self.rules]
+        bounded = [w for w in widths if w is not None]
+        triggered = [Rule(r.name, r.trigger, flags=r.flags) for r, w in zip(self.rules, widths) if w is None and r.trigger]
+        trigger_widths = [_max_width(t.pattern, t.flags) for t in triggered]
+        # Longest tail that may hold the start of a match not yet complete.
+        self.hold = max([*bounded, *(w for w in trigger_widths if w is not None), 0])
+        self.untriggered = any(w is None and not r.trigger for r, w in zip(self.rules, widths)) or None in trigger_widths
+        self._trigger = re.compile("|".join(_scoped(t) for t in triggered)) if triggered else None
+
+    # ── matching ─────────────────────────────────────────────
+
+    def narrow(self, text: str) -> "Scanner | None":
+        """An unfiltered scanner over just the rules that can hit ``text``.
+
+        ``None`` when none can. Narrow once and reuse the result for many
+        pieces of the same text (lines, say) to skip the per-call prefilter.
+        """
+        if not self._prefiltered:
+            return self if self.rules else None
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            active = tuple(range(len(self.rules)))  # case mapping changed lengths; skip the prefilter
+        else:
+            active = tuple(
+                i for i, lits in enumerate(self._literals)
+                if lits is None or any(lit in lowered for lit in lits)
+            )
+        if active not in self._subsets:
+            self._subsets[active] = Scanner([self.rules[i] for i in active], prefilter=False) if active else None
+        return self._subsets[active]
+
+    def _matches(self, text: str, pos: int = 0) -> Iterable[tuple[int, re.Match]]:
+        """``(rule_index, match)`` in text order, non-overlapping."""
+        if not self._separate:
+            if self._regex is not None:
+                for m in self._regex.finditer(text, pos):
+                    yield self._by_group[m.lastgroup], m
+            return
+        found: list[tuple[int, int, re.Match]] = []
+        if self._regex is not None:
+            found.extend((m.start(), self._by_group[m.lastgroup], m) for m in self._regex.finditer(text, pos))
+        for index, regex in self._separate:
+            found.extend((m.start(), index, m) for m in regex.finditer(text, pos))
+        found.sort(key=lambda item: (item[0], item[1]))
+        end = pos
+        for start, index, m in found:
+            if start < end:
+                continue
+            end = m.end()
+            yield index, m
+
+    def _replace(self, index: int, m: re.Match) -> str:
+        rule = self.rules[index]
+        if rule.replacement is None:
+            return m.group()
+        if callable(rule.replacement):
+            own = m if m.re is self._own[index] else self._own[index].match(m.string, m.start(), m.end())
+            return rule.replacement(own or m)
+        return rule.replacement
+
+    def search(self, text: str) -> Hit | None:
+        scanner = self.narrow(text)
+        if scanner is None:
+            return None
+        for index, m in scanner._matches(text):
+            return Hit(scanner.rules[index].name, m.start(), m.end(), m.group())
+        return None
+
+    def detect(self, text: str) -> bool:
+        scanner = self.narrow(text)
+        if scanner is None:
+            return False
+        if not scanner._separate and scanner._regex is not None:
+            return scanner._regex.search(text) is not None
+        return scanner.search(text) is not None
+
+    def scan(self, text: str) -> list[Hit]:
+        scanner = self.narrow(text)
+        if scanner is None:
+            return []
+        return [Hit(scanner.rules[index].name, m.start(), m.end(), m.group()) for index, m in scanner._matches(text)]
+
+    def rewrite(self, text: str) -> str:
+        scanner = self.narrow(text)
+        if scanner is None:
+            return text
+        if not scanner._separate and scanner._regex is not None:
+            if scanner._template is not None:
+                return scanner._regex.sub(scanner._template, text)
+            if scanner._fixed is not None:
+                fixed = scanner._fixed
+                return scanner._regex.sub(lambda m: fixed[m.lastgroup], text)
+            return scanner._regex.sub(lambda m: scanner._replace(scanner._by_group[m.lastgroup], m), text)
+        return scanner._scan_rewrite(text)[0]
+
+    def scan_rewrite(self, text: str) -> tuple[str, list[Hit]]:
+        """Rewritten text and the hits (offsets into the original text)."""
+        scanner = self.narrow(text)
+        if scanner is None:
+            return text, []
+        return scanner._scan_rewrite(text)
+
+    def _scan_rewrite(self, text: str) -> tuple[str, list[Hit]]:
+        out: list[str] = []
+        hits: list[Hit] = []
+        pos = 0
+        for index, m in self._matches(text):
+            out.append(text[pos:m.start()])
+            out.append(self._replace(index, m))
+            hits.append(Hit(self.rules[index].name, m.start(), m.end(), m.group()))
+            pos = m.end()
+        out.append(text[pos:])
+        return "".join(out), hits
+
+    def stream(self, max_match: int = 512) -> "StreamScanner":
+        return StreamScanner(self, max_match)
+
+    def __add__(self, other: "Scanner") -> "Scanner":
+        return Scanner([*self.rules, *other.rules])
+
+
+class StreamScanner:
+    """Incremental ``Scanner.scan_rewrite`` over chunks.
+
+    ``feed`` returns the rewritten text that is final so far; ``finish``
+    returns the rest. ``hits`` accumulates with offsets into the whole input.
+    """
+
+    def __init__(self, scanner: Scanner, max_match: int = 512):
+        self.scanner = scanner
+        self.max_match = max(max_match, scanner.hold)
+        self.hits: list[Hit] = []
+        self._buf = ""
+        self._base = 0
+
+    def feed(self, chunk: str) -> str:
+        if not chunk:
+            return ""
+        buf = self._buf = self._buf + chunk
+        n = len(buf)
+        out: list[str] = []
+        pos = 0
+        pending = n
+        trigger = self.scanner._trigger
+        window = n - self.max_match
+        for index, m in self.scanner._matches(buf):
+            # An unresolved trigger before this hit may still grow into a
+            # match that swallows it, and a hit touching the end may still
+            # grow; settle both on a later chunk (or once they are too old).
+            if trigger is not None and m.start() > max(pos, window):
+                t = trigger.search(buf, max(pos, window), m.start())
+                if t is not None:
+                    pending = t.start()
+                    break
+            if m.end() >= n and m.start() > window:
+                pending = m.start()
+                break
+            self._emit(out, buf, pos, index, m)
+            pos = m.end()
+        cut = n - self.scanner.hold
+        if self.scanner.untriggered:
+            cut = min(cut, window)
+        if trigger is not None:
+            t = trigger.search(buf, max(pos, window))
+            if t is not None:
+                cut = min(cut, t.start())
+        cut = max(pos, min(cut, pending))
+        out.append(buf[pos:cut])
+        self._buf = buf[cut:]
+        self._base += cut
+        return "".join(out)
+
+    def finish(self) -> str:
+        text, hits = self.scanner.scan_rewrite(self._buf)
+        self.hits.extend(Hit(h.rule, h.start + self._base, h.end + self._base, h.text) for h in hits)
+        self._base += len(self._buf)
+        self._buf = ""
+        return text
+
+    def _emit(self, out: list[str], buf: str, pos: int, index: int, m: re.Match) -> None:
+        out.append(buf[pos:m.start()])
+        out.append(self.scanner._replace(index, m))
+        self.hits.append(Hit(self.scanner.rules[index].name, m.start() + self._base, m.end() + self._base, m.group()))
+
+
+def rules_from(patterns: Sequence[str], replacement: Replacement = None, flags: int = 0, prefix: str = "rule") -> list[Rule]:
+    """One ``Rule`` per pattern, all sharing ``replacement`` and ``flags``."""
+    return [Rule(f"{prefix}{i}", p, replacement, flags) for i, p in enumerate(patterns)]
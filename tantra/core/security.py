@@ -13,6 +13,8 @@ from enum import Enum
 from pathlib import Path
 from typing import Any
 
+from tantra.core.scanner import Hit, Rule, Scanner, StreamScanner, rules_from
+
 
 class RiskLevel(Enum):
     LOW = "low"
@@ -178,27 +180,42 @@ class SSRFProtection:
             return False
 
 
+INJECTION_PATTERNS = [
+    r"ignore previous instructions",
+    r"system prompt",
+    r"you are now",
+    r"disregard",
+    r"override",
+    r"new instructions",
+]
+
+# Every secret match starts with its trigger; streaming holds text back only
+# from a trigger until the value's closing quote arrives.
+_SECRET_TRIGGER = r"""["']?{name}["']?\s{{0,8}}[:=]\s{{0,8}}["']"""
+SECRET_RULES = [
+    Rule("api_key", r'''["\']?api[_-]?key["\']?\s*[:=]\s*["\']([A-Za-z0-9_\-]{16,})["\']''', "[REDACTED_API_KEY]",
+         trigger=_SECRET_TRIGGER.format(name="api[_-]?key"), literals=("apikey", "api_key", "api-key")),
+    Rule("password", r'''["\']?password["\']?\s*[:=]\s*["\']([^"\']{4,})["\']''', "[REDACTED_PASSWORD]",
+         trigger=_SECRET_TRIGGER.format(name="password"), literals=("password",)),
+    Rule("token", r'''["\']?token["\']?\s*[:=]\s*["\']([A-Za-z0-9_\-]{16,})["\']''', "[REDACTED_TOKEN]",
+         trigger=_SECRET_TRIGGER.format(name="token"), literals=("token",)),
+]
+SECRET_SCANNER = Scanner(SECRET_RULES)
+
+
 class PromptInjectionGuard:
     def __init__(self):
-        self._injection_patterns = [
-            r"ignore previous instructions",
-            r"system prompt",
-            r"you are now",
-            r"disregard",
-            r"override",
-            r"new instructions",
-        ]
+        self._injection_patterns = list(INJECTION_PATTERNS)
+        self._scanner = Scanner(rules_from(self._injection_patterns, "[REDACTED]", re.IGNORECASE, prefix="injection"))
 
     def detect(self, content: str) -> bool:
-        for pattern in self._injection_patterns:
-            if re.search(pattern, content, re.IGNORECASE):
-                return True
-        return False
+        return self._scanner.detect(content)
+
+    def scan(self, content: str) -> list[Hit]:
+        return self._scanner.scan(content)
 
     def sanitize(self, content: str) -> str:
-        for pattern in self._injection_patterns:
-            content = re.sub(pattern, "[REDACTED]", content, flags=re.IGNORECASE)
-        return content
+        return self._scanner.rewrite(content)
 
 
 class EncryptionManager:
@@ -225,14 +242,7 @@ class EncryptionManager:
         )
 
     def redact_secrets(self, text: str) -> str:
-        patterns = [
-            (r'["\']?api[_-]?key["\']?\s*[:=]\s*["\']([A-Za-z0-9_\-]{16,})["\']', "[REDACTED_API_KEY]"),
-            (r'["\']?password["\']?\s*[:=]\s*["\']([^"\']{4,})["\']', "[REDACTED_PASSWORD]"),
-            (r'["\']?token["\']?\s*[:=]\s*["\']([A-Za-z0-9_\-]{16,})["\']', "[REDACTED_TOKEN]"),
-        ]
-        for pattern, replacement in patterns:
-            text = re.sub(pattern, replacement, text)
-        return text
+        return SECRET_SCANNER.rewrite(text)
 
 
 class SecurityManager:
@@ -248,14 +258,21 @@ class SecurityManager:
             else None
         )
         self._audit_log: list[dict[str, Any]] = []
+        self._scrubber = self.injection._scanner + SECRET_SCANNER
 
     def check_url(self, url: str) -> bool:
         return self.ssrf.check_url(url)
 
     def sanitize_input(self, content: str) -> str:
-        if self.injection.detect(content):
-            return self.injection.sanitize(content)
-        return content
+        return self.injection.sanitize(content)
+
+    def scrub(self, content: str) -> tuple[str, list[Hit]]:
+        """Injection phrases and secrets redacted in one pass, with the hits."""
+        return self._scrubber.scan_rewrite(content)
+
+    def scrub_stream(self, max_match: int = 512) -> StreamScanner:
+        """``scrub`` for text arriving in chunks (e.g. SSE tokens)."""
+        return self._scrubber.stream(max_match)
 
     def log_action(self, action: str, details: dict[str, Any]):
         self._audit_log.append({"action": action, "details": details, "timestamp": time.time()})
@@ -1,10 +1,21 @@
-"""Task classifier for model routing using semantic similarity."""
+"""Task classifier for model routing using semantic similarity.
+
+The prototype phrases are compiled once into a sparse term-by-phrase count
+matrix, stored as postings (``term -> [(phrase, count)]``) with each
+phrase's L2 norm precomputed. Scoring a prompt is then one sparse dot
+product of its term counts against the postings it touches, instead of
+re-tokenizing every phrase per call. Results are memoized per normalized
+prompt in a bounded LRU.
+"""
 from __future__ import annotations
 
 import re
 import math
+import threading
+from collections import Counter, OrderedDict
 from dataclasses import dataclass
 from enum import Enum
+from typing import Iterable, Sequence
 
 
 class TaskCategory(Enum):
@@ -25,8 +36,25 @@ class TaskClassification:
     estimated_cost: float
 
 
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_CODE_LANGUAGES = ("python", "javascript", "typescript", "rust", "go", "java", "c++", "sql", "html", "css")
+_MODEL_MAP = {
+    TaskCategory.REASONING: "reasoning_model",
+    TaskCategory.FAST: "fast_model",
+    TaskCategory.VISION: "vision_model",
+    TaskCategory.CODING: "coding_model",
+    TaskCategory.CREATIVE: "reasoning_model",
+    TaskCategory.ANALYSIS: "reasoning_model",
+}
+
+
 def _tokenize(text: str) -> list[str]:
-    return re.findall(r"[a-z0-9]+", text.lower())
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _normalize(prompt: str) -> str:
+    """Cache key: lowercase, whitespace collapsed (neither changes tokens or substrings)."""
+    return " ".join(prompt.lower().split())
 
 
 def _tfidf_similarity(query_tokens: list[str], prototype_tokens: list[str]) -> float:
@@ -58,8 +86,71 @@ def _tfidf_similarity(query_tokens: list[str], prototype_tokens: list[str]) -> f
     return dot / (q_norm * p_norm)
 
 
+class PrototypeIndex:
+    """Keywords and prototype phrases of every category, compiled for scoring.
+
+    ``scores`` gives the same numbers as scoring each phrase with
+    ``_tfidf_similarity``: dot products are integer sums and per-category
+    phrase contributions are added in phrase order.
+    """
+
+    def __init__(self, prototypes: dict[TaskCategory, dict[str, list[str]]]):
+        self.categories = list(prototypes)
+        self.keywords: dict[str, list[list[int]]] = {}
+        self.postings: dict[str, list[tuple[int, int]]] = {}
+        self.norms: list[float] = []
+        self.phrase_category: list[int] = []
+        for ci, category in enumerate(self.categories):
+            for keyword in prototypes[category].get("keywords", []):
+                weights = self.keywords.setdefault(keyword, [])
+                if weights and weights[-1][0] == ci:
+                    weights[-1][1] += 3
+                else:
+                    weights.append([ci, 3])
+            for phrase in prototypes[category].get("phrases", []):
+                counts = Counter(_tokenize(phrase))
+                if not counts:
+                    continue
+                pid = len(self.norms)
+                for term, count in counts.items():
+                    self.postings.setdefault(term, []).append((pid, count))
+                self.norms.append(math.sqrt(sum(c * c for c in counts.values())))
+                self.phrase_category.append(ci)
+
+    @property
+    def phrases(self) -> int:
+        return len(self.norms)
+
+    def scores(self, query_tokens: list[str], bonus: list[int] | None = None) -> list[float]:
+        """Keyword (+ ``bonus``) + phrase score per category, aligned with ``categories``."""
+        keyword = list(bonus) if bonus is not None else [0] * len(self.categories)
+        phrase = [0] * len(self.categories)
+        if not query_tokens:
+            return [k + ph for k, ph in zip(keyword, phrase)]
+        counts = Counter(query_tokens)
+        dots: dict[int, int] = {}
+        postings = self.postings
+        for term, q in counts.items():
+            for ci, weight in self.keywords.get(term, ()):
+                keyword[ci] += weight
+            for pid, p in postings.get(term, ()):
+                dots[pid] = dots.get(pid, 0) + q * p
+        q_norm = math.sqrt(sum(v * v for v in counts.values()))
+        for pid in sorted(dots):
+            sim = dots[pid] / (q_norm * self.norms[pid])
+            if sim > 0.3:
+                phrase[self.phrase_category[pid]] += sim * 5
+        return [k + ph for k, ph in zip(keyword, phrase)]
+
+
 class TaskClassifier:
-    def __init__(self):
+    """Routes prompts to a task category and model.
+
+    Args:
+        cache_size: Normalized prompts whose (category, confidence) are kept; 0 disables
+    """
+
+    def __init__(self, cache_size: int = 4096):
         self._prototypes = {
             TaskCategory.REASONING: {
                 "keywords": ["think", "analyze", "why", "how", "explain", "reason", "logic", "understand", "concept", "theory", "philosophy", "deep", "complex"],
@@ -146,8 +237,26 @@ class TaskClassifier:
             "vision_model": {"input": 0.005, "output": 0.015},
             "coding_model": {"input": 0.001, "output": 0.003},
         }
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, tuple[TaskCategory, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.compile()
 
-    def classify(self, prompt: str, estimated_tokens: int = 100) -> TaskClassification:
+    def compile(self) -> None:
+        """(Re)build the prototype index; call after editing ``_prototypes``."""
+        self._index = PrototypeIndex(self._prototypes)
+        self._coding = self._index.categories.index(TaskCategory.CODING) if TaskCategory.CODING in self._index.categories else -1
+        with self._lock:
+            self._cache.clear()
+
+    def add_prototypes(self, category: TaskCategory, phrases: Iterable[str] = (), keywords: Iterable[str] = ()) -> None:
+        proto = self._prototypes.setdefault(category, {"keywords": [], "phrases": []})
+        proto.setdefault("keywords", []).extend(keywords)
+        proto.setdefault("phrases", []).extend(phrases)
+        self.compile()
+
+    def _reference_scores(self, prompt: str) -> dict[TaskCategory, float]:
+        """Reference scorer: every phrase re-tokenized and compared (slow)."""
         query_tokens = _tokenize(prompt)
         scores = {}
 
@@ -167,6 +276,24 @@ class TaskClassifier:
                 keyword_score += code_bonus
 
             scores[category] = keyword_score + phrase_score
+        return scores
+
+    def _scores(self, normalized: str, query_tokens: list[str]) -> dict[TaskCategory, float]:
+        bonus = [0] * len(self._index.categories)
+        if self._coding >= 0:
+            bonus[self._coding] = sum(4 for kw in _CODE_LANGUAGES if kw in normalized)
+        return dict(zip(self._index.categories, self._index.scores(query_tokens, bonus)))
+
+    def _categorize(self, prompt: str) -> tuple[TaskCategory, float]:
+        key = _normalize(prompt)
+        if self.cache_size > 0:
+            with self._lock:
+                hit = self._cache.get(key)
+                if hit is not None:
+                    self._cache.move_to_end(key)
+                    return hit
+        query_tokens = _tokenize(key)
+        scores = self._scores(key, query_tokens)
 
         best_category = max(scores, key=scores.get)
         max_score = scores[best_category]
@@ -177,16 +304,33 @@ class TaskClassifier:
         else:
             confidence = min(0.98, 0.6 + (max_score / max(total_score, 1)) * 0.3 + min(0.08, len(query_tokens) * 0.003))
 
-        model_map = {
-            TaskCategory.REASONING: "reasoning_model",
-            TaskCategory.FAST: "fast_model",
-            TaskCategory.VISION: "vision_model",
-            TaskCategory.CODING: "coding_model",
-            TaskCategory.CREATIVE: "reasoning_model",
-            TaskCategory.ANALYSIS: "reasoning_model",
-        }
+        result = (best_category, confidence)
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[key] = result
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def classify(self, prompt: str, estimated_tokens: int = 100) -> TaskClassification:
+        return self._classification(*self._categorize(prompt), estimated_tokens)
+
+    def classify_batch(self, prompts: Sequence[str], estimated_tokens: int | Sequence[int] = 100) -> list[TaskClassification]:
+        """Classify many prompts; repeated prompts in the batch are scored once."""
+        tokens = [estimated_tokens] * len(prompts) if isinstance(estimated_tokens, int) else list(estimated_tokens)
+        if len(tokens) != len(prompts):
+            raise ValueError("estimated_tokens must be an int or match prompts in length")
+        seen: dict[str, tuple[TaskCategory, float]] = {}
+        results = []
+        for prompt, n in zip(prompts, tokens):
+            hit = seen.get(prompt)
+            if hit is None:
+                hit = seen[prompt] = self._categorize(prompt)
+            results.append(self._classification(*hit, n))
+        return results
 
-        recommended = model_map[best_category]
+    def _classification(self, best_category: TaskCategory, confidence: float, estimated_tokens: int) -> TaskClassification:
+        recommended = _MODEL_MAP[best_category]
         costs = self._model_costs.get(recommended, {"input": 0.001, "output": 0.003})
         estimated_cost = (estimated_tokens / 1000) * (costs["input"] + costs["output"]) / 2
 
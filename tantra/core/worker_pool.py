@@ -0,0 +1,260 @@
+"""Warm worker processes for subprocess-style model providers.
+
+Spawning a CLI per request pays interpreter/runtime start-up and model
+client initialization every time, and a prompt passed as one argv string
+runs into ``ARG_MAX``. ``WorkerPool`` instead keeps ``size`` long-lived
+workers and talks to each over stdin/stdout, one JSON object per line:
+
+  worker -> ``{"ready": true}`` once, when it can take requests
+  pool   -> ``{"id": 7, "messages": [...], "temperature": 0.7, "max_tokens": null, "stream": false}``
+  worker -> ``{"id": 7, "chunk": "..."}`` zero or more times (streaming)
+  worker -> ``{"id": 7, "done": true, "content": "...", "usage": {...}}``
+            or ``{"id": 7, "error": "..."}``
+
+A worker serves one request at a time. It is recycled after
+``max_requests`` requests, and replaced when it exits, times out or is
+abandoned mid-request (e.g. a cancelled hedge), since its stream position
+is then unknown. Health is derived from worker liveness.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import signal
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Protocol lines can carry a whole conversation; asyncio's default limit is 64 KiB.
+_LINE_LIMIT = 16 * 1024 * 1024
+
+
+class WorkerCrashed(RuntimeError):
+    """The worker exited (or closed stdout) while serving a request."""
+
+
+class _Worker:
+    __slots__ = ("proc", "served", "started", "ready", "stderr", "_drain")
+
+    def __init__(self, proc: asyncio.subprocess.Process):
+        self.proc = proc
+        self.served = 0
+        self.started = time.time()
+        self.ready = False
+        self.stderr: deque[str] = deque(maxlen=20)
+        self._drain = asyncio.ensure_future(self._read_stderr()) if proc.stderr else None
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.returncode is None
+
+    async def _read_stderr(self) -> None:
+        while True:
+            line = await self.proc.stderr.readline()
+            if not line:
+                return
+            self.stderr.append(line.decode(errors="replace").rstrip())
+
+    def detail(self) -> str:
+        return f" (exit {self.proc.returncode}): {self.stderr[-1]}" if self.stderr else f" (exit {self.proc.returncode})"
+
+    def kill(self) -> None:
+        # os.kill, not proc.kill(): the owning loop may already be closed.
+        if self.proc.returncode is None:
+            with contextlib.suppress(OSError):
+                os.kill(self.proc.pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+        if self._drain is not None and not self._drain.done():
+            with contextlib.suppress(RuntimeError):
+                self._drain.cancel()
+
+
+class WorkerPool:
+    """Pool of warm workers speaking line-delimited JSON.
+
+    Args:
+        argv: Command that starts one worker
+        size: Workers kept running
+        max_requests: Requests a worker serves before it is replaced
+        timeout: Seconds to wait for each protocol line
+        env: Extra environment for the workers
+    """
+
+    def __init__(self, argv: Sequence[str], size: int = 2, max_requests: int = 100, timeout: float = 30.0, env: dict[str, str] | None = None):
+        self.argv = list(argv)
+        self.size = max(1, size)
+        self.max_requests = max(1, max_requests)
+        self.timeout = timeout
+        self.env = {**os.environ, **env} if env else None
+        self._workers: list[_Worker] = []
+        self._idle: asyncio.Queue[_Worker] | None = None
+        self._spawning: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._next_id = 0
+        self.requests = 0
+        self.recycled = 0
+        self.crashed = 0
+        self.spawn_errors = 0
+        self.last_error = ""
+
+    # ── lifecycle ────────────────────────────────────────────
+
+    async def _spawn(self) -> _Worker:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *self.argv,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=self.env,
+                limit=_LINE_LIMIT,
+            )
+        except OSError as exc:
+            self.spawn_errors += 1
+            self.last_error = str(exc)
+            raise
+        worker = _Worker(proc)
+        self._workers.append(worker)
+        return worker
+
+    async def start(self) -> None:
+        """Spawn the workers (idempotent); they initialize concurrently."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Subprocess transports belong to the loop that made them.
+            self._discard()
+            self._loop, self._idle, self._spawning = loop, asyncio.Queue(), asyncio.Lock()
+        if len(self._workers) >= self.size:
+            return
+        async with self._spawning:
+            while len(self._workers) < self.size:
+                self._idle.put_nowait(await self._spawn())
+
+    def _discard(self) -> None:
+        for worker in self._workers:
+            worker.kill()
+        self._workers.clear()
+        self._idle = None
+
+    def _retire(self, worker: _Worker) -> None:
+        worker.kill()
+        with contextlib.suppress(ValueError):
+            self._workers.remove(worker)
+
+    async def close(self) -> None:
+        for worker in list(self._workers):
+            if worker.alive and worker.proc.stdin is not None:
+                with contextlib.suppress(Exception):
+                    worker.proc.stdin.close()
+        for worker in list(self._workers):
+            with contextlib.suppress(Exception):
+                await asyncio.wait_for(worker.proc.wait(), timeout=2.0)
+        self._discard()
+        self._loop = None
+
+    # ── requests ─────────────────────────────────────────────
+
+    async def _acquire(self) -> _Worker:
+        await self.start()
+        while True:
+            worker = await self._idle.get()
+            if worker.alive:
+                return worker
+            self.crashed += 1
+            self.last_error = f"worker died while idle{worker.detail()}"
+            self._retire(worker)
+            self._idle.put_nowait(await self._spawn())
+
+    async def _release(self, worker: _Worker, ok: bool) -> None:
+        worker.served += 1
+        if self._idle is None or worker not in self._workers:
+            worker.kill()  # the pool was closed or moved to another loop meanwhile
+            return
+        if ok and worker.alive and worker.served < self.max_requests:
+            self._idle.put_nowait(worker)
+            return
+        if ok and worker.alive:
+            self.recycled += 1
+        self._retire(worker)
+        with contextlib.suppress(OSError):
+            self._idle.put_nowait(await self._spawn())
+
+    async def _readline(self, worker: _Worker) -> dict[str, Any]:
+        try:
+            line = await asyncio.wait_for(worker.proc.stdout.readline(), timeout=self.timeout)
+        except asyncio.TimeoutError as exc:
+            raise RuntimeError(f"Worker timeout after {self.timeout}s") from exc
+        if not line:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(worker.proc.wait(), timeout=1.0)
+            self.crashed += 1
+            raise WorkerCrashed(f"Worker crashed{worker.detail()}")
+        try:
+            return json.loads(line)
+        except ValueError as exc:
+            raise RuntimeError(f"Worker sent a non-JSON line: {line[:200]!r}") from exc
+
+    async def stream(self, request: dict[str, Any]) -> AsyncIterator[dict[str, Any]]:
+        """Send ``request``; yield its ``chunk`` messages, then the final one."""
+        worker = await self._acquire()
+        ok = False
+        try:
+            while not worker.ready:
+                message = await self._readline(worker)
+                worker.ready = bool(message.get("ready"))
+            self._next_id += 1
+            request_id = self._next_id
+            line = json.dumps({**request, "id": request_id}, ensure_ascii=False, separators=(",", ":")) + "\n"
+            worker.proc.stdin.write(line.encode("utf-8"))
+            try:
+                await worker.proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError) as exc:
+                self.crashed += 1
+                raise WorkerCrashed(f"Worker crashed{worker.detail()}") from exc
+            self.requests += 1
+            while True:
+                message = await self._readline(worker)
+                if message.get("id") != request_id:
+                    continue
+                if "error" in message:
+                    ok = True  # the worker itself is fine
+                    raise RuntimeError(str(message["error"]))
+                if message.get("done"):
+                    ok = True
+                    yield message
+                    return
+                yield message
+        except Exception as exc:
+            self.last_error = str(exc)
+            raise
+        finally:
+            await self._release(worker, ok)
+
+    async def request(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Send ``request`` and return the final message."""
+        final: dict[str, Any] = {}
+        async for message in self.stream({**request, "stream": False}):
+            final = message
+        return final
+
+    # ── health ───────────────────────────────────────────────
+
+    def health(self) -> dict[str, Any]:
+        alive = sum(1 for w in self._workers if w.alive)
+        return {
+            "size": self.size,
+            "alive": alive,
+            "requests": self.requests,
+            "recycled": self.recycled,
+            "crashed": self.crashed,
+            "spawn_errors": self.spawn_errors,
+            "last_error": self.last_error,
+        }
+
+    @property
+    def alive(self) -> int:
+        return sum(1 for w in self._workers if w.alive)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Stand-in for a subprocess model CLI (tests and the overhead benchmark).
+
+One-shot, like ``opencode run``::
+
+    python worker_stub.py --version
+    python worker_stub.py run [--stream] [--temperature T] [--max-tokens N] PROMPT
+
+Warm worker speaking the ``WorkerPool`` protocol::
+
+    python worker_stub.py serve
+
+``ATULYA_STUB_INIT_MS`` simulates client initialization paid at every
+process start. The reply echoes the prompt; the prompt ``__crash__`` makes
+a serving worker exit mid-request. Standard library only, so start-up
+cost is the interpreter's.
+"""
+from __future__ import annotations
+
+import json
+import os
+import stat
+import sys
+import time
+from pathlib import Path
+
+
+def _init() -> None:
+    delay = float(os.environ.get("ATULYA_STUB_INIT_MS", "0") or 0)
+    if delay > 0:
+        time.sleep(delay / 1000.0)
+
+
+def _reply(prompt: str, max_tokens: int | None) -> list[str]:
+    words = f"echo: {prompt}".split()
+    return words[:max_tokens] if max_tokens else words
+
+
+def _run(args: list[str]) -> int:
+    stream, max_tokens, prompt = False, None, ""
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--stream":
+            stream = True
+        elif arg in ("--temperature", "--max-tokens"):
+            i += 1
+            if arg == "--max-tokens":
+                max_tokens = int(args[i])
+        else:
+            prompt = arg
+        i += 1
+    words = _reply(prompt, max_tokens)
+    if stream:
+        for word in words:
+            print(word, flush=True)
+    else:
+        print(" ".join(words))
+    return 0
+
+
+def _serve() -> int:
+    out = sys.stdout
+    out.write(json.dumps({"ready": True}) + "\n")
+    out.flush()
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        rid = request.get("id")
+        prompt = "\n".join(m.get("content", "") for m in request.get("messages") or [])
+        if prompt == "__crash__":
+            sys.stderr.write("stub worker crashing on request\n")
+            sys.stderr.flush()
+            os._exit(3)
+        words = _reply(prompt, request.get("max_tokens"))
+        if request.get("stream"):
+            for word in words:
+                out.write(json.dumps({"id": rid, "chunk": word}) + "\n")
+        out.write(json.dumps({
+            "id": rid,
+            "done": True,
+            "content": " ".join(words),
+            "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(words), "total_tokens": len(prompt.split()) + len(words)},
+        }) + "\n")
+        out.flush()
+    return 0
+
+
+def install(directory: str | Path, name: str = "stubcli") -> Path:
+    """Copy this stub into ``directory`` as an executable for the current interpreter."""
+    target = Path(directory) / name
+    source = Path(__file__).read_text(encoding="utf-8").split("\n", 1)[1]
+    target.write_text(f"#!{sys.executable}\n{source}", encoding="utf-8")
+    target.chmod(target.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return target
+
+
+def main(argv: list[str]) -> int:
+    if argv[:1] == ["--version"]:
+        print("worker-stub 1.0")
+        return 0
+    _init()
+    if argv[:1] == ["run"]:
+        return _run(argv[1:])
+    if argv[:1] == ["serve"]:
+        return _serve()
+    sys.stderr.write("usage: worker_stub.py --version | run [...] PROMPT | serve\n")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,295 @@
+"""Multi-adapter LoRA serving for NP-DNA.
+
+``ChunkTrainer.load_adapters`` activates a topic by mutating the shared
+model, which serialises every request behind one adapter. ``AdapterServer``
+instead keeps many topic adapters resident inside the same LoRALinear
+wrappers and selects one per request through a context variable, so
+concurrent generations never see each other's adapter.
+
+  - Adapters are loaded lazily and kept in LRU order under a memory budget.
+  - A request pins its adapter version; eviction and hot-swap (``reload``)
+    never pull weights out from under an in-flight generation.
+  - Genome-generated strand weights are cached per adapter, so switching
+    topics costs nothing after the first request.
+  - ``forward_rows`` serves a mixed batch: rows are grouped by adapter and
+    each group runs one forward under its route.
+
+Usage:
+    server = AdapterServer(core, "outputs/lora", budget_mb=64)
+    text = server.generate("What is an index fund?", topic="finance")
+"""
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Generator, Iterator, Optional
+
+import torch
+from torch import Tensor
+
+from .plasticity import LoRAAdapter, adapter_route, wrap_lora_layers
+
+logger = logging.getLogger(__name__)
+
+_TOPIC_RE = re.compile(r"^[A-Za-z0-9_\-]{1,64}$")
+
+
+@dataclass
+class _ResidentAdapter:
+    topic: str
+    key: str          # versioned name inside every LoRALinear.adapters
+    nbytes: int
+    loaded_at: float
+    pins: int = 0
+
+
+class AdapterServer:
+    """Serve many LoRA topic adapters from one resident NP-DNA model.
+
+    Args:
+        core: NpDnaCore to serve (its mesh Linears are wrapped once, in place)
+        adapters_dir: Directory with ``<topic>/adapters.pt`` + ``meta.json``
+            as written by ``ChunkTrainer.save_adapters``
+        budget_mb: Soft cap on resident adapter weights; least recently used
+            unpinned adapters are evicted past it
+        cache_weights: Enable the Genome inference weight cache (per adapter)
+    """
+
+    def __init__(self, core, adapters_dir: Path | str, budget_mb: float = 64.0,
+                 cache_weights: bool = True):
+        self.core = core
+        self.adapters_dir = Path(adapters_dir)
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self._wrappers = wrap_lora_layers(core.model)
+        self._resident: OrderedDict[str, _ResidentAdapter] = OrderedDict()  # topic → live version
+        self._retired: dict[str, _ResidentAdapter] = {}                     # key → old pinned version
+        self._by_key: dict[str, _ResidentAdapter] = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._versions = itertools.count(1)
+        if cache_weights and hasattr(core.model, "genome"):
+            core.model.genome.enable_inference_cache()
+
+    # ── Inventory ────────────────────────────────────────────────────────────
+
+    def available(self) -> list[str]:
+        """Topics with saved adapters on disk."""
+        if not self.adapters_dir.exists():
+            return []
+        return sorted(p.parent.name for p in self.adapters_dir.glob("*/adapters.pt"))
+
+    def resident(self) -> list[dict]:
+        """Loaded adapters, least recently used first."""
+        with self._lock:
+            return [
+                {"topic": r.topic, "key": r.key, "bytes": r.nbytes, "pins": r.pins, "loaded_at": r.loaded_at}
+                for r in self._resident.values()
+            ]
+
+    @property
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(r.nbytes for r in self._resident.values()) + sum(r.nbytes for r in self._retired.values())
+
+    # ── Loading / eviction ───────────────────────────────────────────────────
+
+    def _topic_dir(self, topic: str) -> Path:
+        if not _TOPIC_RE.match(topic):
+            raise ValueError(f"Invalid adapter topic: {topic!r}")
+        path = self.adapters_dir / topic
+        if not (path / "adapters.pt").exists():
+            raise FileNotFoundError(f"No saved adapters for topic '{topic}'")
+        return path
+
+    def _load(self, topic: str) -> _ResidentAdapter:
+        """Read a topic from disk and register it under a fresh version key."""
+        path = self._topic_dir(topic)
+        state = torch.load(path / "adapters.pt", map_location="cpu", weights_only=True)
+        try:
+            meta = json.loads((path / "meta.json").read_text())
+        except (OSError, ValueError):
+            meta = {}
+        key = f"{topic}@v{next(self._versions)}"
+
+        built: list[tuple[object, LoRAAdapter]] = []
+        nbytes = 0
+        for i, lora in enumerate(self._wrappers):
+            weights = state.get(f"layer_{i}")
+            if weights is None:
+                continue
+            rank = int(weights["lora_A.weight"].shape[0])
+            adapter = LoRAAdapter(lora.base.in_features, lora.base.out_features,
+                                  rank=rank, alpha=float(meta.get("alpha", rank * 2)))
+            adapter.load_state_dict(weights)
+            adapter.to(lora.base.weight.device).eval().requires_grad_(False)
+            nbytes += sum(p.numel() * p.element_size() for p in adapter.parameters())
+            built.append((lora, adapter))
+        if not built:
+            raise ValueError(f"Adapters for topic '{topic}' do not match this model")
+
+        # Fully built before publishing: a request routed to ``key`` sees all layers.
+        for lora, adapter in built:
+            lora.adapters[key] = adapter
+        logger.info("AdapterServer: loaded '%s' as %s (%.1f KB)", topic, key, nbytes / 1024)
+        return _ResidentAdapter(topic=topic, key=key, nbytes=nbytes, loaded_at=time.time())
+
+    def _drop(self, entry: _ResidentAdapter) -> None:
+        for lora in self._wrappers:
+            if entry.key in lora.adapters:
+                del lora.adapters[entry.key]
+        genome = getattr(self.core.model, "genome", None)
+        if genome is not None:
+            genome.drop_cached_route(entry.key)
+        self._by_key.pop(entry.key, None)
+
+    def _evict_over_budget(self) -> None:
+        """Drop LRU unpinned adapters until under budget. Caller holds ``_lock``."""
+        total = sum(r.nbytes for r in self._resident.values()) + sum(r.nbytes for r in self._retired.values())
+        for topic in list(self._resident):
+            if total <= self.budget_bytes or len(self._resident) <= 1:
+                break
+            entry = self._resident[topic]
+            if entry.pins:
+                continue
+            del self._resident[topic]
+            self._drop(entry)
+            total -= entry.nbytes
+            logger.info("AdapterServer: evicted '%s' (%s)", topic, entry.key)
+
+    def acquire(self, topic: Optional[str]) -> Optional[str]:
+        """Pin ``topic``'s current adapter version, loading it on a miss.
+
+        Returns the adapter key to route to (``None`` = base model).
+        """
+        if not topic:
+            return None
+        with self._lock:
+            entry = self._resident.get(topic)
+            if entry is not None:
+                self._resident.move_to_end(topic)
+                entry.pins += 1
+                return entry.key
+        # Loads are serialised, but in-flight generations never wait on them.
+        with self._load_lock:
+            with self._lock:
+                entry = self._resident.get(topic)
+            if entry is None:
+                entry = self._load(topic)
+                with self._lock:
+                    self._resident[topic] = entry
+                    self._by_key[entry.key] = entry
+            with self._lock:
+                self._resident.move_to_end(topic)
+                entry.pins += 1
+                self._evict_over_budget()
+                return entry.key
+
+    def release(self, key: Optional[str]) -> None:
+        if not key:
+            return
+        with self._lock:
+            entry = self._by_key.get(key)
+            if entry is None:
+                return
+            entry.pins = max(0, entry.pins - 1)
+            if entry.pins == 0 and key in self._retired:
+                del self._retired[key]
+                self._drop(entry)
+            self._evict_over_budget()
+
+    def reload(self, topic: str) -> str:
+        """Hot-swap a topic to the adapters currently on disk.
+
+        New requests get the new version immediately; requests already
+        generating keep the old version until they release it.
+        """
+        with self._load_lock:
+            fresh = self._load(topic)
+            with self._lock:
+                old = self._resident.pop(topic, None)
+                self._resident[topic] = fresh
+                self._by_key[fresh.key] = fresh
+                if old is not None:
+                    if old.pins:
+                        self._retired[old.key] = old
+                    else:
+                        self._drop(old)
+                self._evict_over_budget()
+        return fresh.key
+
+    def unload(self, topic: str) -> bool:
+        """Remove a topic now (retired until in-flight users release it)."""
+        with self._lock:
+            entry = self._resident.pop(topic, None)
+            if entry is None:
+                return False
+            if entry.pins:
+                self._retired[entry.key] = entry
+            else:
+                self._drop(entry)
+            return True
+
+    # ── Serving ──────────────────────────────────────────────────────────────
+
+    @contextmanager
+    def use(self, topic: Optional[str]) -> Iterator[Optional[str]]:
+        """Route model calls in this context through ``topic``'s adapter."""
+        key = self.acquire(topic)
+        try:
+            with adapter_route(key):
+                yield key
+        finally:
+            self.release(key)
+
+    def generate_stream(self, prompt: str, topic: Optional[str] = None, **kwargs) -> Generator[str, None, None]:
+        """``core.generate_stream`` under a topic adapter.
+
+        The route is set only around each step of the inner generator, so
+        several interleaved streams on one thread stay isolated.
+        """
+        key = self.acquire(topic)
+        try:
+            inner = self.core.generate_stream(prompt, **kwargs)
+            while True:
+                with adapter_route(key):
+                    try:
+                        piece = next(inner)
+                    except StopIteration:
+                        return
+                yield piece
+        finally:
+            self.release(key)
+
+    def generate(self, prompt: str, topic: Optional[str] = None, **kwargs) -> str:
+        return "".join(self.generate_stream(prompt, topic=topic, **kwargs))
+
+    @torch.no_grad()
+    def forward_rows(self, input_ids: Tensor, topics: list[Optional[str]]) -> Tensor:
+        """Logits for a batch whose rows may each use a different adapter.
+
+        LoRA here adapts the Genome weight generators (shared by every row),
+        so rows are grouped by adapter and each group runs one forward.
+        """
+        if input_ids.shape[0] != len(topics):
+            raise ValueError("forward_rows needs one topic per row")
+        groups: dict[Optional[str], list[int]] = {}
+        for row, topic in enumerate(topics):
+            groups.setdefault(topic or None, []).append(row)
+
+        self.core.model.eval()
+        out: Optional[Tensor] = None
+        for topic, rows in groups.items():
+            with self.use(topic):
+                logits, _ = self.core.model(input_ids[rows])
+            if out is None:
+                out = logits.new_empty(input_ids.shape[0], *logits.shape[1:])
+            out[rows] = logits
+        return out
@@ -2,11 +2,18 @@
 
 Maps text to one of 10 NP-DNA categories using weighted keyword matching.
 Each category has primary keywords (high weight) and secondary (low weight).
+
+All ~1.2k weighted patterns are evaluated by ``CompiledTopicMatcher`` in one
+``\\w+`` tokenization pass: pure word patterns become set lookups, literal
+phrases become ``str.find`` with exact ``\\b`` checks, and the few real
+regexes only run when the token they start with is present.
 """
 
 from __future__ import annotations
 
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 
 # ── 10 NP-DNA categories with full topic/sub-topic structure ──────────────
@@ -229,6 +236,144 @@ TOPICS: dict[str, list[str]] = {
 }
 
 
+# ── Compiled multi-pattern matcher ────────────────────────────────────────
+
+_WORD_RE = re.compile(r"\w+")
+_LITERAL_CORE_RE = re.compile(r"(?:\\\W|[^\\.^$*+?{}\[\]|()])+")
+_LEADING_WORD_RE = re.compile(r"\\b(\w+)")
+_OPTIONAL_SPACE = ("\\s*", " *")
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _unescape_literal(core: str) -> str | None:
+    """Plain text for a regex that only contains literals (else None)."""
+    if not _LITERAL_CORE_RE.fullmatch(core):
+        return None
+    return re.sub(r"\\(.)", r"\1", core)
+
+
+def _leading_token(pattern: str) -> str | None:
+    """Token that must appear as a whole ``\\w+`` run for ``pattern`` to match.
+
+    Only for ``\\bWORD`` followed by whitespace or punctuation (so WORD ends
+    at a word boundary) and no top-level alternation.
+    """
+    depth = 0
+    escaped = False
+    for ch in pattern:
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            return None
+
+    m = _LEADING_WORD_RE.match(pattern)
+    if not m:
+        return None
+    token = m.group(1).lower()
+    rest = pattern[m.end():]
+    if rest.startswith(("\\s+", " +")):
+        return token
+    if rest.startswith(("\\s", " ")) and rest[2 if rest[0] == "\\" else 1:][:1] not in ("*", "?", "{"):
+        return token
+    # Optional whitespace, then a literal non-word character
+    for opt in _OPTIONAL_SPACE:
+        if rest.startswith(opt):
+            rest = rest[len(opt):]
+            break
+    if rest.startswith("\\"):
+        ch, after = rest[1:2], rest[2:3]
+    else:
+        ch, after = rest[:1], rest[1:2]
+        if ch in ".^$*+?{}[]|()":
+            return None
+    if not ch or _is_word_char(ch) or after in ("*", "?", "{"):
+        return None
+    return token
+
+
+class CompiledTopicMatcher:
+    """Report which weighted patterns hit a text, from one tokenization pass.
+
+    Semantics match ``re.compile(pattern, re.IGNORECASE).search(text_lower)``
+    for every pattern; the text is expected to be lower-cased already.
+
+    Args:
+        patterns: ``(label, regex, weight)`` triples in scoring order
+    """
+
+    def __init__(self, patterns: list[tuple[str, str, float]]):
+        self.patterns = list(patterns)
+        self._words: dict[str, list[int]] = {}                       # token → pattern ids
+        self._literals: dict[tuple[str, bool, bool], list[int]] = {}  # (text, \b start, \b end)
+        self._regexes: list[tuple[re.Pattern, str | None, int]] = []
+        for idx, (_, pattern, _) in enumerate(self.patterns):
+            lead = pattern.startswith("\\b")
+            trail = pattern.endswith("\\b") and not pattern.endswith("\\\\b")
+            core = pattern[2 if lead else 0:len(pattern) - (2 if trail else 0)]
+            literal = _unescape_literal(core) if core else None
+            if literal is None:
+                self._regexes.append((re.compile(pattern, re.IGNORECASE), _leading_token(pattern), idx))
+            elif lead and trail and all(_is_word_char(ch) for ch in literal):
+                self._words.setdefault(literal.lower(), []).append(idx)
+            else:
+                self._literals.setdefault((literal.lower(), lead, trail), []).append(idx)
+
+    @staticmethod
+    def _bounded_find(text: str, literal: str, lead: bool, trail: bool) -> bool:
+        start = text.find(literal)
+        while start != -1:
+            end = start + len(literal)
+            ok = True
+            if lead:
+                before = start > 0 and _is_word_char(text[start - 1])
+                ok = before != _is_word_char(literal[0])
+            if ok and trail:
+                after = end < len(text) and _is_word_char(text[end])
+                ok = after != _is_word_char(literal[-1])
+            if ok:
+                return True
+            start = text.find(literal, start + 1)
+        return False
+
+    def tokens(self, text_lower: str) -> set[str]:
+        return set(_WORD_RE.findall(text_lower))
+
+    def hits(self, text_lower: str, tokens: set[str] | None = None) -> list[int]:
+        """Sorted ids of patterns that match ``text_lower``."""
+        if tokens is None:
+            tokens = self.tokens(text_lower)
+        found: list[int] = []
+        for word in tokens.intersection(self._words):
+            found.extend(self._words[word])
+        for (literal, lead, trail), ids in self._literals.items():
+            if self._bounded_find(text_lower, literal, lead, trail):
+                found.extend(ids)
+        for compiled, token, idx in self._regexes:
+            if token is not None and token not in tokens:
+                continue
+            if compiled.search(text_lower):
+                found.append(idx)
+        found.sort()
+        return found
+
+    def scores(self, text_lower: str, tokens: set[str] | None = None) -> dict[str, float]:
+        """Summed weight per label, in pattern order (labels with no hit omitted)."""
+        out: dict[str, float] = {}
+        for idx in self.hits(text_lower, tokens):
+            label, _, weight = self.patterns[idx]
+            out[label] = out.get(label, 0.0) + weight
+        return out
+
+
 @dataclass
 class TopicClassification:
     category: str
@@ -368,12 +513,20 @@ class NpDnaTopicClassifier:
         for cat, pats in self._exclusive.items():
             self._exclusive_compiled[cat] = [(re.compile(p, re.IGNORECASE), w) for p, w in pats]
 
-    def classify(self, text: str) -> TopicClassification:
-        """Classify text into NP-DNA topic category.
+        # Keyword patterns first, then exclusive bonuses: same summation order as _regex_scores
+        self._matcher = CompiledTopicMatcher(
+            [(cat, p, w) for cat, pats in self._patterns.items() for p, w in pats]
+            + [(cat, p, w) for cat, pats in self._exclusive.items() for p, w in pats]
+        )
+        self._sub_topics: dict[str, list[tuple[str, list[str], bool]]] = {
+            cat: [(sub, [w for w in sub.split() if len(w) > 3], " " in sub) for sub in subs]
+            for cat, subs in TOPICS.items()
+        }
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_workers = 0
 
-        Returns TopicClassification with category, sub-topic, and confidence.
-        """
-        text_lower = text.lower()[:50000]  # cap text length for performance
+    def _regex_scores(self, text_lower: str) -> dict[str, float]:
+        """Reference scorer: every compiled regex, one by one (slow)."""
         scores: dict[str, float] = {}
 
         # Score each category using pre-compiled patterns
@@ -392,6 +545,20 @@ class NpDnaTopicClassifier:
                     bonus += weight
             if bonus > 0:
                 scores[category] = scores.get(category, 0) + bonus
+        return scores
+
+    def _scores(self, text_lower: str, tokens: set[str]) -> dict[str, float]:
+        hit = self._matcher.scores(text_lower, tokens)
+        return {category: hit.get(category, 0.0) for category in self._compiled}
+
+    def classify(self, text: str) -> TopicClassification:
+        """Classify text into NP-DNA topic category.
+
+        Returns TopicClassification with category, sub-topic, and confidence.
+        """
+        text_lower = text.lower()[:50000]  # cap text length for performance
+        tokens = self._matcher.tokens(text_lower)
+        scores = self._scores(text_lower, tokens)
 
         # Find best category — fallback to conversation if nothing matches
         if not scores:
@@ -410,7 +577,7 @@ class NpDnaTopicClassifier:
             confidence = 0.5
 
         # Find best sub-topic within the best category
-        best_sub = self._find_best_sub_topic(text_lower, best_cat)
+        best_sub = self._find_best_sub_topic(text_lower, best_cat, tokens)
 
         return TopicClassification(
             category=best_cat,
@@ -419,22 +586,79 @@ class NpDnaTopicClassifier:
             scores=scores,
         )
 
-    def classify_batch(self, texts: list[str]) -> list[TopicClassification]:
-        """Classify a batch of texts."""
-        return [self.classify(t) for t in texts]
+    def classify_batch(self, texts: list[str], workers: int | None = 1,
+                       chunk_size: int = 256) -> list[TopicClassification]:
+        """Classify a batch of texts.
+
+        Args:
+            texts: Texts to classify
+            workers: Worker processes (``None`` = ``os.cpu_count()``). Batches
+                smaller than two chunks always run in-process.
+            chunk_size: Texts per task sent to a worker
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1 or len(texts) < 2 * chunk_size:
+            return [self.classify(t) for t in texts]
+        pool = self._get_pool(workers)
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        results: list[TopicClassification] = []
+        for part in pool.map(_classify_chunk, chunks):
+            results.extend(part)
+        return results
+
+    def start_pool(self, workers: int | None = None) -> None:
+        """Start the ``classify_batch`` pool and build the classifier in each worker.
+
+        Executors spawn processes lazily, so without this the first batch
+        pays for process start-up and per-worker classifier construction.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1:
+            return
+        pool = self._get_pool(workers)
+        list(pool.map(_classify_chunk, [[""]] * workers))
+
+    def _get_pool(self, workers: int) -> ProcessPoolExecutor:
+        if self._pool is None or self._pool_workers != workers:
+            self.close()
+            self._pool = ProcessPoolExecutor(max_workers=workers)
+            self._pool_workers = workers
+        return self._pool
+
+    def close(self) -> None:
+        """Shut down the classify_batch worker pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+            self._pool_workers = 0
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        state["_pool_workers"] = 0
+        return state
 
-    def _find_best_sub_topic(self, text_lower: str, category: str) -> str:
+    def _find_best_sub_topic(self, text_lower: str, category: str,
+                             tokens: set[str] | None = None) -> str:
         """Find best-matching sub-topic within a category."""
         if category not in TOPICS:
             return "general"
+        tokens = tokens or set()
+        present: dict[str, bool] = {}
+
+        def contains(fragment: str) -> bool:
+            # A whole token is certainly a substring; otherwise fall back to find.
+            if fragment not in present:
+                present[fragment] = fragment in tokens or fragment in text_lower
+            return present[fragment]
+
         best_sub = "general"
         best_score = 0
-        for sub in TOPICS[category]:
-            score = 0
-            for word in sub.split():
-                if len(word) > 3 and word in text_lower:
-                    score += 1
-            if " " in sub and sub in text_lower:
+        for sub, words, is_phrase in self._sub_topics[category]:
+            score = sum(1 for word in words if contains(word))
+            if is_phrase and contains(sub):
                 score += 3
             if score > best_score:
                 best_score = score
@@ -453,6 +677,17 @@ def _dedupe_patterns(
     return list(seen.items())
 
 
+_WORKER_CLASSIFIER: NpDnaTopicClassifier | None = None
+
+
+def _classify_chunk(texts: list[str]) -> list[TopicClassification]:
+    """Process-pool task: classify one chunk with a per-worker classifier."""
+    global _WORKER_CLASSIFIER
+    if _WORKER_CLASSIFIER is None:
+        _WORKER_CLASSIFIER = NpDnaTopicClassifier()
+    return [_WORKER_CLASSIFIER.classify(t) for t in texts]
+
+
 # Convenience instance
 classifier = NpDnaTopicClassifier()
 
@@ -31,6 +31,7 @@ class StrandConfig:
     """Causal gated state-space processing unit configuration."""
     hidden_size: int = 128
     state_size: int = 64
+    checkpoint_chunk: int = 0  # >0 = recompute recurrence per chunk of this many steps in backward
 
 
 @dataclass
@@ -432,6 +432,11 @@ class MemoryCortex(torch.nn.Module):
             (path / "cortex_meta.json").write_text(
                 json.dumps(meta, indent=2), encoding="utf-8"
             )
+            try:
+                from .cortex_index import write_for_dir
+                write_for_dir(path)
+            except Exception as exc:  # the JSON is authoritative; the index is rebuilt on demand
+                logger.warning("Cortex index not written for %s: %s", path, exc)
 
         # Save projection weights
         torch.save(
@@ -0,0 +1,231 @@
+"""Sidecar SQLite index over a saved Cortex's entry metadata.
+
+``cortex_meta.json`` is one JSON array; browsing it meant parsing the whole
+file for every page. ``MemoryCortex.save`` now also writes
+``cortex_index.db`` next to it: one row per entry with indexed ``topic``,
+``importance`` and ``access_count`` columns, plus an FTS5 table over the
+entry text (``source``) when SQLite has FTS5. ``CortexIndex`` serves pages,
+filters, sorts and text search from it without touching the JSON.
+
+Indexes are stamped with the ``(size, mtime_ns)`` of the ``cortex_meta.json``
+they were built from; ``CortexIndex.open`` rebuilds a missing or stale one
+(older checkpoints, hierarchical tiers written without an index).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Iterable
+
+INDEX_FILE = "cortex_index.db"
+META_FILE = "cortex_meta.json"
+SORT_COLUMNS = {"index": "idx", "topic": "topic", "importance": "importance", "access_count": "access_count", "created_at": "created_at"}
+
+_SCHEMA = """
+CREATE TABLE entries (
+    idx          INTEGER PRIMARY KEY,
+    topic        TEXT NOT NULL,
+    topics       TEXT NOT NULL,
+    related      TEXT NOT NULL,
+    source       TEXT NOT NULL,
+    created_at   REAL NOT NULL,
+    access_count INTEGER NOT NULL,
+    importance   REAL NOT NULL
+);
+CREATE INDEX idx_entries_topic ON entries(topic);
+CREATE INDEX idx_entries_importance ON entries(importance);
+CREATE INDEX idx_entries_access ON entries(access_count);
+CREATE TABLE info (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def importance_score(meta: dict[str, Any], now: float | None = None) -> float:
+    """Same formula as ``MemoryCortex._importance_score``, from saved metadata."""
+    age_hours = max(0.0, ((time.time() if now is None else now) - float(meta.get("created_at") or 0.0)) / 3600)
+    return (
+        int(meta.get("access_count") or 0)
+        + len(meta.get("related") or []) * 0.25
+        + len(meta.get("topics") or []) * 0.1
+        - age_hours * 0.01
+    )
+
+
+def _meta_stamp(meta_path: Path) -> str:
+    st = meta_path.stat()
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def _has_fts5(conn: sqlite3.Connection) -> bool:
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._fts_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp._fts_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def write_index(db_path: Path, meta: Iterable[dict[str, Any]], meta_stamp: str = "") -> Path:
+    """Write the index atomically (temp file + rename)."""
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".cortex_index-", suffix=".db", dir=str(db_path.parent))
+    os.close(fd)
+    now = time.time()
+    try:
+        conn = sqlite3.connect(tmp)
+        try:
+            conn.executescript(_SCHEMA)
+            fts = _has_fts5(conn)
+            if fts:
+                conn.execute("CREATE VIRTUAL TABLE entries_fts USING fts5(source, topic, content='entries', content_rowid='idx')")
+            rows = (
+                (
+                    i,
+                    str(m.get("topic") or ""),
+                    json.dumps(m.get("topics") or []),
+                    json.dumps(m.get("related") or []),
+                    str(m.get("source") or ""),
+                    float(m.get("created_at") or 0.0),
+                    int(m.get("access_count") or 0),
+                    importance_score(m, now),
+                )
+                for i, m in enumerate(meta)
+            )
+            conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            if fts:
+                conn.execute("INSERT INTO entries_fts(rowid, source, topic) SELECT idx, source, topic FROM entries")
+            conn.executemany(
+                "INSERT INTO info VALUES (?, ?)",
+                [("meta_stamp", meta_stamp), ("fts", "1" if fts else "0"), ("built_at", str(now))],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp, db_path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return db_path
+
+
+def write_for_dir(cortex_dir: Path) -> Path:
+    """(Re)build the index for a saved cortex directory from its JSON."""
+    meta_path = cortex_dir / META_FILE
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    return write_index(cortex_dir / INDEX_FILE, meta, _meta_stamp(meta_path))
+
+
+def _fts_query(text: str) -> str:
+    """User text → FTS5 prefix query over quoted terms (no operator injection)."""
+    terms = [t.replace('"', '""') for t in text.split() if t.strip()]
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+class CortexIndex:
+    """Read side of ``cortex_index.db``."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        with closing(self._connect()) as conn:
+            info = dict(conn.execute("SELECT key, value FROM info").fetchall())
+            self.total = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        self.meta_stamp = info.get("meta_stamp", "")
+        self.fts = info.get("fts") == "1"
+
+    @classmethod
+    def open(cls, cortex_dir: Path) -> "CortexIndex | None":
+        """Index for ``cortex_dir``, rebuilt first if missing or stale.
+
+        Returns ``None`` when the directory has no saved entries.
+        """
+        cortex_dir = Path(cortex_dir)
+        meta_path = cortex_dir / META_FILE
+        if not meta_path.exists():
+            return None
+        db_path = cortex_dir / INDEX_FILE
+        stamp = _meta_stamp(meta_path)
+        if db_path.exists():
+            try:
+                index = cls(db_path)
+                if index.meta_stamp == stamp:
+                    return index
+            except sqlite3.DatabaseError:
+                pass
+        try:
+            return cls(write_for_dir(cortex_dir))
+        except OSError:
+            # Read-only checkpoint: keep a private copy of the index instead.
+            key = hashlib.sha1(str(cortex_dir.resolve()).encode()).hexdigest()[:16]
+            fallback = Path(tempfile.gettempdir()) / f"atulya-cortex-{key}.db"
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            return cls(write_index(fallback, meta, stamp))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def query(
+        self,
+        page: int = 1,
+        limit: int = 50,
+        topic: str = "",
+        q: str = "",
+        sort: str = "index",
+        order: str = "asc",
+    ) -> tuple[list[dict[str, Any]], int]:
+        """One page of entries and the total matching the filters."""
+        column = SORT_COLUMNS.get(sort)
+        if column is None:
+            raise ValueError(f"Unknown sort field: {sort!r}")
+        direction = "DESC" if order.lower() == "desc" else "ASC"
+        where, params = [], []
+        if topic:
+            where.append("e.topic = ?")
+            params.append(topic)
+        join = ""
+        if q.strip():
+            if self.fts:
+                join = "JOIN entries_fts f ON f.rowid = e.idx"
+                where.append("entries_fts MATCH ?")
+                params.append(_fts_query(q))
+            else:
+                where.append("e.source LIKE ? ESCAPE '\\'")
+                params.append("%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        limit = max(1, limit)
+        offset = max(0, (page - 1) * limit)
+        with closing(self._connect()) as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM entries e {join} {clause}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT e.* FROM entries e {join} {clause} ORDER BY e.{column} {direction}, e.idx ASC LIMIT ? OFFSET ?",
+                [*params, limit, offset],
+            ).fetchall()
+        return [self._row(row) for row in rows], total
+
+    def topics(self, limit: int = 100) -> list[dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT topic, COUNT(*) AS n FROM entries GROUP BY topic ORDER BY n DESC, topic LIMIT ?", (limit,),
+            ).fetchall()
+        return [{"topic": row["topic"], "entries": row["n"]} for row in rows]
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> dict[str, Any]:
+        return {
+            "index": row["idx"],
+            "topic": row["topic"],
+            "topics": json.loads(row["topics"]),
+            "related": json.loads(row["related"]),
+            "source": row["source"],
+            "created_at": row["created_at"],
+            "access_count": row["access_count"],
+            "importance": round(row["importance"], 4),
+        }
@@ -23,6 +23,11 @@ try:
 except ImportError:
     _HAS_IDENTITY = False
 
+try:
+    from atulya.observability import TOKENIZER_ENCODE, timed as _timed
+except ImportError:
+    _timed = None
+
 logger = logging.getLogger(__name__)
 
 # ── Sampling helpers ──────────────────────────────────────────────────────────
@@ -175,7 +180,11 @@ class GenerationMixin:
     ) -> Generator[str, None, None]:
         original_prompt = prompt
         prompt = _cache_prompt(_build_chat_prompt(prompt, system=system))
-        prompt_ids = self.encode(prompt, allow_growth=False)
+        if _timed is not None:
+            with _timed(TOKENIZER_ENCODE, "tokenizer.encode"):
+                prompt_ids = self.encode(prompt, allow_growth=False)
+        else:
+            prompt_ids = self.encode(prompt, allow_growth=False)
         ids = list(prompt_ids) or [self.tokenizer.token_to_id.get("<bos>", 2)]
         self.last_prompt_len = len(ids)
 
@@ -19,6 +19,7 @@ import torch
 from torch import Tensor, nn
 
 from .config import GenomeConfig, StrandConfig
+from .plasticity import current_adapter_route
 
 logger = logging.getLogger(__name__)
 
@@ -77,8 +78,9 @@ class Genome(nn.Module):
         for role, (_, cols) in self._shapes.items():
             self.bias_decoders[role] = nn.Linear(L, cols)
 
-        # Weight cache for inference (cleared on train mode switch)
-        self._weight_cache: dict[int, dict] = {}
+        # Weight cache for inference (cleared on train mode switch), keyed by
+        # (adapter route, strand_id) since LoRA adapters change decoder output
+        self._weight_cache: dict[tuple, dict] = {}
         self._cache_enabled: bool = False
 
     def generate(self, strand_id: int, role: WeightRole) -> tuple[Tensor, Tensor]:
@@ -112,16 +114,17 @@ class Genome(nn.Module):
         During inference with cache enabled: returns cached weights (free after first call).
         During training: always recomputes (gradients flow through seeds).
         """
+        key = (current_adapter_route(), strand_id)
         # Cache hit during inference
-        if self._cache_enabled and not self.training and strand_id in self._weight_cache:
-            return self._weight_cache[strand_id]
+        if self._cache_enabled and not self.training and key in self._weight_cache:
+            return self._weight_cache[key]
 
         # Generate weights
         result = {role: self.generate(strand_id, role) for role in _ROLES}
 
         # Cache during inference
         if self._cache_enabled and not self.training:
-            self._weight_cache[strand_id] = result
+            self._weight_cache[key] = result
 
         return result
 
@@ -131,6 +134,11 @@ class Genome(nn.Module):
         self._cache_enabled = True
         self._weight_cache.clear()
 
+    def drop_cached_route(self, route) -> None:
+        """Forget cached weights generated under one adapter route."""
+        for key in [k for k in self._weight_cache if k[0] == route]:
+            self._weight_cache.pop(key, None)
+
     def disable_inference_cache(self) -> None:
         """Call before training to ensure fresh weight generation."""
         self._cache_enabled = False
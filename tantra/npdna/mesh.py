@@ -6,6 +6,12 @@ N/k × compute savings (e.g., 8 strands, top-2 = 4× savings).
 
 Includes load-balancing loss to prevent dead Strands (where all tokens
 route to the same few Strands and the rest are never used).
+
+With ``config.strand.checkpoint_chunk`` > 0 (activation checkpointing "chunk"
+or "full") the strand dispatch runs per chunk of that many positions under
+``torch.utils.checkpoint``: strands see one token per call, so their
+activations pile up across the dispatch loop rather than inside a recurrence.
+Routing stays outside the checkpoint; usage counts are taken once.
 """
 
 from __future__ import annotations
@@ -15,6 +21,7 @@ from collections import Counter
 
 import torch
 from torch import Tensor, nn
+from torch.utils.checkpoint import checkpoint
 
 from .config import MeshConfig
 from .genome import Genome
@@ -23,6 +30,19 @@ from .strand import Strand
 logger = logging.getLogger(__name__)
 
 
+def _dispatch_chunked(dispatch, chunk: int, x: Tensor, *routing: Tensor) -> Tensor:
+    """Run ``dispatch`` over ``chunk``-sized position slices, recomputing each in backward."""
+    T = x.shape[1]
+    if chunk <= 0 or T <= chunk or not torch.is_grad_enabled():
+        return dispatch(x, *routing)
+    outputs = [
+        checkpoint(dispatch, x[:, start:start + chunk], *(r[:, start:start + chunk] for r in routing),
+                   use_reentrant=False)
+        for start in range(0, T, chunk)
+    ]
+    return torch.cat(outputs, dim=1)
+
+
 class NeuralMesh(nn.Module):
     """Sparse routing mesh.  Each token is processed by only top_k Strands.
 
@@ -161,6 +181,29 @@ class NeuralMesh(nn.Module):
         # Normalize weights
         top_weights = top_weights.softmax(dim=-1)  # (B, T, K)
 
+        output = _dispatch_chunked(self._dispatch, self.config.strand.checkpoint_chunk, x, top_indices, top_weights)
+
+        # Update usage counts
+        with torch.no_grad():
+            usage = top_indices.reshape(-1).bincount(minlength=N).float()
+            self._usage_counts.add_(usage)
+
+        # Balance loss
+        f_i = usage / usage.sum().clamp_min(1.0)
+        router_probs = scores.softmax(dim=-1).mean(dim=(0, 1))
+        balance_loss = N * (f_i * router_probs).sum()
+        entropy = -(router_probs * router_probs.clamp_min(1e-9).log()).sum()
+        entropy = entropy / torch.log(torch.tensor(max(1.0, float(N)), device=x.device))
+        self._last_balance_loss.copy_(balance_loss.detach())
+        self._last_router_entropy.copy_(entropy.detach())
+
+        return output, balance_loss * self.config.balance_weight
+
+    def _dispatch(self, x: Tensor, top_indices: Tensor, top_weights: Tensor) -> Tensor:
+        """Weighted sum of the selected strands' outputs for each (b, t) position."""
+        N = self.config.num_strands
+        K = top_indices.shape[-1]
+
         # ── SPARSE: only run the top-K strands that are actually selected ──
         # Collect unique selected strand indices across the whole batch
         unique_selected = top_indices.reshape(-1).unique()  # at most K*B*T unique, often K*2
@@ -200,21 +243,7 @@ class NeuralMesh(nn.Module):
                 w = weight[b_idx, t_idx, :]  # (M, 1)
                 output[b_idx, t_idx, :] += strand_out * w
 
-        # Update usage counts
-        with torch.no_grad():
-            usage = top_indices.reshape(-1).bincount(minlength=N).float()
-            self._usage_counts.add_(usage)
-
-        # Balance loss
-        f_i = usage / usage.sum().clamp_min(1.0)
-        router_probs = scores.softmax(dim=-1).mean(dim=(0, 1))
-        balance_loss = N * (f_i * router_probs).sum()
-        entropy = -(router_probs * router_probs.clamp_min(1e-9).log()).sum()
-        entropy = entropy / torch.log(torch.tensor(max(1.0, float(N)), device=x.device))
-        self._last_balance_loss.copy_(balance_loss.detach())
-        self._last_router_entropy.copy_(entropy.detach())
-
-        return output, balance_loss * self.config.balance_weight
+        return output
 
     # ── Plasticity diagnostics properties ──────────────────────────────────
 
@@ -455,8 +484,6 @@ class CategoryMesh(nn.Module):
             # For each category, distribute weight across its strands
 
             flat_indices = top_indices.reshape(B * T * K)  # (B*T*K,)
-            flat_weights = top_weights.reshape(B * T * K, 1)  # (B*T*K, 1)
-            flat_x = x.unsqueeze(2).expand(-1, -1, K, -1).reshape(B * T * K, -1)  # (B*T*K, H)
 
             # Collect unique categories
             unique_cats = torch.unique(flat_indices)
@@ -472,45 +499,17 @@ class CategoryMesh(nn.Module):
                             self.strands[strand_idx].strand_id
                         )
 
-            # Process strands per category
-            output = torch.zeros_like(x)
-            all_flat_indices_list = []
-            all_contrib = []
-
-            for cat_idx in unique_cats:
-                cat_name = self.category_names[int(cat_idx)]
-                strand_ids = self.category_to_strand_id[cat_name]
-                num_cat_strands = len(strand_ids)
-
-                # Find which tokens were routed to this category
-                cat_mask = flat_indices == cat_idx  # (B*T*K,) bool
-                if cat_mask.sum() == 0:
-                    continue
-
-                # For each strand in this category, process a share of the weight
-                for i, sid in enumerate(strand_ids):
-                    strand_idx = self._strand_idx_by_id(sid)
-                    if strand_idx is None:
-                        continue
-
-                    # Each strand gets category_score / num_cat_strands
-                    indices_s = torch.where(cat_mask)[0]
-                    w_s = flat_weights.index_select(0, indices_s) / num_cat_strands
-                    x_s = flat_x.index_select(0, indices_s).unsqueeze(1)  # (M, 1, H)
-
-                    out_s = self.strands[strand_idx](x_s, weights=weight_cache.get(sid))
-                    out_s = out_s.squeeze(1)  # (M, H)
-
-                    self._usage_counts[sid] += indices_s.shape[0]
+            def dispatch(x_c: Tensor, indices_c: Tensor, weights_c: Tensor) -> Tensor:
+                return self._dispatch(x_c, indices_c, weights_c, weight_cache)
 
-                    # Scatter back
-                    remainder = indices_s % (T * K)
-                    batch_i = indices_s // (T * K)
-                    time_i = remainder // K
+            output = _dispatch_chunked(dispatch, self.config.strand.checkpoint_chunk, x, top_indices, top_weights)
 
-                    output = output.index_put(
-                        (batch_i, time_i), out_s * w_s, accumulate=True
-                    )
+            # Every strand of a category sees each (b, t, k) slot routed to it
+            for cat_idx in unique_cats:
+                routed = int((flat_indices == cat_idx).sum())
+                for sid in self.category_to_strand_id[self.category_names[int(cat_idx)]]:
+                    if self._strand_idx_by_id(sid) is not None:
+                        self._usage_counts[sid] += routed
 
             # Load-balancing loss
             routing_probs_all = torch.softmax(scores, dim=-1)
@@ -546,6 +545,40 @@ class CategoryMesh(nn.Module):
 
             return output, balance_loss * self.config.balance_weight
 
+    def _dispatch(
+        self, x: Tensor, top_indices: Tensor, top_weights: Tensor, weight_cache: dict[int, dict]
+    ) -> Tensor:
+        """Strand outputs for routed (b, t, k) slots, split evenly within each category."""
+        B, T, _ = x.shape
+        K = top_indices.shape[-1]
+        flat_indices = top_indices.reshape(B * T * K)  # (B*T*K,)
+        flat_weights = top_weights.reshape(B * T * K, 1)  # (B*T*K, 1)
+        flat_x = x.unsqueeze(2).expand(-1, -1, K, -1).reshape(B * T * K, -1)  # (B*T*K, H)
+
+        # Process strands per category
+        output = torch.zeros_like(x)
+        for cat_idx in torch.unique(flat_indices):
+            strand_ids = self.category_to_strand_id[self.category_names[int(cat_idx)]]
+            num_cat_strands = len(strand_ids)
+
+            # Find which tokens were routed to this category
+            indices_s = torch.where(flat_indices == cat_idx)[0]
+            w_s = flat_weights.index_select(0, indices_s) / num_cat_strands
+            x_s = flat_x.index_select(0, indices_s).unsqueeze(1)  # (M, 1, H)
+
+            # Scatter targets
+            batch_i = indices_s // (T * K)
+            time_i = (indices_s % (T * K)) // K
+
+            # Each strand in this category gets category_score / num_cat_strands
+            for sid in strand_ids:
+                strand_idx = self._strand_idx_by_id(sid)
+                if strand_idx is None:
+                    continue
+                out_s = self.strands[strand_idx](x_s, weights=weight_cache.get(sid)).squeeze(1)  # (M, H)
+                output = output.index_put((batch_i, time_i), out_s * w_s, accumulate=True)
+        return output
+
     def _strand_idx_by_id(self, strand_id: int) -> int | None:
         """Find local index in self.strands for a genome strand_id."""
         for i, s in enumerate(self.strands):
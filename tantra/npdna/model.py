@@ -27,6 +27,8 @@ from .checkpoint import CheckpointMixin
 
 logger = logging.getLogger(__name__)
 
+ACTIVATION_CHECKPOINT_MODES = ("none", "layer", "chunk", "full")
+
 
 # â”€â”€ Core architecture â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 
@@ -159,6 +161,25 @@ class NpDnaModel(nn.Module):
             offset += n
         logger.info("NpDnaModel: masked seeds for %d strands in frozen layers", offset)
 
+    def set_activation_checkpointing(self, mode: str = "none", chunk: int = 64) -> None:
+        """Select which activations are recomputed in backward instead of kept.
+
+        Args:
+            mode: "none", "layer" (checkpoint each mesh layer), "chunk"
+                (checkpoint each mesh's strand dispatch, and any strand
+                recurrence longer than ``chunk``, per chunk of positions) or
+                "full" (both).
+            chunk: Sequence positions per checkpoint chunk.
+        """
+        if mode not in ACTIVATION_CHECKPOINT_MODES:
+            raise ValueError(f"Unknown activation checkpointing mode: {mode!r}")
+        self.config.gradient_checkpointing = mode in {"layer", "full"}
+        strand_chunk = max(1, int(chunk)) if mode in {"chunk", "full"} else 0
+        for mesh in self.mesh_layers:
+            mesh.config.strand.checkpoint_chunk = strand_chunk
+            for strand in mesh.strands:
+                strand.config.checkpoint_chunk = strand_chunk
+
     def active_layer_mask(self) -> list[bool]:
         """Which layers are trainable (not frozen)."""
         return [
@@ -20,10 +20,15 @@ from __future__ import annotations
 
 import json
 import logging
+import queue
+import random
+import threading
 import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, Callable
+from typing import Iterable, Iterator, Optional, Callable
 
 try:
     import torch
@@ -39,6 +44,30 @@ except Exception:
 
 logger = logging.getLogger(__name__)
 
+IGNORE_INDEX = -100
+PAD_ID = 0
+
+# Per-request adapter route: an adapter name, None (base model) or a tuple of
+# names with one entry per batch row. Unset means "use LoRALinear.active_adapter",
+# so concurrent generations can pick adapters without mutating shared modules.
+_ADAPTER_ROUTE: ContextVar = ContextVar("lora_adapter_route")
+_UNSET = object()
+
+
+def current_adapter_route(default=None):
+    """Adapter route of the running request, or ``default`` when unset."""
+    return _ADAPTER_ROUTE.get(default)
+
+
+@contextmanager
+def adapter_route(route):
+    """Select an adapter (or per-row tuple of adapters) for the current context."""
+    token = _ADAPTER_ROUTE.set(route)
+    try:
+        yield
+    finally:
+        _ADAPTER_ROUTE.reset(token)
+
 
 # ── LoRA Adapter ─────────────────────────────────────────────────────────────
 
@@ -98,11 +127,12 @@ class LoRALinear(nn.Module):
         self._rank = rank
         self._alpha = alpha
 
-    def add_adapter(self, name: str) -> LoRAAdapter:
+    def add_adapter(self, name: str, rank: Optional[int] = None,
+                    alpha: Optional[float] = None) -> LoRAAdapter:
         """Create and register a new adapter."""
         adapter = LoRAAdapter(
             self.base.in_features, self.base.out_features,
-            rank=self._rank, alpha=self._alpha
+            rank=rank or self._rank, alpha=alpha or self._alpha
         )
         self.adapters[name] = adapter
         return adapter
@@ -130,10 +160,278 @@ class LoRALinear(nn.Module):
 
     def forward(self, x: Tensor) -> Tensor:
         out = self.base(x)
-        if self.active_adapter and self.active_adapter in self.adapters:
-            out = out + self.adapters[self.active_adapter](x)
+        route = _ADAPTER_ROUTE.get(_UNSET)
+        if route is _UNSET:
+            route = self.active_adapter
+        if isinstance(route, tuple):
+            return out + self._row_delta(x, route)
+        # _modules.get: an adapter evicted by another thread just means "base"
+        adapter = self.adapters._modules.get(route) if route else None
+        if adapter is not None:
+            out = out + adapter(x)
         return out
 
+    def _row_delta(self, x: Tensor, route: tuple) -> Tensor:
+        """Batched LoRA delta with a different adapter per leading-dim row.
+
+        Gathers each row's A/B factors and runs two bmm calls, so a mixed
+        batch costs one pass instead of one pass per adapter.
+        """
+        if x.dim() < 2 or x.shape[0] != len(route):
+            raise ValueError(f"Row routing needs a batch-aligned input (rows={len(route)}, x={tuple(x.shape)})")
+        names = [n for n in dict.fromkeys(route) if n and n in self.adapters]
+        if not names:
+            return torch.zeros(*x.shape[:-1], self.base.out_features, dtype=x.dtype, device=x.device)
+        adapters = [self.adapters[n] for n in names]
+        r = max(a.rank for a in adapters)
+        A = x.new_zeros(len(names) + 1, r, self.base.in_features)   # slot 0 = no adapter
+        B = x.new_zeros(len(names) + 1, self.base.out_features, r)
+        for i, a in enumerate(adapters, start=1):
+            A[i, :a.rank] = a.lora_A.weight
+            B[i, :, :a.rank] = a.lora_B.weight * a.scaling
+        slot = {n: i for i, n in enumerate(names, start=1)}
+        idx = torch.tensor([slot.get(n, 0) for n in route], device=x.device)
+
+        flat = x.reshape(x.shape[0], -1, x.shape[-1])                  # (N, L, in)
+        delta = torch.bmm(torch.bmm(flat, A[idx].transpose(1, 2)), B[idx].transpose(1, 2))
+        return delta.reshape(*x.shape[:-1], self.base.out_features)
+
+
+def wrap_lora_layers(model, rank: int = 8, alpha: float = 16.0,
+                     layers: Optional[list[int]] = None) -> list[LoRALinear]:
+    """Wrap eligible mesh Linear layers with LoRALinear (idempotent).
+
+    The Genome is shared by every mesh layer, so a Linear reached from
+    several layers is wrapped once, and Linears inside an existing
+    LoRALinear (its base and adapter projections) are never wrapped.
+    Returns every LoRALinear in a stable order, which is the order saved
+    ``layer_{i}`` adapter keys refer to.
+    """
+    wrappers: list[LoRALinear] = []
+    seen: set[int] = set()
+
+    for layer_idx, mesh in enumerate(model.mesh_layers):
+        if layers and layer_idx not in layers:
+            continue
+
+        for name, module in list(mesh.named_modules()):
+            if id(module) in seen:
+                continue
+            if isinstance(module, LoRALinear):
+                seen.update(id(m) for m in module.modules())
+                wrappers.append(module)
+                continue
+            if not isinstance(module, nn.Linear):
+                continue
+            seen.add(id(module))
+            if module.out_features < 32:
+                continue  # Too small to benefit
+
+            parts = name.rsplit(".", 1)
+            parent = mesh
+            if len(parts) > 1:
+                for p in parts[0].split("."):
+                    parent = getattr(parent, p)
+                attr = parts[1]
+            else:
+                attr = parts[0]
+
+            lora = LoRALinear(module, rank=rank, alpha=alpha)
+            setattr(parent, attr, lora)
+            seen.update(id(m) for m in lora.modules())
+            wrappers.append(lora)
+    return wrappers
+
+
+# ── Packed topic batches ──────────────────────────────────────────────────────
+
+@dataclass
+class PackedBatch:
+    """One length-bucketed batch for a single topic.
+
+    ``labels`` are already shifted (next-token targets) and hold
+    ``IGNORE_INDEX`` on padding and on packed-segment boundaries, so the loss
+    never learns to predict one document from the tail of another.
+    """
+    topic: str
+    input_ids: Tensor      # (B, T)
+    labels: Tensor         # (B, T)
+    n_tokens: int          # supervised (non-ignored) targets
+
+
+def pack_token_sequences(sequences: Iterable[list[int]], seq_len: int) -> list[tuple[list[int], list[int]]]:
+    """Pack token sequences into rows of at most ``seq_len`` training positions.
+
+    First-fit-decreasing bin packing: long documents are split into
+    ``seq_len + 1`` windows, short ones share a row. Returns
+    ``(input_ids, labels)`` pairs with boundary targets masked out.
+    """
+    width = seq_len + 1
+    pieces: list[list[int]] = []
+    for ids in sequences:
+        for start in range(0, len(ids), width):
+            piece = ids[start:start + width]
+            if len(piece) >= 2:
+                pieces.append(piece)
+    pieces.sort(key=len, reverse=True)
+
+    bins: list[list[list[int]]] = []
+    room: list[int] = []
+    for piece in pieces:
+        for i, free in enumerate(room):
+            if len(piece) <= free:
+                bins[i].append(piece)
+                room[i] -= len(piece)
+                break
+        else:
+            bins.append([piece])
+            room.append(width - len(piece))
+
+    rows = []
+    for segments in bins:
+        tokens: list[int] = []
+        labels: list[int] = []
+        for seg in segments:
+            # The trailing IGNORE_INDEX masks "last token of seg → first of next".
+            tokens.extend(seg)
+            labels.extend(seg[1:] + [IGNORE_INDEX])
+        rows.append((tokens[:-1], labels[:-1]))
+    return rows
+
+
+def collate_packed(rows: list[tuple[list[int], list[int]]], topic: str, pad_id: int = PAD_ID) -> PackedBatch:
+    """Right-pad rows to the longest one in the batch (not to ``seq_len``)."""
+    T = max(len(ids) for ids, _ in rows)
+    input_ids = torch.full((len(rows), T), pad_id, dtype=torch.long)
+    labels = torch.full((len(rows), T), IGNORE_INDEX, dtype=torch.long)
+    n_tokens = 0
+    for i, (ids, lab) in enumerate(rows):
+        input_ids[i, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+        labels[i, :len(lab)] = torch.tensor(lab, dtype=torch.long)
+        n_tokens += sum(1 for t in lab if t != IGNORE_INDEX)
+    return PackedBatch(topic=topic, input_ids=input_ids, labels=labels, n_tokens=n_tokens)
+
+
+class TopicBatcher:
+    """Turn raw topic texts into packed, length-bucketed ``PackedBatch`` objects.
+
+    Texts are consumed in windows of ``window`` documents per topic; each
+    window is tokenized, packed and bucketed by length, and topics are
+    interleaved round-robin so one pass can feed several adapters. The
+    vocabulary is never grown here: adapters train against a fixed embedding.
+
+    Args:
+        tokenizer: AtulyaTokenizer (or anything with ``encode(text, allow_growth=...)``)
+        seq_len: Maximum training positions per row
+        batch_size: Rows per batch
+        window: Documents tokenized and packed together per topic
+        seed: Shuffle seed for batch order inside a window
+    """
+
+    def __init__(self, tokenizer, seq_len: int = 128, batch_size: int = 4,
+                 window: int = 256, seed: int = 0):
+        self.tokenizer = tokenizer
+        self.seq_len = seq_len
+        self.batch_size = batch_size
+        self.window = max(1, window)
+        self._rng = random.Random(seed)
+
+    def _encode(self, text: str) -> list[int]:
+        try:
+            return self.tokenizer.encode(text, allow_growth=False)
+        except TypeError:
+            return self.tokenizer.encode(text)
+
+    def _topic_batches(self, topic: str, texts: Iterable[str]) -> Iterator[PackedBatch]:
+        buf: list[str] = []
+        for text in texts:
+            buf.append(text)
+            if len(buf) >= self.window:
+                yield from self._window_batches(topic, buf)
+                buf = []
+        if buf:
+            yield from self._window_batches(topic, buf)
+
+    def _window_batches(self, topic: str, texts: list[str]) -> list[PackedBatch]:
+        rows = pack_token_sequences((self._encode(t) for t in texts), self.seq_len)
+        rows.sort(key=lambda r: len(r[0]))
+        batches = [
+            collate_packed(rows[i:i + self.batch_size], topic)
+            for i in range(0, len(rows), self.batch_size)
+        ]
+        self._rng.shuffle(batches)
+        return batches
+
+    def batches(self, texts_by_topic: dict[str, Iterable[str]]) -> Iterator[PackedBatch]:
+        """Synchronously yield batches, interleaving topics window by window."""
+        streams = [self._topic_batches(topic, texts) for topic, texts in texts_by_topic.items()]
+        while streams:
+            for stream in list(streams):
+                batch = next(stream, None)
+                if batch is None:
+                    streams.remove(stream)
+                else:
+                    yield batch
+
+    def stream(self, texts_by_topic: dict[str, Iterable[str]], prefetch: int = 8) -> "PrefetchIterator":
+        """Like ``batches`` but tokenizes/packs on a background thread."""
+        return PrefetchIterator(self.batches(texts_by_topic), depth=prefetch)
+
+
+class PrefetchIterator:
+    """Run a producer iterator on a daemon thread behind a bounded queue.
+
+    Tokenization is pure Python while the training step spends most of its
+    time inside torch ops that release the GIL, so the two overlap well.
+    Producer exceptions are re-raised in the consumer.
+    """
+
+    _DONE = object()
+
+    def __init__(self, source: Iterable, depth: int = 8):
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, depth))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(iter(source),), daemon=True)
+        self._thread.start()
+
+    def _run(self, source: Iterator) -> None:
+        try:
+            for item in source:
+                if not self._put(item):
+                    return
+        except BaseException as exc:
+            self._put(exc)
+            return
+        self._put(self._DONE)
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self) -> "PrefetchIterator":
+        return self
+
+    def __next__(self):
+        if self._stop.is_set():
+            raise StopIteration
+        item = self._queue.get()
+        if item is self._DONE:
+            self._stop.set()
+            raise StopIteration
+        if isinstance(item, BaseException):
+            self._stop.set()
+            raise item
+        return item
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
 
 # ── Chunk trainer ─────────────────────────────────────────────────────────────
 
@@ -155,6 +453,9 @@ class ChunkTrainConfig:
     freeze_layers_except: list[int] = field(default_factory=list)  # layer indices to train
     train_genome_seeds: bool = True       # fine-tune DNA seeds for this topic
     device: str = "cpu"
+    pack_window: int = 256                # documents packed together per topic
+    prefetch: int = 8                     # batches tokenized ahead of compute
+    log_every: int = 10                   # loss host-sync interval (steps)
 
 
 class ChunkTrainer:
@@ -175,99 +476,115 @@ class ChunkTrainer:
         self.model = model
         self.config = config
         self._adapters_added: list[tuple[object, str]] = []  # (module, adapter_name)
-
-    def attach_adapters(self) -> int:
-        """Wrap eligible Linear layers with LoRALinear + add adapter."""
-        count = 0
+        self._wrappers: list[LoRALinear] = []
+        self._param_groups: Optional[list[dict]] = None
+        self._clip_params: list = []
+        self._active_topic: Optional[str] = None
+        self._progress_cb: Optional[Callable[[int, float], None]] = None
+
+    def attach_adapters(self, topics: Optional[list[str]] = None) -> int:
+        """Wrap eligible Linear layers with LoRALinear + add one adapter per topic."""
+        topics = topics or [self.config.topic]
         target_layers = self.config.freeze_layers_except
 
+        # Only modify target layers (or all if not specified)
         for layer_idx, mesh in enumerate(self.model.mesh_layers):
-            # Only modify target layers (or all if not specified)
             if target_layers and layer_idx not in target_layers:
                 for p in mesh.parameters():
                     p.requires_grad_(False)
-                continue
-
-            # Wrap Linear layers in this mesh with LoRALinear
-            for name, module in list(mesh.named_modules()):
-                if not isinstance(module, nn.Linear):
-                    continue
-                if module.out_features < 32:
-                    continue  # Too small to benefit
-
-                parts = name.rsplit(".", 1)
-                parent = mesh
-                if len(parts) > 1:
-                    for p in parts[0].split("."):
-                        parent = getattr(parent, p)
-                    attr = parts[1]
-                else:
-                    attr = parts[0]
-
-                lora = LoRALinear(module, rank=self.config.rank, alpha=self.config.alpha)
-                lora.add_adapter(self.config.topic)
-                lora.activate(self.config.topic)
-                setattr(parent, attr, lora)
-                self._adapters_added.append((lora, self.config.topic))
-                count += 1
 
-        logger.info(f"ChunkTrainer: attached {count} LoRA adapters for topic '{self.config.topic}'")
+        wrappers = wrap_lora_layers(self.model, rank=self.config.rank, alpha=self.config.alpha,
+                                    layers=target_layers or None)
+        for lora in wrappers:
+            for topic in topics:
+                lora.add_adapter(topic).to(lora.base.weight.device)
+                self._adapters_added.append((lora, topic))
+            self._wrappers.append(lora)
+        count = len(wrappers)
+
+        self._param_groups = None
+        self.activate_topic(topics[0])
+        logger.info(f"ChunkTrainer: attached {count} LoRA adapters for topics {topics}")
         return count
 
+    def activate_topic(self, topic: str) -> None:
+        """Route every wrapped layer to ``topic``'s adapter (no-op if already active)."""
+        if topic == self._active_topic:
+            return
+        for lora in self._wrappers:
+            lora.activate(topic)
+        self._active_topic = topic
+
     def trainable_params(self) -> list[dict]:
-        """Return optimizer parameter groups."""
+        """Return optimizer parameter groups (built once, then cached)."""
+        if self._param_groups is not None:
+            return self._param_groups
+
         adapter_params = []
         seed_params = []
+        topics = {name for _, name in self._adapters_added}
 
         for lora, name in self._adapters_added:
             if name in lora.adapters:
                 adapter_params.extend(lora.adapters[name].parameters())
 
-        if self.config.train_genome_seeds and hasattr(self.model, "genome"):
+        # Seeds are shared by all topics; only tune them for single-topic runs.
+        if self.config.train_genome_seeds and hasattr(self.model, "genome") and len(topics) <= 1:
             seed_params.append(self.model.genome.seeds)
 
         groups = [{"params": adapter_params, "lr": self.config.lr}]
         if seed_params:
             groups.append({"params": seed_params, "lr": self.config.seed_lr})
+        self._param_groups = groups
+        self._clip_params = [p for g in groups for p in g["params"]]
         return groups
 
-    def train_step(self, input_ids: Tensor, optimizer: torch.optim.Optimizer,
-                   step: int) -> float:
-        """Single training step. Returns loss."""
-        self.model.train()
+    def _forward_loss(self, input_ids: Tensor, labels: Optional[Tensor] = None) -> Tensor:
         device = torch.device(self.config.device)
         input_ids = input_ids.to(device)
-
-        # Auto-regressive LM loss: predict next token
-        x = input_ids[:, :-1]
-        y = input_ids[:, 1:]
-
-        logits, *_ = self.model(x)
+        if labels is None:
+            # Auto-regressive LM loss: predict next token, pads ignored
+            labels = input_ids[:, 1:].masked_fill(input_ids[:, 1:] == PAD_ID, IGNORE_INDEX)
+            input_ids = input_ids[:, :-1]
+        else:
+            labels = labels.to(device)
+
+        logits, *_ = self.model(input_ids)
         B, T, V = logits.shape
-        loss = torch.nn.functional.cross_entropy(
+        return torch.nn.functional.cross_entropy(
             logits.reshape(B * T, V),
-            y.reshape(B * T),
-            ignore_index=0,  # ignore <pad>
+            labels.reshape(B * T),
+            ignore_index=IGNORE_INDEX,
         )
 
+    def _micro_step(self, input_ids: Tensor, optimizer: torch.optim.Optimizer, step: int,
+                    labels: Optional[Tensor] = None) -> Tensor:
+        """Forward/backward (+ optimizer step on accumulation boundaries).
+
+        Returns the detached loss without a host sync.
+        """
+        self.model.train()
+        if self._param_groups is None:
+            self.trainable_params()
+        loss = self._forward_loss(input_ids, labels)
         (loss / self.config.gradient_accumulation).backward()
 
         if (step + 1) % self.config.gradient_accumulation == 0:
-            torch.nn.utils.clip_grad_norm_(
-                [p for g in self.trainable_params() for p in g["params"]],
-                max_norm=1.0
-            )
+            torch.nn.utils.clip_grad_norm_(self._clip_params, max_norm=1.0)
             optimizer.step()
-            optimizer.zero_grad()
+            # None grads let AdamW skip adapters of topics not seen this step.
+            optimizer.zero_grad(set_to_none=True)
 
-        return loss.item()
+        return loss.detach()
 
-    def train(self, dataset, progress_cb: Optional[Callable[[int, float], None]] = None
-              ) -> dict:
-        """Run full chunk training. Dataset must yield (input_ids,) tensors."""
+    def train_step(self, input_ids: Tensor, optimizer: torch.optim.Optimizer,
+                   step: int) -> float:
+        """Single training step. Returns loss."""
+        return self._micro_step(input_ids, optimizer, step).item()
+
+    def _run(self, batches: Iterable, attached: int) -> dict:
         cfg = self.config
-        n_attached = self.attach_adapters()
-        if n_attached == 0:
+        if attached == 0:
             logger.warning("No adapters attached. Check model structure.")
             return {"steps": 0, "final_loss": 0.0}
 
@@ -277,86 +594,166 @@ class ChunkTrainer:
             optimizer, start_factor=0.1, end_factor=1.0, total_iters=cfg.warmup_steps
         )
 
-        losses = []
+        pending: list[tuple[str, Tensor]] = []
+        losses: list[float] = []
+        topic_loss: dict[str, list[float]] = {}
+        tokens = 0
+        started = time.perf_counter()
         step = 0
-        for batch in dataset:
+
+        def flush() -> None:
+            # One host sync for the whole interval instead of one per step.
+            if not pending:
+                return
+            values = torch.stack([loss for _, loss in pending]).tolist()
+            for (topic, _), value in zip(pending, values):
+                losses.append(value)
+                topic_loss.setdefault(topic, []).append(value)
+            pending.clear()
+
+        for batch in batches:
             if step >= cfg.max_steps:
                 break
-            if isinstance(batch, (list, tuple)):
-                input_ids = batch[0]
+            if isinstance(batch, PackedBatch):
+                self.activate_topic(batch.topic)
+                loss = self._micro_step(batch.input_ids, optimizer, step, batch.labels)
+                topic = batch.topic
+                tokens += batch.n_tokens
             else:
-                input_ids = batch
-
-            loss = self.train_step(input_ids, optimizer, step)
-            losses.append(loss)
+                input_ids = batch[0] if isinstance(batch, (list, tuple)) else batch
+                loss = self._micro_step(input_ids, optimizer, step)
+                topic = cfg.topic
+                tokens += int(input_ids[:, 1:].ne(PAD_ID).sum())
+            pending.append((topic, loss))
 
             if step < cfg.warmup_steps:
                 scheduler.step()
 
-            if progress_cb:
-                progress_cb(step, loss)
-
-            if step % 10 == 0:
-                avg = sum(losses[-10:]) / len(losses[-10:])
-                logger.info(f"Chunk train [{cfg.topic}] step {step}/{cfg.max_steps} loss={avg:.4f}")
+            if (step + 1) % cfg.log_every == 0:
+                flush()
+                avg = sum(losses[-cfg.log_every:]) / len(losses[-cfg.log_every:])
+                logger.info(f"Chunk train [{topic}] step {step + 1}/{cfg.max_steps} loss={avg:.4f}")
+                if self._progress_cb:
+                    self._progress_cb(step, avg)
 
             if step > 0 and step % cfg.save_every == 0:
-                self.save_adapters()
+                self._save_all()
 
             step += 1
 
-        self.save_adapters()
+        if isinstance(batches, PrefetchIterator):
+            batches.close()
+        flush()
+        if step % cfg.gradient_accumulation:
+            # Apply the trailing partial accumulation window.
+            torch.nn.utils.clip_grad_norm_(self._clip_params, max_norm=1.0)
+            optimizer.step()
+            optimizer.zero_grad(set_to_none=True)
+
+        self._save_all()
+        elapsed = time.perf_counter() - started
         final_loss = sum(losses[-20:]) / max(len(losses[-20:]), 1)
-        logger.info(f"Chunk training complete: {step} steps, final_loss={final_loss:.4f}")
-        return {"steps": step, "final_loss": final_loss, "topic": cfg.topic}
+        logger.info(f"Chunk training complete: {step} steps, final_loss={final_loss:.4f}, "
+                    f"{tokens / max(elapsed, 1e-9):.0f} tok/s")
+        return {
+            "steps": step,
+            "final_loss": final_loss,
+            "topic": cfg.topic,
+            "topic_loss": {t: sum(v[-20:]) / len(v[-20:]) for t, v in topic_loss.items()},
+            "tokens": tokens,
+            "tok_per_sec": tokens / max(elapsed, 1e-9),
+        }
 
-    def save_adapters(self) -> Path:
-        """Save all adapters for this topic to disk."""
-        out_dir = Path(self.config.output_dir) / self.config.topic
+    def train(self, dataset, progress_cb: Optional[Callable[[int, float], None]] = None
+              ) -> dict:
+        """Run full chunk training.
+
+        Dataset may yield ``(input_ids,)`` / ``input_ids`` tensors or
+        ``PackedBatch`` objects. ``progress_cb(step, avg_loss)`` fires every
+        ``log_every`` steps, when losses are synced to the host.
+        """
+        self._progress_cb = progress_cb
+        return self._run(dataset, self.attach_adapters())
+
+    def train_topics(self, texts_by_topic: dict[str, Iterable[str]], tokenizer,
+                     progress_cb: Optional[Callable[[int, float], None]] = None) -> dict:
+        """Train one adapter per topic in a single pass over packed text batches.
+
+        Batches are topic-homogeneous and interleaved; the active adapter is
+        switched per batch. Adapter LoRA deltas act on the Genome's weight
+        generators, so routing happens per micro-batch rather than per row.
+        Tokenization runs on a background thread, ahead of compute.
+        """
+        cfg = self.config
+        topics = list(texts_by_topic)
+        attached = self.attach_adapters(topics)
+        batcher = TopicBatcher(tokenizer, seq_len=cfg.seq_len, batch_size=cfg.batch_size,
+                               window=cfg.pack_window)
+        self._progress_cb = progress_cb
+        return self._run(batcher.stream(texts_by_topic, prefetch=cfg.prefetch), attached)
+
+    def _save_all(self) -> None:
+        for topic in dict.fromkeys(name for _, name in self._adapters_added):
+            self.save_adapters(topic)
+
+    def save_adapters(self, topic: Optional[str] = None) -> Path:
+        """Save all adapters for a topic (default: ``config.topic``) to disk."""
+        topic = topic or self.config.topic
+        out_dir = Path(self.config.output_dir) / topic
         out_dir.mkdir(parents=True, exist_ok=True)
 
         state = {}
-        for i, (lora, name) in enumerate(self._adapters_added):
-            if name in lora.adapters:
-                state[f"layer_{i}"] = lora.adapters[name].state_dict()
+        for i, lora in enumerate(self._wrappers):
+            if topic in lora.adapters:
+                state[f"layer_{i}"] = lora.adapters[topic].state_dict()
 
         torch.save(state, out_dir / "adapters.pt")
 
         meta = {
-            "topic": self.config.topic,
+            "topic": topic,
             "rank": self.config.rank,
             "alpha": self.config.alpha,
             "saved_at": time.time(),
-            "adapter_count": len(self._adapters_added),
+            "adapter_count": len(state),
         }
         (out_dir / "meta.json").write_text(json.dumps(meta, indent=2))
-        logger.info(f"Saved adapters for '{self.config.topic}' → {out_dir}")
+        logger.info(f"Saved adapters for '{topic}' → {out_dir}")
         return out_dir
 
     @staticmethod
     def load_adapters(model, topic: str, adapters_dir: Path) -> int:
-        """Load and activate saved adapters for a topic. Returns count loaded."""
+        """Load and activate saved adapters for a topic. Returns count loaded.
+
+        This mutates the shared model; for serving several topics at once
+        use ``tantra.npdna.adapter_serving.AdapterServer`` instead.
+        """
         state_path = Path(adapters_dir) / topic / "adapters.pt"
         if not state_path.exists():
             logger.warning(f"No saved adapters for topic '{topic}'")
             return 0
 
         state = torch.load(state_path, map_location="cpu", weights_only=True)
+        meta = _read_adapter_meta(state_path.parent)
         count = 0
-        # Walk model and attach adapters
-        for layer_idx, mesh in enumerate(model.mesh_layers):
-            key = f"layer_{layer_idx}"  # approximate mapping
-            for name, module in mesh.named_modules():
-                if isinstance(module, LoRALinear):
-                    if key in state:
-                        module.add_adapter(topic)
-                        module.adapters[topic].load_state_dict(state[key])
-                        module.activate(topic)
-                        count += 1
+        for i, lora in enumerate(wrap_lora_layers(model)):
+            key = f"layer_{i}"
+            if key not in state:
+                continue
+            lora.add_adapter(topic, rank=meta.get("rank"), alpha=meta.get("alpha"))
+            lora.adapters[topic].load_state_dict(state[key])
+            lora.activate(topic)
+            count += 1
         logger.info(f"Loaded {count} adapters for topic '{topic}'")
         return count
 
 
+def _read_adapter_meta(topic_dir: Path) -> dict:
+    try:
+        return json.loads((Path(topic_dir) / "meta.json").read_text())
+    except (OSError, ValueError):
+        return {}
+
+
 # ── Knowledge injection (zero training) ───────────────────────────────────────
 
 class KnowledgeInjector:
@@ -385,20 +782,37 @@ class KnowledgeInjector:
         # Mean pool → single vector
         return emb.mean(dim=1).squeeze(0)
 
+    @torch.no_grad()
+    def encode_texts(self, texts: list[str], max_len: int = 128) -> Tensor:
+        """Encode many texts in one padded embedding call. Returns (N, H)."""
+        encoded = [self.tokenizer.encode(t)[:max_len] or [PAD_ID] for t in texts]
+        T = max(len(ids) for ids in encoded)
+        ids_tensor = torch.full((len(encoded), T), PAD_ID, dtype=torch.long)
+        mask = torch.zeros(len(encoded), T, 1)
+        for i, ids in enumerate(encoded):
+            ids_tensor[i, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+            mask[i, :len(ids)] = 1.0
+        emb = self.model.embedding(ids_tensor)  # (N, T, H)
+        # Masked mean pool so padding does not dilute short chunks
+        return (emb * mask).sum(dim=1) / mask.sum(dim=1)
+
     def inject(self, text: str, topic: str = "", source: str = "") -> int:
         """Encode text and store in Cortex. Returns entry index."""
         vec = self.encode_text(text)
         return self.model.cortex.store(vec, topic=topic, source=source)
 
     def inject_chunks(self, text: str, chunk_size: int = 200,
-                      overlap: int = 50, topic: str = "") -> int:
+                      overlap: int = 50, topic: str = "", batch_size: int = 64) -> int:
         """Chunk text and inject all chunks. Returns count injected."""
         words = text.split()
-        count = 0
+        chunks = []
         i = 0
         while i < len(words):
-            chunk = " ".join(words[i:i + chunk_size])
-            self.inject(chunk, topic=topic)
-            count += 1
+            chunks.append(" ".join(words[i:i + chunk_size]))
             i += chunk_size - overlap
-        return count
+
+        for start in range(0, len(chunks), batch_size):
+            vecs = self.encode_texts(chunks[start:start + batch_size])
+            for vec in vecs:
+                self.model.cortex.store(vec.clone(), topic=topic)
+        return len(chunks)
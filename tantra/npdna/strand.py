@@ -16,11 +16,34 @@ from __future__ import annotations
 
 import torch
 from torch import Tensor, nn
+from torch.utils.checkpoint import checkpoint
 
 from .config import StrandConfig
 from .genome import Genome
 
 
+def _scan_states(
+    gate_input: Tensor,
+    state_input: Tensor,
+    state: Tensor,
+    W_rec: Tensor,
+    b_rec: Tensor,
+) -> tuple[Tensor, Tensor]:
+    """Run the gated recurrence over (B, T, S) projections.
+
+    Returns the stacked states (B, T, S) and the final state (B, S).
+    """
+    outputs = []
+    for t in range(gate_input.shape[1]):
+        # Now each loop iteration is 3 cheap ops instead of 3 matmuls:
+        rec = state @ W_rec + b_rec          # (B, S)
+        gate = torch.sigmoid(gate_input[:, t] + rec)  # (B, S)
+        candidate = torch.tanh(state_input[:, t])      # (B, S) — no matmul!
+        state = gate * state + (1.0 - gate) * candidate
+        outputs.append(state)
+    return torch.stack(outputs, dim=1), state
+
+
 class Strand(nn.Module):
     """Causal gated state-space processing unit with DNA-generated weights.
 
@@ -96,18 +119,28 @@ class Strand(nn.Module):
 
         # ── SEQUENTIAL: state update (unavoidable — uses previous state) ──
         state = init_state if init_state is not None else torch.zeros(B, S, device=device, dtype=x.dtype)
-        outputs = []
-
-        for t in range(T):
-            # Now each loop iteration is 3 cheap ops instead of 3 matmuls:
-            rec = state @ W_rec + b_rec          # (B, S)
-            gate = torch.sigmoid(gate_input[:, t] + rec)  # (B, S)
-            candidate = torch.tanh(state_input[:, t])      # (B, S) — no matmul!
-            state = gate * state + (1.0 - gate) * candidate
-            outputs.append(state)
-
-        # Stack states, then single big output projection:
-        all_states = torch.stack(outputs, dim=1)  # (B, T, S)
+
+        chunk = self.config.checkpoint_chunk
+        if chunk > 0 and T > chunk and torch.is_grad_enabled() and gate_input.requires_grad:
+            # Activation checkpointing per time chunk: only chunk boundaries
+            # and stacked states stay alive; gates are recomputed in backward.
+            chunks = []
+            for start in range(0, T, chunk):
+                states, state = checkpoint(
+                    _scan_states,
+                    gate_input[:, start:start + chunk],
+                    state_input[:, start:start + chunk],
+                    state,
+                    W_rec,
+                    b_rec,
+                    use_reentrant=False,
+                )
+                chunks.append(states)
+            all_states = torch.cat(chunks, dim=1)  # (B, T, S)
+        else:
+            all_states, state = _scan_states(gate_input, state_input, state, W_rec, b_rec)
+
+        # Single big output projection over the stacked states:
         out = all_states @ W_out + b_out           # (B, T, H) — ONE matmul for all T
 
         self.usage_count += B * T
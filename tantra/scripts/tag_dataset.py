@@ -3,6 +3,7 @@
 Usage:
     python -m tantra.scripts.tag_dataset
     python -m tantra.scripts.tag_dataset --input data/all_datasets.jsonl --output data/tagged_dataset.jsonl
+    python -m tantra.scripts.tag_dataset --workers 0   # all CPUs
 """
 from __future__ import annotations
 
@@ -23,8 +24,13 @@ def tag_dataset(
     input_path: str | Path = "data/all_datasets.jsonl",
     output_path: str | Path = "data/tagged_dataset.jsonl",
     batch_size: int = 100,
+    workers: int | None = 1,
 ) -> None:
-    """Tag every example in a JSONL dataset with its topic category."""
+    """Tag every example in a JSONL dataset with its topic category.
+
+    Examples are classified in blocks through ``classify_batch``; pass
+    ``workers > 1`` (or ``None`` for all CPUs) to spread them over processes.
+    """
     input_path = Path(input_path)
     output_path = Path(output_path)
     if not input_path.is_absolute():
@@ -44,36 +50,46 @@ def tag_dataset(
     print(f"Categories: {', '.join(CATEGORIES)}")
     print()
 
-    with open(input_path, "r", encoding="utf-8") as inf:
-        with open(output_path, "w", encoding="utf-8") as outf:
-            for line in inf:
-                line = line.strip()
-                if not line:
-                    continue
-                total += 1
-                try:
-                    example = json.loads(line)
-                    text = example.get("instruction", "") + " " + example.get("output", "")
-                    result = classifier.classify(text)
-                    example["category"] = result.category
-                    example["category_score"] = round(result.confidence, 3)
-                    outf.write(json.dumps(example, ensure_ascii=False) + "\n")
-                    tagged += 1
-                    cat = result.category or "unknown"
-                    category_counts[cat] = category_counts.get(cat, 0) + 1
-                except Exception as e:
-                    errors += 1
-                    # Write untagged as fallback
+    pending: list[dict] = []
+    block = max(batch_size, 256 * max(1, workers or 1) * 4)
+
+    def flush(outf) -> None:
+        nonlocal tagged
+        texts = [str(ex.get("instruction") or "") + " " + str(ex.get("output") or "") for ex in pending]
+        for example, result in zip(pending, classifier.classify_batch(texts, workers=workers)):
+            example["category"] = result.category
+            example["category_score"] = round(result.confidence, 3)
+            outf.write(json.dumps(example, ensure_ascii=False) + "\n")
+            tagged += 1
+            cat = result.category or "unknown"
+            category_counts[cat] = category_counts.get(cat, 0) + 1
+        pending.clear()
+
+    try:
+        with open(input_path, "r", encoding="utf-8") as inf:
+            with open(output_path, "w", encoding="utf-8") as outf:
+                for line in inf:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    total += 1
                     try:
-                        ex2 = json.loads(line)
-                        ex2["category"] = "unknown"
-                        ex2["category_score"] = 0.0
-                        outf.write(json.dumps(ex2, ensure_ascii=False) + "\n")
+                        example = json.loads(line)
                     except Exception:
-                        pass
-
-                if total % batch_size == 0:
-                    print(f"  Processed {total}...")
+                        example = None
+                    if isinstance(example, dict):
+                        pending.append(example)
+                    else:
+                        errors += 1
+                    if len(pending) >= block:
+                        flush(outf)
+
+                    if total % batch_size == 0:
+                        print(f"  Processed {total}...")
+                if pending:
+                    flush(outf)
+    finally:
+        classifier.close()
 
     print()
     print(f"Done: {tagged} tagged, {errors} errors, {total} total")
@@ -94,8 +110,10 @@ def main():
                         help="Output JSONL file (default: data/tagged_dataset.jsonl)")
     parser.add_argument("--batch-size", type=int, default=100,
                         help="Log progress every N lines")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Classifier worker processes (0 = all CPUs)")
     args = parser.parse_args()
-    tag_dataset(args.input, args.output, args.batch_size)
+    tag_dataset(args.input, args.output, args.batch_size, workers=args.workers or None)
 
 
 if __name__ == "__main__":
@@ -7,17 +7,26 @@ Measures:
   4. Token generation speed (tok/sec)
   5. Memory profiling (peak RSS)
   6. Dense model comparison (NP-DNA vs equivalent standard model)
+  7. Data-parallel training scaling (tok/sec for 1/2/4/8 CPU processes)
+  8. Training peak RSS vs seq_limit per activation-checkpointing mode
+  9. Topic classifier throughput (docs/sec: legacy regex, compiled, process pool)
+ 10. Task classifier latency (reference vs compiled index vs cache) at 1x/100x prototypes
+ 11. Subprocess provider per-request overhead (process per request vs warm worker pool)
 
 Usage:
   python training/benchmark.py --model outputs/npdna
   python training/benchmark.py --config seed --steps 100
+  python training/benchmark.py --dp-scaling 1,2,4,8 --data data/seed_dataset.jsonl
+  python training/benchmark.py --train-memory 128,256,512,1024
+  python training/benchmark.py --classify-bench data/seed_dataset.jsonl --workers 4
+  python training/benchmark.py --task-classifier-bench 1,100
+  python training/benchmark.py --worker-pool-bench 50
 """
 
 from __future__ import annotations
 
 import json
 import logging
-import math
 import os
 import sys
 import time
@@ -33,6 +42,7 @@ if str(_ROOT) not in sys.path:
 
 from tantra.npdna import NpDnaCore, NpDnaModel
 from tantra.training.datasets.build_dataset import load_dataset
+from tantra.training.evaluation import encode_eval_set, evaluate_loss, measure_latency
 
 logger = logging.getLogger(__name__)
 
@@ -45,41 +55,16 @@ def measure_perplexity(
     """Measure perplexity on test data.
 
     Perplexity = exp(average cross-entropy loss).
-    Lower is better. Random baseline â‰ˆ vocab_size.
-    """
-    model = core.model
-    model.eval()
-    params = list(model.parameters())
-    device = params[0].device if params else torch.device("cpu")
-    loss_fn = nn.CrossEntropyLoss(reduction="sum")
-
-    total_loss = 0.0
-    total_tokens = 0
-
-    with torch.no_grad():
-        for text in test_texts:
-            # Evaluation must not grow the tokenizer. New vocabulary rows are
-            # randomly initialized, so adding them during benchmark makes
-            # perplexity meaningless and can explode the score.
-            ids = core.encode(text, allow_growth=False)[:max_seq]
-            if len(ids) < 2:
-                continue
+    Lower is better. Random baseline ≈ vocab_size.
 
-            input_ids = torch.tensor([ids[:-1]], dtype=torch.long, device=device)
-            labels = torch.tensor([ids[1:]], dtype=torch.long, device=device)
-
-            logits, _ = model(input_ids)
-            loss = loss_fn(logits.reshape(-1, logits.shape[-1]), labels.reshape(-1))
-
-            total_loss += float(loss)
-            total_tokens += len(ids) - 1
-
-    if total_tokens == 0:
+    Evaluation must not grow the tokenizer: new vocabulary rows are randomly
+    initialized and would make the score meaningless. Texts are encoded once
+    and run in padded length-bucketed batches (see ``evaluation``).
+    """
+    encoded = encode_eval_set(core, test_texts, max_seq)
+    if len(encoded) == 0:
         return float("inf")
-
-    avg_loss = total_loss / total_tokens
-    perplexity = math.exp(min(avg_loss, 100))  # Cap to avoid overflow
-    return perplexity
+    return evaluate_loss(core.model, encoded)["perplexity"]
 
 
 def measure_compression(model: NpDnaModel) -> dict:
@@ -148,25 +133,15 @@ def measure_strand_utilization(core: NpDnaCore, test_texts: list[str]) -> dict:
     return results
 
 
-def measure_generation_speed(core: NpDnaCore, num_tokens: int = 100) -> dict:
-    """Measure token generation speed."""
+def measure_generation_speed(core: NpDnaCore, num_tokens: int = 100, runs: int = 5) -> dict:
+    """Measure token generation speed (medians over ``runs`` after warmup)."""
     core.model.eval()
-
-    # Warmup
-    core.generate("test", max_tokens=5)
-
-    # Timed run
-    start = time.perf_counter()
-    result = core.generate("Hello world", max_tokens=num_tokens)
-    elapsed = time.perf_counter() - start
-
-    tokens_generated = len(core.encode(result, allow_growth=False))
-    tok_per_sec = tokens_generated / max(0.001, elapsed)
-
+    latency = measure_latency(core, "Hello world", max_tokens=num_tokens, runs=runs)
     return {
-        "tokens_generated": tokens_generated,
-        "time_seconds": round(elapsed, 3),
-        "tokens_per_second": round(tok_per_sec, 1),
+        "tokens_generated": latency["tokens"],
+        "time_seconds": round(latency["total_ms_p50"] / 1000, 3),
+        "tokens_per_second": latency["tokens_per_sec_p50"],
+        "latency": latency,
     }
 
 
@@ -185,6 +160,324 @@ def measure_memory(core: NpDnaCore) -> dict:
     }
 
 
+def measure_data_parallel_scaling(
+    data_path: str,
+    config_name: str = "seed",
+    process_counts: tuple[int, ...] = (1, 2, 4, 8),
+    steps: int = 20,
+    seq_limit: int = 128,
+    limit_samples: int | None = 512,
+    output_root: str | Path | None = None,
+) -> dict:
+    """Train briefly with 1/2/4/8 gloo workers and compare throughput.
+
+    Every run uses the same step count, so N workers process N times as many
+    sequences; tok/sec is the global rate reported by rank 0 in
+    ``train_status.json``.  Speedup is relative to the smallest process count.
+    """
+    import tempfile
+
+    from tantra.training.npdna_train import train_npdna
+
+    root = Path(output_root) if output_root else Path(tempfile.mkdtemp(prefix="npdna_dp_bench_"))
+    cpu_count = os.cpu_count() or 1
+    runs = []
+    for nprocs in process_counts:
+        if nprocs > cpu_count:
+            logger.info("Skipping nprocs=%d (only %d CPUs)", nprocs, cpu_count)
+            continue
+        out_dir = root / f"nprocs_{nprocs}"
+        train_npdna(
+            config_name=config_name,
+            max_steps=steps,
+            seq_limit=seq_limit,
+            output_dir=str(out_dir),
+            data_path=data_path,
+            limit_samples=limit_samples,
+            device="cpu",
+            log_every=max(1, steps),
+            nprocs=nprocs,
+        )
+        status = json.loads((out_dir / "train_status.json").read_text(encoding="utf-8"))
+        runs.append({
+            "processes": nprocs,
+            "steps": status.get("run_step"),
+            "tokens_seen": status.get("tokens_seen"),
+            "elapsed_seconds": round(float(status.get("elapsed") or 0.0), 3),
+            "tokens_per_second": status.get("tok_per_sec"),
+        })
+        logger.info("  nprocs=%d: %.1f tok/sec", nprocs, runs[-1]["tokens_per_second"] or 0.0)
+
+    base = runs[0]["tokens_per_second"] if runs else None
+    for run in runs:
+        tps = run["tokens_per_second"] or 0.0
+        run["speedup"] = round(tps / base, 2) if base else None
+        run["efficiency"] = round(tps / base / run["processes"] * runs[0]["processes"], 2) if base else None
+
+    results = {
+        "config_name": config_name,
+        "data_path": str(Path(data_path).resolve()),
+        "cpu_count": cpu_count,
+        "steps": steps,
+        "seq_limit": seq_limit,
+        "runs": runs,
+    }
+    (root / "dp_scaling.json").write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return results
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes.
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        info = psutil.Process(os.getpid()).memory_info()
+        return getattr(info, "peak_wset", info.rss) / 1024 / 1024
+
+
+def _training_step_peak_rss(
+    config_name: str,
+    seq_len: int,
+    mode: str,
+    checkpoint_chunk: int,
+    steps: int,
+) -> dict:
+    """Run forward/backward steps in a fresh process and report peak RSS."""
+    from tantra.training.npdna_train import _estimate_training_ram_gb
+
+    torch.manual_seed(0)
+    core = NpDnaCore.from_config(config_name)
+    model = core.model
+    model.train()
+    model.set_activation_checkpointing(mode, checkpoint_chunk)
+    loss_fn = nn.CrossEntropyLoss()
+
+    def step(length: int) -> None:
+        ids = torch.randint(0, model.vocab_size, (1, length + 1))
+        logits, balance_loss = model(ids[:, :-1])
+        loss = loss_fn(logits.reshape(-1, logits.shape[-1]), ids[:, 1:].reshape(-1)) + balance_loss
+        loss.backward()
+        model.zero_grad(set_to_none=True)
+
+    # Warm up on a tiny sequence so one-time allocations (gradient buffers,
+    # lazily imported checkpoint machinery) land in the baseline.
+    step(8)
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    for _ in range(max(1, steps)):
+        step(seq_len)
+    elapsed = time.perf_counter() - start
+    peak = _peak_rss_mb()
+    return {
+        "seq_limit": seq_len,
+        "mode": mode,
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(peak, 1),
+        "step_peak_delta_mb": round(peak - baseline, 1),
+        "step_seconds": round(elapsed / max(1, steps), 3),
+        "estimated_training_ram_gb": round(_estimate_training_ram_gb(core, seq_len, 1, mode, checkpoint_chunk), 3),
+    }
+
+
+def measure_training_memory(
+    config_name: str = "seed",
+    seq_limits: tuple[int, ...] = (128, 256, 512, 1024),
+    modes: tuple[str, ...] = ("none", "layer", "chunk", "full"),
+    checkpoint_chunk: int = 64,
+    steps: int = 2,
+) -> dict:
+    """Peak RSS of a training step vs seq_limit for each checkpointing mode.
+
+    Each point runs in its own spawned process so ``ru_maxrss`` is not
+    polluted by earlier, larger runs.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    ctx = multiprocessing.get_context("spawn")
+    rows = []
+    for seq_len in seq_limits:
+        for mode in modes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                row = pool.submit(
+                    _training_step_peak_rss, config_name, seq_len, mode, checkpoint_chunk, steps,
+                ).result()
+            rows.append(row)
+            logger.info(
+                "  seq=%d mode=%s: peak %.1fMB (+%.1fMB), %.3fs/step",
+                seq_len, mode, row["peak_rss_mb"], row["step_peak_delta_mb"], row["step_seconds"],
+            )
+    return {"config_name": config_name, "checkpoint_chunk": checkpoint_chunk, "rows": rows}
+
+
+def measure_classifier_throughput(
+    jsonl_path: str,
+    limit: int = 2000,
+    workers: int | None = None,
+) -> dict:
+    """Docs/sec of the NP-DNA topic classifier over a JSONL corpus.
+
+    Compares the legacy one-regex-per-pattern scorer, the compiled matcher
+    (``classify``) and the process-pool ``classify_batch``.
+    """
+    from tantra.npdna.classifier import NpDnaTopicClassifier
+
+    texts: list[str] = []
+    with open(jsonl_path, encoding="utf-8") as f:
+        for line in f:
+            if len(texts) >= limit:
+                break
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            text = row.get("text") or f"{row.get('instruction', '')} {row.get('output', '')}".strip()
+            if text:
+                texts.append(text)
+    if not texts:
+        raise ValueError(f"No texts found in {jsonl_path}")
+
+    clf = NpDnaTopicClassifier()
+    chars = sum(len(t) for t in texts)
+
+    def _rate(fn) -> float:
+        t0 = time.perf_counter()
+        fn()
+        return len(texts) / max(time.perf_counter() - t0, 1e-9)
+
+    legacy = _rate(lambda: [clf._regex_scores(t.lower()) for t in texts])
+    compiled = _rate(lambda: [clf.classify(t) for t in texts])
+    workers = workers or os.cpu_count() or 1
+    clf.start_pool(workers)  # pool start-up outside the timing
+    pooled = _rate(lambda: clf.classify_batch(texts, workers=workers))
+    clf.close()
+
+    result = {
+        "docs": len(texts),
+        "avg_chars": round(chars / len(texts), 1),
+        "workers": workers,
+        "legacy_regex_docs_per_sec": round(legacy, 1),
+        "compiled_docs_per_sec": round(compiled, 1),
+        "pool_docs_per_sec": round(pooled, 1),
+        "compiled_speedup": round(compiled / legacy, 2),
+    }
+    logger.info(
+        "  Classifier: legacy %.1f docs/s, compiled %.1f docs/s, pool(%d) %.1f docs/s",
+        legacy, compiled, workers, pooled,
+    )
+    return result
+
+
+def measure_task_classifier_latency(scales: tuple[int, ...] = (1, 100), queries: int = 500, seed: int = 0) -> dict:
+    """Per-prompt latency of ``TaskClassifier`` at ``scales`` x the built-in prototypes.
+
+    Scaled sets add ``scale - 1`` variants of every phrase, each with one
+    extra word from the prototype vocabulary and a unique marker term, so
+    postings of common words grow with the set. Prompts are random draws
+    from the same vocabulary. Reports the reference scorer (re-tokenizes
+    every phrase), the compiled index with the cache off, a cache hit, and
+    ``classify_batch``.
+    """
+    import random
+
+    from tantra.core.task_classifier import TaskClassifier
+
+    rng = random.Random(seed)
+    base = TaskClassifier()
+    vocab = sorted({w for proto in base._prototypes.values() for text in proto["phrases"] + proto["keywords"] for w in text.split()})
+    prompts = [" ".join(rng.choice(vocab) for _ in range(rng.randint(3, 16))) for _ in range(queries)]
+
+    def _us(fn) -> float:
+        t0 = time.perf_counter()
+        fn()
+        return (time.perf_counter() - t0) / len(prompts) * 1e6
+
+    rows = []
+    for scale in scales:
+        clf = TaskClassifier(cache_size=0)
+        for category, proto in list(clf._prototypes.items()):
+            extra = [f"{phrase} {vocab[(i * 31 + j) % len(vocab)]} v{j}" for i, phrase in enumerate(proto["phrases"]) for j in range(1, scale)]
+            proto["phrases"].extend(extra)
+        clf.compile()
+        reference = _us(lambda: [clf._reference_scores(p) for p in prompts])
+        compiled = _us(lambda: [clf.classify(p) for p in prompts])
+        clf.cache_size = len(prompts)
+        [clf.classify(p) for p in prompts]
+        cached = _us(lambda: [clf.classify(p) for p in prompts])
+        clf.cache_size = 0
+        batch = _us(lambda: clf.classify_batch(prompts))
+        rows.append({
+            "scale": scale,
+            "phrases": clf._index.phrases,
+            "reference_us": round(reference, 2),
+            "compiled_us": round(compiled, 2),
+            "cached_us": round(cached, 2),
+            "batch_us": round(batch, 2),
+            "compiled_speedup": round(reference / compiled, 2),
+        })
+        logger.info(
+            "  Task classifier x%d (%d phrases): reference %.1fus, compiled %.1fus, cached %.2fus",
+            scale, clf._index.phrases, reference, compiled, cached,
+        )
+    return {"queries": len(prompts), "rows": rows}
+
+
+def measure_worker_pool_overhead(requests: int = 50, init_ms: tuple[float, ...] = (0.0, 200.0), workers: int = 2) -> dict:
+    """Per-request latency of ``OpenCodeProvider`` against the local stub CLI.
+
+    Compares one process per request (``run``) with the warm worker pool
+    (``serve``), sequentially, for each simulated client start-up cost in
+    ``init_ms``. Pool start-up happens before the timing, as it does at
+    failover start.
+    """
+    import asyncio
+    import tempfile
+
+    from tantra.core.model_failover import OpenCodeProvider, ProviderConfig
+    from tantra.core.worker_stub import install
+
+    messages = [{"role": "user", "content": "benchmark the per-request overhead"}]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        stub = str(install(tmp))
+        for delay in init_ms:
+            os.environ["ATULYA_STUB_INIT_MS"] = str(delay)
+
+            async def _run() -> tuple[float, float]:
+                oneshot = OpenCodeProvider(ProviderConfig(name="opencode", command=stub))
+                pooled = OpenCodeProvider(ProviderConfig(
+                    name="opencode", command=stub,
+                    metadata={"worker_command": [stub, "serve"], "workers": workers, "worker_max_requests": 10 * requests},
+                ))
+                t0 = time.perf_counter()
+                for _ in range(requests):
+                    await oneshot.chat_completion(messages)
+                spawn = (time.perf_counter() - t0) / requests
+                await pooled.chat_completion(messages)  # workers warm
+                t0 = time.perf_counter()
+                for _ in range(requests):
+                    await pooled.chat_completion(messages)
+                warm = (time.perf_counter() - t0) / requests
+                await pooled.close()
+                return spawn, warm
+
+            try:
+                spawn, warm = asyncio.run(_run())
+            finally:
+                os.environ.pop("ATULYA_STUB_INIT_MS", None)
+            rows.append({
+                "init_ms": delay,
+                "process_per_request_ms": round(spawn * 1000, 2),
+                "warm_pool_ms": round(warm * 1000, 3),
+                "speedup": round(spawn / warm, 1),
+            })
+            logger.info("  Subprocess provider (init %.0fms): per-request %.1fms, warm pool %.2fms", delay, spawn * 1000, warm * 1000)
+    return {"requests": requests, "workers": workers, "rows": rows}
+
+
 def run_full_benchmark(
     model_path: str | None = None,
     config_name: str = "seed",
@@ -285,7 +578,10 @@ def run_full_benchmark(
     logger.info("Measuring generation speed...")
     speed = measure_generation_speed(core, num_tokens=50)
     results["generation_speed"] = speed
-    logger.info("  Speed: %.1f tok/sec", speed["tokens_per_second"])
+    logger.info(
+        "  Speed: %.1f tok/sec, TTFT p50 %.1fms / p95 %.1fms",
+        speed["tokens_per_second"], speed["latency"]["ttft_ms_p50"], speed["latency"]["ttft_ms_p95"],
+    )
 
     # 5. Memory
     logger.info("Measuring memory...")
@@ -332,7 +628,47 @@ if __name__ == "__main__":
     parser.add_argument("--config", default="seed", help="Config name")
     parser.add_argument("--data", default=None, help="Optional JSONL dataset for held-out evaluation")
     parser.add_argument("--max-samples", type=int, default=256, help="Max held-out texts to evaluate")
+    parser.add_argument("--dp-scaling", default=None, help="Comma-separated process counts for a CPU data-parallel scaling run, e.g. 1,2,4,8")
+    parser.add_argument("--steps", type=int, default=20, help="Training steps per data-parallel scaling run")
+    parser.add_argument("--train-memory", default=None, help="Comma-separated seq_limit values for a peak-RSS vs seq_limit run")
+    parser.add_argument("--checkpoint-chunk", type=int, default=64, help="Strand chunk size for the peak-RSS run")
+    parser.add_argument("--classify-bench", default=None, help="JSONL corpus for a topic-classifier docs/sec run")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for the classifier run (default: all CPUs)")
+    parser.add_argument("--worker-pool-bench", type=int, default=None, help="Requests per mode for a subprocess-provider overhead run (stub CLI)")
+    parser.add_argument("--task-classifier-bench", default=None, help="Comma-separated prototype scales for a task-classifier latency run, e.g. 1,100")
 
     args = parser.parse_args()
+    if args.dp_scaling:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+        counts = tuple(int(x) for x in args.dp_scaling.split(",") if x.strip())
+        scaling = measure_data_parallel_scaling(
+            args.data or "data/seed_dataset.jsonl",
+            config_name=args.config,
+            process_counts=counts,
+            steps=args.steps,
+        )
+        print(json.dumps(scaling, indent=2))
+        sys.exit(0)
+    if args.train_memory:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+        seq_limits = tuple(int(x) for x in args.train_memory.split(",") if x.strip())
+        memory = measure_training_memory(args.config, seq_limits, checkpoint_chunk=args.checkpoint_chunk)
+        print(json.dumps(memory, indent=2))
+        sys.exit(0)
+    if args.classify_bench:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+        throughput = measure_classifier_throughput(args.classify_bench, limit=args.max_samples, workers=args.workers)
+        print(json.dumps(throughput, indent=2))
+        sys.exit(0)
+    if args.worker_pool_bench:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+        print(json.dumps(measure_worker_pool_overhead(args.worker_pool_bench), indent=2))
+        sys.exit(0)
+    if args.task_classifier_bench:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+        scales = tuple(int(x) for x in args.task_classifier_bench.split(",") if x.strip())
+        latency = measure_task_classifier_latency(scales)
+        print(json.dumps(latency, indent=2))
+        sys.exit(0)
     model_path = args.model if Path(args.model).exists() else None
     run_full_benchmark(model_path, args.config, data_path=args.data, max_samples=args.max_samples)
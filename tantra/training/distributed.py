@@ -0,0 +1,246 @@
+"""Single-machine data-parallel helpers for NP-DNA training.
+
+The Strand recurrence and per-strand mesh dispatch are dominated by small ops,
+so adding intra-op threads stops helping long before a multi-core CPU is busy.
+Running several training processes (one shard of the token stream each) over
+``torch.distributed`` with the gloo backend scales much better.
+
+Layout:
+  - ``launch_data_parallel`` spawns N local worker processes.
+  - Each worker initialises a gloo process group and calls ``train_npdna``.
+  - ``train_npdna`` picks up the group through ``DistContext.current()``:
+    it shards the encoded stream, all-reduces gradients in flat buckets and
+    lets rank 0 own checkpoints, ``train_status.json`` and live metrics.
+
+Topology changes (``grow_strands`` / ``add_strand_capacity``) are kept in
+lock-step: usage counters are reduced across ranks before every plasticity
+check so every rank takes the same decision, then rank 0's parameters are
+broadcast so freshly initialised seeds and router rows match everywhere.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+try:
+    import torch
+    import torch.distributed as dist
+    import torch.multiprocessing as mp
+    _HAS_TORCH = True
+except Exception:
+    torch = None
+    dist = None
+    mp = None
+    _HAS_TORCH = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKET_MB = 25.0
+
+
+@dataclass
+class DistContext:
+    """Rank/world view of the current training process."""
+
+    rank: int = 0
+    world_size: int = 1
+
+    @classmethod
+    def current(cls) -> "DistContext":
+        if _HAS_TORCH and dist.is_available() and dist.is_initialized():
+            return cls(rank=dist.get_rank(), world_size=dist.get_world_size())
+        return cls()
+
+    @property
+    def enabled(self) -> bool:
+        return self.world_size > 1
+
+    @property
+    def is_main(self) -> bool:
+        return self.rank == 0
+
+    def shard(self, items: list) -> list:
+        """Strided shard so every rank sees a similar length distribution."""
+        if not self.enabled:
+            return items
+        return items[self.rank::self.world_size]
+
+    def sum(self, values: list[float]) -> list[float]:
+        """All-reduce a short list of scalars (SUM) in one collective."""
+        if not self.enabled:
+            return list(values)
+        buf = torch.tensor(values, dtype=torch.float64)
+        dist.all_reduce(buf, op=dist.ReduceOp.SUM)
+        return buf.tolist()
+
+    def any(self, flag: bool) -> bool:
+        """True on every rank if the flag is set on any rank."""
+        if not self.enabled:
+            return bool(flag)
+        return self.sum([1.0 if flag else 0.0])[0] > 0
+
+    def broadcast_object(self, obj: Any) -> Any:
+        """Broadcast a picklable object from rank 0."""
+        if not self.enabled:
+            return obj
+        box = [obj if self.is_main else None]
+        dist.broadcast_object_list(box, src=0)
+        return box[0]
+
+    def barrier(self) -> None:
+        if self.enabled:
+            dist.barrier()
+
+
+def is_main_process() -> bool:
+    return DistContext.current().is_main
+
+
+def _flat_buckets(tensors: list, bucket_bytes: int) -> list[list]:
+    """Group tensors into same-dtype buckets of roughly ``bucket_bytes``."""
+    buckets: list[list] = []
+    current: list = []
+    current_bytes = 0
+    current_dtype = None
+    for t in tensors:
+        nbytes = t.numel() * t.element_size()
+        if current and (t.dtype != current_dtype or current_bytes + nbytes > bucket_bytes):
+            buckets.append(current)
+            current, current_bytes = [], 0
+        current.append(t)
+        current_bytes += nbytes
+        current_dtype = t.dtype
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+def allreduce_gradients(model, ctx: DistContext, bucket_mb: float = DEFAULT_BUCKET_MB) -> int:
+    """Average gradients across ranks using flattened buckets.
+
+    Sparse routing means a strand's LayerNorm may get no gradient on one rank
+    and a real one on another, so missing grads are materialised as zeros;
+    otherwise ranks would disagree on the bucket layout.
+
+    Returns:
+        Number of all-reduce calls issued (one per bucket).
+    """
+    if not ctx.enabled:
+        return 0
+    grads = []
+    for p in model.parameters():
+        if not p.requires_grad:
+            continue
+        if p.grad is None:
+            p.grad = torch.zeros_like(p)
+        grads.append(p.grad)
+
+    bucket_bytes = max(1, int(bucket_mb * 1024 * 1024))
+    calls = 0
+    for bucket in _flat_buckets(grads, bucket_bytes):
+        flat = torch.cat([g.reshape(-1) for g in bucket])
+        dist.all_reduce(flat, op=dist.ReduceOp.SUM)
+        flat.div_(ctx.world_size)
+        offset = 0
+        for g in bucket:
+            n = g.numel()
+            g.copy_(flat[offset:offset + n].view_as(g))
+            offset += n
+        calls += 1
+    return calls
+
+
+def broadcast_parameters(model, ctx: DistContext) -> None:
+    """Copy rank 0's parameters and buffers to every other rank."""
+    if not ctx.enabled:
+        return
+    with torch.no_grad():
+        for t in list(model.parameters()) + list(model.buffers()):
+            dist.broadcast(t.data, src=0)
+
+
+def sync_usage_counts(model, ctx: DistContext) -> None:
+    """Average per-strand routing counters so plasticity sees the global picture.
+
+    Averaging (rather than summing) keeps the counters additive: after the
+    next interval the cross-rank sum is again exactly the global history.
+    Only ratios feed plasticity decisions, so the scale does not matter.
+    """
+    if not ctx.enabled:
+        return
+    for mesh in getattr(model, "mesh_layers", []):
+        counts = getattr(mesh, "_usage_counts", None)
+        if counts is None:
+            continue
+        reduced = counts.detach().to(torch.float64)
+        dist.all_reduce(reduced, op=dist.ReduceOp.SUM)
+        counts.copy_((reduced / ctx.world_size).to(counts.dtype))
+
+
+def check_topology(model, ctx: DistContext) -> None:
+    """Fail fast if ranks drifted apart structurally (never expected)."""
+    if not ctx.enabled:
+        return
+    local = [int(p.numel()) for p in model.parameters()]
+    reference = ctx.broadcast_object(local)
+    mismatch = ctx.any(local != reference)
+    if mismatch:
+        raise RuntimeError(f"Rank {ctx.rank}: model topology diverged from rank 0 after plasticity event")
+
+
+def find_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def _worker(rank: int, world_size: int, port: int, train_kwargs: dict[str, Any], threads_per_proc: int) -> None:
+    os.environ["MASTER_ADDR"] = "127.0.0.1"
+    os.environ["MASTER_PORT"] = str(port)
+    torch.set_num_threads(max(1, threads_per_proc))
+    if rank > 0:
+        # train_npdna's basicConfig becomes a no-op, keeping one log stream.
+        logging.basicConfig(level=logging.WARNING)
+    dist.init_process_group("gloo", rank=rank, world_size=world_size)
+    try:
+        from tantra.training.npdna_train import train_npdna
+
+        train_npdna(**train_kwargs)
+    finally:
+        dist.destroy_process_group()
+
+
+def launch_data_parallel(
+    nprocs: int,
+    train_kwargs: dict[str, Any],
+    threads_per_proc: int | None = None,
+) -> list[float]:
+    """Spawn ``nprocs`` local gloo workers running ``train_npdna``.
+
+    Returns:
+        The loss history written by rank 0 into ``metadata.json``.
+    """
+    if not _HAS_TORCH:
+        raise RuntimeError("torch is required for data-parallel training")
+    if nprocs < 2:
+        raise ValueError("launch_data_parallel needs nprocs >= 2")
+
+    if threads_per_proc is None:
+        threads_per_proc = max(1, (os.cpu_count() or nprocs) // nprocs)
+    kwargs = {**train_kwargs, "nprocs": nprocs}
+    port = find_free_port()
+    logger.info("Launching %d gloo workers (threads/proc=%d, port=%d)", nprocs, threads_per_proc, port)
+    mp.spawn(_worker, args=(nprocs, port, kwargs, threads_per_proc), nprocs=nprocs, join=True)
+
+    meta_path = Path(kwargs.get("output_dir", "outputs/npdna")) / "metadata.json"
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        return [float(x) for x in meta.get("losses", [])]
+    except (OSError, json.JSONDecodeError, TypeError, ValueError):
+        return []
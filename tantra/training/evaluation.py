@@ -0,0 +1,360 @@
+"""Batched evaluation engine for NP-DNA checkpoints.
+
+Shared by ``training/benchmark.py``, ``core/eval_checkpoints.py`` and
+``core/compare_checkpoints.py``. Those used to run every text through the
+model one at a time and re-tokenize the eval set for every checkpoint.
+Here instead:
+
+  - ``encode_eval_set`` tokenizes the texts once into one flat int32 tensor
+    plus offsets. Results are memoized per tokenizer fingerprint and
+    optionally cached on disk, so checkpoints that share a tokenizer (and
+    worker processes) reuse one encoding.
+  - ``evaluate_loss`` sorts sequences into length buckets and runs padded
+    batches under a token budget. Loss and accuracy are masked to real
+    tokens. The model is causal, so right padding never changes the logits
+    of real positions.
+  - ``measure_latency`` reports p50/p95 time-to-first-token, total time and
+    tok/s over repeated ``generate_stream`` runs after warmup.
+  - ``evaluate_checkpoints`` runs several checkpoints in parallel spawned
+    worker processes, splitting the CPU threads between them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+import torch
+from torch import Tensor, nn
+
+logger = logging.getLogger(__name__)
+
+PAD_ID = 0
+IGNORE_INDEX = -100
+MAX_BATCH_TOKENS = 8192
+MAX_BATCH_SIZE = 64
+CACHE_DIR = Path(tempfile.gettempdir()) / "atulya-eval-cache"
+
+_MEMO: dict[str, "EncodedSet"] = {}
+_MEMO_MAX = 8
+
+
+@dataclass
+class EncodedSet:
+    """Tokenized eval texts: ``tokens[offsets[i]:offsets[i + 1]]`` is text ``i``.
+
+    Texts shorter than two tokens are dropped.
+    """
+
+    tokens: Tensor
+    offsets: Tensor
+    key: str = ""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def lengths(self) -> list[int]:
+        return (self.offsets[1:] - self.offsets[:-1]).tolist()
+
+    @property
+    def num_targets(self) -> int:
+        return sum(n - 1 for n in self.lengths)
+
+    def sequence(self, i: int) -> Tensor:
+        return self.tokens[int(self.offsets[i]):int(self.offsets[i + 1])]
+
+
+def tokenizer_fingerprint(tokenizer: Any) -> str:
+    """Hash of the vocabulary and merges; empty if the object exposes neither."""
+    tokenizer = getattr(tokenizer, "tokenizer", tokenizer)
+    vocab = getattr(tokenizer, "token_to_id", None)
+    if not isinstance(vocab, dict):
+        return ""
+    digest = hashlib.sha1()
+    digest.update(json.dumps(vocab, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    digest.update(json.dumps([list(m) for m in getattr(tokenizer, "merges", [])], ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _texts_key(fingerprint: str, texts: Sequence[str], max_seq: int) -> str:
+    digest = hashlib.sha1(f"{fingerprint}:{max_seq}:{len(texts)}".encode())
+    for text in texts:
+        digest.update(text.encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def encode_eval_set(
+    tokenizer: Any,
+    texts: Sequence[str],
+    max_seq: int = 128,
+    cache_dir: str | Path | None = None,
+) -> EncodedSet:
+    """Tokenize ``texts`` once (no vocabulary growth) into an ``EncodedSet``.
+
+    ``tokenizer`` is anything with ``encode(text, allow_growth=False)``;
+    an ``NpDnaCore`` works too. With a fingerprintable tokenizer the result
+    is memoized in-process and, if ``cache_dir`` is given, saved there as
+    ``eval-<key>.pt`` for other processes.
+    """
+    fingerprint = tokenizer_fingerprint(tokenizer)
+    key = _texts_key(fingerprint, texts, max_seq) if fingerprint else ""
+    if key and key in _MEMO:
+        return _MEMO[key]
+    cache_file = Path(cache_dir) / f"eval-{key}.pt" if key and cache_dir else None
+    if cache_file is not None and cache_file.exists():
+        try:
+            data = torch.load(cache_file, map_location="cpu", weights_only=True)
+            return _remember(EncodedSet(data["tokens"], data["offsets"], key))
+        except (OSError, RuntimeError, KeyError) as exc:
+            logger.debug("Eval cache %s unreadable: %s", cache_file, exc)
+
+    flat: list[int] = []
+    offsets = [0]
+    for text in texts:
+        ids = tokenizer.encode(text, allow_growth=False)[:max_seq]
+        if len(ids) < 2:
+            continue
+        flat.extend(ids)
+        offsets.append(len(flat))
+    encoded = EncodedSet(torch.tensor(flat, dtype=torch.int32), torch.tensor(offsets, dtype=torch.int64), key)
+    if cache_file is not None:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        torch.save({"tokens": encoded.tokens, "offsets": encoded.offsets}, tmp)
+        os.replace(tmp, cache_file)
+    return _remember(encoded) if key else encoded
+
+
+def _remember(encoded: EncodedSet) -> EncodedSet:
+    _MEMO[encoded.key] = encoded
+    while len(_MEMO) > _MEMO_MAX:
+        _MEMO.pop(next(iter(_MEMO)))
+    return encoded
+
+
+def length_buckets(
+    lengths: Sequence[int],
+    max_batch_tokens: int = MAX_BATCH_TOKENS,
+    max_batch_size: int = MAX_BATCH_SIZE,
+) -> list[list[int]]:
+    """Group indices longest-first so each padded batch fits the token budget."""
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches: list[list[int]] = []
+    batch: list[int] = []
+    width = 0
+    for i in order:
+        if batch and ((len(batch) + 1) * width > max_batch_tokens or len(batch) >= max_batch_size):
+            batches.append(batch)
+            batch = []
+        if not batch:
+            width = lengths[i]
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _model_device(model: Any) -> torch.device:
+    for param in model.parameters():
+        return param.device
+    return torch.device("cpu")
+
+
+def evaluate_loss(
+    model: nn.Module,
+    encoded: EncodedSet,
+    max_batch_tokens: int = MAX_BATCH_TOKENS,
+    max_batch_size: int = MAX_BATCH_SIZE,
+) -> dict[str, Any]:
+    """Masked next-token loss, perplexity and accuracy over padded batches."""
+    model.eval()
+    device = _model_device(model)
+    loss_fn = nn.CrossEntropyLoss(reduction="sum", ignore_index=IGNORE_INDEX)
+    lengths = encoded.lengths
+    batches = length_buckets(lengths, max_batch_tokens, max_batch_size)
+
+    total_loss = 0.0
+    total_tokens = 0
+    total_correct = 0
+    start = time.perf_counter()
+    with torch.no_grad():
+        for batch in batches:
+            width = max(lengths[i] for i in batch) - 1
+            inputs = torch.full((len(batch), width), PAD_ID, dtype=torch.long)
+            labels = torch.full((len(batch), width), IGNORE_INDEX, dtype=torch.long)
+            for row, i in enumerate(batch):
+                seq = encoded.sequence(i).long()
+                inputs[row, :len(seq) - 1] = seq[:-1]
+                labels[row, :len(seq) - 1] = seq[1:]
+            inputs, labels = inputs.to(device), labels.to(device)
+            logits, _ = model(inputs)
+            total_loss += float(loss_fn(logits.reshape(-1, logits.shape[-1]), labels.reshape(-1)))
+            mask = labels != IGNORE_INDEX
+            total_correct += int(((logits.argmax(dim=-1) == labels) & mask).sum().item())
+            total_tokens += int(mask.sum().item())
+    elapsed = time.perf_counter() - start
+
+    avg_loss = total_loss / total_tokens if total_tokens else float("inf")
+    return {
+        "avg_loss": avg_loss,
+        "perplexity": math.exp(min(avg_loss, 100)),
+        "accuracy_pct": total_correct / max(1, total_tokens) * 100.0,
+        "tokens": total_tokens,
+        "sequences": len(encoded),
+        "batches": len(batches),
+        "seconds": elapsed,
+        "tokens_per_sec": total_tokens / max(elapsed, 1e-9),
+    }
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Linear-interpolated percentile (``q`` in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100.0
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def measure_latency(
+    core: Any,
+    prompt: str = "Hello world",
+    max_tokens: int = 20,
+    runs: int = 5,
+    warmup: int = 2,
+) -> dict[str, Any]:
+    """Generation latency over ``runs`` timed ``generate_stream`` calls.
+
+    Each yielded piece is one token. Reports p50/p95 of time-to-first-token,
+    total time and tok/s; ``tokens`` is the median tokens per run.
+    """
+    for _ in range(max(0, warmup)):
+        for _piece in core.generate_stream(prompt, max_tokens=min(max_tokens, 5)):
+            pass
+
+    ttft: list[float] = []
+    totals: list[float] = []
+    rates: list[float] = []
+    counts: list[int] = []
+    for _ in range(max(1, runs)):
+        start = time.perf_counter()
+        first = None
+        n = 0
+        for _piece in core.generate_stream(prompt, max_tokens=max_tokens):
+            if first is None:
+                first = time.perf_counter() - start
+            n += 1
+        elapsed = time.perf_counter() - start
+        ttft.append((first if first is not None else elapsed) * 1000)
+        totals.append(elapsed * 1000)
+        rates.append(n / max(elapsed, 1e-9))
+        counts.append(n)
+
+    return {
+        "runs": len(totals),
+        "warmup": warmup,
+        "tokens": int(percentile(counts, 50)),
+        "ttft_ms_p50": round(percentile(ttft, 50), 2),
+        "ttft_ms_p95": round(percentile(ttft, 95), 2),
+        "total_ms_p50": round(percentile(totals, 50), 2),
+        "total_ms_p95": round(percentile(totals, 95), 2),
+        "tokens_per_sec_p50": round(percentile(rates, 50), 1),
+        "tokens_per_sec_p5": round(percentile(rates, 5), 1),
+    }
+
+
+def default_benchmark(core: Any, texts: Sequence[str], label: str, encoded: EncodedSet | None = None) -> dict[str, Any]:
+    """Loss/perplexity/accuracy plus generation latency for one loaded core."""
+    encoded = encoded or encode_eval_set(core, texts)
+    result: dict[str, Any] = {"label": label, **evaluate_loss(core.model, encoded)}
+    result["latency"] = measure_latency(core)
+    return result
+
+
+def _evaluate_one(
+    path: str,
+    texts: Sequence[str],
+    max_seq: int,
+    cache_dir: str | None,
+    benchmark: Callable[..., dict],
+    threads: int,
+    device: str,
+) -> dict[str, Any]:
+    from tantra.npdna import NpDnaCore
+
+    if threads > 0:
+        torch.set_num_threads(threads)
+    core = NpDnaCore.load(path)
+    core.model.to(device)
+    encoded = encode_eval_set(core, texts, max_seq, cache_dir=cache_dir)
+    return benchmark(core, texts, Path(path).name, encoded=encoded)
+
+
+def evaluate_checkpoints(
+    paths: Sequence[str | Path],
+    texts: Sequence[str],
+    max_seq: int = 128,
+    workers: int | None = None,
+    cache_dir: str | Path | None = CACHE_DIR,
+    benchmark: Callable[..., dict] = default_benchmark,
+    device: str = "cpu",
+) -> list[dict[str, Any]]:
+    """Evaluate several checkpoints, in parallel worker processes when ``workers > 1``.
+
+    The eval set is encoded here once per distinct tokenizer and handed to
+    workers through ``cache_dir``. ``benchmark(core, texts, label,
+    encoded=...)`` must be a module-level function (workers are spawned).
+    Results come back in ``paths`` order; a checkpoint that fails yields
+    ``{"label": ..., "error": "..."}``.
+    """
+    from tantra.npdna.tokenizer import AtulyaTokenizer
+
+    paths = [str(p) for p in paths]
+    cache = str(cache_dir) if cache_dir else None
+    if cache:
+        for path in paths:
+            try:
+                encode_eval_set(AtulyaTokenizer.load(Path(path) / "tokenizer.json"), texts, max_seq, cache_dir=cache)
+            except (OSError, ValueError, KeyError) as exc:
+                logger.debug("Pre-encode skipped for %s: %s", path, exc)
+
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(workers or max(1, cpus // 2), cpus, len(paths) or 1))
+    results: list[dict[str, Any]] = []
+    if workers == 1:
+        for path in paths:
+            try:
+                results.append(_evaluate_one(path, texts, max_seq, cache, benchmark, 0, device))
+            except Exception as exc:
+                logger.exception("Evaluation failed for %s", path)
+                results.append({"label": Path(path).name, "error": str(exc)})
+        return results
+
+    threads = max(1, cpus // workers)
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = [
+            pool.submit(_evaluate_one, path, list(texts), max_seq, cache, benchmark, threads, device)
+            for path in paths
+        ]
+        for path, future in zip(paths, futures):
+            try:
+                results.append(future.result())
+            except Exception as exc:
+                logger.error("Evaluation failed for %s: %s", path, exc)
+                results.append({"label": Path(path).name, "error": str(exc)})
+    return results
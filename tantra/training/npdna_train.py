@@ -35,6 +35,16 @@ if str(_ROOT) not in sys.path:
 
 from tantra.npdna import NpDnaCore, PlasticityEngine
 from tantra.training.datasets.build_dataset import build_seed_dataset, load_dataset
+from tantra.training.distributed import (
+    DEFAULT_BUCKET_MB,
+    DistContext,
+    allreduce_gradients,
+    broadcast_parameters,
+    check_topology,
+    is_main_process,
+    launch_data_parallel,
+    sync_usage_counts,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -266,7 +276,12 @@ def _backup_and_rotate_latest(output_dir: str | Path, max_backups: int = 3) -> N
 
 
 def _write_train_status(output_dir: str | Path, phase: str, **fields) -> None:
-    """Write dashboard-readable training status before metrics exist."""
+    """Write dashboard-readable training status before metrics exist.
+
+    Only rank 0 writes when running data-parallel.
+    """
+    if not is_main_process():
+        return
     path = Path(output_dir) / "train_status.json"
     path.parent.mkdir(parents=True, exist_ok=True)
     payload = {
@@ -291,6 +306,8 @@ def _training_metadata(
     balance_weight: float,
     plasticity_interval: int,
     plasticity_overload_threshold: float,
+    grad_accum_tokens: int = 0,
+    activation_checkpointing: str = "none",
 ) -> dict[str, object]:
     return {
         "train_config_name": config_name,
@@ -309,9 +326,17 @@ def _training_metadata(
         "train_balance_weight": balance_weight,
         "train_plasticity_interval": plasticity_interval,
         "train_plasticity_overload_threshold": plasticity_overload_threshold,
+        "train_grad_accum_tokens": grad_accum_tokens,
+        "train_activation_checkpointing": activation_checkpointing,
     }
 
 
+def _scale_gradients(model: nn.Module, factor: float) -> None:
+    for p in model.parameters():
+        if p.grad is not None:
+            p.grad.mul_(factor)
+
+
 def _set_mesh_balance_weight(core: NpDnaCore, balance_weight: float) -> None:
     core.config.mesh.balance_weight = balance_weight
     for mesh in core.model.mesh_layers:
@@ -365,32 +390,68 @@ def _available_ram_gb() -> float:
     return psutil.virtual_memory().available / (1024 ** 3)
 
 
-def _estimate_training_ram_gb(core: NpDnaCore, seq_limit: int, batch_size: int) -> float:
+# Saved-for-backward tensors per token, per active strand, in units of hidden_size
+# floats.  The recurrence (gates, candidates, states) dominates; the rest covers
+# projections, routing and the residual/norm path.
+_ACTIVATION_FACTOR_RECURRENT = 8
+_ACTIVATION_FACTOR_RECURRENT_CHUNKED = 3
+_ACTIVATION_FACTOR_OTHER = 4
+
+# PlasticityEngine events after which the strand set differs: rebuild the
+# optimizer and, under data parallelism, resync parameters across ranks.
+_TOPOLOGY_EVENTS = frozenset({"grow_strands", "reuse_strands"})
+
+
+def _estimate_training_ram_gb(
+    core: NpDnaCore,
+    seq_limit: int,
+    batch_size: int,
+    activation_checkpointing: str = "none",
+    checkpoint_chunk: int = 64,
+) -> float:
     """Conservative CPU RAM estimate for one training step.
 
     This is intentionally simple and biased high.  Backward needs parameters,
     gradients, optimizer state, generated strand weights, and recurrent
     activations.  CPU OOM failures often happen on tiny allocations when the
     system is already exhausted, so the useful rule is headroom, not precision.
+
+    Activation checkpointing changes what stays alive: "chunk" recomputes the
+    strand dispatch per ``checkpoint_chunk`` positions, so only chunk inputs
+    and outputs outlive the forward once sequences exceed a chunk; "layer"
+    keeps one input per mesh layer plus a single layer's activations during
+    recompute.  Gradient accumulation does not change the peak; gradients are
+    a fixed-size buffer.
     """
     param_bytes = sum(p.numel() * p.element_size() for p in core.model.parameters())
     optimizer_bytes = param_bytes * 2.5  # AdamW moments plus gradients/working buffers
-    activation_bytes = (
-        batch_size
-        * max(1, seq_limit)
-        * core.config.hidden_size
-        * core.config.num_layers
-        * max(1, core.config.mesh.top_k)
-        * 4
-        * 12
+    recurrent_factor = (
+        _ACTIVATION_FACTOR_RECURRENT_CHUNKED
+        if activation_checkpointing in {"chunk", "full"}
+        and seq_limit > max(1, checkpoint_chunk)
+        else _ACTIVATION_FACTOR_RECURRENT
     )
+    token_floats = batch_size * max(1, seq_limit) * core.config.hidden_size
+    per_layer_bytes = token_floats * max(1, core.config.mesh.top_k) * 4 * (recurrent_factor + _ACTIVATION_FACTOR_OTHER)
+    if activation_checkpointing in {"layer", "full"}:
+        activation_bytes = token_floats * 4 * core.config.num_layers + per_layer_bytes
+    else:
+        activation_bytes = per_layer_bytes * core.config.num_layers
     overhead_bytes = 1.0 * 1024 ** 3
     return (param_bytes + optimizer_bytes + activation_bytes + overhead_bytes) / (1024 ** 3)
 
 
-def _memory_rule_status(core: NpDnaCore, seq_limit: int, batch_size: int, min_free_ram_gb: float) -> dict[str, float]:
+def _memory_rule_status(
+    core: NpDnaCore,
+    seq_limit: int,
+    batch_size: int,
+    min_free_ram_gb: float,
+    processes: int = 1,
+    activation_checkpointing: str = "none",
+) -> dict[str, float]:
     available = _available_ram_gb()
-    estimated = _estimate_training_ram_gb(core, seq_limit, batch_size)
+    # Data-parallel workers share one machine, so each needs its own copy.
+    estimated = _estimate_training_ram_gb(core, seq_limit, batch_size, activation_checkpointing) * max(1, processes)
     required = max(min_free_ram_gb, estimated * 0.35)
     return {
         "available_ram_gb": round(available, 3),
@@ -476,6 +537,11 @@ def train_npdna(
     plasticity_dead_threshold: float = 0.01,
     plasticity_grow_cooldown: int = 1,
     plasticity_reuse_dead: bool = True,
+    nprocs: int = 1,
+    grad_bucket_mb: float = DEFAULT_BUCKET_MB,
+    grad_accum_tokens: int = 0,
+    activation_checkpointing: str = "none",
+    checkpoint_chunk: int = 64,
 ) -> tuple[NpDnaCore, list[float]]:
     """Train an NP-DNA model.
 
@@ -490,10 +556,27 @@ def train_npdna(
         log_every: Log loss every N steps.
         checkpoint_every: Save checkpoint every N steps (0 = disabled).
         resume_from: Path to resume from a checkpoint.
+        nprocs: Local data-parallel worker processes (gloo). Each rank trains
+            on its own shard of the token stream; rank 0 owns all output files.
+        grad_bucket_mb: Gradient all-reduce bucket size when nprocs > 1.
+        grad_accum_tokens: Accumulate sequences until at least this many
+            target tokens (across all ranks) are seen, then take one optimizer
+            step.  0 steps after every sequence.
+        activation_checkpointing: "none", "layer", "chunk" or "full" — see
+            ``NpDnaModel.set_activation_checkpointing``.
+        checkpoint_chunk: Sequence positions per checkpoint chunk.
 
     Returns:
         (core, losses) â€” trained model and loss history.
     """
+    train_kwargs = dict(locals())
+    ctx = DistContext.current()
+    if nprocs > 1 and not ctx.enabled:
+        losses = launch_data_parallel(nprocs, train_kwargs)
+        if not (Path(output_dir) / "model.pt").exists():
+            return NpDnaCore.from_config(config_name), losses
+        return NpDnaCore.load(output_dir), losses
+
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s [%(name)s] %(levelname)s: %(message)s",
@@ -572,6 +655,7 @@ def train_npdna(
         core = NpDnaCore.from_config(config_name)
 
     _set_mesh_balance_weight(core, balance_weight)
+    core.model.set_activation_checkpointing(activation_checkpointing, checkpoint_chunk)
 
     # Ensure dataset exists
     if not Path(data_path).exists():
@@ -582,8 +666,11 @@ def train_npdna(
     texts = load_dataset(data_path, limit=limit_samples, append_eos=True)
 
     if bpe_merges > 0:
-        memory_status = _memory_rule_status(core, seq_limit, batch_size, min_free_ram_gb)
-        if train_device.type == "cpu" and memory_status["available_ram_gb"] < memory_status["required_free_ram_gb"]:
+        memory_status = _memory_rule_status(
+            core, seq_limit, batch_size, min_free_ram_gb,
+            processes=ctx.world_size, activation_checkpointing=activation_checkpointing,
+        )
+        if ctx.any(train_device.type == "cpu" and memory_status["available_ram_gb"] < memory_status["required_free_ram_gb"]):
             msg = (
                 f"Memory preflight blocked tokenizer training: available "
                 f"{memory_status['available_ram_gb']}GB, requires "
@@ -619,7 +706,7 @@ def train_npdna(
             stop_callback=lambda: (Path(output_dir) / "stop_signal.txt").exists(),
         )
         stop_signal_file = Path(output_dir) / "stop_signal.txt"
-        if stop_signal_file.exists():
+        if ctx.any(stop_signal_file.exists()):
             logger.info("Tokenizer warmup stopped by user signal")
             try:
                 stop_signal_file.unlink(missing_ok=True)
@@ -652,8 +739,11 @@ def train_npdna(
             core.tokenizer.capacity,
         )
 
-    memory_status = _memory_rule_status(core, seq_limit, batch_size, min_free_ram_gb)
-    if train_device.type == "cpu" and memory_status["available_ram_gb"] < memory_status["required_free_ram_gb"]:
+    memory_status = _memory_rule_status(
+        core, seq_limit, batch_size, min_free_ram_gb,
+        processes=ctx.world_size, activation_checkpointing=activation_checkpointing,
+    )
+    if ctx.any(train_device.type == "cpu" and memory_status["available_ram_gb"] < memory_status["required_free_ram_gb"]):
         msg = (
             f"Memory preflight blocked training: available "
             f"{memory_status['available_ram_gb']}GB, requires "
@@ -701,7 +791,15 @@ def train_npdna(
         logger.info("Packed into %d sequences", len(encoded))
         _write_train_status(output_dir, "packed", sequences=len(encoded))
 
-    if not encoded:
+    if ctx.enabled:
+        # Every rank encodes the full stream so tokenizer growth stays
+        # identical; only then is the stream split between ranks.
+        if ctx.any(core.tokenizer.size != ctx.broadcast_object(core.tokenizer.size)):
+            raise RuntimeError(f"Rank {ctx.rank}: tokenizer diverged from rank 0 during encoding")
+        encoded = ctx.shard(encoded)
+        logger.info("Rank %d/%d: training on %d sequences", ctx.rank, ctx.world_size, len(encoded))
+
+    if ctx.any(not encoded):
         logger.error("No valid training samples. Aborting.")
         _write_train_status(output_dir, "error", error="No valid training samples")
         return core, []
@@ -710,6 +808,7 @@ def train_npdna(
     model = core.model
     model.to(train_device)
     model.train()
+    broadcast_parameters(model, ctx)
     def build_optimizer(current_lr: float):
         opt = torch.optim.AdamW(model.parameters(), lr=current_lr, weight_decay=0.01)
         sched = None
@@ -751,6 +850,9 @@ def train_npdna(
 
     step = 0
     tokens_seen = 0
+    accum_ce = accum_balance = accum_tokens = 0.0
+    accum_micro_steps = 0
+    optimizer.zero_grad(set_to_none=True)
     stop_reason: str | None = None
     start_time = time.time()
 
@@ -768,6 +870,7 @@ def train_npdna(
         max_steps=base_step + max_steps,
         run_max_steps=max_steps,
         samples=len(encoded),
+        processes=ctx.world_size,
         device=str(train_device),
         bf16=use_autocast,
         parameter_count=model.parameter_count(),
@@ -775,6 +878,8 @@ def train_npdna(
         balance_weight=balance_weight,
         plasticity_interval=plasticity_check_interval,
         plasticity_overload_threshold=plasticity_overload_threshold,
+        grad_accum_tokens=grad_accum_tokens,
+        activation_checkpointing=activation_checkpointing,
     )
 
     # Training loop
@@ -785,7 +890,22 @@ def train_npdna(
 
             # Check for stop signal file from the dashboard
             stop_signal_file = Path(output_dir) / "stop_signal.txt"
-            if stop_signal_file.exists():
+            _auto_tweak_file = Path(output_dir) / "auto_tweak.json"
+            stop_requested = ctx.is_main and stop_signal_file.exists()
+            tweak_pending = ctx.is_main and _auto_tweak_file.exists()
+            low_memory = False
+            if train_device.type == "cpu":
+                memory_status = _memory_rule_status(
+                    core, seq_limit, batch_size, min_free_ram_gb, activation_checkpointing=activation_checkpointing,
+                )
+                low_memory = memory_status["available_ram_gb"] < memory_status["required_free_ram_gb"]
+            if ctx.enabled:
+                # One small collective keeps every rank on the same step count.
+                stop_requested, tweak_pending, low_memory = (
+                    v > 0 for v in ctx.sum([float(stop_requested), float(tweak_pending), float(low_memory)])
+                )
+
+            if stop_requested:
                 stop_reason = f"Stopped at step {base_step + step}: user stop signal received"
                 logger.info(stop_reason)
                 try:
@@ -794,27 +914,27 @@ def train_npdna(
                     pass
                 break
 
-            if train_device.type == "cpu":
-                memory_status = _memory_rule_status(core, seq_limit, batch_size, min_free_ram_gb)
-                if memory_status["available_ram_gb"] < memory_status["required_free_ram_gb"]:
-                    stop_reason = (
-                        f"Stopped before step {base_step + step + 1}: low RAM headroom "
-                        f"({memory_status['available_ram_gb']}GB available, "
-                        f"{memory_status['required_free_ram_gb']}GB required)."
-                    )
-                    logger.warning(stop_reason)
-                    _write_train_status(
-                        output_dir,
-                        "stopping_low_memory",
-                        step=base_step + step,
-                        run_step=step,
-                        **memory_status,
-                        warning=stop_reason,
-                    )
-                    break
+            if low_memory:
+                stop_reason = (
+                    f"Stopped before step {base_step + step + 1}: low RAM headroom "
+                    f"({memory_status['available_ram_gb']}GB available, "
+                    f"{memory_status['required_free_ram_gb']}GB required)."
+                )
+                logger.warning(stop_reason)
+                _write_train_status(
+                    output_dir,
+                    "stopping_low_memory",
+                    step=base_step + step,
+                    run_step=step,
+                    **memory_status,
+                    warning=stop_reason,
+                )
+                break
 
             input_ids = torch.tensor([ids[:-1]], dtype=torch.long, device=train_device)
             labels = torch.tensor([ids[1:]], dtype=torch.long, device=train_device)
+            n_tokens = max(0, len(ids) - 1)
+            step_ready = False
 
             try:
                 if use_autocast:
@@ -829,12 +949,30 @@ def train_npdna(
                         ce_loss = loss_fn(logits.reshape(-1, logits.shape[-1]), labels.reshape(-1))
                         loss = ce_loss + balance_loss
 
-                optimizer.zero_grad()
-                loss.backward()
-                torch.nn.utils.clip_grad_norm_(model.parameters(), 1.0)
-                optimizer.step()
-                if scheduler is not None:
-                    scheduler.step()
+                # Token-weighted backward: gradients of an accumulated step are
+                # rescaled by the total token count below, so one optimizer
+                # step equals the mean loss over every token it covered.
+                (loss * n_tokens).backward()
+
+                micro = [ce_loss.detach().item() * n_tokens, balance_loss.detach().item() * n_tokens, float(n_tokens)]
+                input_ids = labels = logits = balance_loss = ce_loss = loss = None
+                if ctx.enabled:
+                    micro = ctx.sum(micro)
+                accum_ce += micro[0]
+                accum_balance += micro[1]
+                accum_tokens += micro[2]
+                accum_micro_steps += 1
+
+                # Ranks decide on the reduced token count, so they step together.
+                step_ready = accum_tokens >= grad_accum_tokens
+                if step_ready:
+                    allreduce_gradients(model, ctx, grad_bucket_mb)
+                    _scale_gradients(model, ctx.world_size / max(1.0, accum_tokens))
+                    torch.nn.utils.clip_grad_norm_(model.parameters(), 1.0)
+                    optimizer.step()
+                    if scheduler is not None:
+                        scheduler.step()
+                    optimizer.zero_grad(set_to_none=True)
             except RuntimeError as exc:
                 if not _is_cpu_oom(exc):
                     raise
@@ -842,7 +980,9 @@ def train_npdna(
                 gc.collect()
                 if train_device.type == "cuda":
                     torch.cuda.empty_cache()
-                memory_status = _memory_rule_status(core, seq_limit, batch_size, min_free_ram_gb)
+                memory_status = _memory_rule_status(
+                    core, seq_limit, batch_size, min_free_ram_gb, activation_checkpointing=activation_checkpointing,
+                )
                 stop_reason = (
                     f"Stopped after CPU OOM at attempted step {base_step + step + 1}: {exc}"
                 )
@@ -857,13 +997,20 @@ def train_npdna(
                 )
                 break
 
-            loss_val = ce_loss.detach().item()
-            balance_loss_val = balance_loss.detach().item()
+            if not step_ready:
+                continue
+
+            loss_val = accum_ce / max(1.0, accum_tokens)
+            balance_loss_val = accum_balance / max(1.0, accum_tokens)
+            step_tokens = int(accum_tokens)
+            micro_steps = accum_micro_steps
+            accum_ce = accum_balance = accum_tokens = 0.0
+            accum_micro_steps = 0
             losses.append(loss_val)
             plasticity.record_loss(loss_val)
 
             step += 1
-            tokens_seen += max(0, len(ids) - 1)
+            tokens_seen += step_tokens
             if step == 1 or step % max(1, log_every) == 0:
                 _write_train_status(
                     output_dir,
@@ -876,6 +1023,8 @@ def train_npdna(
                     balance_loss=balance_loss_val,
                     avg_loss=sum(losses[-50:]) / min(len(losses), 50),
                     lr=optimizer.param_groups[0]["lr"],
+                    step_tokens=step_tokens,
+                    micro_steps=micro_steps,
                     vocab=core.tokenizer.size,
                     vocab_capacity=core.tokenizer.capacity,
                     parameter_count=model.parameter_count(),
@@ -902,6 +1051,7 @@ def train_npdna(
                             k: (v.clone() if isinstance(v, torch.Tensor) else v)
                             for k, v in state.items()
                         }
+                sync_usage_counts(model, ctx)
                 events = plasticity.check(base_step + step)
             else:
                 events = []
@@ -909,6 +1059,12 @@ def train_npdna(
             for e in events:
                 logger.info("âš¡ Plasticity [%s]: %s", e.event_type, e.details)
 
+            topology_changed = any(e.event_type in _TOPOLOGY_EVENTS for e in events)
+            if topology_changed and ctx.enabled:
+                # New seeds/router rows are randomly initialised on each rank.
+                check_topology(model, ctx)
+                broadcast_parameters(model, ctx)
+
             # Live metrics append for dashboard (after plasticity to include events)
             metrics_file = Path(output_dir) / "live_metrics.jsonl"
             metrics_file.parent.mkdir(parents=True, exist_ok=True)
@@ -925,31 +1081,41 @@ def train_npdna(
                 if layer_router_entropies else 0.0
             )
             plasticity_events = [{"type": e.event_type, "details": e.details} for e in events] if events else []
-            with open(metrics_file, "a", encoding="utf-8") as f:
-                f.write(json.dumps({
-                    "step": base_step + step,
-                    "run_step": step,
-                    "loss": loss_val,
-                    "balance_loss": balance_loss_val,
-                    "avg_loss": sum(losses[-50:]) / min(len(losses), 50),
-                    "router_entropy": avg_router_entropy,
-                    "layer_balance_loss": layer_balance_losses,
-                    "layer_router_entropy": layer_router_entropies,
-                    "usage": usage,
-                    "total_params": model.parameter_count(),
-                    "active_params": model.active_parameter_count(),
-                    "vocab_size": core.tokenizer.size,
-                    "vocab_capacity": core.tokenizer.capacity,
-                    "lr": optimizer.param_groups[0]["lr"],
-                    "plasticity_events": plasticity_events,
-                }) + "\n")
-                f.flush()
-
-            # Auto-tweak: check for hyperparameter adjustments from monitor
-            _auto_tweak_file = Path(output_dir) / "auto_tweak.json"
-            if _auto_tweak_file.exists():
+            if ctx.is_main:
+                with open(metrics_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({
+                        "step": base_step + step,
+                        "run_step": step,
+                        "loss": loss_val,
+                        "balance_loss": balance_loss_val,
+                        "avg_loss": sum(losses[-50:]) / min(len(losses), 50),
+                        "router_entropy": avg_router_entropy,
+                        "layer_balance_loss": layer_balance_losses,
+                        "layer_router_entropy": layer_router_entropies,
+                        "usage": usage,
+                        "total_params": model.parameter_count(),
+                        "active_params": model.active_parameter_count(),
+                        "vocab_size": core.tokenizer.size,
+                        "vocab_capacity": core.tokenizer.capacity,
+                        "lr": optimizer.param_groups[0]["lr"],
+                        "step_tokens": step_tokens,
+                        "micro_steps": micro_steps,
+                        "plasticity_events": plasticity_events,
+                    }) + "\n")
+                    f.flush()
+
+            # Auto-tweak: check for hyperparameter adjustments from monitor.
+            # Rank 0 reads the file and hands the same tweak to every rank.
+            if tweak_pending:
+                _tweak = None
+                if ctx.is_main:
+                    try:
+                        _tweak = json.loads(_auto_tweak_file.read_text())
+                    except Exception as _ex:
+                        logger.warning("Failed to read auto-tweak: %s", _ex)
+                _tweak = ctx.broadcast_object(_tweak)
+            if tweak_pending and _tweak is not None:
                 try:
-                    _tweak = json.loads(_auto_tweak_file.read_text())
                     _adjusted = []
                     # Update learning rate
                     _new_lr = _tweak.get("lr")
@@ -966,11 +1132,12 @@ def train_npdna(
                         _adjusted.append(f"balance={_new_bw:.3f}")
                     if _adjusted:
                         logger.info("Auto-tweak applied at step %d: %s", base_step + step, ", ".join(_adjusted))
-                    _auto_tweak_file.unlink(missing_ok=True)
+                    if ctx.is_main:
+                        _auto_tweak_file.unlink(missing_ok=True)
                 except Exception as _ex:
                     logger.warning("Failed to apply auto-tweak: %s", _ex)
 
-            if any(e.event_type in {"grow_strands", "plateau_grow_strands"} for e in events):
+            if topology_changed:
                 current_lr = optimizer.param_groups[0]["lr"]
                 new_optimizer, new_scheduler = build_optimizer(current_lr)
                 restore_optimizer_state(new_optimizer, old_named_states, model)
@@ -981,7 +1148,7 @@ def train_npdna(
                         logger.warning("Failed to restore scheduler state: %s", ex)
                 optimizer = new_optimizer
                 scheduler = new_scheduler
-                logger.info("Optimizer rebuilt and state safely recovered after strand growth (lr=%.2e)", current_lr)
+                logger.info("Optimizer rebuilt and state safely recovered after strand topology change (lr=%.2e)", current_lr)
 
             for e in events:
                 if e.event_type == "reinit_strands":
@@ -1029,8 +1196,8 @@ def train_npdna(
                     except Exception as ex:
                         logger.warning("Failed to clear optimizer momentum for reinitialized strands: %s", ex)
 
-            # Checkpoint
-            if checkpoint_every > 0 and step % checkpoint_every == 0:
+            # Checkpoint (rank 0 only; all ranks hold identical weights)
+            if ctx.is_main and checkpoint_every > 0 and step % checkpoint_every == 0:
                 global_step = base_step + step
                 ckpt_path = Path(output_dir) / "checkpoints" / f"step_{global_step:06d}"
                 core.save(
@@ -1049,6 +1216,8 @@ def train_npdna(
                         balance_weight=balance_weight,
                         plasticity_interval=plasticity_check_interval,
                         plasticity_overload_threshold=plasticity_overload_threshold,
+                        grad_accum_tokens=grad_accum_tokens,
+                        activation_checkpointing=activation_checkpointing,
                     ),
                 )
                 
@@ -1087,13 +1256,14 @@ def train_npdna(
                             balance_weight=balance_weight,
                             plasticity_interval=plasticity_check_interval,
                             plasticity_overload_threshold=plasticity_overload_threshold,
+                            grad_accum_tokens=grad_accum_tokens,
+                            activation_checkpointing=activation_checkpointing,
                         ),
                     )
                     logger.info("Checkpoint saved (NEW BEST): %s", ckpt_path)
                 else:
                     logger.info("Checkpoint saved: %s", ckpt_path)
 
-            input_ids = labels = logits = balance_loss = ce_loss = loss = None
             if step % 50 == 0:
                 gc.collect()
                 if train_device.type == "cuda":
@@ -1117,7 +1287,12 @@ def train_npdna(
         elapsed=elapsed,
         final_loss=losses[-1] if losses else None,
         warning=stop_reason,
+        processes=ctx.world_size,
+        tokens_seen=tokens_seen,
+        tok_per_sec=round(tokens_seen / max(elapsed, 1e-9), 1),
     )
+    if not ctx.is_main:
+        return core, losses
 
     # Save the final model as "latest"
     ckpt_dir = Path(output_dir) / "checkpoints"
@@ -1175,6 +1350,8 @@ def train_npdna(
                 balance_weight=balance_weight,
                 plasticity_interval=plasticity_check_interval,
                 plasticity_overload_threshold=plasticity_overload_threshold,
+                grad_accum_tokens=grad_accum_tokens,
+                activation_checkpointing=activation_checkpointing,
             ),
         )
     
@@ -1371,6 +1548,16 @@ def main():
     parser.add_argument("--plasticity-dead-threshold", type=float, default=0.01, help="Strand usage ratio that counts as dead")
     parser.add_argument("--plasticity-grow-cooldown", type=int, default=1, help="Plasticity checks to wait before growing strands again")
     parser.add_argument("--plasticity-reuse-dead", action="store_true", default=True, help="Reuse dead strands before growing new ones (default: enabled)")
+    parser.add_argument("--nprocs", type=int, default=1, help="Local data-parallel worker processes (gloo, CPU); 1 disables")
+    parser.add_argument("--grad-accum-tokens", type=int, default=0, help="Target tokens per optimizer step (gradient accumulation); 0 steps every sequence")
+    parser.add_argument(
+        "--activation-checkpointing",
+        choices=["none", "layer", "chunk", "full"],
+        default="none",
+        help="Recompute activations in backward: per mesh layer, per chunk of positions, or both",
+    )
+    parser.add_argument("--checkpoint-chunk", type=int, default=64, help="Sequence positions per activation checkpoint chunk")
+    parser.add_argument("--grad-bucket-mb", type=float, default=DEFAULT_BUCKET_MB, help="Gradient all-reduce bucket size in MB for --nprocs > 1")
 
     args = parser.parse_args()
     try:
@@ -1398,6 +1585,11 @@ def main():
             plasticity_dead_threshold=args.plasticity_dead_threshold,
             plasticity_grow_cooldown=args.plasticity_grow_cooldown,
             plasticity_reuse_dead=args.plasticity_reuse_dead,
+            nprocs=args.nprocs,
+            grad_bucket_mb=args.grad_bucket_mb,
+            grad_accum_tokens=args.grad_accum_tokens,
+            activation_checkpointing=args.activation_checkpointing,
+            checkpoint_chunk=args.checkpoint_chunk,
     )
     except Exception as exc:
         _write_train_status(args.output, "error", error=str(exc))
@@ -203,3 +203,180 @@ class TestIdentity:
             persona = Persona(os.path.join(tmp, "missing.json"), data_dir=tmp)
             assert persona.name == "MarkdownBot"
             assert "curious" in persona.build_system_prompt()
+
+
+"""Tests for TokenJuice — bucketed usage ledger and budgets."""
+
+import time
+
+
+class TestTokenJuiceLedger:
+    """Tests for UsageLedger-backed tracking, budgets and restarts."""
+
+    def test_budget_windows_and_restart(self):
+        from atulya.tokenjuice import TokenBudget, TokenJuice
+        with tempfile.TemporaryDirectory() as tmp:
+            tj = TokenJuice(tmp, budget=TokenBudget(daily_token_limit=250, per_session_limit=100))
+            tj.track_raw("openai", "gpt-4", 100, 50, session_id="s1")
+            tj.track_raw("anthropic", "claude", 60, 40)
+            tj.ledger.record({"provider": "openai", "model": "gpt-4", "prompt_tokens": 999,
+                              "completion_tokens": 0, "timestamp": time.time() - 2 * 86400})
+            budget = tj.check_budget("s1")
+            assert budget["daily_tokens"] == 250
+            assert budget["session_tokens"] == 150
+            assert set(budget["violations"]) == {"daily_token_limit", "per_session_limit"}
+            tj.close()
+
+            reloaded = TokenJuice(tmp)
+            stats = reloaded.get_stats()
+            assert stats["total_calls"] == 3
+            assert stats["by_provider"] == {"openai": 1149, "anthropic": 100}
+            assert stats["budget"]["daily_tokens"] == 250
+
+    def test_window_edges_survive_pruning(self):
+        from atulya.tokenjuice.ledger import UsageLedger
+        now = 1_700_000_000.0 + 1234.5
+        with tempfile.TemporaryDirectory() as tmp:
+            for seconds in (86400, 2592000, 90 * 86400):
+                ledger = UsageLedger(os.path.join(tmp, str(seconds)))
+                # Two minutes inside the old edge, then a fresh record that triggers pruning.
+                ledger.record({"provider": "p", "model": "m", "prompt_tokens": 7, "timestamp": now - seconds + 120})
+                ledger.record({"provider": "p", "model": "m", "prompt_tokens": 1, "timestamp": now})
+                assert ledger.window(seconds, now)["prompt_tokens"] == 8
+                ledger.close()
+
+    def test_compaction_and_legacy_migration(self):
+        from atulya.tokenjuice import TokenJuice
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy = os.path.join(tmp, "tokenjuice")
+            os.makedirs(legacy)
+            with open(os.path.join(legacy, "usage.json"), "w") as f:
+                json.dump({"usage": [{"provider": "p", "model": "m", "prompt_tokens": 10,
+                                      "completion_tokens": 5, "session_id": "old"}]}, f)
+            tj = TokenJuice(tmp, max_records=4)
+            assert os.path.exists(os.path.join(legacy, "usage.json.migrated"))
+            for _ in range(9):
+                tj.track_raw("p", "m", 1, 1, session_id="new")
+            assert tj.ledger._raw_records == 1
+            assert tj.ledger.session("old")["prompt_tokens"] == 10
+
+            # No close(): the snapshot plus the raw tail still cover everything.
+            reloaded = TokenJuice(tmp, max_records=4)
+            assert reloaded.get_stats()["total_calls"] == 10
+            assert reloaded.check_budget("new")["session_tokens"] == 18
+
+
+"""Tests for observability — spans, sampling, histograms and export."""
+
+import asyncio
+
+from atulya.observability import (
+    LATENCY_BUCKETS, TOOL_CALL, FileSpanExporter, MetricsCollector, Tracer, current_span,
+    get_metrics, set_tracer, timed,
+)
+
+
+class TestTracing:
+    """Tests for contextvar spans, head sampling and latency histograms."""
+
+    def test_spans_follow_async_boundaries(self):
+        tracer = Tracer(sample_rate=1.0)
+
+        async def child(name):
+            await asyncio.sleep(0)
+            with tracer.span(name):
+                return current_span().parent_id
+
+        async def root():
+            with tracer.span("root") as span:
+                parents = await asyncio.gather(child("a"), child("b"))
+                threaded = await asyncio.to_thread(lambda: current_span().span_id)
+                return span, parents, threaded
+
+        span, parents, threaded = asyncio.run(root())
+        assert parents == [span.span_id, span.span_id]
+        assert threaded == span.span_id
+        assert current_span() is None
+        finished = tracer.recent()
+        assert {s.name for s in finished} == {"root", "a", "b"}
+        assert {s.trace_id for s in finished} == {span.trace_id}
+        assert tracer.open_spans == 0
+
+    def test_head_sampling_is_per_trace(self):
+        tracer = Tracer(sample_rate=0.5)
+        for _ in range(200):
+            with tracer.span("root"):
+                with tracer.span("child"):
+                    pass
+        by_trace = {}
+        for s in tracer.recent(1000):
+            by_trace.setdefault(s.trace_id, set()).add(s.name)
+        assert 0 < len(by_trace) < 200
+        assert all(names == {"root", "child"} for names in by_trace.values())
+        with Tracer(sample_rate=0.0).span("off") as off:
+            assert not off.sampled
+
+    def test_lookup_and_end_by_id(self):
+        tracer = Tracer(sample_rate=1.0)
+        span = tracer.start_span("manual")
+        assert tracer.get_span(span.trace_id, span.span_id) is span
+        tracer.end_span(span.trace_id, span.span_id, status="error")
+        assert tracer.get_span(span.trace_id, span.span_id) is None
+        assert span.end_ns and span.status == "error"
+
+    def test_histogram_prometheus_export(self):
+        metrics = MetricsCollector()
+        for value in (0.0004, 0.003, 0.003, 7.0, 100.0):
+            metrics.observe("lat_seconds", value, {"provider": "Groq"})
+        text = metrics.export_prometheus()
+        assert "# TYPE lat_seconds histogram" in text
+        assert 'lat_seconds_bucket{provider="Groq",le="0.0005"} 1' in text
+        assert 'lat_seconds_bucket{provider="Groq",le="0.005"} 3' in text
+        assert 'lat_seconds_bucket{provider="Groq",le="+Inf"} 5' in text
+        assert 'lat_seconds_count{provider="Groq"} 5' in text
+        hist = metrics.histogram("lat_seconds")
+        assert hist.quantile(0.5, {"provider": "Groq"}) == 0.005
+        assert len(hist.snapshot({"provider": "Groq"})["buckets"]) == len(LATENCY_BUCKETS) + 1
+
+    def test_file_exporter_writes_rotating_otlp_json(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "spans.jsonl")
+            exporter = FileSpanExporter(path, max_bytes=2000, backups=2, batch_size=10_000)
+            tracer = Tracer(sample_rate=1.0, exporter=exporter)
+            for i in range(12):
+                with tracer.span("op", index=i, ok=True):
+                    pass
+                tracer.flush()
+            payload = json.loads(open(path).readline())
+            span = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+            assert len(span["traceId"]) == 32 and len(span["spanId"]) == 16
+            assert {"key": "ok", "value": {"boolValue": True}} in span["attributes"]
+            assert os.path.exists(path + ".1") and not os.path.exists(path + ".3")
+            assert exporter.exported == 12
+
+    def test_timed_records_tool_calls_and_overhead(self):
+        from yantra.capabilities import ToolRegistry, ToolResult, Tool
+
+        class Echo(Tool):
+            name = "echo_test"
+
+            async def execute(self, **kwargs):
+                return ToolResult(success=True, output="ok")
+
+        previous = set_tracer(Tracer(sample_rate=1.0))
+        try:
+            registry = ToolRegistry()
+            registry.register(Echo())
+            before = get_metrics().histogram(TOOL_CALL).snapshot({"tool": "echo_test"})["count"]
+            asyncio.run(registry.execute("echo_test"))
+            assert get_metrics().histogram(TOOL_CALL).snapshot({"tool": "echo_test"})["count"] == before + 1
+
+            # Recording cost per span stays in the microseconds.
+            n = 20_000
+            started = time.perf_counter()
+            for _ in range(n):
+                with timed("overhead_test_seconds", "noop", tool="x"):
+                    pass
+            assert (time.perf_counter() - started) / n < 50e-6
+        finally:
+            set_tracer(previous)
@@ -102,12 +102,14 @@ async def test_jwt_encode_decode_latency():
 
 @pytest.mark.asyncio
 async def test_rate_limiter_overhead():
-    from drishti.dashboard.app import _RATE_LIMIT_MAX, _RATE_STORE, _rate_limiter
+    from drishti.dashboard.app import _RATE_LIMITER, _rate_limiter
     from unittest.mock import AsyncMock, Mock
 
-    _RATE_STORE.clear()
+    _RATE_LIMITER.store.clear()
     request = Mock()
     request.client.host = "10.0.0.1"
+    request.headers = {}
+    request.url.path = "/api/health"
 
     n = 100
     times = []
@@ -119,4 +121,22 @@ async def test_rate_limiter_overhead():
     print(f"\n  Rate limiter avg (n={n}): {avg*1000:.3f}ms")
     assert avg < 0.01, f"Rate limiter avg {avg*1000:.3f}ms exceeds 10us"
     assert resp is not None
-    _RATE_STORE.clear()
+    _RATE_LIMITER.store.clear()
+
+
+def test_audit_log_append_throughput(tmp_path):
+    from tantra.core.audit_log import TamperEvidentLog
+
+    n = 1_000_000
+    log = TamperEvidentLog(tmp_path / "audit.log", segment_bytes=32 * 1024 * 1024)
+    t0 = time.perf_counter()
+    for i in range(n):
+        log.append("bench.event", {"i": i})
+    log.flush()
+    elapsed = time.perf_counter() - t0
+    t1 = time.perf_counter()
+    assert log.verify() is True
+    verify_elapsed = time.perf_counter() - t1
+    log.close()
+    print(f"\n  Audit append: {n / elapsed:,.0f} entries/s over {n:,} entries; tail verify {verify_elapsed*1000:.1f}ms")
+    assert len(log) == n
@@ -230,3 +230,51 @@ class TestChatAPIMerge:
         from drishti.dashboard.routes.chat import _merge_history
         h = [{"role": "user", "content": f"m{i}"} for i in range(20)]
         assert len(_merge_history(h, [], limit=5)) == 5
+
+
+class TestChatHistorySQLite:
+    def _get_module(self, tmp_path):
+        mod = TestChatHistoryPersistence()._get_module()
+        mod.HISTORY_FILE = tmp_path / "chat_history.json"
+        return mod
+
+    def test_migrates_legacy_json_once(self, tmp_path):
+        legacy = {"users": {"bob": {"messages": [
+            {"role": "user", "text": "old question", "created_at": "2024-01-01T00:00:00+00:00", "surface": "chat"},
+            {"role": "assistant", "text": "old answer", "created_at": "2024-01-01T00:00:01+00:00",
+             "surface": "chat", "provider": "p"},
+        ]}}}
+        (tmp_path / "chat_history.json").write_text(json.dumps(legacy), encoding="utf-8")
+        mod = self._get_module(tmp_path)
+
+        messages = mod.list_messages({"username": "bob"})
+        assert [m["text"] for m in messages] == ["old question", "old answer"]
+        assert messages[1]["provider"] == "p"
+        assert not (tmp_path / "chat_history.json").exists()
+        assert (tmp_path / "chat_history.json.migrated").exists()
+        assert (tmp_path / "chat_history.db").exists()
+
+    def test_keyset_pagination(self, tmp_path):
+        mod = self._get_module(tmp_path)
+        user = {"username": "pager"}
+        for i in range(5):
+            mod.append_exchange(user, f"q{i}", f"a{i}")
+
+        page = mod.list_messages(user, limit=4)
+        assert [m["text"] for m in page] == ["q3", "a3", "q4", "a4"]
+        older = mod.list_messages(user, limit=4, before=page[0]["id"])
+        assert [m["text"] for m in older] == ["q1", "a1", "q2", "a2"]
+
+    def test_trim_keeps_newest_per_user(self, tmp_path):
+        mod = self._get_module(tmp_path)
+        mod._TRIM_DELAY = 60.0
+        mod._MAX_MESSAGES = 4
+        for i in range(5):
+            mod.append_exchange({"username": "a"}, f"q{i}", f"r{i}")
+        mod.append_exchange({"username": "b"}, "only", "one")
+
+        assert mod.trim_history() == 6
+        conn = mod._store().conn()
+        counts = dict(conn.execute("SELECT user, COUNT(*) FROM messages GROUP BY user").fetchall())
+        assert counts == {"a": 4, "b": 2}
+        assert [m["text"] for m in mod.list_messages({"username": "a"})] == ["q3", "r3", "q4", "r4"]
@@ -118,17 +118,78 @@ async def test_jwt_tampered_token():
 
 @pytest.mark.asyncio
 async def test_rate_limiter_exceeded():
-    from drishti.dashboard.app import _RATE_LIMIT_MAX, _RATE_STORE, _rate_limiter
-    _RATE_STORE.clear()
-    client_ip = "192.168.1.1"
-    now = __import__("time").time()
-    _RATE_STORE[client_ip] = [now - 1 for _ in range(_RATE_LIMIT_MAX)]
+    from drishti.dashboard.app import _RATE_LIMITER, _rate_limiter
+    _RATE_LIMITER.store.clear()
     from unittest.mock import AsyncMock, Mock
     request = Mock()
-    request.client.host = client_ip
+    request.client.host = "192.168.1.1"
+    request.headers = {}
+    request.url.path = "/api/chat"
+    burst = int(_RATE_LIMITER.rule_for("/api/chat").burst)
+    for _ in range(burst):
+        resp = await _rate_limiter(request, AsyncMock(return_value="ok"))
+        assert resp == "ok"
     resp = await _rate_limiter(request, AsyncMock())
     assert resp.status_code == 429
-    _RATE_STORE.clear()
+    assert int(resp.headers["Retry-After"]) >= 1
+    # Other routes draw on their own budget.
+    request.url.path = "/api/health"
+    assert await _rate_limiter(request, AsyncMock(return_value="ok")) == "ok"
+    _RATE_LIMITER.store.clear()
+
+
+def test_chat_rule_covers_generation_routes_only():
+    from drishti.dashboard.rate_limit import RateLimiter
+    limiter = RateLimiter()
+    assert limiter.rule_for("/api/chat").name == "chat"
+    assert limiter.rule_for("/api/chat/stream").name == "chat"
+    assert limiter.rule_for("/api/chat/history").name == "default"
+    assert limiter.rule_for("/v1/chat/completions").name == "chat"
+    for path in ("/api/voice/chat", "/api/voice/chat/stream", "/api/voice/tts", "/api/voice/stt"):
+        assert limiter.rule_for(path).name == "voice"
+    assert limiter.rule_for("/api/voice/voices").name == "default"
+    assert limiter.rule_for("/api/voice/chat/stream/stats").name == "default"
+
+
+def test_token_bucket_refills_and_bounds_keys():
+    from drishti.dashboard.rate_limit import MemoryBucketStore
+    store = MemoryBucketStore(max_keys=4, shards=1)
+    assert store.take("a", rate=1.0, burst=2, now=0.0) == (True, 0.0)
+    assert store.take("a", rate=1.0, burst=2, now=0.0)[0]
+    allowed, retry = store.take("a", rate=1.0, burst=2, now=0.0)
+    assert not allowed and retry == pytest.approx(1.0)
+    assert store.take("a", rate=1.0, burst=2, now=1.0)[0]
+    for i in range(10):
+        store.take(f"k{i}", rate=1.0, burst=1, now=2.0)
+    assert len(store) == 4
+
+
+def test_sqlite_bucket_store_shared_between_instances(tmp_path):
+    from drishti.dashboard.rate_limit import RateLimiter, RateRule, SQLiteBucketStore
+    rules = (RateRule("default", "/", rate=0.001, burst=3),)
+    worker_a = RateLimiter(rules, SQLiteBucketStore(tmp_path / "rl.db"))
+    worker_b = RateLimiter(rules, SQLiteBucketStore(tmp_path / "rl.db"))
+    results = [w.check("/x", "ip:1", now=100.0)[0] for w in (worker_a, worker_b, worker_a, worker_b)]
+    assert results == [True, True, True, False]
+
+
+@pytest.mark.asyncio
+async def test_sqlite_bucket_store_is_taken_off_the_event_loop(tmp_path):
+    import threading
+    from drishti.dashboard.rate_limit import RateLimiter, RateRule, SQLiteBucketStore
+    store = SQLiteBucketStore(tmp_path / "rl.db")
+    limiter = RateLimiter((RateRule("default", "/", rate=0.001, burst=1),), store)
+    threads = []
+    take = store.take
+
+    def recording_take(*args, **kwargs):
+        threads.append(threading.get_ident())
+        return take(*args, **kwargs)
+
+    store.take = recording_take
+    assert (await limiter.acheck("/x", "ip:1"))[0]
+    assert not (await limiter.acheck("/x", "ip:1"))[0]
+    assert threads and threading.get_ident() not in threads
 
 
 @pytest.mark.asyncio
@@ -128,6 +128,71 @@ def test_llm_bridge_executes_parallel_safe_tools():
     asyncio.run(run())
 
 
+def test_llm_bridge_packs_history_into_context_budget():
+    from atulya.llm import AtulyaLLM
+
+    class RecordingRouter(FakeRouter):
+        prompts = []
+
+        async def chat(self, prompt, system_prompt="", **kwargs):
+            self.prompts.append(prompt)
+            return await super().chat(prompt, system_prompt, **kwargs)
+
+    async def run():
+        llm = AtulyaLLM(context_tokens=10_000, reply_tokens=0)
+        llm.router = RecordingRouter()
+        history = [{"role": "user", "content": f"turn {i} " + "word " * 400} for i in range(30)]
+        llm.context_tokens = llm._fallback_counter.count(llm._build_system_prompt(history)) + 2500
+        response = await llm.ask("latest question", history=history, tools_enabled=False)
+        sent = llm.router.prompts[-1]
+        assert sent.endswith("User: latest question")
+        assert "turn 29 " in sent and "turn 0 " not in sent
+        assert 0 < response.context["efficiency"] <= 1.0
+        assert response.context["dropped"] > 0
+        assert response.context["tokenizer"] == "estimate"
+
+    asyncio.run(run())
+
+
+def test_llm_bridge_packs_for_the_answering_provider():
+    from atulya.intelligence import IntelligenceProvider, ProviderRouter
+    from atulya.llm import AtulyaLLM
+    from tantra.core.latency_routing import LatencyPolicy
+    from tantra.core.packing import TokenCounter
+
+    class Stub(IntelligenceProvider):
+        def __init__(self, label, window, available, counter=None):
+            self.label, self.context_tokens, self.available, self.counter = label, window, available, counter
+            self.prompts = []
+
+        def name(self):
+            return self.label
+
+        def is_available(self):
+            return self.available
+
+        def token_counter(self):
+            return self.counter
+
+        async def chat(self, prompt, system_prompt=""):
+            self.prompts.append(prompt)
+            return "ok"
+
+    local = Stub("local", 4096, False, TokenCounter(lambda text: text.split(), name="local-vocab"))
+    remote = Stub("remote", 128_000, True)
+    llm = AtulyaLLM(reply_tokens=512)
+    llm.context_tokens = None
+    llm.router = ProviderRouter([local, remote], policy=LatencyPolicy(hedging=False))
+    history = [{"role": "user", "content": f"turn {i} " + "word " * 400} for i in range(30)]
+
+    response = asyncio.run(llm.ask("latest question", history=history, tools_enabled=False))
+
+    assert response.provider == "remote" and not local.prompts
+    assert "turn 0 " in remote.prompts[-1]
+    assert response.context["tokenizer"] == "estimate"
+    assert response.context["dropped"] == 0 and response.context["budget"] > 100_000
+
+
 def test_telegram_allowlist_blocks_unknown_user():
     from yantra.channels import ChannelMessage, TelegramChannel
 
@@ -338,6 +338,53 @@ def test_dataset_index_exposes_trainable_files_only(tmp_path, monkeypatch):
     assert set(helpers._dataset_index()) == {"alpha.jsonl", "identity.json"}
 
 
+def test_dataset_rows_are_cached_against_size_and_mtime(tmp_path, monkeypatch):
+    from drishti.dashboard import helpers
+
+    datasets_dir = tmp_path / "datasets"
+    datasets_dir.mkdir()
+    data = datasets_dir / "alpha.jsonl"
+    data.write_text('{"a": 1}\n{"a": 2}\n', encoding="utf-8")
+    monkeypatch.setattr(helpers, "DATASETS_DIR", datasets_dir)
+
+    misses = helpers._RECORDS.misses
+    assert helpers._dataset_registry()[0]["rows"] == 2
+    assert helpers._dataset_registry()[0]["rows"] == 2
+    assert helpers._RECORDS.misses == misses + 1
+
+    with data.open("a", encoding="utf-8") as handle:
+        handle.write('{"a": 3}\n')
+    assert helpers._dataset_registry()[0]["rows"] == 3
+
+    (datasets_dir / "beta.jsonl").write_text('{"b": 1}\n', encoding="utf-8")
+    assert set(helpers._dataset_index()) == {"alpha.jsonl", "beta.jsonl"}
+
+
+def test_checkpoint_index_rescans_only_on_change(tmp_path, monkeypatch):
+    import json
+    from drishti.dashboard import helpers
+
+    output = tmp_path / "npdna"
+    (output / "versions" / "v1").mkdir(parents=True)
+    (output / "versions" / "v1" / "metadata.json").write_text(json.dumps({"train_step": 10}), encoding="utf-8")
+    monkeypatch.setattr(helpers, "MODEL_OUTPUT_DIRS", (output,))
+
+    builds = helpers._CHECKPOINTS.builds
+    assert helpers._checkpoint_index()["latest"].name == "v1"
+    helpers._checkpoint_index()
+    assert helpers._CHECKPOINTS.builds == builds + 1
+
+    (output / "versions" / "v2").mkdir()
+    assert "v2" not in helpers._checkpoint_index()
+    (output / "versions" / "v2" / "metadata.json").write_text(json.dumps({"train_step": 20}), encoding="utf-8")
+    assert helpers._checkpoint_index()["latest"].name == "v2"
+
+    # In-place rewrite inside a version dir is picked up after explicit invalidation.
+    (output / "versions" / "v1" / "metadata.json").write_text(json.dumps({"train_step": 99}), encoding="utf-8")
+    helpers._invalidate_registries()
+    assert helpers._checkpoint_index()["latest"].name == "v1"
+
+
 def test_training_start_all_datasets_materializes_jsonl_bundle(tmp_path, monkeypatch):
     from drishti.dashboard.routes import train
 
@@ -638,3 +685,205 @@ def test_telegram_webhook_routes_message():
         assert sent == ["reply:hi"]
 
     asyncio.run(run())
+
+
+def test_automation_runner_runs_due_jobs_concurrently_with_timeout(tmp_path):
+    from drishti.dashboard.automation_runner import AutomationRunner
+
+    class SlowLLM:
+        def __init__(self):
+            self.active = 0
+            self.peak = 0
+
+        async def ask(self, command, tools_enabled=True):
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            try:
+                await asyncio.sleep(5 if command == "hang" else 0.05)
+            finally:
+                self.active -= 1
+
+            class Response:
+                text = command
+                provider = "fake"
+            return Response()
+
+    async def run():
+        jobs_file = tmp_path / "jobs.json"
+        jobs_file.write_text(json.dumps([
+            {"id": "a", "schedule": "60", "command": "one", "next_run": 1},
+            {"id": "b", "schedule": "60", "command": "two", "next_run": 1},
+            {"id": "c", "schedule": "60", "command": "hang", "next_run": 1, "timeout": 0.1},
+        ]))
+        llm = SlowLLM()
+        runner = AutomationRunner(jobs_file, llm, max_concurrency=3)
+        t0 = time.time()
+        await runner.tick()
+        assert time.time() - t0 < 1.0
+        assert llm.peak >= 2
+        jobs = {j["id"]: j for j in json.loads(jobs_file.read_text())}
+        assert jobs["a"]["last_result"] == "one" and jobs["a"]["last_status"] == "ok"
+        assert jobs["c"]["last_status"] == "timeout"
+        assert all(j["next_run"] > time.time() for j in jobs.values())
+        assert runner.metrics["c"]["timeouts"] == 1
+        assert runner.metrics["a"]["last_duration"] > 0
+
+    import time
+    asyncio.run(run())
+
+
+def test_automation_runner_misfire_skip_and_file_reload(tmp_path):
+    from drishti.dashboard.automation_runner import AutomationRunner
+
+    class FakeLLM:
+        calls = []
+
+        async def ask(self, command, tools_enabled=True):
+            self.calls.append(command)
+
+            class Response:
+                text = "ok"
+                provider = "fake"
+            return Response()
+
+    async def run():
+        import time
+        jobs_file = tmp_path / "jobs.json"
+        stale = time.time() - 3600
+        jobs_file.write_text(json.dumps([
+            {"id": "late", "schedule": "60", "command": "late", "next_run": stale, "misfire": "skip"},
+            {"id": "catchup", "schedule": "60", "command": "catchup", "next_run": stale},
+        ]))
+        llm = FakeLLM()
+        runner = AutomationRunner(jobs_file, llm)
+        await runner.tick()
+        assert llm.calls == ["catchup"]
+        jobs = {j["id"]: j for j in json.loads(jobs_file.read_text())}
+        assert jobs["late"]["last_status"] == "skipped"
+        assert jobs["catchup"]["run_count"] == 1
+
+        # An edit made behind the runner's back is picked up and kept.
+        jobs["late"]["next_run"] = 1
+        jobs["late"]["misfire"] = "coalesce"
+        jobs["late"]["name"] = "edited"
+        jobs_file.write_text(json.dumps(list(jobs.values())))
+        await runner.tick()
+        assert llm.calls == ["catchup", "late"]
+        saved = {j["id"]: j for j in json.loads(jobs_file.read_text())}
+        assert saved["late"]["name"] == "edited"
+        assert saved["catchup"]["run_count"] == 1
+
+    asyncio.run(run())
+
+
+def test_provider_router_routes_by_latency_and_hedges():
+    import time
+    from atulya.intelligence import IntelligenceProvider, ProviderRouter
+    from tantra.core.latency_routing import LatencyPolicy
+
+    class Stub(IntelligenceProvider):
+        def __init__(self, label, delay, available=True):
+            self.label, self.delay, self.available = label, delay, available
+
+        def name(self):
+            return self.label
+
+        def is_available(self):
+            return self.available
+
+        async def chat(self, prompt, system_prompt=""):
+            time.sleep(self.delay)  # real providers block on urllib too
+            return f"{self.label}:{prompt}"
+
+    slow, fast, offline = Stub("slow", 0.3), Stub("fast", 0.01), Stub("offline", 0, available=False)
+    router = ProviderRouter([offline, slow, fast], policy=LatencyPolicy(min_samples=2, hedge_floor_ms=20))
+
+    async def run():
+        # Unobserved providers keep their static order; the first call goes to "slow".
+        assert await router.chat("a") == ("slow:a", "slow")
+        router.policy.record("fast", 10)
+        assert await router.chat("b") == ("fast:b", "fast")
+        # "fast" degrades past its p95: the hedge to "slow" answers first.
+        fast.delay = 1.5
+        start = time.perf_counter()
+        text, name = await router.chat("c")
+        return text, name, time.perf_counter() - start
+
+    text, name, elapsed = asyncio.run(run())
+    assert (text, name) == ("slow:c", "slow")
+    assert elapsed < 1.2
+    assert router.policy.snapshot()["hedges_won"] == 1
+
+
+def test_provider_router_hedges_only_within_tier():
+    import time
+    from atulya.intelligence import IntelligenceProvider, ProviderRouter
+    from tantra.core.latency_routing import LatencyPolicy
+
+    class Stub(IntelligenceProvider):
+        def __init__(self, label, delay, tier):
+            self.label, self.delay, self.routing_tier = label, delay, tier
+
+        def name(self):
+            return self.label
+
+        def is_available(self):
+            return True
+
+        async def chat(self, prompt, system_prompt=""):
+            time.sleep(self.delay)
+            return self.label
+
+    free, paid = Stub("free", 0.01, 0), Stub("paid", 0.0, 3)
+    router = ProviderRouter([free, paid], policy=LatencyPolicy(min_samples=2, hedge_floor_ms=20))
+    for _ in range(2):
+        router.policy.record("free", 10)
+    free.delay = 0.2
+    assert asyncio.run(router.chat("hi")) == ("free", "free")
+    assert router.policy.snapshot()["hedges_fired"] == 0
+
+
+def test_local_gguf_provider_serializes_generation():
+    import threading
+    import time
+    from atulya.local_provider import LocalGGUFProvider
+
+    class FakeLlama:
+        def __init__(self):
+            self.active = self.peak = 0
+            self.guard = threading.Lock()
+
+        def create_chat_completion(self, **kwargs):
+            with self.guard:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            time.sleep(0.05)
+            with self.guard:
+                self.active -= 1
+            return {"choices": [{"message": {"content": "ok"}}]}
+
+    provider = LocalGGUFProvider(model_path="missing.gguf")
+    provider._llm = FakeLlama()
+
+    async def run():
+        # Router-style calls on worker threads plus one on the event loop.
+        threaded = [asyncio.to_thread(lambda: asyncio.run(provider.chat("hi"))) for _ in range(3)]
+        return await asyncio.gather(*threaded, provider.chat("hi"))
+
+    assert asyncio.run(run()) == ["ok"] * 4
+    assert provider._llm.peak == 1
+
+
+def test_provider_router_reports_unavailable_chain():
+    from atulya.intelligence import IntelligenceProvider, ProviderRouter
+
+    class Down(IntelligenceProvider):
+        def name(self):
+            return "down"
+
+        def is_available(self):
+            return False
+
+    text, name = asyncio.run(ProviderRouter([Down()]).chat("hi"))
+    assert name == "Diagnostics Fallback"
+    assert "down (Unavailable)" in text
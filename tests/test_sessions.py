@@ -23,10 +23,9 @@ def test_sessions_survive_restart(users_module):
     users_module.create_user("alice", "pw123", role="user", display_name="Alice")
     token = users_module.create_session("alice")
     assert users_module.get_session(token) is not None
-    # The session must have been persisted to the sessions file.
-    assert users_module.SESSIONS_FILE.exists()
-    stored = json.loads(users_module.SESSIONS_FILE.read_text())
-    assert token in stored
+    # The session must have been persisted (snapshot + append log).
+    users_module.flush_sessions()
+    assert token in users_module._read_sessions()
 
     # Simulate a server restart: drop the in-memory store, then rehydrate from
     # the persisted file (the same path the import-time bootstrap reads).
@@ -54,15 +53,17 @@ def test_kill_user_sessions_clears_all(users_module):
     users_module.kill_user_sessions("carol")
     assert users_module.get_session(t1) is None
     assert users_module.get_session(t2) is None
-    # Sessions file should no longer contain either token.
-    data = json.loads(users_module.SESSIONS_FILE.read_text())
+    # The persisted store should no longer contain either token.
+    users_module.flush_sessions()
+    data = users_module._read_sessions()
     assert t1 not in data and t2 not in data
 
 
 def test_kill_session_persists(users_module):
     users_module.create_user("dave", "pw", role="user", display_name="Dave")
     token = users_module.create_session("dave")
-    # Wipe memory to prove the session lives in the file, then rehydrate.
+    # Wipe memory to prove the session lives on disk, then rehydrate.
+    users_module.flush_sessions()
     users_module._sessions.clear()
     with users_module._lock:
         users_module._sessions.update(users_module._read_sessions())
@@ -70,5 +71,39 @@ def test_kill_session_persists(users_module):
     users_module.kill_session(token)
     assert users_module.get_session(token) is None
     # After kill, the on-disk store should not contain the token.
-    data = json.loads(users_module.SESSIONS_FILE.read_text())
+    users_module.flush_sessions()
+    data = users_module._read_sessions()
     assert token not in data
+
+
+def test_compaction_rewrites_snapshot(users_module):
+    users_module.create_user("erin", "pw", role="user", display_name="Erin")
+    keep = users_module.create_session("erin")
+    gone = users_module.create_session("erin")
+    users_module.kill_session(gone)
+    users_module._save_sessions()
+    assert not users_module._sessions_log().exists()
+    snapshot = json.loads(users_module.SESSIONS_FILE.read_text())
+    assert keep in snapshot and gone not in snapshot
+
+
+def test_sweeper_drops_expired_from_expiry_index(users_module):
+    import time as _time
+    users_module.create_user("finn", "pw", role="user", display_name="Finn")
+    token = users_module.create_session("finn")
+    users_module._sessions[token]["expires_at"] = _time.time() - 1
+    users_module._index_session(token, users_module._sessions[token])
+    assert users_module._prune_expired_sessions() == 1
+    assert token not in users_module._sessions
+
+
+def test_user_lookups_are_cached(users_module, monkeypatch):
+    users_module.create_user("gina", "pw", role="admin", display_name="Gina")
+    assert users_module.user_exists("gina")
+    reads = []
+    original = type(users_module.USERS_FILE).read_text
+    monkeypatch.setattr(type(users_module.USERS_FILE), "read_text",
+                        lambda self, *a, **k: reads.append(self) or original(self, *a, **k))
+    assert users_module.user_exists("gina")
+    users_module.create_session("gina")
+    assert reads == []
@@ -241,6 +241,43 @@ class TestVoiceChatRoutes:
         assert "voices" in r
         assert len(r["voices"]) >= 4
 
+    def test_stream_pipelines_sentences_with_fallback_tts(self, tmp_path):
+        import asyncio
+        from types import SimpleNamespace
+
+        from atulya.llm import LLMEvent
+        from drishti.dashboard.routes import voice
+        from yantra.capabilities.voice_pipeline import TextToSpeech
+
+        class FakeLLM:
+            async def stream(self, prompt, history=None, tools_enabled=True, provider=""):
+                for piece in ["The first sentence is here. ", "And the second ", "one follows it!"]:
+                    yield LLMEvent("token", content=piece)
+                yield LLMEvent("done", metadata={"provider": "fake"})
+
+        request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(llm=FakeLLM())))
+
+        async def run():
+            response = await voice.api_voice_chat_stream(request, {"prompt": "hi"}, token="t")
+            return [json.loads(chunk[len("data: "):]) async for chunk in response.body_iterator]
+
+        with patch.object(voice, "_require_auth", return_value={"username": "u"}), \
+                patch.object(voice.chat_history, "list_messages", return_value=[]), \
+                patch.object(voice.chat_history, "append_exchange") as append, \
+                patch.object(voice.voice_pipeline, "tts", TextToSpeech(tmp_path)):
+            events = asyncio.run(run())
+            stats = voice.api_voice_stream_stats(token="t")
+
+        audio = [e["audio"] for e in events if "audio" in e]
+        assert [a["text"] for a in audio] == ["The first sentence is here.", "And the second one follows it!"]
+        assert all(a["provider"] == "fallback" for a in audio)
+        done = events[-1]
+        assert done["done"] is True
+        assert done["response_text"] == "The first sentence is here. And the second one follows it!"
+        assert done["metrics"]["first_token"] <= done["metrics"]["first_audio"] <= done["metrics"]["total"]
+        append.assert_called_once()
+        assert stats["streams"] >= 1 and "first_audio" in stats
+
 
 class TestWakeWord:
     def _strip(self, text):
@@ -31,7 +31,7 @@ class TestUploadRoute:
         mock_file = MagicMock(spec=UploadFile)
         mock_file.filename = "test.txt"
         mock_file.content_type = "text/plain"
-        mock_file.read = AsyncMock(return_value=b"hello world")
+        mock_file.read = AsyncMock(side_effect=[b"hello world", b""])
 
         result = await api_upload(file=mock_file, token="token")
         assert result["ok"] is True
@@ -103,3 +103,67 @@ class TestUploadRoute:
         from fastapi import HTTPException
         with pytest.raises(HTTPException, match="not found"):
             await api_delete_file(file_id="nonexistent.txt", token="token")
+
+    @pytest.mark.asyncio
+    async def test_upload_too_large_aborts_early(self, tmp_path, mock_auth):
+        from fastapi import HTTPException
+        import drishti.dashboard.routes.upload as upload_mod
+        upload_mod.UPLOAD_DIR = tmp_path
+
+        chunks = [b"x" * 8] * 100
+        mock_file = MagicMock(spec=UploadFile)
+        mock_file.filename = "big.txt"
+        mock_file.content_type = "text/plain"
+        mock_file.size = None
+        mock_file.read = AsyncMock(side_effect=chunks)
+
+        with patch.object(upload_mod, "_MAX_SIZE", 20):
+            with pytest.raises(HTTPException) as exc:
+                await upload_mod.api_upload(file=mock_file, token="token")
+        assert exc.value.status_code == 413
+        assert mock_file.read.await_count == 3
+        assert not list((tmp_path / "testuser").iterdir())
+        assert not [p for p in (tmp_path / ".blobs").rglob("*") if p.is_file()]
+
+    @pytest.mark.asyncio
+    async def test_identical_uploads_share_one_blob(self, tmp_path, mock_auth):
+        import drishti.dashboard.routes.upload as upload_mod
+        upload_mod.UPLOAD_DIR = tmp_path
+
+        results = []
+        for _ in range(2):
+            mock_file = MagicMock(spec=UploadFile)
+            mock_file.filename = "same.txt"
+            mock_file.content_type = "text/plain"
+            mock_file.read = AsyncMock(side_effect=[b"same bytes", b""])
+            results.append(await upload_mod.api_upload(file=mock_file, token="token"))
+
+        assert results[0]["sha256"] == results[1]["sha256"]
+        assert [r["deduped"] for r in results] == [False, True]
+        first = tmp_path / "testuser" / results[0]["file_id"]
+        second = tmp_path / "testuser" / results[1]["file_id"]
+        assert first.read_bytes() == second.read_bytes() == b"same bytes"
+        assert first.stat().st_ino == second.stat().st_ino
+
+        await upload_mod.api_delete_file(file_id=results[0]["file_id"], token="token")
+        await upload_mod.api_delete_file(file_id=results[1]["file_id"], token="token")
+        assert not [p for p in (tmp_path / ".blobs").rglob("*") if p.is_file()]
+
+    @pytest.mark.asyncio
+    async def test_blobs_are_not_shared_across_users(self, tmp_path, mock_auth):
+        import drishti.dashboard.routes.upload as upload_mod
+        upload_mod.UPLOAD_DIR = tmp_path
+
+        results = []
+        for username in ("alice", "bob"):
+            mock_auth.return_value = {"username": username, "role": "user"}
+            mock_file = MagicMock(spec=UploadFile)
+            mock_file.filename = "same.txt"
+            mock_file.content_type = "text/plain"
+            mock_file.read = AsyncMock(side_effect=[b"same bytes", b""])
+            results.append(await upload_mod.api_upload(file=mock_file, token="token"))
+
+        assert [r["deduped"] for r in results] == [False, False]
+        alice = tmp_path / "alice" / results[0]["file_id"]
+        bob = tmp_path / "bob" / results[1]["file_id"]
+        assert alice.stat().st_ino != bob.stat().st_ino
@@ -42,9 +42,9 @@ class TestWebSocket:
     @pytest.fixture
     def clean_state(self):
         import drishti.dashboard.routes.ws as ws_mod
-        ws_mod._active_connections.clear()
-        ws_mod._broadcast_history.clear()
+        ws_mod.hub.clear()
         yield
+        ws_mod.hub.clear()
 
     @pytest.mark.asyncio
     async def test_websocket_rejects_unauthenticated(self, anon_ws, clean_state):
@@ -105,7 +105,7 @@ class TestWebSocket:
         await websocket_endpoint(authed_ws)
 
         authed_ws.accept.assert_awaited_once()
-        authed_ws.send_json.assert_any_await({"type": "pong"})
+        authed_ws.send_text.assert_any_await(json.dumps({"type": "pong"}))
 
     @pytest.mark.asyncio
     async def test_websocket_sends_history_on_connect(self, authed_ws, clean_state):
@@ -117,16 +117,125 @@ class TestWebSocket:
 
         await websocket_endpoint(authed_ws)
 
-        assert authed_ws.send_json.await_count >= 1
+        sent = [json.loads(c.args[0]) for c in authed_ws.send_text.await_args_list]
+        assert [m["type"] for m in sent] == ["welcome", "past"]
 
     @pytest.mark.asyncio
     async def test_disconnect_removes_connection(self, authed_ws, clean_state):
         from drishti.dashboard.routes.ws import websocket_endpoint
         import drishti.dashboard.routes.ws as ws_mod
 
-        authed_ws.receive_text.side_effect = [WebSocketDisconnect()]
-        ws_mod._active_connections.add(authed_ws)
+        seen = []
+
+        async def _receive():
+            seen.append(authed_ws in ws_mod.hub.subscribers)
+            raise WebSocketDisconnect()
+
+        authed_ws.receive_text.side_effect = _receive
+
+        await websocket_endpoint(authed_ws)
+
+        assert seen == [True]
+        assert authed_ws not in ws_mod.hub.subscribers
+
+    @pytest.mark.asyncio
+    async def test_non_admin_cannot_subscribe_to_training(self, authed_ws, clean_state, monkeypatch):
+        import asyncio
+        from drishti.dashboard.routes.ws import websocket_endpoint
+        import drishti.dashboard.routes.ws as ws_mod
+        monkeypatch.setattr(ws_mod, "_require_auth", lambda token: {"username": "bob", "role": "user"})
+        authed_ws.query_params = {"token": "valid-token", "topics": "training,*"}
+
+        frames = [json.dumps({"type": "subscribe", "topics": ["training"]})]
+
+        async def _receive():
+            if frames:
+                return frames.pop()
+            ws_mod.hub.publish("training_metrics", {"metrics": [{"loss": 1.0}]})
+            ws_mod.hub.publish("event", {"title": "x"})
+            await asyncio.sleep(0.01)
+            raise WebSocketDisconnect()
+
+        authed_ws.receive_text.side_effect = _receive
 
         await websocket_endpoint(authed_ws)
 
-        assert authed_ws not in ws_mod._active_connections
+        sent = [json.loads(c.args[0]) for c in authed_ws.send_text.await_args_list]
+        assert "training" not in sent[0]["topics"] and "*" not in sent[0]["topics"]
+        assert "training_metrics" not in [m["type"] for m in sent]
+        assert "event" in [m["type"] for m in sent]
+
+
+class TestBroadcastHub:
+    @staticmethod
+    def _socket(delay: float = 0.0):
+        import asyncio
+        ws = MagicMock()
+        ws.received = []
+
+        async def send_text(text):
+            if delay:
+                await asyncio.sleep(delay)
+            ws.received.append(json.loads(text))
+
+        ws.send_text = send_text
+        ws.close = AsyncMock()
+        return ws
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_does_not_stall_others(self):
+        import asyncio
+        from drishti.dashboard.broadcast import BroadcastHub
+        hub = BroadcastHub(queue_size=3)
+        fast, slow = self._socket(), self._socket(delay=10)
+        hub.register(fast, {"events"})
+        hub.register(slow, {"events"})
+        for i in range(10):
+            hub.publish("event", {"i": i})
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        assert [m["data"]["i"] for m in fast.received] == list(range(10))
+        slow_stats = next(c for c in hub.stats()["connections"] if c["sent"] == 0)
+        assert slow_stats["dropped"] > 0 and slow_stats["queued"] == 3
+        assert slow_stats["lag_seconds"] >= 0
+        hub.clear()
+
+    @pytest.mark.asyncio
+    async def test_stats_can_omit_usernames(self):
+        from drishti.dashboard.broadcast import BroadcastHub
+        hub = BroadcastHub()
+        hub.register(self._socket(), {"events"}, user="alice")
+        assert hub.stats()["connections"][0]["user"] == "alice"
+        anonymous = hub.stats(include_users=False)["connections"][0]
+        assert "user" not in anonymous and anonymous["topics"] == ["events"]
+        hub.clear()
+
+    @pytest.mark.asyncio
+    async def test_disconnect_policy_closes_slow_consumer(self):
+        import asyncio
+        from drishti.dashboard.broadcast import DISCONNECT, BroadcastHub
+        hub = BroadcastHub(queue_size=2, policy=DISCONNECT)
+        slow = self._socket(delay=10)
+        hub.register(slow, {"events"})
+        for i in range(5):
+            hub.publish("event", {"i": i})
+        await asyncio.sleep(0)
+        assert slow not in hub.subscribers
+        slow.close.assert_awaited_once_with(code=1013)
+        hub.clear()
+
+    @pytest.mark.asyncio
+    async def test_topics_filter_delivery_and_replay(self):
+        import asyncio
+        from drishti.dashboard.broadcast import BroadcastHub
+        hub = BroadcastHub()
+        events_only, trainer = self._socket(), self._socket()
+        hub.register(events_only)
+        sub = hub.register(trainer, {"training"}, admin=True)
+        hub.publish("training_status", {"step": 1})
+        hub.publish("event", {"title": "x"})
+        await asyncio.sleep(0)
+        assert [m["type"] for m in events_only.received] == ["event"]
+        assert [m["type"] for m in trainer.received] == ["training_status"]
+        assert [json.loads(t)["type"] for t in hub.replay(sub)] == ["training_status"]
+        hub.clear()
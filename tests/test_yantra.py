@@ -692,6 +692,48 @@ class TestTextToSpeech:
             assert stats["total_cost"] == 0.0
 
 
+    def test_sentence_chunker_cuts_at_boundaries(self):
+        from yantra.capabilities.voice_pipeline import SentenceChunker
+        chunker = SentenceChunker(min_chars=10, max_chars=40)
+        out = []
+        for piece in ["Hi. This is a sentence", ". Another one! And", " a tail"]:
+            out += chunker.feed(piece)
+        assert out == ["Hi. This is a sentence.", "Another one!"]
+        assert chunker.flush() == "And a tail"
+        long = chunker.feed("word " * 20)
+        assert long and all(len(s) <= 40 for s in long)
+
+    def test_synthesize_sentences_overlaps_and_keeps_order(self):
+        import asyncio
+        from yantra.capabilities.voice_pipeline import TextToSpeech, TTSResult
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tts = TextToSpeech(output_dir=tmp)
+            active = []
+            peak = []
+
+            async def fake_synthesize(text, voice="en_male", speed=1.0):
+                active.append(text)
+                peak.append(len(active))
+                await asyncio.sleep(0.05 if text.startswith("Slow") else 0.0)
+                active.remove(text)
+                return TTSResult(id=text, provider="fake")
+
+            async def tokens():
+                for piece in ["Slow sentence comes first. ", "Fast sentence comes next. ", "Tail"]:
+                    yield piece
+                    await asyncio.sleep(0)
+
+            async def run():
+                return [(s, r.id) async for s, r in tts.synthesize_sentences(tokens())]
+
+            tts.synthesize = fake_synthesize
+            results = asyncio.run(run())
+            assert [s for s, _ in results] == ["Slow sentence comes first.", "Fast sentence comes next.", "Tail"]
+            assert all(s == rid for s, rid in results)
+            assert max(peak) >= 2
+
+
 class TestSpeechToText:
     """Tests for SpeechToText (no actual network calls)."""
 
@@ -12,6 +12,8 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
+from atulya.observability import TOOL_CALL, timed
+
 
 @dataclass
 class ToolResult:
@@ -44,10 +46,14 @@ class ToolRegistry:
         tool = self._tools.get(name)
         if not tool:
             return ToolResult(success=False, error=f"Tool not found: {name}")
-        try:
-            return await tool.execute(**kwargs)
-        except Exception as e:
-            return ToolResult(success=False, error=str(e))
+        with timed(TOOL_CALL, "tool.call", tool=name) as span:
+            try:
+                result = await tool.execute(**kwargs)
+            except Exception as e:
+                result = ToolResult(success=False, error=str(e))
+            if not result.success:
+                span.fail(result.error)
+            return result
 
     def list_tools(self) -> list[dict[str, str]]:
         return [{"name": t.name, "description": t.description} for t in self._tools.values()]
@@ -66,6 +66,44 @@ class STTResult:
     metadata: dict[str, Any] = field(default_factory=dict)
 
 
+class SentenceChunker:
+    """Cut a token stream into speakable sentences.
+
+    A sentence ends at ``.``, ``!``, ``?``, ``।`` or ``॥`` followed by
+    whitespace, or at a newline. Fragments shorter than ``min_chars`` are held
+    back and joined to the next sentence; runs longer than ``max_chars`` are
+    cut at the last comma or space so TTS never waits on a huge clause.
+    """
+
+    _BOUNDARY = re.compile(r"(?<=[.!?।॥])\s+|\n+")
+
+    def __init__(self, min_chars: int = 20, max_chars: int = 240):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, piece: str) -> list[str]:
+        self._buffer += piece
+        out: list[str] = []
+        start = 0
+        for match in self._BOUNDARY.finditer(self._buffer):
+            candidate = self._buffer[start:match.start()].strip()
+            if len(candidate) >= self.min_chars:
+                out.append(candidate)
+                start = match.end()
+        self._buffer = self._buffer[start:]
+        while len(self._buffer) > self.max_chars:
+            cut = max(self._buffer.rfind(",", 0, self.max_chars), self._buffer.rfind(" ", 0, self.max_chars))
+            cut = cut + 1 if cut > 0 else self.max_chars
+            out.append(self._buffer[:cut].strip())
+            self._buffer = self._buffer[cut:]
+        return [s for s in out if s]
+
+    def flush(self) -> str:
+        tail, self._buffer = self._buffer.strip(), ""
+        return tail
+
+
 class TextToSpeech:
     """TTS with edge-tts plus an optional offline Piper fallback."""
 
@@ -140,6 +178,68 @@ class TextToSpeech:
 
         return await asyncio.gather(*(run(text) for text in texts))
 
+    async def synthesize_sentences(
+        self,
+        tokens: AsyncIterator[str],
+        voice: str = "en_male",
+        speed: float = 1.0,
+        concurrency: int = 3,
+    ) -> AsyncIterator[tuple[str, TTSResult]]:
+        """Synthesize a token stream sentence by sentence, in order.
+
+        Each sentence is submitted as soon as the chunker closes it, so TTS of
+        sentence N overlaps generation of sentence N+1. Results are yielded in
+        sentence order as they finish; a failed sentence yields a result with
+        ``provider="error"`` instead of aborting the stream.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        pending: asyncio.Queue = asyncio.Queue()
+
+        async def run(text: str) -> TTSResult:
+            async with semaphore:
+                try:
+                    return await self.synthesize(text, voice=voice, speed=speed)
+                except Exception as exc:
+                    logger.warning("Sentence synthesis failed: %s", exc)
+                    return TTSResult(
+                        hashlib.sha256(text.encode()).hexdigest()[:16],
+                        provider="error",
+                        metadata={"error": str(exc)},
+                    )
+
+        async def produce() -> None:
+            chunker = SentenceChunker()
+            try:
+                async for piece in tokens:
+                    for sentence in chunker.feed(piece):
+                        await pending.put((sentence, asyncio.create_task(run(sentence))))
+                tail = chunker.flush()
+                if tail:
+                    await pending.put((tail, asyncio.create_task(run(tail))))
+            finally:
+                await pending.put(None)
+
+        producer = asyncio.create_task(produce())
+        inflight: list[asyncio.Task] = []
+        try:
+            while True:
+                item = await pending.get()
+                if item is None:
+                    break
+                sentence, task = item
+                inflight.append(task)
+                yield sentence, await task
+                inflight.remove(task)
+            await producer  # surface token-stream errors
+        finally:
+            producer.cancel()
+            while not pending.empty():
+                item = pending.get_nowait()
+                if item is not None:
+                    inflight.append(item[1])
+            for task in inflight:
+                task.cancel()
+
     async def _piper_or_manifest(self, text: str, voice: str, format: AudioFormat) -> TTSResult:
         result_id = hashlib.sha256(text.encode()).hexdigest()[:16]
         model = os.environ.get("PIPER_MODEL", "")